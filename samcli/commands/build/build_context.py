@@ -77,7 +77,9 @@ class BuildContext(object):
         return self
 
     def __exit__(self, *args):
-        pass
+        if self._container_manager:
+            # Remove the containers the manager still holds, and wait until they are gone
+            self._container_manager.shutdown()
 
     @staticmethod
     def _setup_build_dir(build_dir, clean):
@@ -5,14 +5,20 @@ Reads CLI arguments and performs necessary preparation to be able to run the fun
 import errno
 import json
 import os
+from enum import Enum
 
 import samcli.lib.utils.osutils as osutils
 from samcli.lib.utils.stream_writer import StreamWriter
+from samcli.lib.utils.timings import TimingsFileWriter
 from samcli.commands.local.lib.local_lambda import LocalLambdaRunner
 from samcli.commands.local.lib.debug_context import DebugContext
+from samcli.cli.global_config import GlobalConfig
+from samcli.local.lambdafn.code_cache import CodeArchiveCache
 from samcli.local.lambdafn.runtime import LambdaRuntime
-from samcli.local.docker.lambda_image import LambdaImage
+from samcli.local.docker.lambda_image import LambdaImage, Runtime
+from samcli.local.docker.image_cache import LambdaImageCache, INDEX_FILE_NAME as IMAGE_INDEX_FILE_NAME
 from samcli.local.docker.manager import ContainerManager
+from samcli.local.docker.standby_pool import StandbyContainerPool
 from samcli.commands._utils.template import get_template_data
 from samcli.local.layers.layer_downloader import LayerDownloader
 from .user_exceptions import InvokeContextException, DebugContextException
@@ -27,6 +33,18 @@ except ImportError:
     from pathlib2 import Path
 
 
+class ContainersInitializationMode(Enum):
+    """
+    Ways to keep containers warm between invokes
+    """
+
+    # A container is started for a function the first time it is invoked, and reused by later invokes
+    LAZY = "LAZY"
+
+    # A container is started for every function before the first invoke, and reused by all invokes
+    EAGER = "EAGER"
+
+
 class InvokeContext(object):
     """
     Sets up a context to invoke Lambda functions locally by parsing all command line arguments necessary for the
@@ -43,6 +61,9 @@ class InvokeContext(object):
     This class sets up some resources that need to be cleaned up after the context object is used.
     """
 
+    # Directory in the SAM CLI app dir that keeps decompressed code archives between runs
+    _CODE_CACHE_DIR_NAME = "code-pkg"
+
     def __init__(
         self,  # pylint: disable=R0914
         template_file,
@@ -60,6 +81,11 @@ class InvokeContext(object):
         force_image_build=None,
         aws_region=None,
         aws_profile=None,
+        warm_container_initialization_mode=None,
+        standby_containers=False,
+        timings_file=None,
+        mount_layers=False,
+        prefetch_images=False,
     ):
         """
         Initialize the context
@@ -97,6 +123,20 @@ class InvokeContext(object):
             Whether or not to force build the image
         aws_region str
             AWS region to use
+        warm_container_initialization_mode str
+            Optional. One of ContainersInitializationMode values. If set, containers are kept running between
+            invokes and reused
+        standby_containers bool
+            Optional. If True and containers are neither kept warm nor debugged, a few containers per function are
+            created ahead of the invokes that run them. Meant for commands that serve many invokes.
+        timings_file str
+            Optional. Path to a file to append the timings of every invoke to, as JSON lines. If the file does not
+            exist, it will be created
+        mount_layers bool
+            Optional. If True, layers are mounted into the containers instead of built into their images
+        prefetch_images bool
+            Optional. If True, the images of every function in the template are pulled in parallel when the context
+            is entered, instead of by the first invoke of each function. Meant for commands that serve many invokes.
         """
         self._template_file = template_file
         self._function_identifier = function_identifier
@@ -113,6 +153,11 @@ class InvokeContext(object):
         self._force_image_build = force_image_build
         self._aws_region = aws_region
         self._aws_profile = aws_profile
+        self._warm_container_initialization_mode = warm_container_initialization_mode
+        self._standby_containers = standby_containers
+        self._timings_file = timings_file
+        self._mount_layers = mount_layers
+        self._prefetch_images = prefetch_images
 
         self._template_dict = None
         self._function_provider = None
@@ -121,6 +166,9 @@ class InvokeContext(object):
         self._debug_context = None
         self._layers_downloader = None
         self._container_manager = None
+        self._timings_writer = None
+        self._code_cache = None
+        self._image_cache = None
 
     def __enter__(self):
         """
@@ -135,14 +183,36 @@ class InvokeContext(object):
 
         self._env_vars_value = self._get_env_vars_value(self._env_vars_file)
         self._log_file_handle = self._setup_log_file(self._log_file)
+        self._timings_writer = self._setup_timings_writer(self._timings_file)
+
+        self._code_cache = CodeArchiveCache(str(GlobalConfig().config_dir.joinpath(self._CODE_CACHE_DIR_NAME)))
 
         self._debug_context = self._get_debug_context(self._debug_port, self._debug_args, self._debugger_path)
 
-        self._container_manager = self._get_container_manager(self._docker_network, self._skip_pull_image)
+        # Warm containers already skip container creation. When debugging, the debugger port can only be published
+        # by one container at a time.
+        standby_pool_size = 0
+        if self._standby_containers and not self._warm_container_initialization_mode and not self._is_debugging:
+            standby_pool_size = StandbyContainerPool.DEFAULT_SIZE
+
+        self._container_manager = self._get_container_manager(
+            self._docker_network, self._skip_pull_image, standby_pool_size
+        )
 
         if not self._container_manager.is_docker_reachable:
             raise InvokeContextException("Running AWS SAM projects locally requires Docker. Have you got it installed?")
 
+        self._image_cache = LambdaImageCache(
+            str(GlobalConfig().config_dir.joinpath(IMAGE_INDEX_FILE_NAME)),
+            docker_client=self._container_manager.docker_client,
+        )
+
+        if self._prefetch_images:
+            self._container_manager.pull_images(self._get_function_images(self._function_provider))
+
+        if self._warm_container_initialization_mode == ContainersInitializationMode.EAGER.value:
+            self.local_lambda_runner.prewarm_all()
+
         return self
 
     def __exit__(self, *args):
@@ -154,6 +224,14 @@ class InvokeContext(object):
             self._log_file_handle.close()
             self._log_file_handle = None
 
+        if self._container_manager:
+            # Do not leave warm containers running after SAM CLI exits
+            self._container_manager.shutdown()
+
+        if self._timings_writer:
+            self._timings_writer.close()
+            self._timings_writer = None
+
     @property
     def function_name(self):
         """
@@ -192,9 +270,21 @@ class InvokeContext(object):
         """
 
         layer_downloader = LayerDownloader(self._layer_cache_basedir, self.get_cwd())
-        image_builder = LambdaImage(layer_downloader, self._skip_pull_image, self._force_image_build)
+        image_builder = LambdaImage(
+            layer_downloader,
+            self._skip_pull_image,
+            self._force_image_build,
+            mount_layers=self._mount_layers,
+            image_cache=self._image_cache,
+        )
 
-        lambda_runtime = LambdaRuntime(self._container_manager, image_builder)
+        lambda_runtime = LambdaRuntime(
+            self._container_manager,
+            image_builder,
+            warm_containers=bool(self._warm_container_initialization_mode),
+            timings_writer=self._timings_writer,
+            code_cache=self._code_cache,
+        )
         return LocalLambdaRunner(
             local_runtime=lambda_runtime,
             function_provider=self._function_provider,
@@ -231,6 +321,13 @@ class InvokeContext(object):
         stream = self._log_file_handle if self._log_file_handle else osutils.stderr()
         return StreamWriter(stream, self._is_debugging)
 
+    @property
+    def is_recording_timings(self):
+        """
+        :return bool: True, if the timings of every invoke are recorded
+        """
+        return bool(self._timings_file)
+
     @property
     def template(self):
         """
@@ -268,6 +365,22 @@ class InvokeContext(object):
     def _is_debugging(self):
         return bool(self._debug_context)
 
+    @staticmethod
+    def _get_function_images(function_provider):
+        """
+        Returns the base images of every function with a supported runtime. Images of functions with layers are built
+        from these.
+
+        :param samcli.commands.local.lib.sam_function_provider.SamFunctionProvider function_provider: Provider of the
+            functions in the template
+        :return set: Names of the images
+        """
+        return {
+            LambdaImage.get_base_image(function.runtime)
+            for function in function_provider.get_all()
+            if Runtime.has_value(function.runtime)
+        }
+
     @staticmethod
     def _get_template_data(template_file):
         """
@@ -320,6 +433,19 @@ class InvokeContext(object):
 
         return open(log_file, "wb")
 
+    @staticmethod
+    def _setup_timings_writer(timings_file):
+        """
+        Open the file to write the timings of invokes to, if necessary. This will create a file if it does not exist
+
+        :param string timings_file: Path to the file the timings should be appended to
+        :return samcli.lib.utils.timings.TimingsFileWriter: Writer of the timings, if necessary. None otherwise
+        """
+        if not timings_file:
+            return None
+
+        return TimingsFileWriter(timings_file)
+
     @staticmethod
     def _get_debug_context(debug_port, debug_args, debugger_path):
         """
@@ -361,7 +487,7 @@ class InvokeContext(object):
         return DebugContext(debug_port=debug_port, debug_args=debug_args, debugger_path=debugger_path)
 
     @staticmethod
-    def _get_container_manager(docker_network, skip_pull_image):
+    def _get_container_manager(docker_network, skip_pull_image, standby_pool_size=0):
         """
         Creates a ContainerManager with specified options
 
@@ -371,6 +497,8 @@ class InvokeContext(object):
             Docker network identifier
         skip_pull_image bool
             Should the manager skip pulling the image
+        standby_pool_size int
+            Optional. Number of containers per function to create ahead of invokes
 
         Returns
         -------
@@ -378,4 +506,6 @@ class InvokeContext(object):
             Object representing Docker container manager
         """
 
-        return ContainerManager(docker_network_id=docker_network, skip_pull_image=skip_pull_image)
+        return ContainerManager(
+            docker_network_id=docker_network, skip_pull_image=skip_pull_image, standby_pool_size=standby_pool_size
+        )
@@ -4,6 +4,7 @@ Common CLI options for invoke command
 
 import click
 from samcli.commands._utils.options import template_click_option, docker_click_options, parameter_override_click_option
+from samcli.commands.local.cli_common.invoke_context import ContainersInitializationMode
 
 try:
     from pathlib import Path
@@ -127,7 +128,22 @@ def invoke_common_options(f):
                 help="Specify whether CLI should rebuild the image used for invoking functions with layers.",
                 envvar="SAM_FORCE_IMAGE_BUILD",
                 default=False,
-            )
+            ),
+            click.option(
+                "--timings-file",
+                type=click.Path(dir_okay=False, writable=True),
+                help="Optional. Appends how long each phase of every invoke took, like pulling the image, creating "
+                "and starting the container and running the function, to this file as one JSON record per line. "
+                "start-api also returns the record of an invoke in the X-SAM-CLI-Timings response header.",
+            ),
+            click.option(
+                "--mount-layers",
+                is_flag=True,
+                help="Specify whether CLI should mount the layers of functions into /opt of their containers, instead "
+                "of building an image with them. The layer cache must be on the machine that runs Docker.",
+                envvar="SAM_MOUNT_LAYERS",
+                default=False,
+            ),
         ]
     )
 
@@ -136,3 +152,39 @@ def invoke_common_options(f):
         option(f)
 
     return f
+
+
+def warm_containers_common_options(f):
+    """
+    Warm containers related CLI options shared by "local start-api" and "local start-lambda" commands
+
+    :param f: Callback passed by Click
+    """
+
+    warm_containers_options = [
+        click.option(
+            "--warm-containers",
+            help="Optional. Keeps the container of a function running after an invoke and reuses it for later "
+            "invokes of the same function, instead of starting a new container for every invoke. "
+            "LAZY: A container is started the first time each function is invoked. "
+            "EAGER: A container is started for every function when the command starts, before the first invoke. "
+            "Containers are stopped after being idle for a few minutes. Function code is loaded once per container, "
+            "so changes to the code are only picked up by new containers.",
+            type=click.Choice([mode.value for mode in ContainersInitializationMode]),
+            envvar="SAM_WARM_CONTAINERS",
+        ),
+        click.option(
+            "--standby-containers",
+            is_flag=True,
+            help="Optional. Creates a few containers per function ahead of the invokes that run them, so an invoke "
+            "only has to start a container. Ignored with --warm-containers, and when debugging.",
+            envvar="SAM_STANDBY_CONTAINERS",
+            default=False,
+        ),
+    ]
+
+    # Reverse the list to maintain ordering of options in help text printed with --help
+    for option in reversed(warm_containers_options):
+        option(f)
+
+    return f
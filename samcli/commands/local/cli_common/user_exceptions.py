@@ -61,6 +61,14 @@ class ResourceNotFound(UserException):
     pass
 
 
+class CorruptedLayerDownload(UserException):
+    """
+    The content of a downloaded Layer does not match the checksum reported by AWS Lambda
+    """
+
+    pass
+
+
 class InvalidLayerVersionArn(UserException):
     """
     The LayerVersion Arn given in the template is Invalid
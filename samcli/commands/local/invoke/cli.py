@@ -67,6 +67,8 @@ def cli(
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    timings_file,
+    mount_layers,
 ):
 
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
@@ -88,6 +90,8 @@ def cli(
         skip_pull_image,
         force_image_build,
         parameter_overrides,
+        timings_file,
+        mount_layers,
     )  # pragma: no cover
 
 
@@ -108,6 +112,8 @@ def do_cli(  # pylint: disable=R0914
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    timings_file,
+    mount_layers,
 ):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
@@ -141,6 +147,8 @@ def do_cli(  # pylint: disable=R0914
             parameter_overrides=parameter_overrides,
             layer_cache_basedir=layer_cache_basedir,
             force_image_build=force_image_build,
+            timings_file=timings_file,
+            mount_layers=mount_layers,
             aws_region=ctx.region,
             aws_profile=ctx.profile,
         ) as context:
@@ -39,6 +39,7 @@ class LocalApiService(object):
         )
         self.lambda_runner = lambda_invoke_context.local_lambda_runner
         self.stderr_stream = lambda_invoke_context.stderr
+        self.timings_header = lambda_invoke_context.is_recording_timings
 
     def start(self):
         """
@@ -65,6 +66,7 @@ class LocalApiService(object):
             port=self.port,
             host=self.host,
             stderr=self.stderr_stream,
+            timings_header=self.timings_header,
         )
 
         service.create()
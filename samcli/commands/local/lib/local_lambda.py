@@ -4,6 +4,8 @@ Implementation of Local Lambda runner
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 
 from samcli.lib.utils.codeuri import resolve_code_path
@@ -23,6 +25,9 @@ class LocalLambdaRunner(object):
 
     MAX_DEBUG_TIMEOUT = 36000  # 10 hours in seconds
 
+    # Number of functions whose containers are started at the same time by ``prewarm_all``
+    MAX_PREWARM_WORKERS = 4
+
     def __init__(
         self,
         local_runtime,
@@ -96,6 +101,36 @@ class LocalLambdaRunner(object):
         # Invoke the function
         self.local_runtime.invoke(config, event, debug_context=self.debug_context, stdout=stdout, stderr=stderr)
 
+    def prewarm_all(self):
+        """
+        Starts one warm container for every function in the template, so that even the first invoke of a function
+        finds a running container. Images are pulled or built, and layers are downloaded, as part of this.
+
+        Functions are pre-warmed in parallel. This blocks until every container is up. A function that fails to
+        pre-warm is skipped. Its first invoke starts a container as usual.
+        """
+        if self.is_debugging():
+            # Every invoke starts a new container when debugging
+            return
+
+        functions = list(self.provider.get_all())
+        if not functions:
+            return
+
+        LOG.info("Starting warm containers for %d function(s)", len(functions))
+
+        executor = ThreadPoolExecutor(max_workers=min(self.MAX_PREWARM_WORKERS, len(functions)))
+        futures = {executor.submit(self._prewarm, function): function for function in functions}
+        executor.shutdown(wait=True)
+
+        for future, function in futures.items():
+            if future.exception():
+                LOG.warning("Failed to start a warm container for function '%s': %s", function.name, future.exception())
+
+    def _prewarm(self, function):
+        LOG.debug("Starting a warm container for function '%s'", function.name)
+        self.local_runtime.prewarm(self._get_invoke_config(function))
+
     def is_debugging(self):
         """
         Are we debugging the invoke?
@@ -0,0 +1,82 @@
+"""
+CLI command for "local prune-images" command
+"""
+
+import logging
+
+import click
+import docker
+import requests
+
+from samcli.cli.global_config import GlobalConfig
+from samcli.cli.main import pass_context, common_options as cli_framework_options
+from samcli.commands.local.cli_common.user_exceptions import UserException
+from samcli.lib.telemetry.metrics import track_command
+from samcli.local.docker.client import get_docker_client
+from samcli.local.docker.image_cache import LambdaImageCache, INDEX_FILE_NAME
+
+LOG = logging.getLogger(__name__)
+
+HELP_TEXT = """
+Removes the Docker images that SAM CLI built for functions with layers, and that were not used recently.\n
+Images that were not used for more than the maximum age are removed first. Then the least recently used images are
+removed until the remaining ones fit the maximum size. Images that are used by a container are kept. SAM CLI also does
+this in the background, at most once an hour, after it built new images. The defaults can be changed with the
+SAM_CLI_IMAGE_CACHE_MAX_SIZE_MB and SAM_CLI_IMAGE_CACHE_MAX_AGE_DAYS environment variables.\n
+\b
+Remove every image that SAM CLI built:
+$ sam local prune-images --max-size 0
+"""
+
+
+@click.command(
+    "prune-images",
+    help=HELP_TEXT,
+    short_help="Removes the Docker images built by SAM CLI that were not used recently.",
+)
+@click.option(
+    "--max-size",
+    type=click.IntRange(min=0),
+    help="Total size of the images to keep, in megabytes. Defaults to 10240.",
+)
+@click.option(
+    "--max-age",
+    type=click.IntRange(min=0),
+    help="Number of days after which an image that was not used is removed. Defaults to 30.",
+)
+@click.option("--dry-run", is_flag=True, help="List the images that would be removed, without removing them.")
+@cli_framework_options
+@pass_context
+@track_command
+def cli(ctx, max_size, max_age, dry_run):
+    # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
+
+    do_cli(max_size, max_age, dry_run)  # pragma: no cover
+
+
+def do_cli(max_size, max_age, dry_run):
+    """
+    Implementation of the ``cli`` method, just separated out for unit testing purposes
+    """
+
+    LOG.debug("local prune-images command is called")
+
+    docker_client = get_docker_client()
+    try:
+        docker_client.ping()
+    except (docker.errors.APIError, requests.exceptions.ConnectionError):
+        raise UserException("Running AWS SAM projects locally requires Docker. Have you got it installed?")
+
+    image_cache = LambdaImageCache(
+        str(GlobalConfig().config_dir.joinpath(INDEX_FILE_NAME)),
+        docker_client=docker_client,
+        max_size=max_size * 1024 * 1024 if max_size is not None else None,
+        max_age=max_age * 24 * 60 * 60 if max_age is not None else None,
+    )
+
+    removed = image_cache.collect(dry_run=dry_run)
+
+    for image in removed:
+        click.echo("{}{}".format("Would remove " if dry_run else "Removed ", image))
+    if not removed:
+        click.echo("No images to remove")
@@ -6,7 +6,11 @@ import logging
 import click
 
 from samcli.cli.main import pass_context, common_options as cli_framework_options, aws_creds_options
-from samcli.commands.local.cli_common.options import invoke_common_options, service_common_options
+from samcli.commands.local.cli_common.options import (
+    invoke_common_options,
+    service_common_options,
+    warm_containers_common_options,
+)
 from samcli.commands.local.cli_common.invoke_context import InvokeContext
 from samcli.commands.local.lib.exceptions import NoApisDefined, InvalidLayerReference
 from samcli.commands.exceptions import UserException
@@ -46,6 +50,7 @@ and point SAM to the directory or file containing build artifacts.
     help="Any static assets (e.g. CSS/Javascript/HTML) files located in this directory " "will be presented at /",
 )
 @invoke_common_options
+@warm_containers_common_options
 @cli_framework_options
 @aws_creds_options  # pylint: disable=R0914
 @pass_context
@@ -69,6 +74,10 @@ def cli(
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    warm_containers,
+    standby_containers,
+    timings_file,
+    mount_layers,
 ):
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
 
@@ -89,6 +98,10 @@ def cli(
         skip_pull_image,
         force_image_build,
         parameter_overrides,
+        warm_containers,
+        standby_containers,
+        timings_file,
+        mount_layers,
     )  # pragma: no cover
 
 
@@ -109,6 +122,10 @@ def do_cli(  # pylint: disable=R0914
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    warm_containers,
+    standby_containers,
+    timings_file,
+    mount_layers,
 ):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
@@ -134,8 +151,13 @@ def do_cli(  # pylint: disable=R0914
             parameter_overrides=parameter_overrides,
             layer_cache_basedir=layer_cache_basedir,
             force_image_build=force_image_build,
+            timings_file=timings_file,
+            mount_layers=mount_layers,
             aws_region=ctx.region,
             aws_profile=ctx.profile,
+            warm_container_initialization_mode=warm_containers,
+            standby_containers=standby_containers,
+            prefetch_images=True,
         ) as invoke_context:
 
             service = LocalApiService(lambda_invoke_context=invoke_context, port=port, host=host, static_dir=static_dir)
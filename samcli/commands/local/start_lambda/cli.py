@@ -6,7 +6,11 @@ import logging
 import click
 
 from samcli.cli.main import pass_context, common_options as cli_framework_options, aws_creds_options
-from samcli.commands.local.cli_common.options import invoke_common_options, service_common_options
+from samcli.commands.local.cli_common.options import (
+    invoke_common_options,
+    service_common_options,
+    warm_containers_common_options,
+)
 from samcli.commands.local.cli_common.invoke_context import InvokeContext
 from samcli.commands.local.cli_common.user_exceptions import UserException
 from samcli.commands.local.lib.exceptions import InvalidLayerReference
@@ -58,6 +62,7 @@ Here is a Python example:
 )
 @service_common_options(3001)
 @invoke_common_options
+@warm_containers_common_options
 @cli_framework_options
 @aws_creds_options
 @pass_context
@@ -80,6 +85,10 @@ def cli(
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    warm_containers,
+    standby_containers,
+    timings_file,
+    mount_layers,
 ):  # pylint: disable=R0914
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
 
@@ -99,6 +108,10 @@ def cli(
         skip_pull_image,
         force_image_build,
         parameter_overrides,
+        warm_containers,
+        standby_containers,
+        timings_file,
+        mount_layers,
     )  # pragma: no cover
 
 
@@ -118,6 +131,10 @@ def do_cli(  # pylint: disable=R0914
     skip_pull_image,
     force_image_build,
     parameter_overrides,
+    warm_containers,
+    standby_containers,
+    timings_file,
+    mount_layers,
 ):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
@@ -143,8 +160,13 @@ def do_cli(  # pylint: disable=R0914
             parameter_overrides=parameter_overrides,
             layer_cache_basedir=layer_cache_basedir,
             force_image_build=force_image_build,
+            timings_file=timings_file,
+            mount_layers=mount_layers,
             aws_region=ctx.region,
             aws_profile=ctx.profile,
+            warm_container_initialization_mode=warm_containers,
+            standby_containers=standby_containers,
+            prefetch_images=True,
         ) as invoke_context:
 
             service = LocalLambdaService(lambda_invoke_context=invoke_context, port=port, host=host)
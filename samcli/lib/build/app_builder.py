@@ -100,7 +100,14 @@ class ApplicationBuilder(object):
 
         result = {}
 
-        for lambda_function in self._functions_to_build:
+        functions = list(self._functions_to_build)
+
+        if self._container_manager and self._container_manager.is_docker_reachable:
+            # Pull the build images of all functions in parallel, instead of one by one as each function is built
+            build_images = [LambdaBuildContainer.get_image(lambda_function.runtime) for lambda_function in functions]
+            self._container_manager.pull_images(build_images)
+
+        for lambda_function in functions:
 
             LOG.info("Building resource '%s'", lambda_function.name)
             result[lambda_function.name] = self._build_function(lambda_function.name,
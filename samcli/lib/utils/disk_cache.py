@@ -0,0 +1,160 @@
+"""
+Helpers shared by the caches that SAM CLI keeps on disk
+"""
+
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+from samcli.lib.utils.file_lock import FileLock
+
+LOG = logging.getLogger(__name__)
+
+LOCK_FILE_SUFFIX = ".lock"
+
+
+def get_env_int(name, default):
+    """
+    Reads a number that is not negative from an environment variable
+
+    Parameters
+    ----------
+    name str
+        Name of the environment variable
+    default int
+        Value to use if the variable is not set, or is not a number
+
+    Returns
+    -------
+    int
+        Value of the variable
+    """
+    value = os.environ.get(name)
+    if value:
+        try:
+            return max(0, int(value))
+        except ValueError:
+            LOG.warning("Ignoring %s=%s. It must be a number", name, value)
+
+    return default
+
+
+def get_max_size(name, default_mb):
+    """
+    Reads the maximum size of a cache, in megabytes, from an environment variable
+
+    Parameters
+    ----------
+    name str
+        Name of the environment variable
+    default_mb int
+        Size in megabytes to use if the variable is not set, or is not a number
+
+    Returns
+    -------
+    int
+        Size in bytes
+    """
+    return get_env_int(name, default_mb) * 1024 * 1024
+
+
+def get_dir_size(path):
+    """
+    Parameters
+    ----------
+    path str
+        Path to a directory
+
+    Returns
+    -------
+    int
+        Total size of the files in the directory and its subdirectories, in bytes. Symlinks are not followed.
+    """
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+
+    return size
+
+
+def read_json_file(path):
+    """
+    Reads a JSON file, that may not exist yet
+
+    Parameters
+    ----------
+    path str
+        Path to the file
+
+    Returns
+    -------
+    object
+        Content of the file. None, if the file does not exist or is corrupted
+    """
+    try:
+        with open(path, "r") as fp:
+            return json.load(fp)
+    except (IOError, OSError):
+        return None
+    except ValueError:
+        LOG.debug("Ignoring the corrupted file %s", path, exc_info=True)
+        return None
+
+
+@contextmanager
+def update_json_file(path, read):
+    """
+    Yields the content of a JSON file that is shared by processes, and writes it back when the context exits. The
+    file is only written while holding a file lock next to it, and is replaced atomically, so it can be read without
+    the lock.
+
+    Parameters
+    ----------
+    path str
+        Path to the file. Its directory must exist.
+    read callable
+        Called without arguments while holding the lock. Returns the content to yield.
+
+    Yields
+    ------
+    object
+        Content returned by ``read``, to modify in place
+    """
+    with FileLock(path + LOCK_FILE_SUFFIX):
+        content = read()
+        yield content
+
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path), dir=os.path.dirname(path) or None)
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(content, fp, indent=2, sort_keys=True)
+            replace_file(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def replace_file(src, dst):
+    """
+    Renames a file, replacing the destination if it exists
+
+    Parameters
+    ----------
+    src str
+        Path to the file to rename
+    dst str
+        Path to rename it to
+    """
+    if hasattr(os, "replace"):
+        os.replace(src, dst)  # pylint: disable=no-member
+        return
+
+    # Python 2 on Windows cannot rename onto an existing file
+    if os.name == "nt" and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
@@ -0,0 +1,82 @@
+"""
+Lock that is shared by processes through a file
+"""
+
+import errno
+import logging
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows
+    fcntl = None
+    import msvcrt  # pylint: disable=import-error
+
+LOG = logging.getLogger(__name__)
+
+
+class FileLock(object):
+    """
+    Exclusive lock on a file. It blocks other processes, and other threads that open the same file, until it is
+    released. The file is created if it does not exist, and is left in place after the lock is released, because
+    deleting it could let another process lock a new file with the same name while the old one is locked.
+
+    Use it as a context manager:
+
+        with FileLock("/path/to/resource.lock"):
+            ...
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path str
+            Path to the lock file
+        """
+        self._path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self._path, "a+")
+        try:
+            _lock(self._file)
+        except BaseException:
+            self._file.close()
+            self._file = None
+            raise
+
+        return self
+
+    def __exit__(self, *args):
+        try:
+            _unlock(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _lock(lock_file):
+    if fcntl:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        return
+
+    lock_file.seek(0)
+    while True:
+        try:
+            # Blocks for about 10 seconds before it fails
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except (IOError, OSError) as ex:
+            if ex.errno != errno.EDEADLOCK:
+                raise
+            LOG.debug("Waiting for the lock on %s", lock_file.name)
+
+
+def _unlock(lock_file):
+    if fcntl:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        return
+
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,127 @@
+"""
+Fingerprints the content of files and directory trees
+"""
+
+import hashlib
+import logging
+import os
+import stat
+import threading
+
+LOG = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class DirectoryFingerprinter(object):
+    """
+    Computes a SHA256 fingerprint of the content of a directory tree: the relative paths, permissions and contents of
+    its files, the targets of its symlinks and its empty directories. Modification times are not part of it, so a
+    tree whose files were touched, or checked out again, keeps its fingerprint.
+
+    Reading every file is expensive, so fingerprints are cached. If no file in a tree changed its size or
+    modification time since the tree was last fingerprinted, the cached fingerprint is returned after walking the
+    tree, without reading any file. Otherwise, only the files that changed are read again. This class is thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Path of the tree => (signature of the stats of its entries, fingerprint)
+        self._trees = {}
+        # Path of the file => (size, modification time, SHA256 digest of its content). A file that changed replaces
+        # its entry, so the cache does not grow with every edit.
+        self._files = {}
+
+    def fingerprint(self, path):
+        """
+        Parameters
+        ----------
+        path str
+            Path to a directory or file
+
+        Returns
+        -------
+        str
+            Fingerprint of the content at the path. None, if nothing exists at the path
+        """
+        if not os.path.lexists(path):
+            return None
+
+        entries = _stat_tree(path)
+        signature = hashlib.sha256(repr(entries).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            cached = self._trees.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        LOG.debug("Fingerprinting the content of %s", path)
+        sha256 = hashlib.sha256()
+        for relative_path, kind, mode, size, mtime, link_target in entries:
+            sha256.update("{}\0{}\0{:o}\0".format(relative_path, kind, mode).encode("utf-8"))
+
+            if kind == "file":
+                file_path = os.path.join(path, relative_path) if relative_path else path
+                sha256.update(self._file_digest(file_path, size, mtime).encode("utf-8"))
+            elif kind == "link":
+                sha256.update(link_target.encode("utf-8"))
+
+            sha256.update(b"\n")
+
+        fingerprint = sha256.hexdigest()
+        with self._lock:
+            self._trees[path] = (signature, fingerprint)
+
+        return fingerprint
+
+    def _file_digest(self, path, size, mtime):
+        with self._lock:
+            cached = self._files.get(path)
+
+        digest = cached[2] if cached and cached[:2] == (size, mtime) else None
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as fp:
+                for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+
+            with self._lock:
+                self._files[path] = (size, mtime, digest)
+
+        return digest
+
+
+def _stat_tree(path):
+    """
+    Lists every entry of the tree in a stable order, without following symlinks
+
+    :param string path: Path to a directory or file
+    :return list: (relative path, kind, permissions, size, modification time, symlink target) of every entry
+    """
+    if not os.path.isdir(path) or os.path.islink(path):
+        return [_stat_entry(path, "")]
+
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        relative_root = os.path.relpath(root, path)
+        if relative_root == os.curdir:
+            relative_root = ""
+
+        for name in sorted(dirs + files):
+            relative_path = os.path.join(relative_root, name).replace(os.sep, "/")
+            entries.append(_stat_entry(os.path.join(root, name), relative_path))
+
+    return entries
+
+
+def _stat_entry(path, relative_path):
+    info = os.lstat(path)
+
+    if stat.S_ISLNK(info.st_mode):
+        return (relative_path, "link", 0, 0, 0, os.readlink(path))
+
+    kind = "dir" if stat.S_ISDIR(info.st_mode) else "file"
+    size = info.st_size if kind == "file" else 0
+    return (relative_path, kind, stat.S_IMODE(info.st_mode), size, info.st_mtime, None)
@@ -32,5 +32,27 @@ class StreamWriter(object):
         if self._auto_flush:
             self._stream.flush()
 
+    def write_response(self, response, is_error=None):
+        """
+        Writes the response of a function, that the runtime kept apart from the logs of the function. Streams that
+        tell responses apart get it with ``write_response``. Other streams get it like any other output.
+
+        Parameters
+        ----------
+        response bytes-like object
+            Response of the function
+        is_error bool
+            Optional. True, if the function failed. None, if the runtime does not tell.
+        """
+        write_response = getattr(self._stream, "write_response", None)
+        if write_response is None:
+            self.write(response)
+            return
+
+        write_response(response, is_error=is_error)
+
+        if self._auto_flush:
+            self._stream.flush()
+
     def flush(self):
         self._stream.flush()
@@ -2,10 +2,14 @@
 Tarball Archive utility
 """
 
+import os
+import stat
 import tarfile
 from tempfile import TemporaryFile
 from contextlib import contextmanager
 
+_CHUNK_SIZE = 64 * 1024
+
 
 @contextmanager
 def create_tarball(tar_paths):
@@ -35,3 +39,106 @@ def create_tarball(tar_paths):
         yield tarballfile
     finally:
         tarballfile.close()
+
+
+def stream_tarball(tar_paths, tar_contents=None, chunk_size=_CHUNK_SIZE):
+    """
+    Generates a tarball in chunks, without writing it to a file first. The tarball is deterministic: entries are in
+    a stable order and owned by root, so the same files produce the same tarball. Symlinks are added as symlinks.
+
+    Parameters
+    ----------
+    tar_paths dict(str, str)
+        Key representing a full path to the file or directory and the Value representing the path within the tarball
+    tar_contents dict(str, bytes)
+        Optional. Key representing the path of a file within the tarball and the Value representing its content
+    chunk_size int
+        Optional. Size of the chunks file contents are read in
+
+    Yields
+    ------
+    bytes
+        Next chunk of the tarball
+    """
+    for path_in_tarball, content in sorted((tar_contents or {}).items()):
+        info = _normalize(tarfile.TarInfo(path_in_tarball.lstrip("/")))
+        info.size = len(content)
+        info.mode = 0o644
+        yield info.tobuf(tarfile.PAX_FORMAT)
+        yield content
+        yield _padding(info.size)
+
+    for path_on_system, path_in_tarball in sorted(tar_paths.items(), key=lambda item: item[1]):
+        for path, arcname in _walk(path_on_system, path_in_tarball.lstrip("/")):
+            info = _get_tarinfo(path, arcname)
+            if info is None:
+                continue
+
+            yield info.tobuf(tarfile.PAX_FORMAT)
+            if info.isreg():
+                for chunk in _read_file(path, info.size, chunk_size):
+                    yield chunk
+                yield _padding(info.size)
+
+    # End of archive
+    yield tarfile.NUL * tarfile.BLOCKSIZE * 2
+
+
+def _walk(path, arcname):
+    """
+    Yields the path and name within the tarball of the given path and, if it is a directory, everything in it, in a
+    stable order. Symlinks to directories are not followed.
+    """
+    yield path, arcname
+
+    if os.path.isdir(path) and not os.path.islink(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(dirs + files):
+                child = os.path.join(root, name)
+                yield child, arcname + "/" + os.path.relpath(child, path).replace(os.sep, "/")
+
+
+def _get_tarinfo(path, arcname):
+    """
+    :return tarfile.TarInfo: Header of the file at the path. None, if it is neither a file, directory nor symlink
+    """
+    stat_result = os.lstat(path)
+
+    info = tarfile.TarInfo(arcname)
+    info.mode = stat.S_IMODE(stat_result.st_mode)
+    info.mtime = int(stat_result.st_mtime)
+
+    if stat.S_ISREG(stat_result.st_mode):
+        info.size = stat_result.st_size
+    elif stat.S_ISDIR(stat_result.st_mode):
+        info.type = tarfile.DIRTYPE
+    elif stat.S_ISLNK(stat_result.st_mode):
+        info.type = tarfile.SYMTYPE
+        info.linkname = os.readlink(path)
+    else:
+        return None
+
+    return _normalize(info)
+
+
+def _normalize(info):
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def _read_file(path, size, chunk_size):
+    remaining = size
+    with open(path, "rb") as fp:
+        while remaining:
+            chunk = fp.read(min(chunk_size, remaining))
+            if not chunk:
+                raise IOError("{} changed while it was added to the tarball".format(path))
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _padding(size):
+    remainder = size % tarfile.BLOCKSIZE
+    return tarfile.NUL * (tarfile.BLOCKSIZE - remainder) if remainder else b""
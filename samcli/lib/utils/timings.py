@@ -0,0 +1,196 @@
+"""
+Records how long each phase of an operation, like a function invoke, takes
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+LOG = logging.getLogger(__name__)
+
+# Python 2 has no monotonic clock
+_monotonic = getattr(time, "monotonic", time.time)
+
+# Holds the timings being recorded, and the lists collecting finished timings, of each thread
+_local = threading.local()
+
+
+class Timings(object):
+    """
+    Durations of the phases of one operation. A phase that runs more than once adds up.
+    """
+
+    def __init__(self, name):
+        """
+        Parameters
+        ----------
+        name str
+            Name of the operation, like the name of the function that is invoked
+        """
+        self.name = name
+        self.start_time = time.time()
+        self.duration = None
+
+        # Phase => seconds spent in it, in the order the phases started
+        self.phases = OrderedDict()
+        # Other facts about the operation that are reported with the timings
+        self.details = {}
+
+        self._start = _monotonic()
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+    def finish(self):
+        self.duration = _monotonic() - self._start
+
+    def to_dict(self):
+        """
+        :return dict: Timings in milliseconds, ready to be serialized to JSON
+        """
+        record = OrderedDict()
+        record["name"] = self.name
+        record["start_time"] = self.start_time
+        record["total_ms"] = _to_ms(self.duration)
+        record["phases_ms"] = OrderedDict((phase, _to_ms(seconds)) for phase, seconds in self.phases.items())
+        record.update(self.details)
+        return record
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+@contextmanager
+def record(name):
+    """
+    Records the timings of the phases that run on the current thread, until the context exits. Phases are timed with
+    ``phase``. Timings that are recorded within other timings are reported on their own.
+
+    Parameters
+    ----------
+    name str
+        Name of the operation
+
+    Yields
+    ------
+    Timings
+        Timings being recorded
+    """
+    timings = Timings(name)
+    previous = getattr(_local, "timings", None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+        timings.finish()
+
+        for collected in getattr(_local, "collectors", []):
+            collected.append(timings)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times the code within the context as the given phase of the operation that is being recorded on the current
+    thread. Does nothing, if no operation is being recorded.
+
+    Parameters
+    ----------
+    name str
+        Name of the phase
+    """
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        yield
+        return
+
+    start = _monotonic()
+    try:
+        yield
+    finally:
+        timings.add(name, _monotonic() - start)
+
+
+def detail(name, value):
+    """
+    Reports a fact about the operation that is being recorded on the current thread, with its timings. Does nothing,
+    if no operation is being recorded.
+
+    Parameters
+    ----------
+    name str
+        Name of the detail
+    value
+        Value of the detail. It must be serializable to JSON.
+    """
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings.details[name] = value
+
+
+@contextmanager
+def collect():
+    """
+    Collects the timings that finish recording on the current thread, until the context exits
+
+    Yields
+    ------
+    list
+        Timings that finished recording so far
+    """
+    collected = []
+    collectors = getattr(_local, "collectors", None)
+    if collectors is None:
+        collectors = _local.collectors = []
+
+    collectors.append(collected)
+    try:
+        yield collected
+    finally:
+        collectors.remove(collected)
+
+
+class TimingsFileWriter(object):
+    """
+    Appends timings to a file, one JSON record per line. This class is thread-safe.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path str
+            Path to the file. It is created if it does not exist.
+        """
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def write(self, timings):
+        """
+        Parameters
+        ----------
+        timings Timings
+            Timings to append
+        """
+        line = timings.to_json() + "\n"
+        with self._lock:
+            if self._file:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _to_ms(seconds):
+    if seconds is None:
+        return None
+
+    return round(seconds * 1000, 3)
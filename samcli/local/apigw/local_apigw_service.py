@@ -1,5 +1,4 @@
 """API Gateway Local Service"""
-import io
 import json
 import logging
 import base64
@@ -8,7 +7,8 @@ from flask import Flask, request
 from werkzeug.datastructures import Headers
 
 from samcli.commands.local.lib.provider import Cors
-from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
+from samcli.lib.utils import timings
+from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputSplitter
 from samcli.lib.utils.stream_writer import StreamWriter
 from samcli.local.lambdafn.exceptions import FunctionNotFound
 from samcli.local.events.api_event import ContextIdentity, RequestContext, ApiGatewayLambdaEvent
@@ -65,7 +65,10 @@ class LocalApigwService(BaseLocalService):
     _DEFAULT_PORT = 3000
     _DEFAULT_HOST = "127.0.0.1"
 
-    def __init__(self, api, lambda_runner, static_dir=None, port=None, host=None, stderr=None):
+    # Response header with the timings of the invoke that produced the response
+    TIMINGS_HEADER = "X-SAM-CLI-Timings"
+
+    def __init__(self, api, lambda_runner, static_dir=None, port=None, host=None, stderr=None, timings_header=False):
         """
         Creates an ApiGatewayService
 
@@ -85,6 +88,8 @@ class LocalApigwService(BaseLocalService):
             Defaults to '127.0.0.1
         stderr samcli.lib.utils.stream_writer.StreamWriter
             Optional stream writer where the stderr from Docker container should be written to
+        timings_header bool
+            Optional. If True, responses carry the timings of the invoke as JSON in the X-SAM-CLI-Timings header
         """
         super(LocalApigwService, self).__init__(lambda_runner.is_debugging(), port=port, host=host)
         self.api = api
@@ -92,6 +97,7 @@ class LocalApigwService(BaseLocalService):
         self.static_dir = static_dir
         self._dict_of_routes = {}
         self.stderr = stderr
+        self.timings_header = timings_header
 
     def create(self):
         """
@@ -184,19 +190,17 @@ class LocalApigwService(BaseLocalService):
         except UnicodeDecodeError:
             return ServiceErrorResponses.lambda_failure_response()
 
-        stdout_stream = io.BytesIO()
+        # Logs the function writes to stdout are forwarded to stderr while the function runs. Only the response is kept.
+        stdout_stream = LambdaOutputSplitter(log_stream=self.stderr)
         stdout_stream_writer = StreamWriter(stdout_stream, self.is_debugging)
 
         try:
-            self.lambda_runner.invoke(route.function_name, event, stdout=stdout_stream_writer, stderr=self.stderr)
+            with timings.collect() as invoke_timings:
+                self.lambda_runner.invoke(route.function_name, event, stdout=stdout_stream_writer, stderr=self.stderr)
         except FunctionNotFound:
             return ServiceErrorResponses.lambda_not_found_response()
 
-        lambda_response, lambda_logs, _ = LambdaOutputParser.get_lambda_output(stdout_stream)
-
-        if self.stderr and lambda_logs:
-            # Write the logs to stderr if available.
-            self.stderr.write(lambda_logs)
+        lambda_response, _ = stdout_stream.get_lambda_output()
 
         try:
             (status_code, headers, body) = self._parse_lambda_output(
@@ -210,6 +214,9 @@ class LocalApigwService(BaseLocalService):
             )
             return ServiceErrorResponses.lambda_failure_response()
 
+        if self.timings_header and invoke_timings:
+            headers[self.TIMINGS_HEADER] = invoke_timings[-1].to_json()
+
         return self.service_response(body, headers, status_code)
 
     def _get_current_route(self, flask_request):
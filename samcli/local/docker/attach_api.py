@@ -2,13 +2,31 @@
 Wrapper to Docker Attach API
 """
 
+import errno
+import select
 import struct
 import logging
-from socket import timeout
-from docker.utils.socket import read, read_exactly, SocketError
+from socket import timeout, SHUT_WR
+
+import six
+from docker.utils.socket import read, NpipeSocket
 
 LOG = logging.getLogger(__name__)
 
+# Number of bytes read from the attached stream at once
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Every frame starts with a header. It contains the type of the frame and size of the payload.
+#
+#   header := [8]byte{STREAM_TYPE, 0, 0, 0, SIZE1, SIZE2, SIZE3, SIZE4}
+#
+# >BxxxL is the struct notation to unpack data in correct header format in big-endian
+_HEADER = struct.Struct(">BxxxL")
+_HEADER_SIZE = _HEADER.size
+
+# Errors that only mean no data could be read this time
+_RECOVERABLE_ERRNOS = (errno.EINTR, errno.EDEADLK, errno.EWOULDBLOCK)
+
 
 def attach(docker_client, container, stdout=True, stderr=True, logs=False):
     """
@@ -38,14 +56,74 @@ def attach(docker_client, container, stdout=True, stderr=True, logs=False):
         Do you want to include the container's previous output?
     """
 
+    socket = _attach_socket(docker_client, container, stdout=stdout, stderr=stderr, stdin=False, logs=logs)
+
+    return _read_socket(socket)
+
+
+def attach_stdin(docker_client, container):
+    """
+    Attaches to the stdin of a container that was created with its stdin open. Attach before starting the container
+    and then send the data with ``write_stdin``, so the process in the container does not miss any input.
+
+    Parameters
+    ----------
+    docker_client : docker.Client
+        Docker client used to talk to Docker daemon
+
+    container : docker.container
+        Instance of the container to attach to
+
+    Returns
+    -------
+    socket
+        Socket connected to the stdin of the container
+    """
+
+    return _attach_socket(docker_client, container, stdout=False, stderr=False, stdin=True, logs=False)
+
+
+def write_stdin(socket, data):
+    """
+    Writes the data to a socket returned by ``attach_stdin`` and closes it. When the container was created with
+    ``stdin_once``, closing the socket closes the stdin of the container, ie. the process reads an end-of-file right
+    after the data.
+
+    Parameters
+    ----------
+    socket
+        Socket connected to the stdin of the container
+
+    data : bytes
+        Data to write
+    """
+
+    # Depending on the platform, Docker SDK returns either a socket or a file-like object wrapping the socket
+    raw_socket = getattr(socket, "_sock", socket)
+
+    try:
+        raw_socket.sendall(data)
+
+        if hasattr(raw_socket, "shutdown"):
+            # Signal the end of input right away, even if Docker holds on to the connection for a while
+            raw_socket.shutdown(SHUT_WR)
+    finally:
+        socket.close()
+
+
+def _attach_socket(docker_client, container, stdout, stderr, stdin, logs):
+    """
+    Sends the attach request to Docker and returns the raw socket of the connection
+    """
+
     headers = {"Connection": "Upgrade", "Upgrade": "tcp"}
 
     query_params = {
         "stdout": 1 if stdout else 0,
         "stderr": 1 if stderr else 0,
+        "stdin": 1 if stdin else 0,
         "logs": 1 if logs else 0,
         "stream": 1,  # Yes, we always stream
-        "stdin": 0,  # We don't support stdin
     }
 
     # API client is a lower level Docker client that wraps the Docker APIs. It has methods that will help us
@@ -58,12 +136,10 @@ def attach(docker_client, container, stdout=True, stderr=True, logs=False):
 
     # Send out the attach request and read the socket for response
     response = api_client._post(url, headers=headers, params=query_params, stream=True)  # pylint: disable=W0212
-    socket = api_client._get_raw_response_socket(response)  # pylint: disable=W0212
-
-    return _read_socket(socket)
+    return api_client._get_raw_response_socket(response)  # pylint: disable=W0212
 
 
-def _read_socket(socket):
+def _read_socket(socket, buffer_size=DEFAULT_BUFFER_SIZE):
     """
     The stdout and stderr data from the container multiplexed into one stream of response from the Docker API.
     It follows the protocol described here https://docs.docker.com/engine/api/v1.30/#operation/ContainerAttach.
@@ -77,102 +153,144 @@ def _read_socket(socket):
         Stdout => Frame Type = 1
         Stderr => Frame Type = 2
 
+    Data is read from the socket in large blocks, into a buffer that is reused for the whole stream. Frames are sliced
+    out of the buffer without copying them. All the data of consecutive frames of the same type that arrived in one
+    block is yielded at once, so a container that writes many small lines does not cause as many writes downstream.
+    A frame larger than what arrived so far is yielded in parts, as soon as each part arrives.
 
     Parameters
     ----------
     socket
         Socket to read responses from
 
+    buffer_size : int
+        Size of the blocks to read from the socket
+
     Yields
     -------
     int
         Type of the stream (1 => stdout, 2 => stderr)
-    str
+    bytes
         Data in the stream
     """
 
-    # Keep reading the stream until the stream terminates
-    while True:
+    buffer = bytearray(max(buffer_size, _HEADER_SIZE))
+    view = memoryview(buffer)
 
-        try:
+    # Data that was read, but not yielded yet, is buffer[start:end]
+    start = end = 0
+
+    # Type of the frame being read, and number of bytes of its payload that were not read yet. When no bytes are
+    # remaining, the next header is expected.
+    frame_type = None
+    frame_remaining = 0
 
-            payload_type, payload_size = _read_header(socket)
-            if payload_size < 0:
-                # Something is wrong with the data stream. Payload size can't be less than zero
-                break
+    # Keep reading the stream until the stream terminates
+    while True:
 
-            for data in _read_payload(socket, payload_size):
-                yield payload_type, data
+        if start > 0:
+            # At most the beginning of a header is left. Move it to the front, so the whole buffer can be filled.
+            buffer[: end - start] = buffer[start:end]
+            start, end = 0, end - start
 
+        try:
+            size = _read_into(socket, view[end:])
         except timeout:
             # Timeouts are normal during debug sessions and long running tasks
             LOG.debug("Ignoring docker socket timeout")
+            continue
 
-        except SocketError:
-            # There isn't enough data in the stream. Probably the socket terminated
+        if size is None:
+            # This is just a transient state where we didn't get any data
+            continue
+
+        if size == 0:
+            # Socket does not have any more data. We are done here even if we haven't read the full payload
             break
 
+        end += size
+
+        # Slices of the buffer of the same frame type that will be yielded together
+        chunks_type = None
+        chunks = []
+
+        while start < end:
+            if frame_remaining == 0:
+                if end - start < _HEADER_SIZE:
+                    # Wait for the rest of the header
+                    break
+
+                frame_type, frame_remaining = _HEADER.unpack_from(buffer, start)
+                start += _HEADER_SIZE
+                continue
+
+            chunk_size = min(frame_remaining, end - start)
+
+            if frame_type != chunks_type:
+                if chunks:
+                    yield chunks_type, _join(chunks)
+                chunks_type = frame_type
+                chunks = []
 
-def _read_payload(socket, payload_size):
+            chunks.append(view[start : start + chunk_size])
+            start += chunk_size
+            frame_remaining -= chunk_size
+
+        if chunks:
+            # The data is copied out of the buffer before it is reused
+            yield chunks_type, _join(chunks)
+
+
+def _read_into(socket, view):
     """
-    From the given socket, reads and yields payload of the given size. With sockets, we don't receive all data at
-    once. Therefore this method will yield each time we read some data from the socket until the payload_size has
-    reached or socket has no more data.
+    Reads at most as many bytes as fit in the given view from the socket, into the view
 
     Parameters
     ----------
     socket
         Socket to read from
 
-    payload_size : int
-        Size of the payload to read. Exactly these many bytes are read from the socket before stopping the yield.
+    view : memoryview
+        Part of the buffer to read the data into
 
-    Yields
+    Returns
     -------
     int
-        Type of the stream (1 => stdout, 2 => stderr)
-    str
-        Data in the stream
+        Number of bytes that were read. Zero, if the socket has no more data. None, if no data was read this time
     """
 
-    remaining = payload_size
-    while remaining > 0:
-
-        # Try and read as much as possible
-        data = read(socket, remaining)
+    if not hasattr(socket, "recv_into") and not hasattr(socket, "readinto"):
+        # Neither a socket, a socket file nor a named pipe. Let the Docker SDK read it, and copy the data into the
+        # buffer.
+        data = read(socket, len(view))
         if data is None:
-            # ``read`` will terminate with an empty string. This is just a transient state where we didn't get any data
-            continue
+            return None
 
-        if len(data) == 0:  # pylint: disable=C1801
-            # Empty string. Socket does not have any more data. We are done here even if we haven't read full payload
-            break
+        view[: len(data)] = data
+        return len(data)
 
-        remaining -= len(data)
-        yield data
+    if hasattr(socket, "fileno") and not isinstance(socket, NpipeSocket):
+        select.select([socket], [], [])
 
+    try:
+        if hasattr(socket, "recv_into"):
+            return socket.recv_into(view)
 
-def _read_header(socket):
-    """
-    Reads the header from socket stream to determine the size of next frame to read. Header is 8 bytes long, where
-    the first byte is the stream type and last four bytes (bigendian) is size of the payload
+        # On Python 3, the Docker SDK wraps the unix socket of the Docker daemon in a socket.SocketIO
+        return socket.readinto(view)
+    except EnvironmentError as ex:
+        if ex.errno not in _RECOVERABLE_ERRNOS:
+            raise
 
-        header := [8]byte{STREAM_TYPE, 0, 0, 0, SIZE1, SIZE2, SIZE3, SIZE4}
+    return None
 
-    Parameters
-    ----------
-    socket
-        Socket to read the responses from
 
-    Returns
-    -------
-    int
-        Type of the frame
-    int
-        Size of the payload
-    """
+def _join(chunks):
+    if len(chunks) == 1:
+        return chunks[0].tobytes()
 
-    data = read_exactly(socket, 8)
+    if six.PY2:
+        # Python 2 cannot join memoryviews
+        return b"".join(chunk.tobytes() for chunk in chunks)
 
-    # >BxxxL is the struct notation to unpack data in correct header format in big-endian
-    return struct.unpack(">BxxxL", data)
+    return b"".join(chunks)
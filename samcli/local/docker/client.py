@@ -0,0 +1,103 @@
+"""
+Process-wide Docker client
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import docker
+
+LOG = logging.getLogger(__name__)
+
+# Number of connections to the Docker daemon that are kept open for reuse. Concurrent invokes beyond this number
+# still work, but their connections are closed after use.
+DEFAULT_MAX_POOL_SIZE = 20
+MAX_POOL_SIZE_ENV_VAR = "SAM_CLI_DOCKER_MAX_POOL_SIZE"
+
+_client = None
+_lock = threading.Lock()
+
+# Holds the counter of the API calls made on each thread, if any
+_local = threading.local()
+
+
+def get_docker_client():
+    """
+    Returns the Docker client shared by every container, image and manager in this process. It is configured from
+    the environment, like ``docker.from_env()``, and created on first use. Docker clients are thread-safe, so the
+    connection pool to the daemon is shared by all threads, instead of every container opening its own.
+
+    The size of the connection pool can be set with the ``SAM_CLI_DOCKER_MAX_POOL_SIZE`` environment variable.
+
+    Returns
+    -------
+    docker.DockerClient
+        Docker client object
+    """
+    global _client  # pylint: disable=global-statement
+
+    with _lock:
+        if not _client:
+            _client = _create_client(_get_max_pool_size())
+            # Every request to the daemon goes through the session of the low level API client
+            _client.api.hooks["response"].append(_count_api_call)
+
+        return _client
+
+
+def _create_client(max_pool_size):
+    try:
+        return docker.from_env(max_pool_size=max_pool_size)
+    except TypeError:
+        # Versions of the Docker SDK before 4.3 have a fixed pool size
+        LOG.debug("Docker SDK does not support max_pool_size. Using its default pool size")
+        return docker.from_env()
+
+
+def _get_max_pool_size():
+    value = os.environ.get(MAX_POOL_SIZE_ENV_VAR)
+    if not value:
+        return DEFAULT_MAX_POOL_SIZE
+
+    try:
+        return max(1, int(value))
+    except ValueError:
+        LOG.warning("Ignoring %s=%s. It must be a number", MAX_POOL_SIZE_ENV_VAR, value)
+        return DEFAULT_MAX_POOL_SIZE
+
+
+class ApiCallCounter(object):
+    """
+    Number of calls made to the Docker API
+    """
+
+    def __init__(self):
+        self.count = 0
+
+
+@contextmanager
+def count_api_calls():
+    """
+    Counts the calls the current thread makes to the Docker API through the shared client, until the context exits.
+    Calls made on other threads, like removing containers in the background, are not counted.
+
+    Yields
+    ------
+    ApiCallCounter
+        Counter that holds the number of calls made so far
+    """
+    counter = ApiCallCounter()
+    previous = getattr(_local, "counter", None)
+    _local.counter = counter
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+
+def _count_api_call(response, *args, **kwargs):  # pylint: disable=unused-argument
+    counter = getattr(_local, "counter", None)
+    if counter:
+        counter.count += 1
@@ -2,13 +2,21 @@
 Representation of a generic Docker container
 """
 
+import copy
+import hashlib
+import json
 import logging
+import os
 import tarfile
 import tempfile
+import threading
+from collections import Counter
 
 import docker
+import six
 
-from samcli.local.docker.attach_api import attach
+from samcli.local.docker.attach_api import attach, attach_stdin, write_stdin
+from .client import get_docker_client
 from .utils import to_posix_path
 
 LOG = logging.getLogger(__name__)
@@ -28,6 +36,10 @@ class Container(object):
     _STDOUT_FRAME_TYPE = 1
     _STDERR_FRAME_TYPE = 2
 
+    # Host directory => number of containers of this process that mount it. Shared by all containers.
+    _mounted_dirs = Counter()
+    _mounted_dirs_lock = threading.Lock()
+
     def __init__(
         self,
         image,
@@ -68,12 +80,22 @@ class Container(object):
         self._container_opts = container_opts
         self._additional_volumes = additional_volumes
 
-        # Use the given Docker client or create new one
-        self.docker_client = docker_client or docker.from_env()
+        # Use the given Docker client or the one shared by the process
+        self.docker_client = docker_client or get_docker_client()
 
         # Runtime properties of the container. They won't have value until container is created or started
         self.id = None
 
+        # Container object returned by Docker when this container was created. Keeping it saves looking up the
+        # container again for every operation.
+        self._real_container = None
+
+        # Output of the container, attached to before the container starts so that none of it is missed
+        self._logs_itr = None
+
+        # Host directories that are counted as mounted, from when the container is created until it is deleted
+        self._mounted_dirs_counted = ()
+
     def create(self):
         """
         Calls Docker API to creates the Docker container instance. Creating the container does *not* run the container.
@@ -130,39 +152,37 @@ class Container(object):
 
         if self.network_id == "host":
             kwargs["network_mode"] = self.network_id
+        elif self.network_id:
+            # Connect the container to the network as part of creating it, instead of with separate API calls
+            kwargs["network"] = self.network_id
 
-        real_container = self.docker_client.containers.create(self._image, **kwargs)
-        self.id = real_container.id
-
-        if self.network_id and self.network_id != "host":
-            network = self.docker_client.networks.get(self.network_id)
-            network.connect(self.id)
+        self._real_container = self.docker_client.containers.create(self._image, **kwargs)
+        self.id = self._real_container.id
+        self._count_mounts()
 
         return self.id
 
-    def delete(self):
+    def delete(self, reaper=None):
         """
         Removes a container that was created earlier.
+
+        :param samcli.local.docker.reaper.ContainerReaper reaper: Optional. If given, the container is queued for
+            removal in the background, and this method returns right away. Either way, this object no longer refers
+            to a created container once this method returns.
         """
         if not self.is_created():
             LOG.debug("Container was not created. Skipping deletion")
             return
 
-        try:
-            self.docker_client.containers.get(self.id).remove(force=True)  # Remove a container, even if it is running
-        except docker.errors.NotFound:
-            # Container is already not there
-            LOG.debug("Container with ID %s does not exist. Skipping deletion", self.id)
-        except docker.errors.APIError as ex:
-            msg = str(ex)
-            removal_in_progress = ("removal of container" in msg) and ("is already in progress" in msg)
-
-            # When removal is already started, Docker API will throw an exception
-            # Skip such exceptions.
-            if not removal_in_progress:
-                raise ex
+        if reaper:
+            reaper.reap(self.docker_client, self.id)
+        else:
+            remove_container(self.docker_client, self.id)
 
+        self._uncount_mounts()
+        self._close_logs()
         self.id = None
+        self._real_container = None
 
     def start(self, input_data=None):
         """
@@ -173,43 +193,86 @@ class Container(object):
         Parameters
         ----------
         input_data
-            Optional. Input data sent to the container through container's stdin.
+            Optional. Input data sent to the container through container's stdin. The container must be created with
+            ``stdin_open`` and ``stdin_once`` options, so that its stdin is closed once all data is sent.
         """
 
-        if input_data:
-            raise ValueError("Passing input through container's stdin is not supported")
-
         if not self.is_created():
             raise RuntimeError("Container does not exist. Cannot start this container")
 
-        # Get the underlying container instance from Docker API
-        real_container = self.docker_client.containers.get(self.id)
+        real_container = self._get_real_container()
+
+        stdin_socket = None
+        if input_data is not None:
+            # Attach before the container starts, so the process in the container finds its stdin connected
+            stdin_socket = attach_stdin(self.docker_client, container=real_container)
+
+        # Attach to the output before the container starts too. Nothing the container writes is missed, without
+        # asking Docker to replay the logs later.
+        self._logs_itr = attach(self.docker_client, container=real_container, stdout=True, stderr=True, logs=False)
 
         # Start the container
         real_container.start()
 
+        if stdin_socket:
+            if isinstance(input_data, six.text_type):
+                input_data = input_data.encode("utf-8")
+
+            # Input is sent only after the container started. Stdin is a pipe with a small buffer, so large inputs
+            # can only be written while the process in the container is reading them.
+            write_stdin(stdin_socket, input_data)
+
     def wait_for_logs(self, stdout=None, stderr=None):
 
         # Return instantly if we don't have to fetch any logs
         if not stdout and not stderr:
+            # Nobody reads the output. Do not let it fill up the connection.
+            self._close_logs()
             return
 
         if not self.is_created():
             raise RuntimeError("Container does not exist. Cannot get logs for this container")
 
-        real_container = self.docker_client.containers.get(self.id)
-
-        # Fetch both stdout and stderr streams from Docker as a single iterator.
-        logs_itr = attach(self.docker_client, container=real_container, stdout=True, stderr=True, logs=True)
+        logs_itr = self._take_logs()
+        if logs_itr is None:
+            # The container was not started by this object. Fetch both stdout and stderr streams from Docker as a
+            # single iterator, including what was written so far.
+            logs_itr = attach(
+                self.docker_client, container=self._get_real_container(), stdout=True, stderr=True, logs=True
+            )
 
         self._write_container_output(logs_itr, stdout=stdout, stderr=stderr)
 
+    def _take_logs(self):
+        """
+        Hands out the output that was attached to when the container started. It can only be read once.
+
+        :return iterator: Output of the container. None, if the output was not attached to or already handed out
+        """
+        logs_itr = self._logs_itr
+        self._logs_itr = None
+        return logs_itr
+
+    def _close_logs(self):
+        logs_itr = self._take_logs()
+        if logs_itr is not None:
+            logs_itr.close()
+
+    def _get_real_container(self):
+        """
+        :return docker.models.containers.Container: Container object of this container in the Docker SDK
+        """
+        if not self._real_container:
+            self._real_container = self.docker_client.containers.get(self.id)
+
+        return self._real_container
+
     def copy(self, from_container_path, to_host_path):
 
         if not self.is_created():
             raise RuntimeError("Container does not exist. Cannot get logs for this container")
 
-        real_container = self.docker_client.containers.get(self.id)
+        real_container = self._get_real_container()
 
         LOG.debug("Copying from container: %s -> %s", from_container_path, to_host_path)
         with tempfile.NamedTemporaryFile() as fp:
@@ -275,6 +338,42 @@ class Container(object):
         """
         self._network_id = value
 
+    @property
+    def config_key(self):
+        """
+        Returns a key that identifies the configuration this container is created with. Two containers with the same
+        key run the same image with the same command, mounts, environment and limits, so one can be used in place of
+        the other.
+
+        :return string: Key of the container configuration
+        """
+        config = {
+            "image": self._image,
+            "cmd": self._cmd,
+            "working_dir": self._working_dir,
+            "host_dir": self._host_dir,
+            "memory_limit_mb": self._memory_limit_mb,
+            "exposed_ports": self._exposed_ports,
+            "entrypoint": self._entrypoint,
+            "env_vars": self._env_vars,
+            "container_opts": self._container_opts,
+            "additional_volumes": self._additional_volumes,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def clone(self):
+        """
+        Returns a container with the same configuration as this one, that is not created yet
+
+        :return Container: New container with the same ``config_key``
+        """
+        clone = copy.copy(self)
+        clone.id = None
+        clone._real_container = None  # pylint: disable=protected-access
+        clone._logs_itr = None  # pylint: disable=protected-access
+        clone._mounted_dirs_counted = ()  # pylint: disable=protected-access
+        return clone
+
     @property
     def image(self):
         """
@@ -291,3 +390,61 @@ class Container(object):
         :return bool: True if the container was created
         """
         return self.id is not None
+
+    @classmethod
+    def is_mounted(cls, host_dir):
+        """
+        Checks if a container of this process that was created, and not deleted yet, mounts the given directory.
+        Directories that are shared between containers, like the ones of caches, must not be deleted while they are
+        mounted.
+
+        :param string host_dir: Directory in the host operating system
+        :return bool: True if a container mounts the directory
+        """
+        with cls._mounted_dirs_lock:
+            return os.path.realpath(host_dir) in cls._mounted_dirs
+
+    def _count_mounts(self):
+        """
+        Counts this container as mounting each of its host directories
+        """
+        host_dirs = {os.path.realpath(self._host_dir)}
+        host_dirs.update(os.path.realpath(host_dir) for host_dir in self._additional_volumes or {})
+
+        with self._mounted_dirs_lock:
+            self._mounted_dirs.update(host_dirs)
+        self._mounted_dirs_counted = tuple(host_dirs)
+
+    def _uncount_mounts(self):
+        """
+        Stops counting this container as mounting its host directories
+        """
+        with self._mounted_dirs_lock:
+            for host_dir in self._mounted_dirs_counted:
+                self._mounted_dirs[host_dir] -= 1
+                if self._mounted_dirs[host_dir] <= 0:
+                    del self._mounted_dirs[host_dir]
+        self._mounted_dirs_counted = ()
+
+
+def remove_container(docker_client, container_id):
+    """
+    Removes a container, even if it is running
+
+    :param docker.DockerClient docker_client: Docker client to remove the container with
+    :param string container_id: ID of the container to remove
+    """
+    try:
+        # Remove a container, even if it is running. The low level API does this with a single call.
+        docker_client.api.remove_container(container_id, force=True)
+    except docker.errors.NotFound:
+        # Container is already not there
+        LOG.debug("Container with ID %s does not exist. Skipping deletion", container_id)
+    except docker.errors.APIError as ex:
+        msg = str(ex)
+        removal_in_progress = ("removal of container" in msg) and ("is already in progress" in msg)
+
+        # When removal is already started, Docker API will throw an exception
+        # Skip such exceptions.
+        if not removal_in_progress:
+            raise ex
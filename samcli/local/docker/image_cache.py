@@ -0,0 +1,254 @@
+"""
+Keeps track of the images that SAM CLI builds, and removes the least recently used ones
+"""
+
+import logging
+import os
+import threading
+import time
+
+import docker
+
+from samcli.lib.utils.disk_cache import get_env_int, get_max_size, read_json_file, update_json_file
+from .client import get_docker_client
+
+LOG = logging.getLogger(__name__)
+
+# Label of every image that SAM CLI builds
+IMAGE_LABEL = "com.amazonaws.sam-cli.image"
+
+# Repository of the images that SAM CLI builds. Older versions of SAM CLI built them without the label. Only images
+# with the label or in this repository are ever removed.
+IMAGE_REPO_NAME = "samcli/lambda"
+
+# File in the SAM CLI app dir that records when the images were last used
+INDEX_FILE_NAME = "lambda-images.json"
+
+# Total size of the images that are kept, in megabytes. Images used by the current invoke are kept even if they exceed
+# this size.
+DEFAULT_MAX_SIZE_MB = 10240
+MAX_SIZE_ENV_VAR = "SAM_CLI_IMAGE_CACHE_MAX_SIZE_MB"
+
+# Images that were not used for this many days are removed
+DEFAULT_MAX_AGE_DAYS = 30
+MAX_AGE_ENV_VAR = "SAM_CLI_IMAGE_CACHE_MAX_AGE_DAYS"
+
+# Seconds between two collections in the background, across all processes sharing the index
+COLLECT_INTERVAL = 60 * 60
+
+_DAY = 24 * 60 * 60
+
+
+class LambdaImageCache(object):
+    """
+    Records when each image that SAM CLI built was last used, and removes the least recently used images once they
+    exceed a disk budget, or were not used for too long.
+
+    Images are found through their label, or their repository for images that older versions of SAM CLI built without
+    the label, so images that SAM CLI did not build are never removed. The times of last
+    use are kept in a JSON index that is shared by every process, because Docker does not record them. Images that are
+    not in the index, for example because they were built by an older version of SAM CLI, were last used when they
+    were created. The index is only written while holding a file lock, and is replaced atomically.
+
+    The size of an image is the size of what it adds to its parent image. Images that share their parent image, such
+    as the images of functions with the same runtime, only count the parent image once, outside of the budget.
+    """
+
+    def __init__(self, index_path, docker_client=None, max_size=None, max_age=None):
+        """
+        Parameters
+        ----------
+        index_path str
+            Path of the index file. Its directory is created when the index is first written.
+        docker_client docker.DockerClient
+            Optional. Docker client to look up and remove images with
+        max_size int
+            Optional. Total size of the images to keep, in bytes. Defaults to the value of the
+            ``SAM_CLI_IMAGE_CACHE_MAX_SIZE_MB`` environment variable, or 10 GB.
+        max_age int
+            Optional. Seconds after which an image that was not used is removed. Defaults to the value of the
+            ``SAM_CLI_IMAGE_CACHE_MAX_AGE_DAYS`` environment variable, or 30 days.
+        """
+        self._index_path = index_path
+        self.docker_client = docker_client or get_docker_client()
+        self._max_size = max_size if max_size is not None else get_max_size(MAX_SIZE_ENV_VAR, DEFAULT_MAX_SIZE_MB)
+        self._max_age = max_age if max_age is not None else get_env_int(MAX_AGE_ENV_VAR, DEFAULT_MAX_AGE_DAYS) * _DAY
+
+    def touch(self, images):
+        """
+        Marks the images as the most recently used ones
+
+        Parameters
+        ----------
+        images list(str)
+            Names of the images (REPOSITORY:TAG)
+        """
+        now = time.time()
+        with self._write() as index:
+            for image in images:
+                index["Images"][image] = now
+
+    def collect(self, keep=(), dry_run=False):
+        """
+        Removes the images that were not used for longer than the maximum age, and then the least recently used images
+        until the remaining ones fit the maximum size. An image that cannot be removed, for example because a container
+        uses it, is skipped.
+
+        Parameters
+        ----------
+        keep iterable(str)
+            Names of the images that must not be removed
+        dry_run bool
+            Optional. True to only list the images that would be removed
+
+        Returns
+        -------
+        list(str)
+            Names of the removed images
+        """
+        index = self._read()
+        now = time.time()
+
+        images = self._list_images()
+        sizes = self._get_sizes(images)
+
+        candidates = []
+        for image in images:
+            tags = image.tags
+            if not tags or any(tag in keep for tag in tags):
+                continue
+
+            last_used = max(index["Images"].get(tag, _get_created(image)) for tag in tags)
+            # Children are created after their parent image. Remove them first, so the parent is not in use.
+            candidates.append((last_used, -_get_created(image), tags, sizes[image.id]))
+
+        total_size = sum(sizes.values())
+        removed = []
+        for last_used, _, tags, size in sorted(candidates):
+            if now - last_used <= self._max_age and total_size <= self._max_size:
+                break
+
+            if dry_run or self._remove(tags):
+                removed.extend(tags)
+                total_size -= size
+
+        if not dry_run:
+            present = {tag for image in images for tag in image.tags}
+            with self._write() as index:
+                index["LastCollected"] = now
+                for tag in list(index["Images"]):
+                    if tag in removed or tag not in present:
+                        del index["Images"][tag]
+
+        return removed
+
+    def collect_in_background(self, keep=()):
+        """
+        Starts a collection in the background, unless one was started less than an hour ago by any process. Errors
+        are only logged.
+
+        Parameters
+        ----------
+        keep iterable(str)
+            Names of the images that must not be removed
+        """
+        with self._write() as index:
+            if time.time() - index.get("LastCollected", 0) < COLLECT_INTERVAL:
+                return
+            index["LastCollected"] = time.time()
+
+        keep = list(keep)
+
+        def collect():
+            try:
+                removed = self.collect(keep=keep)
+                if removed:
+                    LOG.debug("Removed images that were not used recently: %s", ", ".join(removed))
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Failed to remove images that were not used recently", exc_info=True)
+
+        collector = threading.Thread(target=collect, name="image-collect")
+        collector.daemon = True
+        collector.start()
+
+    def _list_images(self):
+        """
+        :return list: Images built by SAM CLI
+        """
+        images = {}
+        for filters in [{"label": IMAGE_LABEL}, {"reference": IMAGE_REPO_NAME}]:
+            for image in self.docker_client.images.list(filters=filters):
+                images[image.id] = image
+
+        return list(images.values())
+
+    def _get_sizes(self, images):
+        """
+        :param list images: Images built by SAM CLI
+        :return dict: ID of every image => size of what it adds to its parent image, in bytes
+        """
+        parent_sizes = {image.id: image.attrs.get("Size", 0) for image in images}
+
+        sizes = {}
+        for image in images:
+            parent_id = image.attrs.get("ParentId")
+            if parent_id and parent_id not in parent_sizes:
+                # Base image, that SAM CLI did not build
+                try:
+                    parent_sizes[parent_id] = self.docker_client.images.get(parent_id).attrs.get("Size", 0)
+                except docker.errors.APIError:
+                    parent_sizes[parent_id] = 0
+
+            size = image.attrs.get("Size", 0)
+            sizes[image.id] = max(0, size - parent_sizes[parent_id]) if parent_id else size
+
+        return sizes
+
+    def _remove(self, tags):
+        """
+        :param list tags: Names of an image
+        :return bool: True, if the image was removed
+        """
+        LOG.debug("Removing image %s", ", ".join(tags))
+        try:
+            for tag in tags:
+                self.docker_client.images.remove(tag)
+        except docker.errors.ImageNotFound:
+            pass
+        except docker.errors.APIError as ex:
+            LOG.debug("Failed to remove image %s: %s", ", ".join(tags), ex)
+            return False
+
+        return True
+
+    def _read(self):
+        """
+        :return dict: Index, with the time every image was last used by name, under "Images"
+        """
+        index = read_json_file(self._index_path)
+
+        if not isinstance(index, dict) or not isinstance(index.get("Images"), dict):
+            index = {"Images": {}}
+
+        return index
+
+    def _write(self):
+        """
+        Yields the index, which is written back when the context exits
+        """
+        index_dir = os.path.dirname(self._index_path)
+        if index_dir and not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+
+        return update_json_file(self._index_path, self._read)
+
+
+def _get_created(image):
+    """
+    :param docker.models.images.Image image: Image from the list of images
+    :return float: Time the image was created
+    """
+    created = image.attrs.get("Created", 0)
+    # The list of images has the time in seconds since the epoch
+    return created if isinstance(created, (int, float)) else 0
+
@@ -76,7 +76,7 @@ class LambdaBuildContainer(Container):
             mode,
         )
 
-        image = LambdaBuildContainer._get_image(runtime)
+        image = LambdaBuildContainer.get_image(runtime)
         entry = LambdaBuildContainer._get_entrypoint(request_json)
         cmd = []
 
@@ -234,7 +234,11 @@ class LambdaBuildContainer(Container):
         return result
 
     @staticmethod
-    def _get_image(runtime):
+    def get_image(runtime):
+        """
+        :param string runtime: Name of the Lambda runtime
+        :return string: Name of the image that builds functions of the runtime
+        """
         runtime_to_images = {"nodejs10.x": "amazon/lambda-build-node10.x"}
 
         return runtime_to_images.get(
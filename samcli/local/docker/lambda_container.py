@@ -2,8 +2,19 @@
 Represents Lambda runtime containers.
 """
 import logging
+import sys
+import threading
+import time
 
+import docker
+import requests
+import six
+from six.moves.urllib.parse import urlparse
+
+from samcli.local.docker.attach_api import attach
 from samcli.local.docker.lambda_debug_entrypoint import LambdaDebugEntryPoint
+from samcli.local.lambda_service.runtime_api_service import LocalRuntimeApiService
+from .client import get_docker_client
 from .container import Container
 from .lambda_image import Runtime
 
@@ -20,6 +31,7 @@ class LambdaContainer(Container):
 
     _IMAGE_REPO_NAME = "lambci/lambda"
     _WORKING_DIR = "/var/task"
+    _LAYERS_DIR = "/opt"
 
     # The Volume Mount path for debug files in docker
     _DEBUGGER_VOLUME_MOUNT_PATH = "/tmp/lambci_debug_files"
@@ -31,6 +43,39 @@ class LambdaContainer(Container):
     # This is the dictionary that represents where the debugger_path arg is mounted in docker to as readonly.
     _DEBUGGER_VOLUME_MOUNT = {"bind": _DEBUGGER_VOLUME_MOUNT_PATH, "mode": "ro"}
 
+    # In "stay-open" mode, lambci images keep the runtime running and serve the Lambda Invoke API on this port
+    # instead of running the function once. See https://github.com/lambci/docker-lambda
+    _STAY_OPEN_ENV_VAR = "DOCKER_LAMBDA_STAY_OPEN"
+    _STAY_OPEN_API_PORT = 9001
+    _STAY_OPEN_INVOKE_PATH = "/2015-03-31/functions/function/invocations"
+
+    # Number of seconds to wait for the Invoke API to come up after the container started
+    _STAY_OPEN_STARTUP_TIMEOUT = 30
+
+    # Makes lambci images read the event from stdin instead of the AWS_LAMBDA_EVENT_BODY environment variable
+    _USE_STDIN_ENV_VAR = "DOCKER_LAMBDA_USE_STDIN"
+
+    # Runtimes whose bootstrap talks to the Lambda Runtime API. In stay-open mode, containers of these runtimes run
+    # the bootstrap directly and fetch their events from a Runtime API served by SAM CLI.
+    _RUNTIME_API_ENTRY_POINTS = {
+        Runtime.python37.value: ["/var/runtime/bootstrap"],
+        Runtime.nodejs10x.value: ["/var/runtime/bootstrap"],
+        # Same lookup as Lambda: the bootstrap of the function comes first, then the one of a layer
+        Runtime.provided.value: [
+            "/bin/sh",
+            "-c",
+            "if [ -x /var/task/bootstrap ]; then exec /var/task/bootstrap; fi; exec /opt/bootstrap",
+        ],
+    }
+    _RUNTIME_API_ENV_VAR = "AWS_LAMBDA_RUNTIME_API"
+
+    # Hostname under which Docker Desktop makes the host reachable from containers
+    _DOCKER_DESKTOP_HOST = "host.docker.internal"
+    _DEFAULT_BRIDGE_GATEWAY = "172.17.0.1"
+
+    # Network ID => address of the host in that network. Shared by all containers.
+    _network_gateways = {}
+
     def __init__(
         self,  # pylint: disable=R0914
         runtime,
@@ -41,6 +86,8 @@ class LambdaContainer(Container):
         memory_mb=128,
         env_vars=None,
         debug_options=None,
+        stay_open=False,
+        docker_client=None,
     ):
         """
         Initializes the class
@@ -64,6 +111,11 @@ class LambdaContainer(Container):
             Optional. Dictionary containing environment variables passed to container
         debug_options DebugContext
             Optional. Contains container debugging info (port, debugger path)
+        stay_open bool
+            Optional. If True, the container keeps running after an invoke and every event is sent through ``invoke``.
+            Otherwise, the container runs the function once with the event it reads from stdin. Defaults to False.
+        docker_client docker.DockerClient
+            Optional. Docker client object
         """
 
         if not Runtime.has_value(runtime):
@@ -74,8 +126,47 @@ class LambdaContainer(Container):
         entry = LambdaContainer._get_entry_point(runtime, debug_options)
         additional_options = LambdaContainer._get_additional_options(runtime, debug_options)
         additional_volumes = LambdaContainer._get_additional_volumes(debug_options)
+        layers_volume = LambdaContainer._get_layers_volume(image_builder, layers)
+        if layers_volume:
+            additional_volumes = dict(additional_volumes or {}, **layers_volume)
         cmd = [handler]
 
+        self._stay_open = stay_open
+        self._invoke_url = None
+        self._invoke_log_writer = _InvokeLogWriter()
+        self._runtime_api = None
+
+        # The event is never part of the container configuration. This keeps large events out of the create request
+        # and lets containers of the same function share a configuration.
+        env_vars = dict(env_vars or {})
+
+        if stay_open and runtime in self._RUNTIME_API_ENTRY_POINTS:
+            docker_client = docker_client or get_docker_client()
+
+        if stay_open and self._can_serve_runtime_api(runtime, docker_client):
+            # The runtime fetches its events from SAM CLI through the Runtime API, like it does on Lambda. The address
+            # of the API is only known once the container is created.
+            self._runtime_api = LocalRuntimeApiService(host=None)
+            entry = self._RUNTIME_API_ENTRY_POINTS[runtime]
+            cmd = []
+            env_vars["_HANDLER"] = handler
+            env_vars.setdefault("AWS_LAMBDA_FUNCTION_NAME", "test")
+            env_vars.setdefault("AWS_LAMBDA_FUNCTION_VERSION", "$LATEST")
+        elif stay_open:
+            env_vars[self._STAY_OPEN_ENV_VAR] = "1"
+
+            # Publish the Invoke API on a random port of the Docker host
+            ports = dict(ports or {})
+            ports[self._STAY_OPEN_API_PORT] = None
+        else:
+            env_vars[self._USE_STDIN_ENV_VAR] = "1"
+
+            # Keep stdin open until the event is written to it. Closing the attached stream then closes the stdin
+            # of the container, ie. the runtime reads an end-of-file after the event.
+            additional_options = dict(additional_options or {})
+            additional_options["stdin_open"] = True
+            additional_options["stdin_once"] = True
+
         super(LambdaContainer, self).__init__(
             image,
             cmd,
@@ -87,8 +178,249 @@ class LambdaContainer(Container):
             env_vars=env_vars,
             container_opts=additional_options,
             additional_volumes=additional_volumes,
+            docker_client=docker_client,
         )
 
+    def create(self):
+        """
+        Creates the container. If the container fetches its events from the Runtime API, this also starts serving the
+        API to the container.
+
+        :return string: ID of the created container
+        """
+        if not self._runtime_api:
+            return super(LambdaContainer, self).create()
+
+        bind_host, container_host = self._get_runtime_api_hosts()
+        self._runtime_api.host = bind_host
+        self._runtime_api.create()
+        self._runtime_api.start()
+
+        # Like the network of the container, the address of the API is not part of the configuration of the
+        # container. Two containers of the same function must share a ``config_key`` even if they use different ports.
+        env_vars = self._env_vars
+        self._env_vars = dict(env_vars)
+        self._env_vars[self._RUNTIME_API_ENV_VAR] = "{}:{}".format(container_host, self._runtime_api.port)
+
+        try:
+            return super(LambdaContainer, self).create()
+        except Exception:
+            self._runtime_api.stop()
+            raise
+        finally:
+            self._env_vars = env_vars
+
+    def delete(self, reaper=None):
+        """
+        Removes the container, and stops serving the Runtime API to it. Invokes that wait for the container fail.
+
+        :param samcli.local.docker.reaper.ContainerReaper reaper: Optional. Reaper to remove the container in the
+            background
+        """
+        if self._runtime_api:
+            self._runtime_api.stop()
+
+        super(LambdaContainer, self).delete(reaper=reaper)
+
+    def clone(self):
+        """
+        Returns a container with the same configuration as this one, that is not created yet
+
+        :return LambdaContainer: New container with the same ``config_key``
+        """
+        clone = super(LambdaContainer, self).clone()
+
+        # Every container has its own connections
+        clone._invoke_url = None
+        clone._invoke_log_writer = _InvokeLogWriter()
+        if self._runtime_api:
+            clone._runtime_api = LocalRuntimeApiService(host=None)
+
+        return clone
+
+    def start(self, input_data=None):
+        """
+        Starts the container. In stay-open mode, this also waits until the container is ready to receive invokes.
+
+        Parameters
+        ----------
+        input_data
+            Optional. Input data sent to the container through container's stdin.
+        """
+        super(LambdaContainer, self).start(input_data=input_data)
+
+        if self._stay_open:
+            self._follow_logs()
+
+        if self._stay_open and not self._runtime_api:
+            self._invoke_url = self._wait_for_invoke_api()
+
+    def invoke(self, event, stdout=None, stderr=None, timeout=None):
+        """
+        Runs the function once with the given event, in a container that was started in stay-open mode. This blocks
+        until the function returns.
+
+        Parameters
+        ----------
+        event str
+            Event passed to the function
+        stdout samcli.lib.utils.stream_writer.StreamWriter
+            Optional. Stream writer to write the response of the function into
+        stderr samcli.lib.utils.stream_writer.StreamWriter
+            Optional. Stream writer to write the output of the container into while the function runs
+        timeout int
+            Optional. Timeout of the function in seconds. It is only passed on to the runtime. Enforcing it is up to
+            the caller.
+
+        Returns
+        -------
+        bool
+            True, if the function ran. False, if the container could not be reached, for example because it was
+            stopped before the function returned
+        """
+        if not self._invoke_url and not (self._runtime_api and self.is_created()):
+            raise RuntimeError("Container is not running in stay-open mode. Cannot invoke this container")
+
+        if isinstance(event, six.text_type):
+            event = event.encode("utf-8")
+
+        # Container output is not tagged with the invoke it belongs to. This is fine, because a warm container
+        # serves only one invoke at a time.
+        self._invoke_log_writer.stream = stderr
+
+        if self._runtime_api:
+            invocation = self._runtime_api.invoke(event, timeout=timeout)
+            if invocation.response is None:
+                LOG.debug("Container %s was stopped before the function returned", self.id)
+                return False
+
+            if stdout:
+                stdout.write_response(invocation.response, is_error=invocation.is_error)
+            return True
+
+        try:
+            response = requests.post(self._invoke_url, data=event)
+        except requests.exceptions.RequestException:
+            LOG.debug("Failed to invoke the function in container %s", self.id, exc_info=True)
+            return False
+
+        if stdout:
+            stdout.write_response(response.content)
+
+        return True
+
+    def _follow_logs(self):
+        """
+        Forwards the output of the container to the stream of the invoke that is using the container. Output is read
+        on a background thread for as long as the container runs.
+        """
+        logs_itr = self._take_logs()
+        if logs_itr is None:
+            logs_itr = attach(
+                self.docker_client, container=self._get_real_container(), stdout=True, stderr=True, logs=False
+            )
+
+        follower = threading.Thread(
+            target=self._write_container_output,
+            args=(logs_itr,),
+            kwargs={"stdout": self._invoke_log_writer, "stderr": self._invoke_log_writer},
+        )
+        follower.daemon = True
+        follower.start()
+
+    def _wait_for_invoke_api(self):
+        """
+        Waits for the Invoke API of a stay-open container to accept connections
+
+        Returns
+        -------
+        str
+            URL to send invoke requests to
+
+        Raises
+        ------
+        ContainerNotReadyException
+            If the Invoke API did not come up in time
+        """
+        # Ports are published when the container starts. Refresh what Docker told us when creating the container.
+        real_container = self._get_real_container()
+        real_container.reload()
+        port_bindings = real_container.attrs["NetworkSettings"]["Ports"]
+        host_port = port_bindings["{}/tcp".format(self._STAY_OPEN_API_PORT)][0]["HostPort"]
+
+        base_url = "http://{}:{}".format(self._get_docker_host(), host_port)
+        deadline = time.time() + self._STAY_OPEN_STARTUP_TIMEOUT
+
+        while True:
+            try:
+                # Any HTTP response, even an error, means the API is listening
+                requests.get(base_url, timeout=1)
+                return base_url + self._STAY_OPEN_INVOKE_PATH
+            except requests.exceptions.RequestException:
+                if time.time() > deadline:
+                    raise ContainerNotReadyException(
+                        "Container {} did not start serving invokes within {} seconds".format(
+                            self.id, self._STAY_OPEN_STARTUP_TIMEOUT
+                        )
+                    )
+                time.sleep(0.1)
+
+    def _get_runtime_api_hosts(self):
+        """
+        Returns where to serve the Runtime API so that the container can reach it
+
+        :return tuple(string, string): Address to serve the API on, and hostname of that address inside the container
+        """
+        if self.network_id == "host":
+            return "127.0.0.1", "127.0.0.1"
+
+        if not sys.platform.startswith("linux"):
+            # Docker Desktop forwards this hostname to the loopback interface of the host
+            return "127.0.0.1", self._DOCKER_DESKTOP_HOST
+
+        # On Linux, the host is reachable at the gateway of the network the container is connected to. Networks do
+        # not change their gateway, so it is only looked up once.
+        network_id = self.network_id or "bridge"
+        gateway = self._network_gateways.get(network_id)
+        if not gateway:
+            try:
+                network = self.docker_client.networks.get(network_id)
+                gateway = network.attrs["IPAM"]["Config"][0]["Gateway"]
+                self._network_gateways[network_id] = gateway
+            except (docker.errors.APIError, KeyError, IndexError):
+                LOG.debug("Failed to look up gateway of the network %s", network_id, exc_info=True)
+                gateway = self._DEFAULT_BRIDGE_GATEWAY
+
+        return gateway, gateway
+
+    @classmethod
+    def _can_serve_runtime_api(cls, runtime, docker_client):
+        """
+        The Runtime API is served from this machine. Containers can reach it only if Docker runs on this machine too.
+
+        :param string runtime: Lambda function runtime name
+        :param docker.DockerClient docker_client: Docker client object
+        :return bool: True, if containers of the runtime can fetch their events from a Runtime API served by SAM CLI
+        """
+        if runtime not in cls._RUNTIME_API_ENTRY_POINTS:
+            return False
+
+        # Local daemons are reached over a Unix socket or a named pipe
+        return urlparse(docker_client.api.base_url).scheme == "http+docker"
+
+    def _get_docker_host(self):
+        """
+        Returns the address of the host where the ports of the container are published. This is the Docker daemon
+        host when it is reached over TCP, and the local host otherwise.
+
+        :return string: Hostname or IP address of the Docker host
+        """
+        parsed_url = urlparse(self.docker_client.api.base_url)
+        if parsed_url.scheme in ("http", "https") and parsed_url.hostname:
+            return parsed_url.hostname
+
+        return "127.0.0.1"
+
     @staticmethod
     def _get_exposed_ports(debug_options):
         """
@@ -141,6 +473,24 @@ class LambdaContainer(Container):
 
         return {debug_options.debugger_path: LambdaContainer._DEBUGGER_VOLUME_MOUNT}
 
+    @staticmethod
+    def _get_layers_volume(image_builder, layers):
+        """
+        Returns the volume that mounts the layers into /opt, when layers are mounted instead of built into the image
+
+        :param samcli.local.docker.lambda_image.LambdaImage image_builder: LambdaImage that prepares the layers
+        :param list layers: List of layers
+        :return dict: Dictionary containing volume map passed to container creation. None, if nothing is mounted
+        """
+        if not layers:
+            return None
+
+        layers_dir = image_builder.get_layers_dir(layers)
+        if not layers_dir:
+            return None
+
+        return {layers_dir: {"bind": LambdaContainer._LAYERS_DIR, "mode": "ro,delegated"}}
+
     @staticmethod
     def _get_image(image_builder, runtime, layers):
         """
@@ -193,3 +543,21 @@ class LambdaContainer(Container):
             runtime=runtime,
             options=LambdaContainer._DEBUG_ENTRYPOINT_OPTIONS,
         )
+
+
+class _InvokeLogWriter(object):
+    """
+    Writes container output to the stream of the invoke that is currently using a stay-open container
+    """
+
+    def __init__(self):
+        self.stream = None
+
+    def write(self, output):
+        stream = self.stream
+        if stream:
+            stream.write(output)
+
+
+class ContainerNotReadyException(Exception):
+    pass
@@ -2,20 +2,20 @@
 Generates a Docker Image to be used for invoking a function locally
 """
 from enum import Enum
-import uuid
 import logging
 import hashlib
+import os
+import threading
 
 import docker
 
 from samcli.commands.local.cli_common.user_exceptions import ImageBuildException
-from samcli.lib.utils.tar import create_tarball
-
-try:
-    from pathlib import Path
-except ImportError:
-    from pathlib2 import Path
-
+from samcli.lib.utils import timings
+from samcli.lib.utils.fingerprint import DirectoryFingerprinter
+from samcli.lib.utils.tar import stream_tarball
+from samcli.local.docker.client import get_docker_client
+from samcli.local.docker.image_cache import IMAGE_LABEL, IMAGE_REPO_NAME
+from samcli.local.layers.merged_layers import merge_layers
 
 LOG = logging.getLogger(__name__)
 
@@ -50,9 +50,19 @@ class Runtime(Enum):
 class LambdaImage(object):
     _LAYERS_DIR = "/opt"
     _DOCKER_LAMBDA_REPO_NAME = "lambci/lambda"
-    _SAM_CLI_REPO_NAME = "samcli/lambda"
-
-    def __init__(self, layer_downloader, skip_pull_image, force_image_build, docker_client=None):
+    _SAM_CLI_REPO_NAME = IMAGE_REPO_NAME
+    # Directory of the layer cache that holds the merged content of functions with several layers
+    _MERGED_LAYERS_DIR_NAME = ".merged"
+
+    def __init__(
+        self,
+        layer_downloader,
+        skip_pull_image,
+        force_image_build,
+        docker_client=None,
+        mount_layers=False,
+        image_cache=None,
+    ):
         """
 
         Parameters
@@ -65,16 +75,33 @@ class LambdaImage(object):
             True to download the layer and rebuild the image even if it exists already on the system
         docker_client docker.DockerClient
             Optional docker client object
+        mount_layers bool
+            Optional. True to mount the layers into /opt of the container, instead of building an image with them.
+            Containers then run the lambci/lambda image of their runtime. Defaults to False.
+        image_cache samcli.local.docker.image_cache.LambdaImageCache
+            Optional. Records the use of the images, and removes images that were not used recently after new ones
+            were built
         """
         self.layer_downloader = layer_downloader
         self.skip_pull_image = skip_pull_image
         self.force_image_build = force_image_build
-        self.docker_client = docker_client or docker.from_env()
+        self.mount_layers = mount_layers
+        self.image_cache = image_cache
+        self.docker_client = docker_client or get_docker_client()
+        self._fingerprinter = DirectoryFingerprinter()
+        self._lock = threading.Lock()
+        # Images and layer directories that were already resolved by this process, by the runtime and names of their
+        # layers. See ``_get_resolved``.
+        self._images = {}
+        self._layers_dirs = {}
 
     def build(self, runtime, layers):
         """
         Build the image if one is not already on the system that matches the runtime and layers
 
+        The image is remembered for the rest of the process. Building the image for the same runtime and layers again
+        skips downloading the layers and looking up images, unless the content of a layer in the template changed.
+
         Parameters
         ----------
         runtime str
@@ -87,38 +114,268 @@ class LambdaImage(object):
         str
             The image to be used (REPOSITORY:TAG)
         """
-        base_image = "{}:{}".format(self._DOCKER_LAMBDA_REPO_NAME, runtime)
+        base_image = self.get_base_image(runtime)
 
         # Don't build the image if there are no layers.
         if not layers:
             LOG.debug("Skipping building an image since no layers were defined")
             return base_image
 
-        downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
+        if self.mount_layers:
+            LOG.debug("Skipping building an image since layers are mounted")
+            return base_image
 
-        docker_image_version = self._generate_docker_image_version(downloaded_layers, runtime)
-        image_tag = "{}:{}".format(self._SAM_CLI_REPO_NAME, docker_image_version)
+        key = self._get_resolution_key(runtime, layers)
+        image = self._get_resolved(self._images, key)
+        if image:
+            LOG.debug("Reusing image %s", image)
+            return image
+
+        with timings.phase("layer_download"):
+            downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
+
+        # The image of layers defined in the template is tagged with the fingerprint of their content, so it is built
+        # again whenever their content changes
+        with timings.phase("layer_fingerprint"):
+            fingerprints = [self._get_layer_fingerprint(layer) for layer in downloaded_layers]
+
+        # Every layer is added on top of the image of the layers before it. Each of these images is tagged, so
+        # changing a layer only rebuilds the images from that layer on.
+        image_tags = [
+            "{}:{}".format(
+                self._SAM_CLI_REPO_NAME,
+                self._generate_docker_image_version(downloaded_layers[:count], runtime, fingerprints[:count]),
+            )
+            for count in range(1, len(downloaded_layers) + 1)
+        ]
 
-        image_not_found = False
+        first_layer_to_build = self._get_first_layer_to_build(downloaded_layers, fingerprints, image_tags)
 
-        try:
-            self.docker_client.images.get(image_tag)
-        except docker.errors.ImageNotFound:
-            LOG.info("Image was not found.")
-            image_not_found = True
-
-        if (
-            self.force_image_build
-            or image_not_found
-            or any(layer.is_defined_within_template for layer in downloaded_layers)
-        ):
+        if first_layer_to_build < len(downloaded_layers):
             LOG.info("Building image...")
-            self._build_image(base_image, image_tag, downloaded_layers)
+            with timings.phase("image_build"):
+                parent_image = image_tags[first_layer_to_build - 1] if first_layer_to_build else base_image
+                for index in range(first_layer_to_build, len(downloaded_layers)):
+                    # Only the base image can be pulled. The images of the layers exist only locally.
+                    self._build_image(
+                        parent_image, image_tags[index], [downloaded_layers[index]], pull=parent_image == base_image
+                    )
+                    parent_image = image_tags[index]
+
+        if self.image_cache:
+            self._record_use(image_tags, collect=first_layer_to_build < len(downloaded_layers))
+
+        self._set_resolved(self._images, key, image_tags[-1], downloaded_layers, fingerprints)
+        return image_tags[-1]
+
+    @staticmethod
+    def get_base_image(runtime):
+        """
+        :param str runtime: Name of the Lambda runtime
+        :return str: The image that functions of the runtime run in, and that images with layers are built from
+        """
+        return "{}:{}".format(LambdaImage._DOCKER_LAMBDA_REPO_NAME, runtime)
+
+    def get_layers_dir(self, layers):
+        """
+        Downloads the layers, and returns the directory to mount as /opt of the container, when layers are mounted
+        instead of built into the image. A single layer is mounted directly. The content of several layers is merged
+        into one directory first. Like images, the directory is remembered for the rest of the process.
+
+        Parameters
+        ----------
+        layers list(samcli.commands.local.lib.provider.Layer)
+            List of layers
+
+        Returns
+        -------
+        str
+            Directory to mount as /opt. None, if there are no layers, or layers are built into the image
+        """
+        if not self.mount_layers or not layers:
+            return None
+
+        key = self._get_resolution_key(None, layers)
+        layers_dir = self._get_resolved(self._layers_dirs, key)
+        # The directory may have been evicted from the layer cache by another process
+        if layers_dir and os.path.isdir(layers_dir):
+            LOG.debug("Reusing layers in %s", layers_dir)
+            return layers_dir
+
+        with timings.phase("layer_download"):
+            downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
+
+        with timings.phase("layer_merge"):
+            fingerprints = [self._get_layer_fingerprint(layer) for layer in downloaded_layers]
+            if len(downloaded_layers) == 1:
+                layers_dir = downloaded_layers[0].codeuri
+            else:
+                merged_layers_dir = os.path.join(self.layer_downloader.layer_cache, self._MERGED_LAYERS_DIR_NAME)
+                layers_dir = merge_layers(downloaded_layers, fingerprints, merged_layers_dir)
+
+        self._set_resolved(self._layers_dirs, key, layers_dir, downloaded_layers, fingerprints)
+        return layers_dir
+
+    def invalidate(self, image=None):
+        """
+        Forgets images and layer directories that were resolved before, so they are resolved again the next time
+        they are needed. Call it when an image that this builder returned was deleted.
+
+        Parameters
+        ----------
+        image str
+            Optional. Image to forget. Defaults to forgetting every image and layer directory.
+        """
+        with self._lock:
+            if image is None:
+                self._images.clear()
+                self._layers_dirs.clear()
+                return
+
+            for key in [key for key, (resolved, _) in self._images.items() if resolved == image]:
+                del self._images[key]
+
+    def _record_use(self, image_tags, collect):
+        """
+        Records that the images were used. Recording is best effort, and never fails the invoke.
+
+        Parameters
+        ----------
+        image_tags list(str)
+            Images of the function, and the images they are built from
+        collect bool
+            True to remove images that were not used recently, in the background, because new images were built
+        """
+        try:
+            self.image_cache.touch(image_tags)
+            if collect:
+                self.image_cache.collect_in_background(keep=image_tags)
+        except (OSError, IOError):
+            LOG.debug("Failed to record the use of images %s", image_tags, exc_info=True)
+
+    @staticmethod
+    def _get_resolution_key(runtime, layers):
+        """
+        :param str runtime: Name of the Lambda runtime
+        :param list layers: List of layers
+        :return tuple: Key of the image or layer directory of the runtime and layers. Layers from AWS are immutable,
+            and are identified by their name, which contains their version.
+        """
+        return (runtime,) + tuple(layer.name for layer in layers)
+
+    def _get_resolved(self, resolved_by_key, key):
+        """
+        Returns an image or layer directory that was resolved before for the same runtime and layers. Layers in the
+        template are fingerprinted again, and the image or directory is only returned if none of them changed.
 
-        return image_tag
+        Parameters
+        ----------
+        resolved_by_key dict
+            Images or layer directories that were resolved before
+        key tuple
+            Key of the runtime and layers
+
+        Returns
+        -------
+        str
+            The image or layer directory. None, if it must be resolved again
+        """
+        if self.force_image_build:
+            return None
+
+        with self._lock:
+            entry = resolved_by_key.get(key)
+        if entry is None:
+            return None
+
+        resolved, local_layers = entry
+        with timings.phase("layer_fingerprint"):
+            for layer, fingerprint in local_layers:
+                if self._get_layer_fingerprint(layer) != fingerprint:
+                    LOG.debug("Layer %s changed", layer.name)
+                    return None
+
+        return resolved
+
+    def _set_resolved(self, resolved_by_key, key, resolved, layers, fingerprints):
+        """
+        Remembers an image or layer directory, with the fingerprints of the layers in the template it was resolved
+        from. Nothing is remembered if the content of one of these layers is unknown.
+        """
+        local_layers = [
+            (layer, fingerprint) for layer, fingerprint in zip(layers, fingerprints) if layer.is_defined_within_template
+        ]
+        if self.force_image_build or any(not fingerprint for _, fingerprint in local_layers):
+            return
+
+        with self._lock:
+            resolved_by_key[key] = (resolved, local_layers)
+
+    def _get_first_layer_to_build(self, layers, fingerprints, image_tags):
+        """
+        Finds the first layer whose image must be built. Images of the layers before it exist already.
+
+        Parameters
+        ----------
+        layers list(samcli.commands.local.lib.provider.Layer)
+            Downloaded layers
+        fingerprints list(str)
+            Fingerprint of the content of each layer
+        image_tags list(str)
+            Tag of the image of each layer
+
+        Returns
+        -------
+        int
+            Index of the first layer to build. Number of layers, if no image needs to be built
+        """
+        if self.force_image_build:
+            return 0
+
+        # Layers in the template whose content could not be fingerprinted may have changed since the image was built
+        first_unknown = next(
+            (
+                index
+                for index, (layer, fingerprint) in enumerate(zip(layers, fingerprints))
+                if layer.is_defined_within_template and not fingerprint
+            ),
+            len(layers),
+        )
+
+        for index in reversed(range(first_unknown)):
+            try:
+                self.docker_client.images.get(image_tags[index])
+                return index + 1
+            except docker.errors.ImageNotFound:
+                LOG.debug("Image %s was not found", image_tags[index])
+
+        LOG.info("Image was not found.")
+        return 0
+
+    def _get_layer_fingerprint(self, layer):
+        """
+        Parameters
+        ----------
+        layer samcli.commands.local.lib.provider.Layer
+            Downloaded layer
+
+        Returns
+        -------
+        str
+            Fingerprint of the content of a layer defined in the template. None for other layers, and for layers
+            whose content cannot be read
+        """
+        if not layer.is_defined_within_template:
+            return None
+
+        try:
+            return self._fingerprinter.fingerprint(layer.codeuri)
+        except (OSError, IOError):
+            LOG.debug("Failed to fingerprint layer %s", layer.name, exc_info=True)
+            return None
 
     @staticmethod
-    def _generate_docker_image_version(layers, runtime):
+    def _generate_docker_image_version(layers, runtime, fingerprints=None):
         """
         Generate the Docker TAG that will be used to create the image
 
@@ -130,6 +387,9 @@ class LambdaImage(object):
         runtime str
             Runtime of the image to create
 
+        fingerprints list(str)
+            Optional. Fingerprint of the content of each layer, or None for layers that are identified by their name
+
         Returns
         -------
         str
@@ -141,11 +401,14 @@ class LambdaImage(object):
         # specified in the template. This will allow reuse of the runtime and layers across different
         # functions that are defined. If two functions use the same runtime with the same layers (in the
         # same order), SAM CLI will only produce one image and use this image across both functions for invoke.
-        return (
-            runtime + "-" + hashlib.sha256("-".join([layer.name for layer in layers]).encode("utf-8")).hexdigest()[0:25]
-        )
+        layer_ids = [layer.name for layer in layers]
+        for index, fingerprint in enumerate(fingerprints or []):
+            if fingerprint:
+                layer_ids[index] += "@" + fingerprint
 
-    def _build_image(self, base_image, docker_tag, layers):
+        return runtime + "-" + hashlib.sha256("-".join(layer_ids).encode("utf-8")).hexdigest()[0:25]
+
+    def _build_image(self, base_image, docker_tag, layers, pull=True):
         """
         Builds the image
 
@@ -157,6 +420,8 @@ class LambdaImage(object):
             Docker tag (REPOSITORY:TAG) to use when building the image
         layers list(samcli.commands.local.lib.provider.Layer)
             List of Layers to be use to mount in the image
+        pull bool
+            Optional. False, if the base image must not be pulled, because it was built locally
 
         Returns
         -------
@@ -169,29 +434,22 @@ class LambdaImage(object):
         """
         dockerfile_content = self._generate_dockerfile(base_image, layers)
 
-        # Create dockerfile in the same directory of the layer cache
-        dockerfile_name = "dockerfile_" + str(uuid.uuid4())
-        full_dockerfile_path = Path(self.layer_downloader.layer_cache, dockerfile_name)
+        tar_paths = {layer.codeuri: "/" + layer.name for layer in layers}
+        tar_contents = {"Dockerfile": dockerfile_content.encode("utf-8")}
 
+        # The build context is sent to Docker while it is generated
         try:
-            with open(str(full_dockerfile_path), "w") as dockerfile:
-                dockerfile.write(dockerfile_content)
-
-            tar_paths = {str(full_dockerfile_path): "Dockerfile"}
-            for layer in layers:
-                tar_paths[layer.codeuri] = "/" + layer.name
-
-            with create_tarball(tar_paths) as tarballfile:
-                try:
-                    self.docker_client.images.build(
-                        fileobj=tarballfile, custom_context=True, rm=True, tag=docker_tag, pull=not self.skip_pull_image
-                    )
-                except (docker.errors.BuildError, docker.errors.APIError):
-                    LOG.exception("Failed to build Docker Image")
-                    raise ImageBuildException("Building Image failed.")
-        finally:
-            if full_dockerfile_path.exists():
-                full_dockerfile_path.unlink()
+            self.docker_client.images.build(
+                fileobj=stream_tarball(tar_paths, tar_contents),
+                custom_context=True,
+                rm=True,
+                tag=docker_tag,
+                pull=pull and not self.skip_pull_image,
+                labels={IMAGE_LABEL: "lambda"},
+            )
+        except (docker.errors.BuildError, docker.errors.APIError):
+            LOG.exception("Failed to build Docker Image")
+            raise ImageBuildException("Building Image failed.")
 
     @staticmethod
     def _generate_dockerfile(base_image, layers):
@@ -2,13 +2,24 @@
 Provides classes that interface with Docker to create, execute and manage containers.
 """
 
+import io
 import logging
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import sys
 import docker
 import requests
 
+from samcli.lib.utils import timings
 from samcli.lib.utils.stream_writer import StreamWriter
+from .client import get_docker_client
+from .container import remove_container
+from .reaper import ContainerReaper
+from .standby_pool import StandbyContainerPool
+from .warm_pool import WarmContainerPool
 
 LOG = logging.getLogger(__name__)
 
@@ -20,18 +31,50 @@ class ContainerManager(object):
     serve requests faster. It is also thread-safe.
     """
 
-    def __init__(self, docker_network_id=None, docker_client=None, skip_pull_image=False):
+    # Number of images that ``pull_images`` pulls at the same time
+    MAX_PULL_WORKERS = 4
+
+    def __init__(
+        self,
+        docker_network_id=None,
+        docker_client=None,
+        skip_pull_image=False,
+        standby_pool_size=0,
+        image_refresh_interval=None,
+    ):
         """
         Instantiate the container manager
 
         :param docker_network_id: Optional Docker network to run this container in.
         :param docker_client: Optional docker client object
         :param bool skip_pull_image: Should we pull new Docker container image?
+        :param int standby_pool_size: Optional. Number of containers per configuration that are created ahead of the
+            invokes that run them. Defaults to 0 ie. containers are created when they are run.
+        :param int image_refresh_interval: Optional. Number of seconds after which an image that was pulled is pulled
+            again, in the background. Defaults to None ie. every image is pulled at most once by this manager.
         """
 
         self.skip_pull_image = skip_pull_image
         self.docker_network_id = docker_network_id
-        self.docker_client = docker_client or docker.from_env()
+        self.image_refresh_interval = image_refresh_interval
+        self.docker_client = docker_client or get_docker_client()
+
+        # Image name => _CachedImage, for every image that is known to be available locally
+        self._images = {}
+        self._image_locks = defaultdict(threading.Lock)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # Removes containers in the background, so that nothing waits for Docker to remove a container
+        self._reaper = ContainerReaper(remove_container)
+
+        # Containers kept running after a warm invoke, ready to be reused by the next invoke of the same function
+        self._warm_pool = WarmContainerPool(on_evict=self.stop)
+
+        # Containers that are created, but not started yet, ready to be run by the next invoke of the same function
+        self._standby_pool = None
+        if standby_pool_size:
+            self._standby_pool = StandbyContainerPool(self._create, on_evict=self.stop, size=standby_pool_size)
 
     @property
     def is_docker_reachable(self):
@@ -53,22 +96,138 @@ class ContainerManager(object):
             LOG.debug("Docker is not reachable", exc_info=True)
             return False
 
-    def run(self, container, input_data=None, warm=False):
+    def run(self, container, input_data=None, warm=False, standby=True):
         """
         Create and run a Docker container based on the given configuration.
 
         :param samcli.local.docker.container.Container container: Container to create and run
         :param input_data: Optional. Input data sent to the container through container's stdin.
         :param bool warm: Indicates if an existing container can be reused. Defaults False ie. a new container will
-            be created for every request.
+            be created for every request. When True, an idle container with the same configuration that was given
+            back through ``release`` is returned instead of starting the given container. When False and standby
+            containers are enabled, a standby container with the same configuration is started instead of the given
+            container, if one is available.
+        :param bool standby: Optional. False, if no other container will ever have the same configuration, so standby
+            containers are neither used nor prepared for it. Defaults to True.
+        :return samcli.local.docker.container.Container: The running container. This is either the given container,
+            a warm container that was reused, or a standby container
         :raises DockerImagePullFailedException: If the Docker image was not available in the server
         """
 
         if warm:
-            raise ValueError("The facility to invoke warm container does not exist")
+            warm_container = self._warm_pool.acquire(container.config_key)
+            if warm_container:
+                LOG.debug("Reusing warm container %s", warm_container.id)
+                return warm_container
+
+        elif standby and self._standby_pool is not None:
+            standby_container = self._standby_pool.acquire(container.config_key)
+            if standby_container:
+                LOG.debug("Starting standby container %s", standby_container.id)
+                # Replace the container that was just taken, while this one runs
+                self._standby_pool.replenish(container)
+
+                try:
+                    with timings.phase("start"):
+                        standby_container.start(input_data=input_data)
+                    return standby_container
+                except Exception:  # pylint: disable=broad-except
+                    # Start the given container instead, the same way as without a standby container
+                    LOG.debug("Failed to start standby container %s", standby_container.id, exc_info=True)
+                    self.stop(standby_container)
+
+        with timings.phase("image_pull"):
+            self._ensure_image(container.image)
+
+        if standby and self._standby_pool is not None and not warm:
+            # The image is available now. Prepare containers for the next invokes in the background.
+            self._standby_pool.replenish(container)
+
+        if not container.is_created():
+            with timings.phase("create"):
+                try:
+                    self._create(container)
+                except docker.errors.ImageNotFound:
+                    # The image was removed after it was looked up. Look it up again, once.
+                    LOG.debug("Image %s is gone. Looking it up again", container.image)
+                    with self._lock:
+                        self._images.pop(container.image, None)
+                    self._ensure_image(container.image)
+                    self._create(container)
+
+        with timings.phase("start"):
+            container.start(input_data=input_data)
+
+        return container
+
+    def pull_images(self, image_names):
+        """
+        Looks up, and pulls if necessary, every given image ahead of the containers that use them, the same way
+        ``run`` does for the image of a container. Images are pulled in parallel, so this takes about as long as the
+        slowest pull. Progress is reported once per image, instead of interleaving the progress of every pull.
 
-        image_name = container.image
+        This blocks until every image is available. An image that fails to pull is skipped. The first container that
+        uses it pulls it again.
+
+        :param iterable image_names: Names of the images
+        """
+        image_names = sorted(set(image_names))
+        if not image_names:
+            return
+
+        LOG.info("Fetching %d Docker container image(s): %s", len(image_names), ", ".join(image_names))
+
+        executor = ThreadPoolExecutor(max_workers=min(self.MAX_PULL_WORKERS, len(image_names)))
+        futures = {
+            executor.submit(self._ensure_image, image_name, StreamWriter(io.StringIO())): image_name
+            for image_name in image_names
+        }
+
+        done = 0
+        try:
+            for future in as_completed(futures):
+                done += 1
+                if future.exception():
+                    LOG.warning("Failed to fetch image %s: %s", futures[future], future.exception())
+                else:
+                    LOG.info("Fetched image %s (%d/%d)", futures[future], done, len(image_names))
+        finally:
+            executor.shutdown(wait=True)
+
+    def _ensure_image(self, image_name, stream=None):
+        """
+        Makes sure the image is available locally. Each image is looked up, and pulled if necessary, only the first
+        time it is used by this manager. After that, the image is refreshed in the background every
+        ``image_refresh_interval`` seconds, if an interval is set, without holding up the caller.
 
+        :param string image_name: Name of the image
+        :param samcli.lib.utils.stream_writer.StreamWriter stream: Optional. Stream to write the progress of a pull to
+        :raises DockerImagePullFailedException: If the Docker image was not available in the server
+        """
+        with self._lock:
+            image_lock = self._image_locks[image_name]
+
+        # Invokes that need the same image at the same time wait for a single lookup or pull
+        with image_lock:
+            if image_name not in self._images:
+                self._resolve_image(image_name, stream=stream)
+                cached = _CachedImage(self._get_image_id(image_name), time.time())
+
+                with self._lock:
+                    self._images[image_name] = cached
+                return
+
+        if self._is_refresh_due(image_name):
+            self._refresh_image_in_background(image_name)
+
+    def _resolve_image(self, image_name, stream=None):
+        """
+        Looks up the image, and pulls it unless asked to skip pulling
+
+        :param string image_name: Name of the image
+        :param samcli.lib.utils.stream_writer.StreamWriter stream: Optional. Stream to write the progress of a pull to
+        :raises DockerImagePullFailedException: If the Docker image was not available in the server
+        """
         is_image_local = self.has_image(image_name)
 
         # Skip Pulling a new image if: a) Image name is samcli/lambda OR b) Image is available AND
@@ -77,7 +236,7 @@ class ContainerManager(object):
             LOG.info("Requested to skip pulling images ...\n")
         else:
             try:
-                self.pull_image(image_name)
+                self.pull_image(image_name, stream=stream)
             except DockerImagePullFailedException:
                 if not is_image_local:
                     raise DockerImagePullFailedException(
@@ -86,21 +245,82 @@ class ContainerManager(object):
 
                 LOG.info("Failed to download a new %s image. Invoking with the already downloaded image.", image_name)
 
-        if not container.is_created():
-            # Create the container first before running.
-            # Create the container in appropriate Docker network
-            container.network_id = self.docker_network_id
-            container.create()
+    def _is_refresh_due(self, image_name):
+        if self.image_refresh_interval is None or self.skip_pull_image or image_name.startswith("samcli/lambda"):
+            return False
+
+        with self._lock:
+            cached = self._images[image_name]
+            if image_name in self._refreshing or time.time() - cached.pulled_at < self.image_refresh_interval:
+                return False
+
+            self._refreshing.add(image_name)
+            return True
+
+    def _refresh_image_in_background(self, image_name):
+        def refresh():
+            try:
+                # Progress of a background pull would interleave with the output of invokes
+                self.pull_image(image_name, stream=StreamWriter(io.StringIO()))
+                image_id = self._get_image_id(image_name)
+            except DockerImagePullFailedException:
+                LOG.debug("Failed to refresh image %s. Keeping the local image", image_name, exc_info=True)
+                image_id = self._images[image_name].image_id
+
+            with self._lock:
+                self._images[image_name] = _CachedImage(image_id, time.time())
+                self._refreshing.discard(image_name)
+
+        LOG.debug("Refreshing image %s in the background", image_name)
+        refresher = threading.Thread(target=refresh, name="image-refresh")
+        refresher.daemon = True
+        refresher.start()
+
+    def _get_image_id(self, image_name):
+        try:
+            return self.docker_client.images.get(image_name).id
+        except docker.errors.ImageNotFound:
+            return None
+
+    def _create(self, container):
+        """
+        Create the container in appropriate Docker network
 
-        container.start(input_data=input_data)
+        :param samcli.local.docker.container.Container container: Container to create
+        """
+        container.network_id = self.docker_network_id
+        container.create()
 
     def stop(self, container):
         """
-        Stop and delete the container
+        Stop and delete the container. The container is removed in the background. It is no longer usable once this
+        method returns.
 
         :param samcli.local.docker.container.Container container: Container to stop
         """
-        container.delete()
+        container.delete(reaper=self._reaper)
+
+    def release(self, container):
+        """
+        Gives a running container back to the manager once an invoke is done with it, so that a later ``run`` with
+        ``warm=True`` can reuse it. The container is stopped and deleted once it has been idle for too long.
+
+        :param samcli.local.docker.container.Container container: Container to keep warm
+        """
+        self._warm_pool.release(container.config_key, container)
+
+    def shutdown(self):
+        """
+        Stop and delete all the containers that are kept warm or on standby, and wait until every stopped container
+        is removed
+        """
+        self._warm_pool.shutdown()
+
+        if self._standby_pool is not None:
+            self._standby_pool.shutdown()
+
+        # Containers evicted above are queued for removal too. Wait for all of them, so none is left behind.
+        self._reaper.shutdown()
 
     def pull_image(self, image_name, stream=None):
         """
@@ -153,5 +373,9 @@ class ContainerManager(object):
             return False
 
 
+# Image that was looked up or pulled by the manager, with the ID it had at that time
+_CachedImage = namedtuple("_CachedImage", ["image_id", "pulled_at"])
+
+
 class DockerImagePullFailedException(Exception):
     pass
@@ -0,0 +1,80 @@
+"""
+Removes containers in the background
+"""
+
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+LOG = logging.getLogger(__name__)
+
+
+class ContainerReaper(object):
+    """
+    Removes containers on a small pool of background threads. Docker can take hundreds of milliseconds to remove a
+    container. Nothing needs to wait for that once the container is done, so removal is queued here instead of
+    delaying the response of the invoke. This class is thread-safe.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, remove, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Initializes the class
+
+        Parameters
+        ----------
+        remove callable
+            Called with a Docker client and the ID of a container. It must remove the container.
+        max_workers int
+            Optional. Number of containers removed at the same time
+        """
+        self._remove = remove
+        self._max_workers = max_workers
+
+        self._executor = None
+        self._is_shutdown = False
+        self._lock = threading.Lock()
+
+    def reap(self, docker_client, container_id):
+        """
+        Queues the container for removal. If the reaper was shut down already, the container is removed right away.
+
+        Parameters
+        ----------
+        docker_client docker.DockerClient
+            Docker client to remove the container with
+        container_id str
+            ID of the container to remove
+        """
+        with self._lock:
+            if not self._is_shutdown:
+                if not self._executor:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+
+                self._executor.submit(self._reap, docker_client, container_id)
+                return
+
+        self._reap(docker_client, container_id)
+
+    def shutdown(self):
+        """
+        Waits until every queued container is removed. Containers given to ``reap`` from now on are removed right
+        away.
+        """
+        with self._lock:
+            self._is_shutdown = True
+            executor = self._executor
+            self._executor = None
+
+        if executor:
+            executor.shutdown(wait=True)
+
+    def _reap(self, docker_client, container_id):
+        LOG.debug("Removing container %s", container_id)
+        try:
+            self._remove(docker_client, container_id)
+        except Exception:  # pylint: disable=broad-except
+            # Nobody is waiting for this container anymore. Worst case, it is left behind until Docker is cleaned up.
+            LOG.debug("Failed to remove container %s", container_id, exc_info=True)
@@ -0,0 +1,210 @@
+"""
+Pool of containers that are created ahead of the invokes that will start them
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque, OrderedDict
+
+from concurrent.futures import ThreadPoolExecutor
+
+LOG = logging.getLogger(__name__)
+
+
+class StandbyContainerPool(object):
+    """
+    Keeps a few containers per configuration created, and connected to their network, but not started. An invoke
+    that takes a standby container only has to start it, instead of waiting for Docker to create it first. The pool
+    replenishes itself in the background every time a container is taken out of it.
+
+    Containers are grouped by ``config_key``. Two containers with the same key are interchangeable. A configuration
+    that was not used for ``idle_timeout`` seconds, or that is beyond the ``max_keys`` most recently used ones, for
+    example because a changed layer superseded its image, is evicted with its containers. This class is thread-safe.
+    """
+
+    DEFAULT_SIZE = 2
+    DEFAULT_IDLE_TIMEOUT = 300  # 5 minutes in seconds
+    DEFAULT_MAX_KEYS = 10
+
+    # Number of containers being created in the background at the same time
+    _MAX_WORKERS = 2
+
+    def __init__(
+        self, create, on_evict, size=DEFAULT_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_keys=DEFAULT_MAX_KEYS
+    ):
+        """
+        Initializes the class
+
+        Parameters
+        ----------
+        create callable
+            Called with a container that is not created yet. It must create the container.
+        on_evict callable
+            Called with the container every time a standby container leaves the pool without being started. This must
+            take care of removing the container.
+        size int
+            Optional. Number of standby containers kept for each configuration
+        idle_timeout int
+            Optional. Number of seconds after which the containers of a configuration that was not used are evicted
+        max_keys int
+            Optional. Number of configurations that standby containers are kept for
+        """
+        self._create = create
+        self._on_evict = on_evict
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._max_keys = max_keys
+
+        # Config key => time it was last used. Ordered from the least recently used to the most recently used key.
+        self._keys = OrderedDict()
+
+        # Config key => standby containers. Containers are handed out in the order they were created.
+        self._standby = defaultdict(deque)
+        # Config key => number of containers being created in the background
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+
+        self._executor = None
+        self._is_shutdown = False
+
+    def acquire(self, key):
+        """
+        Takes a standby container with the given key out of the pool. The caller owns the container from now on.
+
+        Parameters
+        ----------
+        key str
+            Key identifying the configuration of the container
+
+        Returns
+        -------
+        samcli.local.docker.container.Container
+            A created container that was never started. None, if there is no standby container with the given key
+        """
+        with self._lock:
+            if key in self._keys:
+                self._touch(key)
+            evicted = self._pop_stale()
+
+            standby = self._standby.get(key)
+            container = standby.popleft() if standby else None
+
+        self._evict(evicted)
+        return container
+
+    def replenish(self, container):
+        """
+        Creates containers like the given one in the background, until the pool holds ``size`` of them again. The
+        image of the container must be available locally.
+
+        Parameters
+        ----------
+        container samcli.local.docker.container.Container
+            Container whose configuration the standby containers must have. It is not modified.
+        """
+        key = container.config_key
+
+        with self._lock:
+            if self._is_shutdown:
+                return
+
+            self._touch(key)
+            evicted = self._pop_stale()
+
+            missing = self._size - len(self._standby[key]) - self._pending[key]
+            if missing > 0:
+                self._submit(key, container, missing)
+
+        self._evict(evicted)
+
+    def shutdown(self):
+        """
+        Waits for the containers being created, and evicts every standby container
+        """
+        with self._lock:
+            self._is_shutdown = True
+            executor = self._executor
+
+        if executor:
+            executor.shutdown(wait=True)
+
+        with self._lock:
+            evicted = [container for standby in self._standby.values() for container in standby]
+            self._standby.clear()
+            self._keys.clear()
+
+        self._evict(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(standby) for standby in self._standby.values())
+
+    def _submit(self, key, container, missing):
+        """
+        Creates the missing containers of the key in the background. Must be called while holding the lock.
+        """
+        self._pending[key] += missing
+
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=self._MAX_WORKERS)
+
+        for _ in range(missing):
+            self._executor.submit(self._create_standby, key, container.clone())
+
+    def _touch(self, key):
+        """
+        Marks the key as the most recently used one. Must be called while holding the lock.
+        """
+        self._keys.pop(key, None)
+        self._keys[key] = time.time()
+
+    def _pop_stale(self):
+        """
+        Removes the keys that were not used for too long, or that exceed the number of keys, with their standby
+        containers. Must be called while holding the lock.
+
+        :return list: Standby containers to evict
+        """
+        now = time.time()
+        evicted = []
+
+        for key, last_used in list(self._keys.items()):
+            if len(self._keys) <= self._max_keys and now - last_used <= self._idle_timeout:
+                break
+
+            LOG.debug("Evicting the standby containers of configuration %s", key)
+            del self._keys[key]
+            evicted.extend(self._standby.pop(key, ()))
+
+        return evicted
+
+    def _create_standby(self, key, container):
+        try:
+            self._create(container)
+        except Exception:  # pylint: disable=broad-except
+            # The next invoke creates its container on the request path, and tries to replenish the pool again
+            LOG.debug("Failed to create a standby container", exc_info=True)
+            with self._lock:
+                self._pending[key] -= 1
+            return
+
+        LOG.debug("Created standby container %s", container.id)
+
+        with self._lock:
+            self._pending[key] -= 1
+            # The key may have been evicted while the container was being created
+            is_kept = not self._is_shutdown and key in self._keys
+            if is_kept:
+                self._standby[key].append(container)
+
+        if not is_kept:
+            self._evict([container])
+
+    def _evict(self, containers):
+        for container in containers:
+            LOG.debug("Evicting standby container %s", container.id)
+            try:
+                self._on_evict(container)
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Failed to evict standby container %s", container.id, exc_info=True)
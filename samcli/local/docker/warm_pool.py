@@ -0,0 +1,174 @@
+"""
+Pool of warm containers that are kept running between invokes
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+LOG = logging.getLogger(__name__)
+
+
+class WarmContainerPool(object):
+    """
+    Keeps containers running after an invoke so that a later invoke of the same function can reuse them instead of
+    paying for a full create/start/delete cycle. Containers are grouped by a key that identifies their configuration.
+    Two containers with the same key are interchangeable.
+
+    A container is either *leased*, ie. serving an invoke, or *idle* in the pool. Only idle containers are tracked
+    here. Idle containers are evicted when they have not been used for ``idle_timeout`` seconds, or when there are
+    more than ``max_size`` of them, in which case the least recently used one goes first. This class is thread-safe.
+    """
+
+    DEFAULT_IDLE_TIMEOUT = 300  # 5 minutes in seconds
+    DEFAULT_MAX_SIZE = 10
+
+    # How often the background thread looks for containers that were idle for too long
+    _SWEEP_INTERVAL = 5
+
+    def __init__(self, on_evict, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_size=DEFAULT_MAX_SIZE):
+        """
+        Initializes the class
+
+        Parameters
+        ----------
+        on_evict callable
+            Called with the container every time a container leaves the pool without being reused. This must take
+            care of stopping and removing the container.
+        idle_timeout int
+            Optional. Number of seconds a container can stay idle in the pool before it is evicted
+        max_size int
+            Optional. Maximum number of idle containers kept in the pool
+        """
+        self._on_evict = on_evict
+        self._idle_timeout = idle_timeout
+        self._max_size = max_size
+
+        # Container ID => (key, container, time when the container was returned to the pool).
+        # Ordered from the least recently used to the most recently used container.
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._sweeper = None
+        self._shutdown_event = threading.Event()
+
+    def acquire(self, key):
+        """
+        Takes an idle container with the given key out of the pool. The caller has exclusive use of the container
+        until it is given back through ``release``.
+
+        Parameters
+        ----------
+        key str
+            Key identifying the configuration of the container
+
+        Returns
+        -------
+        samcli.local.docker.container.Container
+            An idle container with the given key. None, if there is no such container in the pool
+        """
+        with self._lock:
+            # Prefer the most recently used container. It is the warmest one and the least likely to be evicted soon.
+            for container_id in reversed(self._idle):
+                container_key, container, _ = self._idle[container_id]
+                if container_key == key:
+                    del self._idle[container_id]
+                    return container
+
+        return None
+
+    def release(self, key, container):
+        """
+        Returns a container to the pool, making it available for reuse
+
+        Parameters
+        ----------
+        key str
+            Key identifying the configuration of the container
+        container samcli.local.docker.container.Container
+            Container to return to the pool. It must still be running. It is evicted right away, if the pool was
+            shut down.
+        """
+        with self._lock:
+            if self._shutdown_event.is_set():
+                # An invoke that was running during the shutdown must not leave its container behind
+                evicted = [container]
+            else:
+                self._idle[container.id] = (key, container, time.time())
+                evicted = self._pop_evictable()
+
+        self._ensure_sweeper()
+        self._evict(evicted)
+
+    def shutdown(self):
+        """
+        Evicts every idle container and stops the background thread. Containers that are leased at this point are
+        the responsibility of the caller.
+        """
+        self._shutdown_event.set()
+
+        with self._lock:
+            evicted = [container for _, container, _ in self._idle.values()]
+            self._idle.clear()
+
+        self._evict(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    def _pop_evictable(self):
+        """
+        Removes containers that have been idle for too long, or that exceed the size of the pool. Must be called while
+        holding the lock.
+
+        Returns
+        -------
+        list(samcli.local.docker.container.Container)
+            Containers that were removed from the pool
+        """
+        evicted = []
+        expiry = time.time() - self._idle_timeout
+
+        while self._idle:
+            container_id = next(iter(self._idle))
+            _, container, last_used = self._idle[container_id]
+
+            if last_used > expiry and len(self._idle) <= self._max_size:
+                # Everything after this container was used more recently. Nothing else to evict
+                break
+
+            del self._idle[container_id]
+            evicted.append(container)
+
+        return evicted
+
+    def _evict(self, containers):
+        for container in containers:
+            LOG.debug("Evicting warm container %s", container.id)
+            try:
+                self._on_evict(container)
+            except Exception:  # pylint: disable=broad-except
+                # One container failing to be removed must not keep the rest around
+                LOG.debug("Failed to evict warm container %s", container.id, exc_info=True)
+
+    def _ensure_sweeper(self):
+        """
+        Starts the background thread that evicts idle containers, if it is not running yet
+        """
+        with self._lock:
+            if self._sweeper or self._shutdown_event.is_set():
+                return
+
+            self._sweeper = threading.Thread(target=self._sweep, name="warm-container-sweeper")
+            # Never keep the process alive just to evict containers. InvokeContext shuts the pool down on exit.
+            self._sweeper.daemon = True
+            self._sweeper.start()
+
+    def _sweep(self):
+        while not self._shutdown_event.wait(self._SWEEP_INTERVAL):
+            with self._lock:
+                evicted = self._pop_evictable()
+
+            self._evict(evicted)
@@ -2,12 +2,11 @@
 
 import json
 import logging
-import io
 
 from flask import Flask, request
 
 from samcli.lib.utils.stream_writer import StreamWriter
-from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
+from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputSplitter
 from samcli.local.lambdafn.exceptions import FunctionNotFound
 from .lambda_error_responses import LambdaErrorResponses
 
@@ -142,7 +141,8 @@ class LocalLambdaInvokeService(BaseLocalService):
 
         request_data = request_data.decode("utf-8")
 
-        stdout_stream = io.BytesIO()
+        # Logs the function writes to stdout are forwarded to stderr while the function runs. Only the response is kept.
+        stdout_stream = LambdaOutputSplitter(log_stream=self.stderr)
         stdout_stream_writer = StreamWriter(stdout_stream, self.is_debugging)
 
         try:
@@ -151,13 +151,7 @@ class LocalLambdaInvokeService(BaseLocalService):
             LOG.debug("%s was not found to invoke.", function_name)
             return LambdaErrorResponses.resource_not_found(function_name)
 
-        lambda_response, lambda_logs, is_lambda_user_error_response = LambdaOutputParser.get_lambda_output(
-            stdout_stream
-        )
-
-        if self.stderr and lambda_logs:
-            # Write the logs to stderr if available.
-            self.stderr.write(lambda_logs)
+        lambda_response, is_lambda_user_error_response = stdout_stream.get_lambda_output()
 
         if is_lambda_user_error_response:
             return self.service_response(
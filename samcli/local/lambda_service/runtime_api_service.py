@@ -0,0 +1,271 @@
+"""Local implementation of the Lambda Runtime API that long-lived runtime containers fetch their events from"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+
+from flask import Flask, request
+from six.moves import queue
+from werkzeug.serving import make_server
+
+from samcli.local.services.base_local_service import BaseLocalService
+
+LOG = logging.getLogger(__name__)
+
+
+class LocalRuntimeApiService(BaseLocalService):
+    """
+    Serves the Lambda Runtime API (https://docs.aws.amazon.com/lambda/latest/dg/runtimes-api.html) to one runtime
+    container. The runtime in the container loops over ``/runtime/invocation/next``, exactly like it does on Lambda,
+    so the container is started once and serves any number of invokes. Invokes are handed to the runtime through
+    ``invoke``, one at a time.
+
+    Unlike the other services, this one does not block the calling thread. It is served from a background thread
+    between ``start`` and ``stop``.
+    """
+
+    _API_VERSION = "2018-06-01"
+
+    # How often a runtime waiting for the next invocation checks whether the service is stopping
+    _POLL_INTERVAL = 1
+
+    def __init__(self, host, port=0, function_arn=None):
+        """
+        Creates the service
+
+        Parameters
+        ----------
+        host str
+            Address to listen on. It must be reachable from the runtime container.
+        port int
+            Optional. Port to listen on. Defaults to 0, ie. a free port picked by the operating system. The actual port
+            is available from ``port`` once the service started.
+        function_arn str
+            Optional. ARN of the function, passed to the runtime with every invocation
+        """
+        super(LocalRuntimeApiService, self).__init__(is_debugging=False, port=port, host=host)
+        self.function_arn = function_arn or "arn:aws:lambda:us-east-1:012345678912:function:function"
+
+        self._server = None
+        self._stopped = threading.Event()
+        self._init_error = None
+
+        # Invocations that the runtime has not fetched yet
+        self._queued = queue.Queue()
+
+        # Request ID => Invocations that the runtime fetched, but did not respond to yet
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def create(self):
+        """
+        Creates a Flask Application that can be started.
+        """
+        self._app = Flask(__name__)
+
+        routes = [
+            ("/{}/runtime/invocation/next".format(self._API_VERSION), self._next_invocation_handler, "GET"),
+            (
+                "/{}/runtime/invocation/<request_id>/response".format(self._API_VERSION),
+                self._invocation_response_handler,
+                "POST",
+            ),
+            (
+                "/{}/runtime/invocation/<request_id>/error".format(self._API_VERSION),
+                self._invocation_error_handler,
+                "POST",
+            ),
+            ("/{}/runtime/init/error".format(self._API_VERSION), self._init_error_handler, "POST"),
+        ]
+
+        for path, view_func, method in routes:
+            self._app.add_url_rule(
+                path, endpoint=path, view_func=view_func, methods=[method], provide_automatic_options=False
+            )
+
+    def start(self):
+        """
+        Starts serving the API from a background thread. Returns once the service accepts connections.
+        """
+        if not self._app:
+            raise RuntimeError("The application must be created before running")
+
+        # Every runtime holds a connection open while it waits for the next invocation. Each request needs its own
+        # thread, so that the response of an invocation is never queued behind that connection.
+        self._server = make_server(self.host, self.port, self._app, threaded=True)
+        self.port = self._server.server_port
+
+        LOG.debug("Runtime API is listening on %s:%s", self.host, self.port)
+
+        server_thread = threading.Thread(target=self._server.serve_forever, name="runtime-api-{}".format(self.port))
+        server_thread.daemon = True
+        server_thread.start()
+
+    def stop(self):
+        """
+        Stops the service. Invokes that are still waiting for a response fail.
+        """
+        self._stopped.set()
+
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        with self._lock:
+            unfinished = list(self._in_flight.values())
+            self._in_flight.clear()
+
+        while True:
+            try:
+                unfinished.append(self._queued.get_nowait())
+            except queue.Empty:
+                break
+
+        for invocation in unfinished:
+            invocation.fail()
+
+    def invoke(self, event, timeout=None):
+        """
+        Hands the event to the runtime and waits for it to respond
+
+        ##### NOTE: THIS IS A LONG BLOCKING CALL #####
+
+        Parameters
+        ----------
+        event bytes
+            Event passed to the function
+        timeout int
+            Optional. Timeout of the function in seconds. It is passed to the runtime as the invocation deadline.
+            Enforcing the timeout is up to the caller.
+
+        Returns
+        -------
+        _Invocation
+            The finished invocation. ``response`` is None, if the invocation failed before the runtime responded
+        """
+        deadline_ms = int((time.time() + (timeout or 0)) * 1000)
+        invocation = _Invocation(str(uuid.uuid4()), event, deadline_ms)
+
+        if self._init_error is not None:
+            # The runtime failed to initialize. It will never fetch this invocation.
+            invocation.complete(self._init_error, is_error=True)
+            return invocation
+
+        self._queued.put(invocation)
+
+        if self._stopped.is_set():
+            # The service stopped while the invocation was being queued. Make sure it does not wait forever.
+            self.stop()
+
+        invocation.wait()
+        return invocation
+
+    def _next_invocation_handler(self):
+        """
+        Handles ``GET /runtime/invocation/next``. Waits until an invocation is available and returns its event.
+        """
+        invocation = None
+        while invocation is None and not self._stopped.is_set():
+            try:
+                invocation = self._queued.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+        if invocation is None:
+            # The runtime gets disconnected, because the container is about to be removed
+            return self._error_response(503, "ServiceUnavailable", "Runtime API is shutting down")
+
+        with self._lock:
+            self._in_flight[invocation.request_id] = invocation
+
+        if self._stopped.is_set():
+            # ``stop`` may have collected the unfinished invocations before this one was added
+            invocation.fail()
+
+        headers = {
+            "Content-Type": "application/json",
+            "Lambda-Runtime-Aws-Request-Id": invocation.request_id,
+            "Lambda-Runtime-Deadline-Ms": str(invocation.deadline_ms),
+            "Lambda-Runtime-Invoked-Function-Arn": self.function_arn,
+            "Lambda-Runtime-Trace-Id": "Root=1-{}-{};Sampled=0".format(
+                "{:x}".format(int(time.time())), uuid.uuid4().hex[:24]
+            ),
+        }
+        return self.service_response(invocation.event, headers, 200)
+
+    def _invocation_response_handler(self, request_id):
+        """
+        Handles ``POST /runtime/invocation/<request_id>/response``
+        """
+        return self._complete_invocation(request_id, is_error=False)
+
+    def _invocation_error_handler(self, request_id):
+        """
+        Handles ``POST /runtime/invocation/<request_id>/error``
+        """
+        return self._complete_invocation(request_id, is_error=True)
+
+    def _init_error_handler(self):
+        """
+        Handles ``POST /runtime/init/error``. The runtime failed to initialize, ie. it will not fetch any invocation.
+        Every pending and future invoke fails with the reported error.
+        """
+        self._init_error = request.get_data()
+        LOG.debug("Runtime failed to initialize: %s", self._init_error)
+
+        while True:
+            try:
+                self._queued.get_nowait().complete(self._init_error, is_error=True)
+            except queue.Empty:
+                break
+
+        return self._accepted_response()
+
+    def _complete_invocation(self, request_id, is_error):
+        with self._lock:
+            invocation = self._in_flight.pop(request_id, None)
+
+        if not invocation:
+            LOG.debug("Runtime responded to unknown invocation %s", request_id)
+            return self._error_response(400, "InvalidRequestID", "Invalid request ID: {}".format(request_id))
+
+        invocation.complete(request.get_data(), is_error=is_error)
+        return self._accepted_response()
+
+    def _accepted_response(self):
+        return self.service_response(json.dumps({"status": "OK"}), {"Content-Type": "application/json"}, 202)
+
+    def _error_response(self, status_code, error_type, message):
+        body = json.dumps({"errorType": error_type, "errorMessage": message})
+        return self.service_response(body, {"Content-Type": "application/json"}, status_code)
+
+
+class _Invocation(object):
+    """
+    One event handed to the runtime, and the response of the runtime once it is available
+    """
+
+    def __init__(self, request_id, event, deadline_ms):
+        self.request_id = request_id
+        self.event = event
+        self.deadline_ms = deadline_ms
+
+        self.response = None
+        self.is_error = False
+        self._done = threading.Event()
+
+    def complete(self, response, is_error=False):
+        self.response = response
+        self.is_error = is_error
+        self._done.set()
+
+    def fail(self):
+        self._done.set()
+
+    def wait(self):
+        # Wait in short steps. A wait without timeout cannot be interrupted with Ctrl+C on Python 2
+        while not self._done.wait(1):
+            pass
@@ -0,0 +1,267 @@
+"""
+Keeps decompressed code archives of functions between invokes
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from samcli.lib.utils import timings
+from samcli.lib.utils.disk_cache import get_dir_size, get_max_size
+from samcli.local.docker.container import Container
+from .zip import unzip
+
+LOG = logging.getLogger(__name__)
+
+# Total size of the decompressed archives that are kept, in megabytes. Archives that are in use are kept even if they
+# exceed this size.
+DEFAULT_MAX_SIZE_MB = 1024
+MAX_SIZE_ENV_VAR = "SAM_CLI_CODE_CACHE_MAX_SIZE_MB"
+
+# Prefix of directories that are being extracted or deleted. They are never served from the cache.
+_TEMP_PREFIX = ".tmp-"
+
+
+class CodeArchiveCache(object):
+    """
+    Decompresses .zip/.jar code archives into a directory named after the SHA256 digest of the archive, and keeps
+    the directory for later invokes of the same archive. The cache directory persists between runs of SAM CLI.
+
+    The digest of an archive is remembered by its path, size and modification time, so an unchanged archive is hashed
+    once per process. Concurrent invokes share a decompressed archive, which is extracted only once. Invokes hold a
+    reference to the archive they use. When the decompressed archives exceed the maximum size, the least recently used
+    ones that are neither referenced, nor mounted by a container, like a warm container, are deleted. This class is
+    thread-safe.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        """
+        Parameters
+        ----------
+        cache_dir str
+            Directory to keep the decompressed archives in. It is created when the first archive is extracted.
+        max_size int
+            Optional. Total size of decompressed archives to keep, in bytes. Defaults to the value of the
+            ``SAM_CLI_CODE_CACHE_MAX_SIZE_MB`` environment variable, or 1 GB.
+        """
+        self._cache_dir = cache_dir
+        self._max_size = max_size if max_size is not None else get_max_size(MAX_SIZE_ENV_VAR, DEFAULT_MAX_SIZE_MB)
+
+        self._lock = threading.Lock()
+        # Digest => entry, from least to most recently used
+        self._entries = OrderedDict()
+        # (path, size, modification time) => digest of the archive
+        self._digests = {}
+        self._is_loaded = False
+
+    @contextmanager
+    def extract(self, archive_path):
+        """
+        Decompresses the archive, unless it was decompressed already. The directory is kept at least until the
+        context exits.
+
+        Parameters
+        ----------
+        archive_path str
+            Path to the .zip/.jar archive
+
+        Yields
+        ------
+        str
+            Directory containing the decompressed archive. It must not be modified.
+        """
+        entry = self._acquire(archive_path)
+        try:
+            yield entry.path
+        finally:
+            self._release(entry)
+
+    def _acquire(self, archive_path):
+        digest = self._digest(archive_path)
+
+        with self._lock:
+            self._load()
+
+            entry = self._entries.pop(digest, None)
+            if entry is None:
+                entry = _CacheEntry(os.path.join(self._cache_dir, digest))
+            # Most recently used entries are at the end
+            self._entries[digest] = entry
+            entry.refs += 1
+
+        try:
+            # Invokes of the same archive wait for the one that extracts it
+            with timings.phase("unzip"), entry.lock:
+                if entry.size is None:
+                    entry.size = self._extract_entry(archive_path, entry.path)
+                else:
+                    LOG.debug("Using decompressed %s from %s", archive_path, entry.path)
+                    _touch(entry.path)
+        except BaseException:
+            self._release(entry)
+            raise
+
+        return entry
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+
+            if entry.size is None and not entry.refs:
+                # Extraction failed. Let the next invoke try again
+                digest = os.path.basename(entry.path)
+                if self._entries.get(digest) is entry:
+                    del self._entries[digest]
+
+            evicted = self._evict()
+
+        for path in evicted:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _evict(self):
+        """
+        Removes the least recently used entries that are not referenced, until the total size fits. Must be called
+        while holding the lock.
+
+        :return list: Directories to delete. They were renamed, so they can be deleted without holding the lock
+        """
+        total_size = sum(entry.size for entry in self._entries.values() if entry.size is not None)
+        evicted = []
+
+        for digest, entry in list(self._entries.items()):
+            if total_size <= self._max_size:
+                break
+
+            if entry.refs or entry.size is None or Container.is_mounted(entry.path):
+                continue
+
+            del self._entries[digest]
+            total_size -= entry.size
+
+            LOG.debug("Evicting decompressed archive %s from the code cache", entry.path)
+            try:
+                trash_dir = tempfile.mkdtemp(prefix=_TEMP_PREFIX, dir=self._cache_dir)
+                evicted.append(trash_dir)
+                os.rename(entry.path, os.path.join(trash_dir, digest))
+            except OSError:
+                LOG.debug("Failed to evict %s", entry.path, exc_info=True)
+
+        return evicted
+
+    def _load(self):
+        """
+        Indexes the archives that were decompressed by earlier runs of SAM CLI, from least to most recently used.
+        Must be called while holding the lock.
+        """
+        if self._is_loaded:
+            return
+
+        if not os.path.isdir(self._cache_dir):
+            os.makedirs(self._cache_dir)
+
+        # Docker does not resolve symlinks in the paths it mounts
+        self._cache_dir = os.path.realpath(self._cache_dir)
+
+        existing = []
+        for name in os.listdir(self._cache_dir):
+            path = os.path.join(self._cache_dir, name)
+            if name.startswith(_TEMP_PREFIX) or not os.path.isdir(path):
+                continue
+
+            existing.append((os.path.getmtime(path), name, path))
+
+        for _, name, path in sorted(existing):
+            entry = _CacheEntry(path)
+            entry.size = get_dir_size(path)
+            self._entries[name] = entry
+
+        LOG.debug("Code cache %s has %d decompressed archives", self._cache_dir, len(self._entries))
+        self._is_loaded = True
+
+    def _digest(self, archive_path):
+        """
+        :param string archive_path: Path to the archive
+        :return string: SHA256 digest of the content of the archive
+        """
+        stat = os.stat(archive_path)
+        key = (os.path.realpath(archive_path), stat.st_size, stat.st_mtime)
+
+        with self._lock:
+            digest = self._digests.get(key)
+
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(archive_path, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+
+            with self._lock:
+                self._digests[key] = digest
+
+        return digest
+
+    def _extract_entry(self, archive_path, path):
+        """
+        Decompresses the archive into the given directory. The archive is decompressed into a temporary directory
+        first, which is then renamed. Another process sharing the cache never sees a partially decompressed archive.
+
+        :param string archive_path: Path to the archive
+        :param string path: Directory to decompress the archive into
+        :return int: Size of the decompressed archive in bytes
+        """
+        if os.path.isdir(path):
+            # Decompressed by another process
+            _touch(path)
+            return get_dir_size(path)
+
+        LOG.info("Decompressing %s", archive_path)
+
+        temp_dir = tempfile.mkdtemp(prefix=_TEMP_PREFIX, dir=self._cache_dir)
+        try:
+            if os.name == "posix":
+                os.chmod(temp_dir, 0o755)
+
+            unzip(archive_path, temp_dir)
+
+            try:
+                os.rename(temp_dir, path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+                # Another process finished decompressing it first
+        finally:
+            if os.path.isdir(temp_dir):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return get_dir_size(path)
+
+
+class _CacheEntry(object):
+    """
+    Archive decompressed into a directory of the cache
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Size of the decompressed archive in bytes. None, until it is decompressed
+        self.size = None
+        # Number of invokes using the directory
+        self.refs = 0
+        # Held while the archive is decompressed
+        self.lock = threading.Lock()
+
+
+def _touch(path):
+    """
+    Updates the modification time of the directory, which orders the archives cached by earlier runs
+    """
+    try:
+        os.utime(path, None)
+    except OSError:
+        LOG.debug("Failed to update the modification time of %s", path, exc_info=True)
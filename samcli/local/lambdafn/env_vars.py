@@ -97,12 +97,6 @@ class EnvironmentVariables(object):
 
         return result
 
-    def add_lambda_event_body(self, value):
-        """
-        Adds the value of AWS_LAMBDA_EVENT_BODY environment variable.
-        """
-        self.variables["AWS_LAMBDA_EVENT_BODY"] = value
-
     @property
     def timeout(self):
         return self._function["timeout"]
@@ -9,3 +9,11 @@ class FunctionNotFound(Exception):
     """
 
     pass
+
+
+class ArchiveChecksumMismatch(Exception):
+    """
+    Raised when the content of a downloaded archive does not match its checksum
+    """
+
+    pass
@@ -7,10 +7,15 @@ import shutil
 import tempfile
 import signal
 import logging
-import threading
 from contextlib import contextmanager
+from functools import partial
 
+import docker
+
+from samcli.lib.utils import timings
+from samcli.local.docker.client import count_api_calls
 from samcli.local.docker.lambda_container import LambdaContainer
+from .timeout_scheduler import get_timeout_scheduler
 from .zip import unzip
 
 LOG = logging.getLogger(__name__)
@@ -25,7 +30,15 @@ class LambdaRuntime(object):
 
     SUPPORTED_ARCHIVE_EXTENSIONS = (".zip", ".jar", ".ZIP", ".JAR")
 
-    def __init__(self, container_manager, image_builder):
+    def __init__(
+        self,
+        container_manager,
+        image_builder,
+        warm_containers=False,
+        timeout_scheduler=None,
+        timings_writer=None,
+        code_cache=None,
+    ):
         """
         Initialize the Local Lambda runtime
 
@@ -35,9 +48,25 @@ class LambdaRuntime(object):
             Instance of the ContainerManager class that can run a local Docker container
         image_builder samcli.local.docker.lambda_image.LambdaImage
             Instance of the LambdaImage class that can create am image
+        warm_containers bool
+            Optional. If True, containers are kept running after an invoke and reused by later invokes of the same
+            function. Defaults to False ie. every invoke runs in a new container.
+        timeout_scheduler samcli.local.lambdafn.timeout_scheduler.TimeoutScheduler
+            Optional. Scheduler that enforces the timeouts of functions. Defaults to the scheduler shared by the process
+        timings_writer samcli.lib.utils.timings.TimingsFileWriter
+            Optional. Writer the timings of every invoke are written to
+        code_cache samcli.local.lambdafn.code_cache.CodeArchiveCache
+            Optional. Cache that keeps decompressed code archives between invokes. If not given, archives are
+            decompressed into a temporary directory on every invoke.
         """
         self._container_manager = container_manager
         self._image_builder = image_builder
+        self._warm_containers = warm_containers
+        self._timeout_scheduler = timeout_scheduler
+        if self._timeout_scheduler is None:
+            self._timeout_scheduler = get_timeout_scheduler()
+        self._timings_writer = timings_writer
+        self._code_cache = code_cache
 
     def invoke(self, function_config, event, debug_context=None, stdout=None, stderr=None):
         """
@@ -57,16 +86,34 @@ class LambdaRuntime(object):
         :param io.IOBase stderr: Optional. IO Stream that receives stderr text from container
         :raises Keyboard
         """
+        with timings.record(function_config.name) as invoke_timings, count_api_calls() as api_calls:
+            try:
+                self._invoke(function_config, event, debug_context=debug_context, stdout=stdout, stderr=stderr)
+            finally:
+                LOG.debug("Invoke of function %s made %d Docker API calls", function_config.name, api_calls.count)
+                invoke_timings.details["docker_api_calls"] = api_calls.count
+
+        LOG.debug("Timings of invoke: %s", invoke_timings.to_json())
+        if self._timings_writer:
+            self._timings_writer.write(invoke_timings)
+
+    def _invoke(self, function_config, event, debug_context=None, stdout=None, stderr=None):
+        """
+        Invokes the function. See ``invoke``.
+        """
+        if self._can_invoke_warm(function_config, debug_context):
+            self._invoke_warm(function_config, event, stdout=stdout, stderr=stderr)
+            return
+
         timer = None
 
-        # Update with event input
-        environ = function_config.env_vars
-        environ.add_lambda_event_body(event)
-        # Generate a dictionary of environment variable key:values
-        env_vars = environ.resolve()
+        # Generate a dictionary of environment variable key:values. The event is not one of them. It is written to
+        # the stdin of the container instead.
+        env_vars = function_config.env_vars.resolve()
 
         with self._get_code_dir(function_config.code_abs_path) as code_dir:
-            container = LambdaContainer(
+            make_container = partial(
+                LambdaContainer,
                 function_config.runtime,
                 function_config.handler,
                 code_dir,
@@ -76,11 +123,16 @@ class LambdaRuntime(object):
                 env_vars=env_vars,
                 debug_options=debug_context,
             )
+            container = make_container()
 
             try:
 
-                # Start the container. This call returns immediately after the container starts
-                self._container_manager.run(container)
+                # Start the container and write the event to its stdin. This call returns once the event is sent.
+                # The manager may run a standby container with the same configuration instead of this one. Without a
+                # code cache, every invoke decompresses an archive into a new directory, so no other container has
+                # the same configuration.
+                standby = self._code_cache is not None or not self._is_archive(function_config.code_abs_path)
+                container = self._run_container(container, make_container, input_data=event, standby=standby)
 
                 # Setup appropriate interrupt - timeout or Ctrl+C - before function starts executing.
                 #
@@ -94,7 +146,8 @@ class LambdaRuntime(object):
                 # NOTE: BLOCKING METHOD
                 # Block the thread waiting to fetch logs from the container. This method will return after container
                 # terminates, either successfully or killed by one of the interrupt handlers above.
-                container.wait_for_logs(stdout=stdout, stderr=stderr)
+                with timings.phase("run"):
+                    container.wait_for_logs(stdout=stdout, stderr=stderr)
 
             except KeyboardInterrupt:
                 # When user presses Ctrl+C, we receive a Keyboard Interrupt. This is especially very common when
@@ -109,7 +162,135 @@ class LambdaRuntime(object):
                 # If we are in debugging mode, timer would not be created. So skip cleanup of the timer
                 if timer:
                     timer.cancel()
+                    timings.detail("timed_out", bool(timer.timed_out))
+                with timings.phase("delete"):
+                    self._container_manager.stop(container)
+
+    def _can_invoke_warm(self, function_config, debug_context):
+        """
+        Warm containers are not used when debugging, because the debugger attaches to one runtime process per invoke.
+        Archives are only invoked in warm containers when there is a code cache. It decompresses an archive into the
+        same directory on every invoke. Without it, every invoke decompresses the archive into a new directory.
+
+        :param FunctionConfig function_config: Configuration of the function to invoke
+        :param DebugContext debug_context: Debugging context for the function
+        :return bool: True, if the function can be invoked in a warm container
+        """
+        if not self._warm_containers or debug_context:
+            return False
+
+        if self._code_cache is None and self._is_archive(function_config.code_abs_path):
+            LOG.debug("Code %s is an archive. Not using a warm container", function_config.code_abs_path)
+            return False
+
+        return True
+
+    def _invoke_warm(self, function_config, event, stdout=None, stderr=None):
+        """
+        Invoke the given Lambda function in a warm container. The event is sent to a container that keeps running
+        between invokes, either pushed to it or fetched by its runtime through the Runtime API. A new container is
+        started only if no idle container is available for this function.
+
+        :param FunctionConfig function_config: Configuration of the function to invoke
+        :param event: String input event passed to Lambda function
+        :param io.IOBase stdout: Optional. IO Stream to that receives stdout text from container.
+        :param io.IOBase stderr: Optional. IO Stream that receives stderr text from container
+        """
+        timer = None
+        invoked = False
+
+        # The code directory of an archive is kept while a container mounts it, not just during this invoke
+        with self._get_code_dir(function_config.code_abs_path) as code_dir:
+            make_container = partial(self._make_warm_container, function_config, code_dir)
+            container = make_container()
+
+            try:
+                container = self._run_container(container, make_container, warm=True)
+
+                timer = self._configure_interrupt(function_config.name, function_config.timeout, container, False)
+
+                # NOTE: BLOCKING METHOD
+                with timings.phase("run"):
+                    invoked = container.invoke(event, stdout=stdout, stderr=stderr, timeout=function_config.timeout)
+
+            except KeyboardInterrupt:
+                LOG.debug("Ctrl+C was pressed. Aborting Lambda execution")
+
+            finally:
+                if timer:
+                    timer.cancel()
+                    timings.detail("timed_out", bool(timer.timed_out))
+
+                # A container that timed out was already stopped. Keep the container only if it served this invoke.
+                if invoked and container.is_created():
+                    self._container_manager.release(container)
+                else:
+                    with timings.phase("delete"):
+                        self._container_manager.stop(container)
+
+    def prewarm(self, function_config):
+        """
+        Starts a warm container for the given function ahead of its first invoke. The container waits in the
+        container manager until an invoke picks it up. Functions that cannot be invoked in a warm container are
+        skipped.
+
+        :param FunctionConfig function_config: Configuration of the function to start a container for
+        """
+        if not self._can_invoke_warm(function_config, None):
+            LOG.debug("Not pre-warming a container for function '%s'", function_config.name)
+            return
+
+        with self._get_code_dir(function_config.code_abs_path) as code_dir:
+            container = self._make_warm_container(function_config, code_dir)
+
+            try:
+                # Always start a new container. Each function gets one ready container, even if it shares a
+                # configuration with another function.
+                self._container_manager.run(container)
+            except BaseException:
                 self._container_manager.stop(container)
+                raise
+
+        self._container_manager.release(container)
+
+    def _run_container(self, container, make_container, **kwargs):
+        """
+        Runs the container with the container manager. The image builder remembers the images it built, so the image
+        of the container may have been deleted since. The image is then forgotten, and a new container is run once,
+        with the image built again.
+
+        :param LambdaContainer container: Container to run
+        :param make_container: Callable that creates a new container with the same configuration
+        :param kwargs: Arguments of ``ContainerManager.run``
+        :return LambdaContainer: The running container
+        """
+        try:
+            return self._container_manager.run(container, **kwargs)
+        except docker.errors.ImageNotFound:
+            LOG.debug("Image %s was deleted. Building it again", container.image)
+            self._image_builder.invalidate(container.image)
+            return self._container_manager.run(make_container(), **kwargs)
+
+    def _make_warm_container(self, function_config, code_dir):
+        """
+        :param FunctionConfig function_config: Configuration of the function
+        :param string code_dir: Directory containing the code of the function
+        :return LambdaContainer: Container that keeps running between invokes of the function
+        """
+        # The event is not part of the environment. Every invoke of this function creates a container with the same
+        # configuration and can therefore reuse a warm one.
+        env_vars = function_config.env_vars.resolve()
+
+        return LambdaContainer(
+            function_config.runtime,
+            function_config.handler,
+            code_dir,
+            function_config.layers,
+            self._image_builder,
+            memory_mb=function_config.memory,
+            env_vars=env_vars,
+            stay_open=True,
+        )
 
     def _configure_interrupt(self, function_name, timeout, container, is_debugging):
         """
@@ -121,11 +302,13 @@ class LambdaRuntime(object):
         :param integer timeout: Timeout in seconds
         :param samcli.local.docker.container.Container container: Instance of a container to terminate
         :param bool is_debugging: Are we debugging?
-        :return threading.Timer: Timer object, if we setup a timer. None otherwise
+        :return samcli.local.lambdafn.timeout_scheduler.ScheduledTimeout: Timeout object, if we setup a timeout.
+            None otherwise
         """
 
         def timer_handler():
-            # NOTE: This handler runs in a separate thread. So don't try to mutate any non-thread-safe data structures
+            # NOTE: This handler runs on the scheduler thread, which enforces the timeouts of all invokes. So don't try
+            # to mutate any non-thread-safe data structures
             LOG.info("Function '%s' timed out after %d seconds", function_name, timeout)
             self._container_manager.stop(container)
 
@@ -138,11 +321,9 @@ class LambdaRuntime(object):
             LOG.debug("Setting up SIGTERM interrupt handler")
             signal.signal(signal.SIGTERM, signal_handler)
         else:
-            # Start a timer, we'll use this to abort the function if it runs beyond the specified timeout
+            # Schedule a timeout, we'll use this to abort the function if it runs beyond the specified timeout
             LOG.debug("Starting a timer for %s seconds for function '%s'", timeout, function_name)
-            timer = threading.Timer(timeout, timer_handler, ())
-            timer.start()
-            return timer
+            return self._timeout_scheduler.schedule(timeout, timer_handler, name=function_name)
 
     @contextmanager
     def _get_code_dir(self, code_path):
@@ -151,7 +332,8 @@ class LambdaRuntime(object):
         be mounted directly inside the Docker container.
 
         This method handles a few different cases for ``code_path``:
-            - ``code_path``is a existent zip/jar file: Unzip in a temp directory and return the temp directory
+            - ``code_path``is a existent zip/jar file: Unzip in a temp directory and return the temp directory. If
+                there is a code cache, return the directory it decompressed the file into instead
             - ``code_path`` is a existent directory: Return this immediately
             - ``code_path`` is a file/dir that does not exist: Return it as is. May be this method is not clever to
                 detect the existence of the path
@@ -164,9 +346,14 @@ class LambdaRuntime(object):
         decompressed_dir = None
 
         try:
-            if os.path.isfile(code_path) and code_path.endswith(self.SUPPORTED_ARCHIVE_EXTENSIONS):
+            if self._is_archive(code_path) and self._code_cache is not None:
+                with self._code_cache.extract(code_path) as cached_dir:
+                    yield cached_dir
+
+            elif self._is_archive(code_path):
 
-                decompressed_dir = _unzip_file(code_path)
+                with timings.phase("unzip"):
+                    decompressed_dir = _unzip_file(code_path)
                 yield decompressed_dir
 
             else:
@@ -176,6 +363,13 @@ class LambdaRuntime(object):
             if decompressed_dir:
                 shutil.rmtree(decompressed_dir)
 
+    def _is_archive(self, code_path):
+        """
+        :param string code_path: Path to the code
+        :return bool: True, if the code is an existing zip/jar file
+        """
+        return os.path.isfile(code_path) and code_path.endswith(self.SUPPORTED_ARCHIVE_EXTENSIONS)
+
 
 def _unzip_file(filepath):
     """
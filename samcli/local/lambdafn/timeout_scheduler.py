@@ -0,0 +1,170 @@
+"""
+Enforces the timeouts of function invokes from a single thread
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+class TimeoutScheduler(object):
+    """
+    Runs a callback when the deadline of an invoke passes, unless the invoke cancels it first. Deadlines of all
+    invokes are kept in a heap, and one background thread waits for the earliest of them. This replaces a timer
+    thread per invoke. The thread is started when the first deadline is scheduled.
+
+    Callbacks run on the scheduler thread, one after the other. They must return quickly, otherwise they delay the
+    deadlines after them. This class is thread-safe.
+    """
+
+    def __init__(self):
+        # Heap of (deadline, sequence number, timeout). The sequence number keeps the order of timeouts with the same
+        # deadline, without ever comparing the timeouts themselves.
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+
+    def schedule(self, timeout, callback, name=None):
+        """
+        Runs the callback once the given number of seconds passed
+
+        Parameters
+        ----------
+        timeout int
+            Number of seconds after which the callback runs
+        callback callable
+            Called without arguments when the timeout expires
+        name str
+            Optional. Name of what timed out, like the name of the function. Used to log failed callbacks.
+
+        Returns
+        -------
+        ScheduledTimeout
+            Timeout that can be cancelled
+        """
+        scheduled = ScheduledTimeout(callback, name)
+
+        with self._condition:
+            heapq.heappush(self._heap, (time.time() + timeout, next(self._sequence), scheduled))
+
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name="TimeoutScheduler")
+                self._thread.daemon = True
+                self._thread.start()
+
+            # The new deadline may be earlier than the one the thread is waiting for
+            self._condition.notify()
+
+        return scheduled
+
+    def __len__(self):
+        with self._condition:
+            return sum(1 for _, _, scheduled in self._heap if not scheduled.is_cancelled)
+
+    def _run(self):
+        while True:
+            scheduled = self._next_expired()
+
+            if not scheduled.expire():
+                # Cancelled while it expired
+                continue
+
+            try:
+                scheduled.callback()
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Timeout callback of %s failed", scheduled.name, exc_info=True)
+
+    def _next_expired(self):
+        """
+        Blocks until the earliest deadline that was not cancelled passes
+
+        :return ScheduledTimeout: Timeout whose deadline passed
+        """
+        with self._condition:
+            while True:
+                # Cancelled timeouts stay in the heap until they reach its top
+                while self._heap and self._heap[0][2].is_cancelled:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                deadline = self._heap[0][0]
+                now = time.time()
+                if deadline <= now:
+                    return heapq.heappop(self._heap)[2]
+
+                self._condition.wait(deadline - now)
+
+
+class ScheduledTimeout(object):
+    """
+    Timeout scheduled with a TimeoutScheduler
+    """
+
+    def __init__(self, callback, name):
+        self.callback = callback
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._is_cancelled = False
+        self._timed_out = False
+
+    @property
+    def is_cancelled(self):
+        return self._is_cancelled
+
+    @property
+    def timed_out(self):
+        """
+        :return bool: True, if the timeout expired before it was cancelled
+        """
+        return self._timed_out
+
+    def cancel(self):
+        """
+        Cancels the timeout. Does nothing, if it expired already.
+        """
+        with self._lock:
+            if not self._timed_out:
+                self._is_cancelled = True
+
+    def expire(self):
+        """
+        Marks the timeout as expired, unless it was cancelled
+
+        :return bool: True, if the timeout expired. False, if it was cancelled
+        """
+        with self._lock:
+            if self._is_cancelled:
+                return False
+
+            self._timed_out = True
+            return True
+
+
+def get_timeout_scheduler():
+    """
+    Returns the scheduler shared by every runtime in this process, creating it on first use
+
+    Returns
+    -------
+    TimeoutScheduler
+        Timeout scheduler
+    """
+    global _scheduler  # pylint: disable=global-statement
+
+    with _lock:
+        if _scheduler is None:
+            _scheduler = TimeoutScheduler()
+
+        return _scheduler
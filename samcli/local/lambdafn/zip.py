@@ -3,13 +3,27 @@ Helper methods to unzip an archive preserving the file permissions. Python's zip
 this feature natively (https://bugs.python.org/issue15795).
 """
 
+import base64
+import collections
+import hashlib
+import io
 import os
+import multiprocessing
+import posixpath
+import struct
+import threading
+import time
 import zipfile
+import zlib
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from six.moves import queue
 
 from samcli.lib.utils.progressbar import progressbar
+from .exceptions import ArchiveChecksumMismatch
 
 try:
     from pathlib import Path
@@ -19,11 +33,37 @@ except ImportError:
 
 LOG = logging.getLogger(__name__)
 
+# Archives with fewer files are extracted on the calling thread
+PARALLEL_UNZIP_MIN_FILES = 64
+MAX_UNZIP_WORKERS = 8
 
-def unzip(zip_file_path, output_dir, permission=None):
+# Number of times a broken download is resumed, without receiving any bytes in between, before it fails
+MAX_DOWNLOAD_RETRIES = 5
+_RETRY_DELAY = 0.5
+
+# Bytes at the end of a zip that hold its end of central directory record, with the longest possible comment
+_ZIP_TAIL_SIZE = 22 + 0xFFFF
+_STREAM_CHUNK_SIZE = 64 * 1024
+# Chunks that are downloaded ahead of the extraction
+_STREAM_QUEUE_SIZE = 64
+# Files up to this size are decompressed into memory and written by a pool of threads. Creating files is slow on some
+# file systems, and would hold up the extraction.
+_BUFFERED_FILE_SIZE = 1024 * 1024
+# Decompressed bytes that wait to be written, before the extraction waits for the pool
+_MAX_PENDING_WRITE_SIZE = 64 * 1024 * 1024
+
+_LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def unzip(zip_file_path, output_dir, permission=None, workers=None):
     """
     Unzip the given file into the given directory while preserving file permissions in the process.
 
+    Archives with many entries are extracted by a pool of threads. Every thread extracts a share of the entries
+    through its own handle of the zip file. Directories are created before any file is extracted, and permissions
+    are set after all files are extracted.
+
     Parameters
     ----------
     zip_file_path : str
@@ -34,23 +74,92 @@ def unzip(zip_file_path, output_dir, permission=None):
 
     permission : octal int
         Permission to set
+
+    workers : int
+        Optional. Number of threads to extract the files with. Defaults to the number of CPUs, up to 8
     """
 
+    if workers is None:
+        workers = min(MAX_UNZIP_WORKERS, multiprocessing.cpu_count())
+
     with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+        infos = zip_ref.infolist()
+        _make_dirs(infos, output_dir)
 
-        # For each item in the zip file, extract the file and set permissions if available
-        for file_info in zip_ref.infolist():
-            name = file_info.filename
-            extracted_path = os.path.join(output_dir, name)
+        file_infos = [info for info in infos if not info.filename.endswith("/")]
+        if workers <= 1 or len(file_infos) < PARALLEL_UNZIP_MIN_FILES:
+            _extract_members(zip_ref, file_infos, output_dir)
+        else:
+            _extract_in_parallel(zip_file_path, file_infos, output_dir, workers)
 
-            zip_ref.extract(name, output_dir)
-            _set_permissions(file_info, extracted_path)
+    _set_all_permissions(infos, output_dir, permission)
 
-            _override_permissions(extracted_path, permission)
+
+def _set_all_permissions(infos, output_dir, permission):
+    """
+    Sets the permissions of every extracted entry. Permissions are set once all files are extracted, in case a
+    directory does not allow writing to it.
+    """
+    for info in infos:
+        extracted_path = os.path.join(output_dir, info.filename)
+        _set_permissions(info, extracted_path)
+        _override_permissions(extracted_path, permission)
 
     _override_permissions(output_dir, permission)
 
 
+def _make_dirs(infos, output_dir):
+    """
+    Creates every directory of the given entries of a zip file, before their files are extracted
+    """
+    names = set()
+    for info in infos:
+        name = info.filename
+        names.add(name if name.endswith("/") else posixpath.dirname(name))
+
+    for name in sorted(names):
+        # zipfile sanitizes names that point outside of the output dir when extracting. Leave those to it.
+        if not name or os.path.isabs(name) or ":" in name or ".." in name.split("/"):
+            continue
+
+        path = os.path.join(output_dir, name)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+
+def _extract_in_parallel(zip_file_path, infos, output_dir, workers):
+    """
+    Extracts the given files of the zip file with a pool of threads. Large files are spread over all threads, by
+    dealing the files round-robin in order of size.
+    """
+    infos = sorted(infos, key=lambda info: info.file_size, reverse=True)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(_extract_files, zip_file_path, infos[index::workers], output_dir)
+            for index in range(workers)
+        ]
+        for future in futures:
+            future.result()
+    finally:
+        executor.shutdown(wait=True)
+
+
+def _extract_files(zip_file_path, infos, output_dir):
+    """
+    Extracts the given files of the zip file through a new handle of the file. Handles of a zip file must not be
+    shared between threads.
+    """
+    with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+        _extract_members(zip_ref, infos, output_dir)
+
+
+def _extract_members(zip_ref, infos, output_dir):
+    for info in infos:
+        zip_ref.extract(info, output_dir)
+
+
 def _override_permissions(path, permission):
     """
     Forcefully override the permissions on the path
@@ -91,40 +200,508 @@ def _set_permissions(zip_file_info, extracted_path):
     os.chmod(extracted_path, permission)
 
 
-def unzip_from_uri(uri, layer_zip_path, unzip_output_dir, progressbar_label):
+def unzip_from_uri(
+    uri, layer_zip_path, unzip_output_dir, progressbar_label, show_progressbar=True, expected_sha256=None
+):
     """
-    Download the LayerVersion Zip to the Layer Pkg Cache
+    Download the LayerVersion Zip and unzip it to the Layer Pkg Cache
+
+    If the server supports HTTP Range requests, like S3 does, the central directory at the end of the zip is
+    downloaded first. The files of the zip are then extracted while the rest of it is downloaded, without writing the
+    zip to disk, and a download that breaks is resumed where it stopped. Otherwise, the zip is downloaded to
+    ``layer_zip_path``, and unzipped once it is complete.
 
     Parameters
     ----------
     uri str
         Uri to download from
     layer_zip_path str
-        Path to where the content from the uri should be downloaded to
+        Path to where the content from the uri should be downloaded to, if it cannot be unzipped while it is
+        downloaded
     unzip_output_dir str
         Path to unzip the zip to
     progressbar_label str
         Label to use in the Progressbar
+    show_progressbar bool
+        Optional. False to log the start and end of the download, instead of showing a progress bar. A progress bar
+        cannot share the terminal with other downloads.
+    expected_sha256 str
+        Optional. Base64 encoded SHA256 digest of the zip, like the CodeSha256 that AWS Lambda reports for a
+        LayerVersion.
+
+    Raises
+    ------
+    samcli.local.lambdafn.exceptions.ArchiveChecksumMismatch
+        When the downloaded zip does not match the expected digest. Files of the zip may have been extracted already,
+        so the output directory must be discarded.
     """
-    try:
-        get_request = requests.get(uri, stream=True, verify=os.environ.get("AWS_CA_BUNDLE", True))
+    verify = os.environ.get("AWS_CA_BUNDLE", True)
+    sha256 = hashlib.sha256()
 
-        with open(layer_zip_path, "wb") as local_layer_file:
-            file_length = int(get_request.headers["Content-length"])
+    try:
+        # The central directory of a zip is at its end. Ask for the end first.
+        get_request = requests.get(
+            uri, stream=True, verify=verify, headers={"Range": "bytes=-{}".format(_ZIP_TAIL_SIZE)}
+        )
 
-            with progressbar(file_length, progressbar_label) as p_bar:
-                # Set the chunk size to None. Since we are streaming the request, None will allow the data to be
-                # read as it arrives in whatever size the chunks are received.
-                for data in get_request.iter_content(chunk_size=None):
-                    local_layer_file.write(data)
-                    p_bar.update(len(data))
+        archive = None
+        if get_request.status_code == 206:
+            archive = _RemoteArchive.open(uri, verify, get_request)
+            if archive is None:
+                get_request = requests.get(uri, stream=True, verify=verify)
 
         # Forcefully set the permissions to 700 on files and directories. This is to ensure the owner
         # of the files is the only one that can read, write, or execute the files.
-        unzip(layer_zip_path, unzip_output_dir, permission=0o700)
+        if archive:
+            with _progress(archive.size, progressbar_label, show_progressbar) as update:
+                archive.extract(unzip_output_dir, sha256, update, permission=0o700)
+            _check_sha256(uri, sha256, expected_sha256)
+        else:
+            file_length = int(get_request.headers["Content-length"])
+            with open(layer_zip_path, "wb") as local_layer_file:
+                with _progress(file_length, progressbar_label, show_progressbar) as update:
+                    # Set the chunk size to None. Since we are streaming the request, None will allow the data to be
+                    # read as it arrives in whatever size the chunks are received.
+                    for data in get_request.iter_content(chunk_size=None):
+                        local_layer_file.write(data)
+                        sha256.update(data)
+                        update(len(data))
+
+            _check_sha256(uri, sha256, expected_sha256)
+            unzip(layer_zip_path, unzip_output_dir, permission=0o700)
 
     finally:
         # Remove the downloaded zip file
         path_to_layer = Path(layer_zip_path)
         if path_to_layer.exists():
             path_to_layer.unlink()
+
+
+@contextmanager
+def _progress(total, label, show_progressbar):
+    """
+    Reports the progress of a download, with a progress bar or with log lines at its start and end
+
+    :return function: Called with the number of bytes that were downloaded since the last call
+    """
+    if show_progressbar:
+        with progressbar(total, label) as p_bar:
+            yield p_bar.update
+        return
+
+    LOG.info("%s (%d bytes)", label, total)
+    yield lambda length: None
+    LOG.info("%s: done", label)
+
+
+def _check_sha256(uri, sha256, expected_sha256):
+    actual_sha256 = base64.b64encode(sha256.digest()).decode("ascii")
+    if expected_sha256 and actual_sha256 != expected_sha256:
+        raise ArchiveChecksumMismatch(
+            "SHA256 of {} is {}, but {} was expected".format(uri.split("?")[0], actual_sha256, expected_sha256)
+        )
+
+
+def _get_range(uri, verify, start, end):
+    """
+    Requests the bytes of the given range of the uri
+
+    :return requests.Response: Streamed response
+    :raise IOError: When the server does not respond with the requested range
+    """
+    response = requests.get(
+        uri, stream=True, verify=verify, headers={"Range": "bytes={}-{}".format(start, end - 1)}
+    )
+    content_range = _parse_content_range(response)
+    if response.status_code != 206 or not content_range or content_range[0] != start:
+        response.close()
+        raise IOError("Server did not respond with bytes {}-{} of {}".format(start, end - 1, uri.split("?")[0]))
+
+    return response
+
+
+def _parse_content_range(response):
+    """
+    :return tuple: First byte of the response and size of the whole content, from a header like
+        ``Content-Range: bytes 100-199/1000``. None, if the response has no such header
+    """
+    try:
+        unit, value = response.headers["Content-Range"].split(" ", 1)
+        byte_range, size = value.split("/")
+        if unit != "bytes":
+            return None
+        return int(byte_range.split("-")[0]), int(size)
+    except (KeyError, ValueError, AttributeError):
+        return None
+
+
+class _RemoteArchive(object):
+    """
+    Zip at a uri of a server that supports HTTP Range requests. Its files are extracted while the zip is downloaded.
+
+    The central directory, which is at the end of the zip, lists the offset and compressed size of every file. It is
+    downloaded first. The rest of the zip is then downloaded on a background thread, while the calling thread
+    decompresses every file as soon as its bytes arrive.
+    """
+
+    def __init__(self, uri, verify, size, tail, infos):
+        self._uri = uri
+        self._verify = verify
+        self.size = size
+        # Last bytes of the zip, which hold its central directory
+        self._tail = tail
+        self._infos = infos
+
+    @classmethod
+    def open(cls, uri, verify, tail_response):
+        """
+        Reads the central directory of the zip
+
+        Parameters
+        ----------
+        uri str
+            Uri of the zip
+        verify bool or str
+            Verify argument of requests
+        tail_response requests.Response
+            Response to a request for the last bytes of the zip
+
+        Returns
+        -------
+        _RemoteArchive
+            Zip that can be extracted while it is downloaded. None, if the zip uses features of the zip format that
+            this class does not support. It must then be downloaded before it is unzipped.
+        """
+        content_range = _parse_content_range(tail_response)
+        tail = tail_response.content
+        if not content_range:
+            return None
+
+        size = content_range[1]
+        try:
+            while True:
+                try:
+                    with zipfile.ZipFile(_TailFile(size, tail)) as zip_ref:
+                        infos = zip_ref.infolist()
+                    break
+                except _MissingBytes as ex:
+                    # The central directory is larger than the tail that was downloaded
+                    response = _get_range(uri, verify, ex.position, size - len(tail))
+                    tail = response.content + tail
+        except (IOError, zipfile.BadZipfile) as ex:
+            LOG.debug("Failed to read the central directory of %s: %s", uri.split("?")[0], ex)
+            return None
+
+        for info in infos:
+            # Bit 0 of the flags marks encrypted files
+            if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or info.flag_bits & 0x1:
+                LOG.debug("%s has files that cannot be extracted while it is downloaded", uri.split("?")[0])
+                return None
+
+        return cls(uri, verify, size, tail, infos)
+
+    def extract(self, output_dir, sha256, update, permission=None):
+        """
+        Downloads the zip and extracts its files while they are downloaded
+
+        Parameters
+        ----------
+        output_dir str
+            Path to unzip the zip to
+        sha256 hashlib.sha256
+            Updated with every byte of the zip, in order
+        update function
+            Called with the number of bytes of every downloaded chunk
+        permission octal int
+            Optional. Permission to set on every file and directory
+        """
+        _make_dirs(self._infos, output_dir)
+
+        chunks = queue.Queue(maxsize=_STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+        body_size = self.size - len(self._tail)
+
+        downloader = threading.Thread(target=self._download, args=(body_size, chunks, stopped))
+        downloader.daemon = True
+        downloader.start()
+
+        def on_chunk(data):
+            sha256.update(data)
+            update(len(data))
+
+        writer = _FileWriter(min(MAX_UNZIP_WORKERS, multiprocessing.cpu_count()))
+        try:
+            reader = _ChunkReader(chunks, self._tail, on_chunk)
+            for info in sorted(self._infos, key=lambda info: info.header_offset):
+                reader.skip_to(info.header_offset)
+                _extract_entry(reader, info, output_dir, writer)
+
+            # Read to the end, so the digest covers the central directory
+            reader.skip_to(self.size)
+            writer.wait()
+        finally:
+            stopped.set()
+            downloader.join()
+            writer.close()
+
+        _set_all_permissions(self._infos, output_dir, permission)
+
+    def _download(self, end, chunks, stopped):
+        """
+        Downloads the bytes of the zip before its tail, and puts them into the queue followed by None. A broken
+        download is resumed from the last byte that was received. If the download fails, the exception is put into
+        the queue instead.
+        """
+        position = 0
+        retries = 0
+        try:
+            while position < end:
+                start = position
+                try:
+                    response = _get_range(self._uri, self._verify, position, end)
+                    try:
+                        for data in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                            data = data[: end - position]
+                            if not _put(chunks, data, stopped):
+                                return
+                            position += len(data)
+                    finally:
+                        response.close()
+
+                    if position < end:
+                        raise IOError("Connection closed after {} of {} bytes".format(position, end))
+                except IOError as ex:
+                    retries = retries + 1 if position == start else 1
+                    if retries > MAX_DOWNLOAD_RETRIES:
+                        raise
+                    LOG.debug("Resuming download of %s at byte %d: %s", self._uri.split("?")[0], position, ex)
+                    time.sleep(_RETRY_DELAY * retries)
+
+            _put(chunks, None, stopped)
+        except Exception as ex:  # pylint: disable=broad-except
+            _put(chunks, ex, stopped)
+
+
+def _put(chunks, item, stopped):
+    """
+    Puts the item into the queue, unless the consumer stopped
+
+    :return bool: False, if the consumer stopped
+    """
+    while not stopped.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+class _TailFile(object):
+    """
+    Read-only file holding the last bytes of a zip, for zipfile to read the central directory from. Reading before
+    the tail raises _MissingBytes.
+    """
+
+    def __init__(self, size, tail):
+        self._size = size
+        self._tail = tail
+        self._tail_start = size - len(tail)
+        self._position = 0
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+
+        if offset < 0:
+            raise IOError("Invalid offset {}".format(offset))
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        if self._position >= self._size:
+            return b""
+        if self._position < self._tail_start:
+            raise _MissingBytes(self._position)
+
+        start = self._position - self._tail_start
+        end = len(self._tail) if size is None or size < 0 else start + size
+        data = self._tail[start:end]
+        self._position += len(data)
+        return data
+
+
+class _MissingBytes(Exception):
+    def __init__(self, position):
+        super(_MissingBytes, self).__init__("Missing bytes at {}".format(position))
+        self.position = position
+
+
+class _ChunkReader(object):
+    """
+    Reads the downloaded chunks of a zip from the queue, in order, followed by its tail
+    """
+
+    def __init__(self, chunks, tail, on_chunk):
+        self._chunks = chunks
+        self._tail = tail
+        self._on_chunk = on_chunk
+        self._buffer = b""
+        self._is_body_read = False
+        self.position = 0
+
+    def read(self, size):
+        """
+        Yields the next bytes, in pieces of at most the size of a chunk
+        """
+        while size > 0:
+            if not self._buffer:
+                self._buffer = self._next_chunk()
+                self._on_chunk(self._buffer)
+
+            piece = self._buffer[:size]
+            self._buffer = self._buffer[len(piece) :]
+            self.position += len(piece)
+            size -= len(piece)
+            yield piece
+
+    def read_exactly(self, size):
+        return b"".join(self.read(size))
+
+    def skip_to(self, position):
+        if position < self.position:
+            raise zipfile.BadZipfile("Entries of the zip overlap at byte {}".format(position))
+
+        for _ in self.read(position - self.position):
+            pass
+
+    def _next_chunk(self):
+        if not self._is_body_read:
+            item = self._chunks.get()
+            if isinstance(item, BaseException):
+                raise item
+            if item is not None:
+                return item
+            self._is_body_read = True
+
+        if self._tail is None:
+            raise zipfile.BadZipfile("Unexpected end of the zip at byte {}".format(self.position))
+
+        tail, self._tail = self._tail, None
+        return tail
+
+
+class _FileWriter(object):
+    """
+    Writes files with a pool of threads. The number of bytes waiting to be written is bounded.
+    """
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        # (future, size) of every write that was not checked yet, in order of submission
+        self._pending = collections.deque()
+        self._pending_size = 0
+
+    def write(self, path, data):
+        self._pending.append((self._executor.submit(_write_file, path, data), len(data)))
+        self._pending_size += len(data)
+
+        while self._pending and (self._pending[0][0].done() or self._pending_size > _MAX_PENDING_WRITE_SIZE):
+            self._check_oldest()
+
+    def wait(self):
+        """
+        Waits for every file to be written
+
+        :raise IOError: When a file could not be written
+        """
+        while self._pending:
+            self._check_oldest()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _check_oldest(self):
+        future, size = self._pending.popleft()
+        self._pending_size -= size
+        future.result()
+
+
+def _write_file(path, data):
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+
+def _extract_entry(reader, info, output_dir, writer):
+    """
+    Extracts an entry of the zip, whose local header starts at the current position of the reader. Small files are
+    handed to the writer. Large files are written while they are read.
+    """
+    header = reader.read_exactly(_LOCAL_FILE_HEADER.size)
+    fields = _LOCAL_FILE_HEADER.unpack(header)
+    if fields[0] != _LOCAL_FILE_HEADER_SIGNATURE:
+        raise zipfile.BadZipfile("Bad magic number for file header of {}".format(info.filename))
+
+    # Skips the file name and the extra field, whose lengths are the last fields of the header
+    reader.skip_to(reader.position + fields[-2] + fields[-1])
+
+    if info.filename.endswith("/"):
+        # Directories were created before
+        reader.skip_to(reader.position + info.compress_size)
+        return
+
+    path = _get_extract_path(output_dir, info.filename)
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+
+    if info.file_size <= _BUFFERED_FILE_SIZE:
+        data = []
+        _decompress(reader, info, data.append)
+        writer.write(path, b"".join(data))
+    else:
+        with open(path, "wb") as fp:
+            _decompress(reader, info, fp.write)
+
+
+def _decompress(reader, info, write):
+    """
+    Decompresses the data of the entry, which starts at the current position of the reader
+
+    :param function write: Called with every piece of decompressed data
+    :raise zipfile.BadZipfile: When the decompressed data does not match the checksum of the entry
+    """
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if info.compress_type == zipfile.ZIP_DEFLATED else None
+    crc = 0
+    for piece in reader.read(info.compress_size):
+        data = decompressor.decompress(piece) if decompressor else piece
+        crc = zlib.crc32(data, crc)
+        write(data)
+
+    if decompressor:
+        data = decompressor.flush()
+        crc = zlib.crc32(data, crc)
+        write(data)
+
+    if crc & 0xFFFFFFFF != info.CRC:
+        raise zipfile.BadZipfile("Bad CRC-32 for file {}".format(info.filename))
+
+
+def _get_extract_path(output_dir, filename):
+    """
+    Path to extract the entry of the zip to. Like zipfile does, it drops the parts of the name that would point
+    outside of the output directory.
+    """
+    name = filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        name = name.replace(os.path.altsep, os.path.sep)
+
+    name = os.path.splitdrive(name)[1]
+    parts = [part for part in name.split(os.path.sep) if part not in ("", os.path.curdir, os.path.pardir)]
+    return os.path.join(output_dir, *parts)
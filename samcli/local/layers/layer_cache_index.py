@@ -0,0 +1,205 @@
+"""
+Index of the Layers that were installed into the Layer Cache
+"""
+
+import logging
+import os
+import time
+
+from samcli.lib.utils.disk_cache import LOCK_FILE_SUFFIX, get_max_size, read_json_file, update_json_file
+
+LOG = logging.getLogger(__name__)
+
+# Total size of the Layers that are kept, in megabytes. Layers used by the current invoke are kept even if they exceed
+# this size.
+DEFAULT_MAX_SIZE_MB = 2048
+MAX_SIZE_ENV_VAR = "SAM_CLI_LAYER_CACHE_MAX_SIZE_MB"
+
+INDEX_FILE_NAME = ".index.json"
+
+# Files and directories that are not in the index, and were not modified for this many seconds, were left behind by an
+# interrupted download
+ORPHAN_MAX_AGE = 60 * 60
+
+
+class LayerCacheIndex(object):
+    """
+    Records the Layers that were completely installed into the Layer Cache, with the CodeSha256 that AWS Lambda
+    reported for their archive and their size on disk. A directory of the cache without a record is incomplete, for
+    example because SAM CLI was interrupted while it was being extracted, and must be downloaded again.
+
+    The index is a JSON file in the cache, shared by every process using the cache. It is only written while holding
+    a file lock, and is replaced atomically, so it can be read without the lock. The modification times of the Layer
+    directories order them from least to most recently used, so using a cached Layer does not write the index.
+    """
+
+    def __init__(self, layer_cache, max_size=None):
+        """
+        Parameters
+        ----------
+        layer_cache str
+            Path of the Layer Cache
+        max_size int
+            Optional. Total size of the Layers to keep, in bytes. Defaults to the value of the
+            ``SAM_CLI_LAYER_CACHE_MAX_SIZE_MB`` environment variable, or 2 GB.
+        """
+        self._layer_cache = layer_cache
+        self._path = os.path.join(layer_cache, INDEX_FILE_NAME)
+        self._max_size = max_size if max_size is not None else get_max_size(MAX_SIZE_ENV_VAR, DEFAULT_MAX_SIZE_MB)
+
+    def get(self, name):
+        """
+        Parameters
+        ----------
+        name str
+            Name of the Layer in the cache
+
+        Returns
+        -------
+        dict
+            Record of the Layer, with its "CodeSha256" and "Size". None, if the Layer is not completely installed
+        """
+        entry = self._read().get(name)
+        if entry is None or not os.path.isdir(os.path.join(self._layer_cache, name)):
+            return None
+
+        return entry
+
+    def touch(self, name):
+        """
+        Marks the Layer as the most recently used one
+        """
+        try:
+            os.utime(os.path.join(self._layer_cache, name), None)
+        except OSError:
+            LOG.debug("Failed to update the modification time of Layer %s", name, exc_info=True)
+
+    def add(self, name, code_sha256, size):
+        """
+        Records a Layer that was completely installed into the cache
+
+        Parameters
+        ----------
+        name str
+            Name of the Layer in the cache
+        code_sha256 str
+            CodeSha256 of the archive of the Layer
+        size int
+            Size of the installed Layer, in bytes
+        """
+        with self._write() as entries:
+            entries[name] = {"CodeSha256": code_sha256, "Size": size}
+
+    def remove(self, name):
+        """
+        Removes the record of a Layer, before it is deleted from the cache
+        """
+        with self._write() as entries:
+            entries.pop(name, None)
+
+    def get_evictable(self, keep=()):
+        """
+        Lists the least recently used Layers that must be deleted so the remaining ones fit the maximum size
+
+        Parameters
+        ----------
+        keep iterable(str)
+            Names of the Layers that must not be deleted
+
+        Returns
+        -------
+        list(str)
+            Names of the Layers to delete
+        """
+        entries = self._read()
+        total_size = sum(entry.get("Size", 0) for entry in entries.values())
+        if total_size <= self._max_size:
+            return []
+
+        candidates = []
+        for name, entry in entries.items():
+            mtime = _get_mtime(os.path.join(self._layer_cache, name))
+            if name not in keep and mtime is not None:
+                candidates.append((mtime, name, entry.get("Size", 0)))
+
+        evictable = []
+        for _, name, size in sorted(candidates):
+            if total_size <= self._max_size:
+                break
+
+            evictable.append(name)
+            total_size -= size
+
+        return evictable
+
+    def get_orphans(self, max_age=ORPHAN_MAX_AGE):
+        """
+        Lists the files and directories of the cache that are not recorded, and were not modified recently. They
+        were left behind by interrupted downloads. Only entries of Layers that have a lock file next to them are
+        listed, so files that SAM CLI did not create are never deleted from a shared directory.
+
+        Parameters
+        ----------
+        max_age int
+            Optional. Seconds after which an entry that is not recorded is an orphan
+
+        Returns
+        -------
+        list(str)
+            Paths of the orphans
+        """
+        entries = self._read()
+        now = time.time()
+
+        names = set(os.listdir(self._layer_cache))
+
+        orphans = []
+        for name in names:
+            if name in entries or name == INDEX_FILE_NAME or name.endswith(LOCK_FILE_SUFFIX):
+                continue
+
+            if not name.startswith(INDEX_FILE_NAME) and _get_layer_name(name) + LOCK_FILE_SUFFIX not in names:
+                continue
+
+            path = os.path.join(self._layer_cache, name)
+            mtime = _get_mtime(path)
+            if mtime is not None and now - mtime > max_age:
+                orphans.append(path)
+
+        return orphans
+
+    def _read(self):
+        """
+        :return dict: Name of every installed Layer => record of the Layer
+        """
+        entries = read_json_file(self._path)
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self):
+        """
+        Yields the records of the index, which are written back when the context exits
+        """
+        return update_json_file(self._path, self._read)
+
+
+def _get_layer_name(name):
+    """
+    :param string name: Name of an entry in the cache
+    :return string: Name of the Layer the entry belongs to
+    """
+    if name.startswith("."):
+        # Temporary directory of a download, named .<layer name>-<random suffix>
+        return name[1:].rsplit("-", 1)[0]
+
+    if name.endswith(".zip"):
+        return name[: -len(".zip")]
+
+    return name
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
@@ -3,13 +3,28 @@ Downloads Layers locally
 """
 
 import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 
 from samcli.lib.utils.codeuri import resolve_code_path
+from samcli.lib.utils.disk_cache import LOCK_FILE_SUFFIX, get_dir_size
+from samcli.lib.utils.file_lock import FileLock
+from samcli.local.docker.container import Container
+from samcli.local.lambdafn.exceptions import ArchiveChecksumMismatch
 from samcli.local.lambdafn.zip import unzip_from_uri
-from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound
+from samcli.commands.local.cli_common.user_exceptions import (
+    CredentialsRequired,
+    ResourceNotFound,
+    CorruptedLayerDownload,
+)
+from .layer_cache_index import LayerCacheIndex
 
 try:
     from pathlib import Path
@@ -21,7 +36,10 @@ LOG = logging.getLogger(__name__)
 
 
 class LayerDownloader(object):
-    def __init__(self, layer_cache, cwd, lambda_client=None):
+    # Number of layers that are downloaded at the same time
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, layer_cache, cwd, lambda_client=None, max_workers=None, max_cache_size=None):
         """
 
         Parameters
@@ -32,14 +50,24 @@ class LayerDownloader(object):
             Current working directory
         lambda_client boto3.client('lambda')
             Boto3 Client for AWS Lambda
+        max_workers int
+            Optional. Number of layers to download at the same time. Defaults to 4
+        max_cache_size int
+            Optional. Total size of the layers to keep in the cache, in bytes. The least recently used layers are
+            deleted when they exceed it. Defaults to 2 GB.
         """
         self._layer_cache = layer_cache
         self.cwd = cwd
         self._lambda_client = lambda_client
+        self._max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self._lock = threading.Lock()
+        self._index = LayerCacheIndex(layer_cache, max_size=max_cache_size)
 
     @property
     def lambda_client(self):
-        self._lambda_client = self._lambda_client or boto3.client("lambda")
+        # Creating boto3 clients is not thread-safe. Using them is.
+        with self._lock:
+            self._lambda_client = self._lambda_client or boto3.client("lambda")
         return self._lambda_client
 
     @property
@@ -71,22 +99,42 @@ class LayerDownloader(object):
         List(Path)
             List of Paths to where the layer was cached
         """
-        layer_dirs = []
-        for layer in layers:
-            layer_dirs.append(self.download(layer, force))
+        remote_layers = [layer for layer in layers if not layer.is_defined_within_template]
+        workers = min(self._max_workers, len(remote_layers))
+
+        if workers <= 1:
+            layer_dirs = [self.download(layer, force) for layer in layers]
+        else:
+            # Progress bars of concurrent downloads would overwrite each other. Every download logs its progress
+            # instead.
+            executor = ThreadPoolExecutor(max_workers=workers)
+            try:
+                futures = [executor.submit(self.download, layer, force, False) for layer in layers]
+                layer_dirs = [future.result() for future in futures]
+            finally:
+                executor.shutdown(wait=True)
+
+        if remote_layers:
+            self._clean_cache(keep=[layer.name for layer in remote_layers])
 
         return layer_dirs
 
-    def download(self, layer, force=False):
+    def download(self, layer, force=False, show_progressbar=True):
         """
         Download a given layer to the local cache.
 
+        The layer is unzipped into a temporary directory first, which is then moved into the cache and recorded in
+        its index, so a partially downloaded layer never looks cached. The download holds a lock on the layer in the
+        cache, so other processes and threads wait for it, instead of downloading the same layer at the same time.
+
         Parameters
         ----------
         layer samcli.commands.local.lib.provider.Layer
             Layer representing the layer to be downloaded.
         force bool
             True to download the layer even if it exists already on the system
+        show_progressbar bool
+            Optional. False to log the progress of the download, instead of showing a progress bar
 
         Returns
         -------
@@ -105,22 +153,84 @@ class LayerDownloader(object):
 
         if is_layer_downloaded and not force:
             LOG.info("%s is already cached. Skipping download", layer.arn)
+            self._index.touch(layer.name)
             return layer
 
-        layer_zip_path = layer.codeuri + ".zip"
-        layer_zip_uri = self._fetch_layer_uri(layer)
-        unzip_from_uri(
-            layer_zip_uri,
-            layer_zip_path,
-            unzip_output_dir=layer.codeuri,
-            progressbar_label="Downloading {}".format(layer.layer_arn),
-        )
+        with FileLock(layer.codeuri + LOCK_FILE_SUFFIX):
+            if not force and self._is_layer_cached(layer_path):
+                LOG.info("%s was downloaded by another process. Skipping download", layer.arn)
+                return layer
+
+            layer_zip_path = layer.codeuri + ".zip"
+            layer_content = self._fetch_layer_content(layer)
+            code_sha256 = layer_content.get("CodeSha256")
+
+            unzip_dir = tempfile.mkdtemp(prefix="." + layer.name + "-", dir=self.layer_cache)
+            try:
+                try:
+                    unzip_from_uri(
+                        layer_content.get("Location"),
+                        layer_zip_path,
+                        unzip_output_dir=unzip_dir,
+                        progressbar_label="Downloading {}".format(layer.layer_arn),
+                        show_progressbar=show_progressbar,
+                        expected_sha256=code_sha256,
+                    )
+                except ArchiveChecksumMismatch as ex:
+                    raise CorruptedLayerDownload("Download of {} is corrupted. {}".format(layer.arn, str(ex)))
+
+                # Layers that are mounted into a container keep the owner of the host, and the function runs as
+                # another user. The cache directory itself stays private to the owner.
+                _make_readable(unzip_dir)
+
+                # Replaces a layer that was not completely installed, or is downloaded again by force
+                self._index.remove(layer.name)
+                if os.path.lexists(layer.codeuri):
+                    shutil.rmtree(layer.codeuri)
+
+                os.rename(unzip_dir, layer.codeuri)
+                self._index.add(layer.name, code_sha256, get_dir_size(layer.codeuri))
+            finally:
+                if os.path.isdir(unzip_dir):
+                    shutil.rmtree(unzip_dir)
 
         return layer
 
-    def _fetch_layer_uri(self, layer):
+    def _clean_cache(self, keep):
+        """
+        Deletes the least recently used layers until the cache fits its maximum size, and the files left behind by
+        interrupted downloads
+
+        Parameters
+        ----------
+        keep list(str)
+            Names of the layers that must be kept
+        """
+        # Warm and standby containers keep running with the layers they were created with
+        mounted = [
+            name for name in os.listdir(self.layer_cache) if Container.is_mounted(os.path.join(self.layer_cache, name))
+        ]
+        for name in self._index.get_evictable(list(keep) + mounted):
+            layer_path = os.path.join(self.layer_cache, name)
+            # Waits for a download of the same layer by another process
+            with FileLock(layer_path + LOCK_FILE_SUFFIX):
+                LOG.debug("Evicting Layer %s from the cache", name)
+                self._index.remove(name)
+                shutil.rmtree(layer_path, ignore_errors=True)
+
+        for path in self._index.get_orphans():
+            LOG.debug("Deleting %s, which was left behind by an interrupted download", path)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    LOG.debug("Failed to delete %s", path, exc_info=True)
+
+    def _fetch_layer_content(self, layer):
         """
-        Fetch the Layer Uri based on the LayerVersion Arn
+        Fetch the Location and checksum of the Layer content based on the LayerVersion Arn
 
         Parameters
         ----------
@@ -129,8 +239,9 @@ class LayerDownloader(object):
 
         Returns
         -------
-        str
-            The Uri to download the LayerVersion Content from
+        dict
+            Content of the LayerVersion, with the Uri to download it from in "Location", and its base64 encoded SHA256
+            in "CodeSha256"
 
         Raises
         ------
@@ -159,11 +270,12 @@ class LayerDownloader(object):
             # If it was not 'AccessDeniedException' or 'ResourceNotFoundException' re-raise
             raise e
 
-        return layer_version_response.get("Content").get("Location")
+        return layer_version_response.get("Content")
 
     def _is_layer_cached(self, layer_path):
         """
-        Checks if the layer is already cached on the system
+        Checks if the layer is already cached on the system. It is cached only if its download completed, which is
+        recorded in the index of the cache. This check does not call AWS.
 
         Parameters
         ----------
@@ -173,10 +285,10 @@ class LayerDownloader(object):
         Returns
         -------
         bool
-            True if the layer_path already exists otherwise False
+            True if the layer_path already exists and its download completed otherwise False
 
         """
-        return layer_path.exists()
+        return layer_path.exists() and self._index.get(layer_path.name) is not None
 
     @staticmethod
     def _create_cache(layer_cache):
@@ -194,3 +306,25 @@ class LayerDownloader(object):
 
         """
         Path(layer_cache).mkdir(mode=0o700, parents=True, exist_ok=True)
+
+
+def _make_readable(path):
+    """
+    Lets every user read a directory tree, and run the files that its owner can run. Symlinks are left as they are.
+
+    Parameters
+    ----------
+    path str
+        Path to the directory
+    """
+    for root, dirs, files in os.walk(path):
+        for name in [root] + [os.path.join(root, name) for name in dirs + files]:
+            mode = os.lstat(name).st_mode
+            if stat.S_ISLNK(mode):
+                continue
+
+            readable = mode | stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+            if stat.S_ISDIR(mode) or mode & stat.S_IXUSR:
+                readable |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+            if readable != mode:
+                os.chmod(name, stat.S_IMODE(readable))
@@ -0,0 +1,158 @@
+"""
+Merges the content of layers into one directory, to mount as /opt of a runtime container
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+from samcli.local.docker.container import Container
+
+LOG = logging.getLogger(__name__)
+
+# Number of merged directories that are kept. The least recently used ones are deleted, unless a container mounts them.
+MAX_MERGED_DIRS = 10
+
+_TEMP_PREFIX = ".tmp-"
+
+
+def merge_layers(layers, fingerprints, merged_layers_dir):
+    """
+    Merges the content of the layers into one directory, like Lambda extracts them into /opt: in order, with the
+    files of a layer replacing the files of the layers before it. Files are hard-linked instead of copied where the
+    file system allows it.
+
+    A merged directory is named after the layers and the fingerprints of their content, and is reused until one of
+    them changes. Merged directories are never modified after they were created, so running containers keep a
+    consistent view of their layers.
+
+    Parameters
+    ----------
+    layers list(samcli.commands.local.lib.provider.Layer)
+        Downloaded layers, in the order of the function
+    fingerprints list(str)
+        Fingerprint of the content of every layer defined in the template. None for layers downloaded from AWS,
+        whose content never changes. A layer defined in the template without a fingerprint is merged again every time.
+    merged_layers_dir str
+        Directory to keep merged directories in
+
+    Returns
+    -------
+    str
+        Path of the merged directory
+    """
+    key = []
+    for layer, fingerprint in zip(layers, fingerprints):
+        if layer.is_defined_within_template and not fingerprint:
+            # The content of the layer is unknown, so a merged directory with the same name may be stale
+            fingerprint = uuid.uuid4().hex
+        key.append([layer.name, fingerprint])
+
+    name = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+    path = os.path.join(merged_layers_dir, name)
+
+    if os.path.isdir(path):
+        LOG.debug("Reusing merged layers %s", path)
+        _touch(path)
+        return path
+
+    if not os.path.isdir(merged_layers_dir):
+        os.makedirs(merged_layers_dir)
+
+    LOG.info("Merging %d layers into %s", len(layers), path)
+    temp_dir = tempfile.mkdtemp(prefix=_TEMP_PREFIX, dir=merged_layers_dir)
+    try:
+        # mkdtemp creates a directory that only its owner can read. It becomes /opt, which the function reads as
+        # another user.
+        os.chmod(temp_dir, 0o755)
+        for layer in layers:
+            _merge_tree(layer.codeuri, temp_dir)
+
+        try:
+            os.rename(temp_dir, path)
+        except OSError:
+            if not os.path.isdir(path):
+                raise
+            # Another process merged the same layers first
+    finally:
+        if os.path.isdir(temp_dir):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    _delete_least_recently_used(merged_layers_dir, keep=path)
+    return path
+
+
+def _merge_tree(source_dir, target_dir):
+    """
+    Adds the content of the source directory to the target directory, replacing entries that exist already
+    """
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        target_root = os.path.normpath(os.path.join(target_dir, relative_root))
+
+        for name in list(dirs):
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+
+            if os.path.islink(source):
+                # os.walk does not descend into symlinks to directories. Link them like files.
+                dirs.remove(name)
+                files.append(name)
+                continue
+
+            if os.path.lexists(target) and (os.path.islink(target) or not os.path.isdir(target)):
+                os.remove(target)
+            if not os.path.isdir(target):
+                os.mkdir(target)
+                shutil.copymode(source, target)
+
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+
+            if os.path.islink(target) or os.path.isfile(target):
+                os.remove(target)
+            elif os.path.isdir(target):
+                shutil.rmtree(target)
+
+            _link(source, target)
+
+
+def _link(source, target):
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), target)
+        return
+
+    try:
+        os.link(source, target)
+    except (OSError, AttributeError):
+        # Hard links do not work across file systems, or on some platforms
+        shutil.copy2(source, target)
+
+
+def _delete_least_recently_used(merged_layers_dir, keep):
+    merged_dirs = []
+    for name in os.listdir(merged_layers_dir):
+        path = os.path.join(merged_layers_dir, name)
+        if path != keep and not name.startswith(_TEMP_PREFIX) and os.path.isdir(path):
+            merged_dirs.append((os.path.getmtime(path), path))
+
+    for _, path in sorted(merged_dirs, reverse=True)[MAX_MERGED_DIRS - 1 :]:
+        if Container.is_mounted(path):
+            # Warm and standby containers keep running with the layers they were created with
+            LOG.debug("Keeping merged layers %s. A container mounts them", path)
+            continue
+
+        LOG.debug("Deleting merged layers %s", path)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        LOG.debug("Failed to update the modification time of %s", path, exc_info=True)
@@ -165,3 +165,142 @@ class LambdaOutputParser(object):
             # If you can't serialize the output into a dict, then do nothing
             pass
         return is_lambda_user_error_response
+
+
+class LambdaOutputSplitter(object):
+    """
+    Stream to give an invoke as its stdout. It separates the response of the function from any log statements the
+    function wrote directly to stdout, while the output arrives. The response is the last line of the output. Every
+    line before it is forwarded to the log stream right away, so only the last line is held in memory, no matter how
+    much the function prints.
+
+    The last line is held up to ``max_response_size`` bytes. A longer line is forwarded to the log stream instead. If
+    it turns out to be the last line, the function has no response.
+
+    A runtime that keeps the response apart from the logs, like the Runtime API of a warm container, writes it with
+    ``write_response`` instead, along with whether it is an error.
+    """
+
+    # Lambda does not return responses larger than 6 MB
+    DEFAULT_MAX_RESPONSE_SIZE = 6 * 1024 * 1024
+
+    def __init__(self, log_stream=None, max_response_size=DEFAULT_MAX_RESPONSE_SIZE):
+        """
+        Parameters
+        ----------
+        log_stream samcli.lib.utils.stream_writer.StreamWriter
+            Optional. Stream to forward the log statements to. If not given, they are dropped.
+        max_response_size int
+            Optional. Maximum number of bytes of the response
+        """
+        self._log_stream = log_stream
+        self._max_response_size = max_response_size
+
+        # Last line written so far, and number of newlines written after it
+        self._last_line = bytearray()
+        self._newlines = 0
+        # True, if the last line is too large and was forwarded to the log stream already
+        self._is_last_line_dropped = False
+        # Whether the response written with ``write_response`` is an error. None, if there is no such response.
+        self._is_error = None
+
+    def write(self, output):
+        """
+        Writes the output of the function
+
+        Parameters
+        ----------
+        output bytes
+            Part of the output
+        """
+        if self._is_error is not None:
+            # The response was written already. Whatever the function writes after it can only be logged.
+            self._write_log(output)
+            return
+
+        content = output.rstrip(b"\n")
+        trailing_newlines = len(output) - len(content)
+
+        if content:
+            last_newline = content.rfind(b"\n")
+            if self._newlines or last_newline >= 0:
+                # The last line is complete, and more lines follow. It was a log statement.
+                self._write_log(bytes(self._last_line) + b"\n" * self._newlines + content[: last_newline + 1])
+                self._last_line = bytearray()
+                self._newlines = 0
+                self._is_last_line_dropped = False
+
+            self._append_to_last_line(content[last_newline + 1 :])
+
+        self._newlines += trailing_newlines
+
+    def write_response(self, response, is_error=None):
+        """
+        Writes the response of the function, that the runtime kept apart from the logs. Anything written before is a
+        log statement.
+
+        Parameters
+        ----------
+        response bytes
+            Response of the function
+        is_error bool
+            Optional. True, if the function failed. If not given, it is detected from the response.
+        """
+        # Output written so far was not the response
+        self._write_log(bytes(self._last_line) + b"\n" * self._newlines)
+        self._last_line = bytearray()
+        self._newlines = 0
+        self._is_last_line_dropped = False
+
+        if is_error is None:
+            is_error = LambdaOutputParser.is_lambda_error_response(response.strip().decode("utf-8"))
+        self._is_error = is_error
+
+        self._append_to_last_line(response)
+
+    def flush(self):
+        if self._log_stream:
+            self._log_stream.flush()
+
+    def get_lambda_output(self):
+        """
+        Returns the response of the function, once the function returned
+
+        Returns
+        -------
+        str
+            String data containing response from Lambda function
+        bool
+            If the response is an error/exception from the container
+        """
+        if self._is_last_line_dropped:
+            LOG.warning(
+                "Function response is larger than %d bytes. It was written to the logs instead",
+                self._max_response_size,
+            )
+            return "", bool(self._is_error)
+
+        lambda_response = bytes(self._last_line).strip().decode("utf-8")
+
+        if self._is_error is not None:
+            return lambda_response, self._is_error
+
+        return lambda_response, LambdaOutputParser.is_lambda_error_response(lambda_response)
+
+    def _append_to_last_line(self, data):
+        if self._is_last_line_dropped:
+            self._write_log(data)
+            return
+
+        if len(self._last_line) + len(data) > self._max_response_size:
+            # Too large to be a response. Stop holding on to this line.
+            self._write_log(bytes(self._last_line) + data)
+            self._last_line = bytearray()
+            self._is_last_line_dropped = True
+            return
+
+        self._last_line += data
+
+    def _write_log(self, data):
+        if self._log_stream and data:
+            self._log_stream.write(data)
@@ -0,0 +1,92 @@
+"""
+Benchmarks demuxing the stream of the Docker Attach API. A writer thread feeds a synthetic multiplexed stream into a
+socket pair, and the demuxer reads it from the other end, like it reads the output of a container.
+"""
+
+import io
+import logging
+import socket
+import struct
+import threading
+import time
+
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from samcli.lib.utils.stream_writer import StreamWriter
+from samcli.local.docker.attach_api import _read_socket
+from samcli.local.docker.container import Container
+
+LOG = logging.getLogger(__name__)
+
+
+def make_stream(frame_sizes, frame_types):
+    """
+    Returns a multiplexed stream with one frame of every given size, cycling through the frame types, and the data
+    expected on stdout and stderr
+    """
+    frames = []
+    expected = {1: [], 2: []}
+
+    for index, size in enumerate(frame_sizes):
+        frame_type = frame_types[index % len(frame_types)]
+        data = (b"%d" % (index % 10)) * size
+        frames.append(struct.pack(">BxxxL", frame_type, size) + data)
+        expected[frame_type].append(data)
+
+    return b"".join(frames), b"".join(expected[1]), b"".join(expected[2])
+
+
+class TestAttachStreamThroughput(TestCase):
+    @parameterized.expand(
+        [
+            # Function that prints many short lines
+            ("small_stdout_frames", [80] * 200000, [1]),
+            # Short lines interleaved on stdout and stderr
+            ("small_interleaved_frames", [80] * 200000, [1, 2]),
+            # Multi-megabyte response
+            ("large_frames", [4 * 1024 * 1024] * 4, [1]),
+        ]
+    )
+    def test_demux_throughput(self, name, frame_sizes, frame_types):
+        stream, expected_stdout, expected_stderr = make_stream(frame_sizes, frame_types)
+        stdout = io.BytesIO()
+        stderr = io.BytesIO()
+
+        reader, writer = socket.socketpair()
+
+        def write():
+            try:
+                writer.sendall(stream)
+            finally:
+                writer.close()
+
+        thread = threading.Thread(target=write)
+        thread.daemon = True
+
+        start = time.time()
+        thread.start()
+        try:
+            # The Docker SDK gives a socket file of the unix socket of the Docker daemon on Python 3
+            Container._write_container_output(
+                _read_socket(reader.makefile("rb", buffering=0)),
+                stdout=StreamWriter(stdout),
+                stderr=StreamWriter(stderr),
+            )
+        finally:
+            thread.join()
+            reader.close()
+        elapsed = max(time.time() - start, 1e-6)
+
+        LOG.info(
+            "%s: demuxed %d frames, %.1f MB in %.3f seconds (%.1f MB/s)",
+            name,
+            len(frame_sizes),
+            len(stream) / 1e6,
+            elapsed,
+            len(stream) / 1e6 / elapsed,
+        )
+
+        self.assertEqual(stdout.getvalue(), expected_stdout)
+        self.assertEqual(stderr.getvalue(), expected_stderr)
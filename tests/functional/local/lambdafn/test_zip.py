@@ -0,0 +1,224 @@
+"""
+Benchmarks extracting an archive with many small files, like a layer with node_modules, with one and more threads,
+and downloads archives from a local HTTP server that stands in for S3
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import TestCase
+
+from parameterized import parameterized
+from six.moves import BaseHTTPServer, socketserver
+
+from samcli.local.lambdafn.exceptions import ArchiveChecksumMismatch
+from samcli.local.lambdafn.zip import unzip, unzip_from_uri
+
+LOG = logging.getLogger(__name__)
+
+
+class TestUnzipThroughput(TestCase):
+    FILE_COUNT = 10000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.zip_file_path = os.path.join(cls.dir, "layer.zip")
+
+        with zipfile.ZipFile(cls.zip_file_path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+            for index in range(cls.FILE_COUNT):
+                info = zipfile.ZipInfo("nodejs/node_modules/package{}/lib/{}.js".format(index % 200, index))
+                info.external_attr = 0o644 << 16
+                zip_ref.writestr(info, "exports.id = {};\n".format(index) * 40)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    @parameterized.expand([(1,), (4,), (8,)])
+    def test_unzip_throughput(self, workers):
+        output_dir = tempfile.mkdtemp(dir=self.dir)
+
+        start = time.time()
+        unzip(self.zip_file_path, output_dir, workers=workers)
+        elapsed = time.time() - start
+
+        LOG.info("Extracted %d files with %d workers in %.3f seconds", self.FILE_COUNT, workers, elapsed)
+
+        extracted = sum(len(files) for _, _, files in os.walk(output_dir))
+        self.assertEqual(extracted, self.FILE_COUNT)
+
+
+class _RangeHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves a zip like S3 does, with support for HTTP Range requests
+    """
+
+    content = b""
+    supports_range = True
+    # Number of responses to ranges that start at a given byte, to break after half of their bytes, like a flaky
+    # connection
+    broken_responses = 0
+    requested_ranges = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        size = len(self.content)
+        range_header = self.headers.get("Range")
+        self.requested_ranges.append(range_header)
+
+        if not range_header or not self.supports_range:
+            self.send_response(200)
+            start, end = 0, size
+        else:
+            first, last = range_header.split("=")[1].split("-")
+            start, end = (size - min(size, int(last)), size) if not first else (int(first), int(last or size - 1) + 1)
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {}-{}/{}".format(start, end - 1, size))
+
+        body = self.content[start:end]
+        self.send_header("Content-length", str(len(body)))
+        self.end_headers()
+
+        if _RangeHandler.broken_responses and range_header and not range_header.startswith("bytes=-"):
+            _RangeHandler.broken_responses -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestUnzipFromUri(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+        cls.uri = "http://127.0.0.1:{}/layer.zip?X-Amz-Signature=secret".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.dir, "layer.zip")
+        self.output_dir = os.path.join(self.dir, "layer")
+        os.mkdir(self.output_dir)
+
+        _RangeHandler.supports_range = True
+        _RangeHandler.broken_responses = 0
+        _RangeHandler.requested_ranges = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def serve_zip(self, file_count=200, compression=zipfile.ZIP_DEFLATED):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression) as zip_ref:
+            zip_ref.writestr("python/", "")
+            for index in range(file_count):
+                info = zipfile.ZipInfo("python/package{}/module_with_a_long_name_{}.py".format(index % 20, index))
+                info.external_attr = 0o644 << 16
+                info.compress_type = zipfile.ZIP_STORED if index % 3 == 0 else compression
+                zip_ref.writestr(info, os.urandom(64) * (index % 50 + 1))
+
+        _RangeHandler.content = archive.getvalue()
+        return base64.b64encode(hashlib.sha256(_RangeHandler.content).digest()).decode("ascii")
+
+    def unzip_from_uri(self, expected_sha256=None):
+        unzip_from_uri(
+            self.uri,
+            self.zip_path,
+            self.output_dir,
+            "Downloading",
+            show_progressbar=False,
+            expected_sha256=expected_sha256,
+        )
+
+    def assert_extracted(self):
+        with zipfile.ZipFile(io.BytesIO(_RangeHandler.content)) as zip_ref:
+            for info in zip_ref.infolist():
+                path = os.path.join(self.output_dir, info.filename)
+                if info.filename.endswith("/"):
+                    self.assertTrue(os.path.isdir(path))
+                    continue
+
+                with open(path, "rb") as fp:
+                    self.assertEqual(fp.read(), zip_ref.read(info))
+
+        self.assertFalse(os.path.exists(self.zip_path))
+
+    def test_must_extract_while_downloading(self):
+        sha256 = self.serve_zip()
+
+        self.unzip_from_uri(sha256)
+
+        self.assert_extracted()
+        # The tail with the central directory, then the rest of the zip
+        self.assertEqual(len(_RangeHandler.requested_ranges), 2)
+        self.assertEqual(_RangeHandler.requested_ranges[0], "bytes=-65557")
+
+    def test_must_read_central_directory_larger_than_tail(self):
+        # The central directory of this zip is larger than 64 KB
+        sha256 = self.serve_zip(file_count=1500)
+
+        self.unzip_from_uri(sha256)
+
+        self.assert_extracted()
+        self.assertEqual(len(_RangeHandler.requested_ranges), 3)
+
+    def test_must_resume_broken_download(self):
+        sha256 = self.serve_zip()
+        _RangeHandler.broken_responses = 2
+
+        self.unzip_from_uri(sha256)
+
+        self.assert_extracted()
+        # The tail, then the rest of the zip, which is resumed twice from the last byte that was received
+        self.assertEqual(len(_RangeHandler.requested_ranges), 4)
+        starts = [int(byte_range[len("bytes=") :].split("-")[0]) for byte_range in _RangeHandler.requested_ranges[1:]]
+        self.assertEqual(starts[0], 0)
+        self.assertTrue(starts[0] < starts[1] < starts[2])
+
+    def test_must_download_zip_first_without_range_support(self):
+        sha256 = self.serve_zip()
+        _RangeHandler.supports_range = False
+
+        self.unzip_from_uri(sha256)
+
+        self.assert_extracted()
+        self.assertEqual(len(_RangeHandler.requested_ranges), 1)
+
+    def test_must_download_zip_first_with_unsupported_compression(self):
+        sha256 = self.serve_zip(compression=zipfile.ZIP_BZIP2)
+
+        self.unzip_from_uri(sha256)
+
+        self.assert_extracted()
+        self.assertEqual(_RangeHandler.requested_ranges, ["bytes=-65557", None])
+
+    def test_must_fail_on_checksum_mismatch(self):
+        self.serve_zip()
+
+        with self.assertRaises(ArchiveChecksumMismatch) as ctx:
+            self.unzip_from_uri("c2hhMjU2")
+
+        self.assertNotIn("secret", str(ctx.exception))
@@ -0,0 +1,129 @@
+"""
+Downloads layers from a local HTTP server, which stands in for the pre-signed S3 URLs of AWS Lambda
+"""
+
+import base64
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import TestCase
+
+from mock import Mock
+from six.moves import BaseHTTPServer, socketserver
+
+from samcli.commands.local.cli_common.user_exceptions import CorruptedLayerDownload
+from samcli.commands.local.lib.provider import LayerVersion
+from samcli.local.layers.layer_downloader import LayerDownloader
+
+
+class _LayerHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Seconds to wait before answering, like a slow connection
+    delay = 0.5
+    content = b""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-length", str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestLayerDownloaderInParallel(TestCase):
+    LAYER_COUNT = 4
+
+    @classmethod
+    def setUpClass(cls):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_ref:
+            zip_ref.writestr("python/layer.py", "LAYER = True\n")
+        _LayerHandler.content = archive.getvalue()
+
+        cls.server = _ThreadingHTTPServer(("127.0.0.1", 0), _LayerHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.layer_cache = tempfile.mkdtemp()
+
+        url = "http://127.0.0.1:{}/layer.zip".format(self.server.server_address[1])
+        self.lambda_client = Mock()
+        code_sha256 = base64.b64encode(hashlib.sha256(_LayerHandler.content).digest()).decode("ascii")
+        self.lambda_client.get_layer_version.return_value = {"Content": {"Location": url, "CodeSha256": code_sha256}}
+
+        self.layers = [
+            LayerVersion("arn:aws:lambda:us-east-1:123456789012:layer:layer{}:1".format(index), None)
+            for index in range(self.LAYER_COUNT)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.layer_cache)
+
+    def test_must_download_layers_at_the_same_time(self):
+        downloader = LayerDownloader(self.layer_cache, ".", self.lambda_client)
+
+        start = time.time()
+        layers = downloader.download_all(self.layers)
+        elapsed = time.time() - start
+
+        # Downloading them one after another takes LAYER_COUNT times the delay of the server
+        self.assertLess(elapsed, _LayerHandler.delay * self.LAYER_COUNT)
+        for layer in layers:
+            self.assertTrue(os.path.isfile(os.path.join(layer.codeuri, "python", "layer.py")))
+
+    def test_must_download_layer_once_for_concurrent_downloaders(self):
+        # Downloaders of separate invokes share the layer cache
+        downloaders = [LayerDownloader(self.layer_cache, ".", self.lambda_client) for _ in range(3)]
+        threads = [
+            threading.Thread(target=downloader.download_all, args=(self.layers[:1],)) for downloader in downloaders
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.lambda_client.get_layer_version.assert_called_once_with(
+            LayerName="arn:aws:lambda:us-east-1:123456789012:layer:layer0", VersionNumber=1
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.layer_cache)),
+            [".index.json", ".index.json.lock", self.layers[0].name, self.layers[0].name + ".lock"],
+        )
+
+    def test_must_reject_corrupted_download(self):
+        self.lambda_client.get_layer_version.return_value["Content"]["CodeSha256"] = "c2hhMjU2"
+        downloader = LayerDownloader(self.layer_cache, ".", self.lambda_client)
+
+        with self.assertRaises(CorruptedLayerDownload):
+            downloader.download(self.layers[0])
+
+        self.assertFalse(os.path.exists(os.path.join(self.layer_cache, self.layers[0].name)))
+
+    def test_must_evict_least_recently_used_layers(self):
+        # Fits one layer
+        downloader = LayerDownloader(self.layer_cache, ".", self.lambda_client, max_cache_size=20)
+
+        for layer in self.layers[:2]:
+            downloader.download_all([layer])
+
+        self.assertFalse(os.path.exists(os.path.join(self.layer_cache, self.layers[0].name)))
+        self.assertTrue(os.path.isdir(os.path.join(self.layer_cache, self.layers[1].name)))
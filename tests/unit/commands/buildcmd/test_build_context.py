@@ -114,6 +114,21 @@ class TestBuildContext__enter__(TestCase):
         func_provider_mock.get_all.assert_called_once()
 
 
+class TestBuildContext__exit__(TestCase):
+    def test_must_shutdown_container_manager(self):
+        context = BuildContext("function_identifier", "template_file", None, "build_dir", mode="mode")
+        context._container_manager = container_manager_mock = Mock()
+
+        context.__exit__()
+
+        container_manager_mock.shutdown.assert_called_once_with()
+
+    def test_must_exit_without_container_manager(self):
+        context = BuildContext("function_identifier", "template_file", None, "build_dir", mode="mode")
+
+        context.__exit__()
+
+
 class TestBuildContext_setup_build_dir(TestCase):
     @patch("samcli.commands.build.build_context.shutil")
     @patch("samcli.commands.build.build_context.os")
@@ -9,6 +9,7 @@ from samcli.commands.local.cli_common.invoke_context import InvokeContext
 
 from unittest import TestCase
 from mock import Mock, PropertyMock, patch, ANY, mock_open
+from parameterized import parameterized
 
 
 class TestInvokeContext__enter__(TestCase):
@@ -74,7 +75,7 @@ class TestInvokeContext__enter__(TestCase):
         invoke_context._get_env_vars_value.assert_called_with(env_vars_file)
         invoke_context._setup_log_file.assert_called_with(log_file)
         invoke_context._get_debug_context.assert_called_once_with(1111, "args", "path-to-debugger")
-        invoke_context._get_container_manager.assert_called_once_with("network", True)
+        invoke_context._get_container_manager.assert_called_once_with("network", True, 0)
 
     @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
     def test_must_use_container_manager_to_check_docker_connectivity(self, SamFunctionProviderMock):
@@ -131,6 +132,92 @@ class TestInvokeContext__enter__(TestCase):
                     str(ex_ctx.exception),
                 )
 
+    @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
+    def test_must_prewarm_all_functions_in_eager_mode(self, SamFunctionProviderMock):
+        invoke_context = InvokeContext("template-file", warm_container_initialization_mode="EAGER")
+
+        invoke_context._get_template_data = Mock()
+        invoke_context._get_env_vars_value = Mock()
+        invoke_context._setup_log_file = Mock()
+        invoke_context._get_debug_context = Mock()
+        invoke_context._get_container_manager = Mock()
+        invoke_context._get_container_manager.return_value.is_docker_reachable = True
+
+        runner_mock = Mock()
+        with patch.object(InvokeContext, "local_lambda_runner", new_callable=PropertyMock, return_value=runner_mock):
+            invoke_context.__enter__()
+
+        runner_mock.prewarm_all.assert_called_once_with()
+
+    @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
+    def test_must_not_prewarm_in_lazy_mode(self, SamFunctionProviderMock):
+        invoke_context = InvokeContext("template-file", warm_container_initialization_mode="LAZY")
+
+        invoke_context._get_template_data = Mock()
+        invoke_context._get_env_vars_value = Mock()
+        invoke_context._setup_log_file = Mock()
+        invoke_context._get_debug_context = Mock()
+        invoke_context._get_container_manager = Mock()
+        invoke_context._get_container_manager.return_value.is_docker_reachable = True
+
+        runner_mock = Mock()
+        with patch.object(InvokeContext, "local_lambda_runner", new_callable=PropertyMock, return_value=runner_mock):
+            invoke_context.__enter__()
+
+        runner_mock.prewarm_all.assert_not_called()
+
+    @parameterized.expand([(True, 1), (False, 0)])
+    @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
+    def test_must_prefetch_images_of_functions(self, prefetch_images, pull_count, SamFunctionProviderMock):
+        SamFunctionProviderMock.return_value.get_all.return_value = [
+            Mock(runtime="python3.7"),
+            Mock(runtime="python3.7"),
+            Mock(runtime="nodejs10.x"),
+            Mock(runtime="unsupported"),
+        ]
+        invoke_context = InvokeContext("template-file", prefetch_images=prefetch_images)
+
+        invoke_context._get_template_data = Mock()
+        invoke_context._get_env_vars_value = Mock()
+        invoke_context._setup_log_file = Mock()
+        invoke_context._get_debug_context = Mock()
+        invoke_context._get_container_manager = Mock()
+        container_manager_mock = invoke_context._get_container_manager.return_value
+        container_manager_mock.is_docker_reachable = True
+
+        invoke_context.__enter__()
+
+        self.assertEqual(container_manager_mock.pull_images.call_count, pull_count)
+        if pull_count:
+            container_manager_mock.pull_images.assert_called_with(
+                {"lambci/lambda:python3.7", "lambci/lambda:nodejs10.x"}
+            )
+
+    @parameterized.expand(
+        [(True, None, None, 2), (True, "LAZY", None, 0), (False, None, None, 0), (True, None, Mock(), 0)]
+    )
+    @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
+    def test_must_size_standby_pool(
+        self, standby_containers, warm_mode, debug_context, pool_size, SamFunctionProviderMock
+    ):
+        invoke_context = InvokeContext(
+            "template-file",
+            docker_network="network",
+            warm_container_initialization_mode=warm_mode,
+            standby_containers=standby_containers,
+        )
+
+        invoke_context._get_template_data = Mock()
+        invoke_context._get_env_vars_value = Mock()
+        invoke_context._setup_log_file = Mock()
+        invoke_context._get_debug_context = Mock(return_value=debug_context)
+        invoke_context._get_container_manager = Mock()
+        invoke_context._get_container_manager.return_value.is_docker_reachable = True
+
+        invoke_context.__enter__()
+
+        invoke_context._get_container_manager.assert_called_once_with("network", None, pool_size)
+
 
 class TestInvokeContext__exit__(TestCase):
     def test_must_close_opened_logfile(self):
@@ -150,6 +237,25 @@ class TestInvokeContext__exit__(TestCase):
         context.__exit__()
         self.assertIsNone(context._log_file_handle)
 
+    def test_must_shutdown_container_manager(self):
+        context = InvokeContext(template_file="template")
+        container_manager_mock = Mock()
+        context._container_manager = container_manager_mock
+
+        context.__exit__()
+
+        container_manager_mock.shutdown.assert_called_with()
+
+    def test_must_close_timings_writer(self):
+        context = InvokeContext(template_file="template")
+        timings_writer_mock = Mock()
+        context._timings_writer = timings_writer_mock
+
+        context.__exit__()
+
+        timings_writer_mock.close.assert_called_with()
+        self.assertIsNone(context._timings_writer)
+
 
 class TestInvokeContextAsContextManager(TestCase):
     """
@@ -225,6 +331,7 @@ class TestInvokeContext_local_lambda_runner(TestCase):
             debug_args="args",
             aws_profile="profile",
             aws_region="region",
+            mount_layers=True,
         )
 
     @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
@@ -265,8 +372,10 @@ class TestInvokeContext_local_lambda_runner(TestCase):
             result = self.context.local_lambda_runner
             self.assertEquals(result, runner_mock)
 
-            LambdaRuntimeMock.assert_called_with(container_manager_mock, image_mock)
-            lambda_image_patch.assert_called_once_with(download_mock, True, True)
+            LambdaRuntimeMock.assert_called_with(
+                container_manager_mock, image_mock, warm_containers=False, timings_writer=None, code_cache=ANY
+            )
+            lambda_image_patch.assert_called_once_with(download_mock, True, True, mount_layers=True, image_cache=ANY)
             LocalLambdaMock.assert_called_with(
                 local_runtime=runtime_mock,
                 function_provider=ANY,
@@ -563,6 +672,19 @@ class TestInvokeContext_setup_log_file(TestCase):
         m.assert_called_with(filename, "wb")
 
 
+class TestInvokeContext_setup_timings_writer(TestCase):
+    def test_must_return_if_file_not_given(self):
+        result = InvokeContext._setup_timings_writer(timings_file=None)
+        self.assertIsNone(result, "Timings writer must not be setup")
+
+    @patch("samcli.commands.local.cli_common.invoke_context.TimingsFileWriter")
+    def test_must_create_writer(self, TimingsFileWriterMock):
+        result = InvokeContext._setup_timings_writer("timings.jsonl")
+
+        self.assertEqual(result, TimingsFileWriterMock.return_value)
+        TimingsFileWriterMock.assert_called_with("timings.jsonl")
+
+
 class TestInvokeContext_get_debug_context(TestCase):
     @patch("samcli.commands.local.cli_common.invoke_context.Path")
     def test_debugger_path_not_found(self, pathlib_mock):
@@ -36,6 +36,8 @@ class TestCli(TestCase):
         self.parameter_overrides = {}
         self.layer_cache_basedir = "/some/layers/path"
         self.force_image_build = True
+        self.timings_file = None
+        self.mount_layers = False
         self.region_name = "region"
         self.profile = "profile"
 
@@ -70,6 +72,8 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
         )
 
         InvokeContextMock.assert_called_with(
@@ -86,6 +90,8 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
             aws_region=self.region_name,
             aws_profile=self.profile,
         )
@@ -124,6 +130,8 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
         )
 
         InvokeContextMock.assert_called_with(
@@ -140,6 +148,8 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
             aws_region=self.region_name,
             aws_profile=self.profile,
         )
@@ -177,6 +187,8 @@ class TestCli(TestCase):
                 parameter_overrides=self.parameter_overrides,
                 layer_cache_basedir=self.layer_cache_basedir,
                 force_image_build=self.force_image_build,
+                timings_file=self.timings_file,
+                mount_layers=self.mount_layers,
             )
 
         msg = str(ex_ctx.exception)
@@ -225,6 +237,8 @@ class TestCli(TestCase):
                 parameter_overrides=self.parameter_overrides,
                 layer_cache_basedir=self.layer_cache_basedir,
                 force_image_build=self.force_image_build,
+                timings_file=self.timings_file,
+                mount_layers=self.mount_layers,
             )
 
         msg = str(ex_ctx.exception)
@@ -273,6 +287,8 @@ class TestCli(TestCase):
                 parameter_overrides=self.parameter_overrides,
                 layer_cache_basedir=self.layer_cache_basedir,
                 force_image_build=self.force_image_build,
+                timings_file=self.timings_file,
+                mount_layers=self.mount_layers,
             )
 
         msg = str(ex_ctx.exception)
@@ -309,6 +325,8 @@ class TestCli(TestCase):
                 parameter_overrides=self.parameter_overrides,
                 layer_cache_basedir=self.layer_cache_basedir,
                 force_image_build=self.force_image_build,
+                timings_file=self.timings_file,
+                mount_layers=self.mount_layers,
             )
 
         msg = str(ex_ctx.exception)
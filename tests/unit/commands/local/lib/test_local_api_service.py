@@ -33,6 +33,7 @@ class TestLocalApiService_start(TestCase):
         self.lambda_invoke_context_mock.get_cwd = Mock()
         self.lambda_invoke_context_mock.get_cwd.return_value = self.cwd
         self.lambda_invoke_context_mock.stderr = self.stderr_mock
+        self.lambda_invoke_context_mock.is_recording_timings = False
 
     @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
     @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
@@ -66,6 +67,7 @@ class TestLocalApiService_start(TestCase):
             port=self.port,
             host=self.host,
             stderr=self.stderr_mock,
+            timings_header=False,
         )
 
         self.apigw_service.create.assert_called_with()
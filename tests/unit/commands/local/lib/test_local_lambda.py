@@ -455,6 +455,45 @@ class TestLocalLambda_invoke(TestCase):
             self.local_lambda.invoke("name", "event")
 
 
+class TestLocalLambda_prewarm_all(TestCase):
+    def setUp(self):
+        self.runtime_mock = Mock()
+        self.function_provider_mock = Mock()
+
+        self.local_lambda = LocalLambdaRunner(self.runtime_mock, self.function_provider_mock, "cwd")
+        self.local_lambda._get_invoke_config = Mock(side_effect=lambda function: "config " + function.name)
+
+    def make_function(self, name):
+        function = Mock()
+        function.name = name
+        return function
+
+    def test_must_prewarm_every_function(self):
+        self.function_provider_mock.get_all.return_value = [self.make_function("a"), self.make_function("b")]
+
+        self.local_lambda.prewarm_all()
+
+        self.assertEqual(self.runtime_mock.prewarm.call_count, 2)
+        self.runtime_mock.prewarm.assert_any_call("config a")
+        self.runtime_mock.prewarm.assert_any_call("config b")
+
+    def test_must_continue_if_one_function_fails(self):
+        self.function_provider_mock.get_all.return_value = [self.make_function("a"), self.make_function("b")]
+        self.runtime_mock.prewarm.side_effect = [ValueError("failed"), None]
+
+        self.local_lambda.prewarm_all()
+
+        self.assertEqual(self.runtime_mock.prewarm.call_count, 2)
+
+    def test_must_not_prewarm_when_debugging(self):
+        self.local_lambda.debug_context = Mock()
+        self.function_provider_mock.get_all.return_value = [self.make_function("a")]
+
+        self.local_lambda.prewarm_all()
+
+        self.runtime_mock.prewarm.assert_not_called()
+
+
 class TestLocalLambda_is_debugging(TestCase):
     def setUp(self):
         self.runtime_mock = Mock()
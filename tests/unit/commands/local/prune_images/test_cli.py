@@ -0,0 +1,45 @@
+from unittest import TestCase
+from mock import patch, Mock, ANY
+
+from requests.exceptions import ConnectionError
+
+from samcli.commands.local.prune_images.cli import do_cli as prune_images_cli
+from samcli.commands.local.cli_common.user_exceptions import UserException
+
+
+class TestCli(TestCase):
+    @patch("samcli.commands.local.prune_images.cli.click")
+    @patch("samcli.commands.local.prune_images.cli.LambdaImageCache")
+    @patch("samcli.commands.local.prune_images.cli.get_docker_client")
+    def test_must_remove_images(self, get_docker_client_mock, LambdaImageCacheMock, click_mock):
+        LambdaImageCacheMock.return_value.collect.return_value = ["samcli/lambda:a"]
+
+        prune_images_cli(max_size=10, max_age=2, dry_run=False)
+
+        LambdaImageCacheMock.assert_called_once_with(
+            ANY, docker_client=get_docker_client_mock.return_value, max_size=10 * 1024 * 1024, max_age=2 * 24 * 60 * 60
+        )
+        LambdaImageCacheMock.return_value.collect.assert_called_once_with(dry_run=False)
+        click_mock.echo.assert_called_once_with("Removed samcli/lambda:a")
+
+    @patch("samcli.commands.local.prune_images.cli.click")
+    @patch("samcli.commands.local.prune_images.cli.LambdaImageCache")
+    @patch("samcli.commands.local.prune_images.cli.get_docker_client")
+    def test_must_use_defaults(self, get_docker_client_mock, LambdaImageCacheMock, click_mock):
+        LambdaImageCacheMock.return_value.collect.return_value = []
+
+        prune_images_cli(max_size=None, max_age=None, dry_run=True)
+
+        LambdaImageCacheMock.assert_called_once_with(
+            ANY, docker_client=get_docker_client_mock.return_value, max_size=None, max_age=None
+        )
+        LambdaImageCacheMock.return_value.collect.assert_called_once_with(dry_run=True)
+        click_mock.echo.assert_called_once_with("No images to remove")
+
+    @patch("samcli.commands.local.prune_images.cli.get_docker_client")
+    def test_must_raise_if_docker_is_not_reachable(self, get_docker_client_mock):
+        get_docker_client_mock.return_value = Mock()
+        get_docker_client_mock.return_value.ping.side_effect = ConnectionError()
+
+        with self.assertRaises(UserException):
+            prune_images_cli(max_size=None, max_age=None, dry_run=False)
@@ -25,6 +25,10 @@ class TestCli(TestCase):
         self.parameter_overrides = {}
         self.layer_cache_basedir = "/some/layers/path"
         self.force_image_build = True
+        self.timings_file = None
+        self.mount_layers = False
+        self.warm_containers = "LAZY"
+        self.standby_containers = True
         self.region_name = "region"
         self.profile = "profile"
 
@@ -61,8 +65,13 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
             aws_region=self.region_name,
             aws_profile=self.profile,
+            warm_container_initialization_mode=self.warm_containers,
+            standby_containers=self.standby_containers,
+            prefetch_images=True,
         )
 
         local_lambda_service_mock.assert_called_with(lambda_invoke_context=context_mock, port=self.port, host=self.host)
@@ -120,4 +129,8 @@ class TestCli(TestCase):
             parameter_overrides=self.parameter_overrides,
             layer_cache_basedir=self.layer_cache_basedir,
             force_image_build=self.force_image_build,
+            timings_file=self.timings_file,
+            mount_layers=self.mount_layers,
+            warm_containers=self.warm_containers,
+            standby_containers=self.standby_containers,
         )
@@ -46,6 +46,22 @@ class TestApplicationBuilder_build(TestCase):
             any_order=False,
         )
 
+    def test_must_pull_build_images_in_parallel(self):
+        container_manager_mock = Mock()
+        self.func1.runtime = "python3.7"
+        self.func2.runtime = "nodejs10.x"
+        builder = ApplicationBuilder(
+            [self.func1, self.func2], "builddir", "basedir", container_manager=container_manager_mock
+        )
+        builder._build_function = Mock()
+
+        builder.build()
+
+        container_manager_mock.pull_images.assert_called_once_with(
+            ["lambci/lambda:build-python3.7", "amazon/lambda-build-node10.x"]
+        )
+        self.assertEquals(builder._build_function.call_count, 2)
+
 
 class TestApplicationBuilder_update_template(TestCase):
     def setUp(self):
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.lib.utils.disk_cache import get_env_int, get_max_size, get_dir_size, read_json_file, update_json_file
+
+
+class TestGetEnvInt(TestCase):
+    def test_must_read_value_from_env(self):
+        with patch.dict(os.environ, {"SAM_CLI_TEST_VALUE": "10"}):
+            self.assertEqual(get_env_int("SAM_CLI_TEST_VALUE", 5), 10)
+
+    def test_must_default_invalid_value(self):
+        with patch.dict(os.environ, {"SAM_CLI_TEST_VALUE": "ten"}):
+            self.assertEqual(get_env_int("SAM_CLI_TEST_VALUE", 5), 5)
+
+    def test_must_not_return_negative_value(self):
+        with patch.dict(os.environ, {"SAM_CLI_TEST_VALUE": "-1"}):
+            self.assertEqual(get_env_int("SAM_CLI_TEST_VALUE", 5), 0)
+
+    def test_must_read_max_size_in_megabytes(self):
+        with patch.dict(os.environ, {"SAM_CLI_TEST_VALUE": "10"}):
+            self.assertEqual(get_max_size("SAM_CLI_TEST_VALUE", 5), 10 * 1024 * 1024)
+
+
+class TestFiles(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "index.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_must_sum_size_of_files(self):
+        os.makedirs(os.path.join(self.dir, "sub"))
+        for path, content in [("a", "1" * 10), (os.path.join("sub", "b"), "2" * 5)]:
+            with open(os.path.join(self.dir, path), "w") as fp:
+                fp.write(content)
+
+        self.assertEqual(get_dir_size(self.dir), 15)
+
+    def test_must_read_missing_or_corrupted_json_as_none(self):
+        self.assertIsNone(read_json_file(self.path))
+
+        with open(self.path, "w") as fp:
+            fp.write("{")
+
+        self.assertIsNone(read_json_file(self.path))
+
+    def test_must_write_back_updated_json(self):
+        with update_json_file(self.path, lambda: read_json_file(self.path) or {}) as content:
+            content["key"] = "value"
+
+        with open(self.path) as fp:
+            self.assertEqual(json.load(fp), {"key": "value"})
+        # Only the file and its lock are left
+        self.assertEqual(sorted(os.listdir(self.dir)), ["index.json", "index.json.lock"])
+
+    def test_must_not_write_if_update_fails(self):
+        with self.assertRaises(ValueError):
+            with update_json_file(self.path, dict) as content:
+                content["key"] = "value"
+                raise ValueError()
+
+        self.assertFalse(os.path.exists(self.path))
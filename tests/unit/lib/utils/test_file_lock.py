@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from samcli.lib.utils.file_lock import FileLock
+
+
+class TestFileLock(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "resource.lock")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_must_create_lock_file(self):
+        with FileLock(self.path):
+            self.assertTrue(os.path.isfile(self.path))
+
+        # Kept, so that another process never locks a different file with the same name
+        self.assertTrue(os.path.isfile(self.path))
+
+    def test_must_block_other_holders_until_released(self):
+        events = []
+
+        def hold():
+            with FileLock(self.path):
+                events.append("second")
+
+        with FileLock(self.path):
+            thread = threading.Thread(target=hold)
+            thread.start()
+            # The other thread opens its own file, and waits for this lock
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            events.append("first")
+
+        thread.join(5)
+        self.assertEqual(events, ["first", "second"])
+
+    def test_must_release_lock_on_error(self):
+        with self.assertRaises(ValueError):
+            with FileLock(self.path):
+                raise ValueError()
+
+        with FileLock(self.path):
+            pass
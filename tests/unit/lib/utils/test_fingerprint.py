@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.lib.utils.fingerprint import DirectoryFingerprinter
+
+
+class TestDirectoryFingerprinter(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fingerprinter = DirectoryFingerprinter()
+
+        self.write("python/module.py", "content")
+        self.write("python/package/__init__.py", "")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as fp:
+            fp.write(content)
+        return path
+
+    def test_must_return_none_if_path_does_not_exist(self):
+        self.assertIsNone(self.fingerprinter.fingerprint(os.path.join(self.dir, "missing")))
+
+    def test_must_keep_fingerprint_of_touched_files(self):
+        before = self.fingerprinter.fingerprint(self.dir)
+
+        path = os.path.join(self.dir, "python", "module.py")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+
+        # A new fingerprinter reads all files again
+        self.assertEqual(DirectoryFingerprinter().fingerprint(self.dir), before)
+        self.assertEqual(self.fingerprinter.fingerprint(self.dir), before)
+
+    def test_must_change_fingerprint_if_content_changes(self):
+        before = self.fingerprinter.fingerprint(self.dir)
+
+        path = self.write("python/module.py", "changed")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+
+        self.assertNotEqual(self.fingerprinter.fingerprint(self.dir), before)
+
+    def test_must_change_fingerprint_if_files_are_added_or_renamed(self):
+        before = self.fingerprinter.fingerprint(self.dir)
+
+        self.write("python/other.py", "")
+        added = self.fingerprinter.fingerprint(self.dir)
+
+        os.rename(os.path.join(self.dir, "python", "other.py"), os.path.join(self.dir, "python", "renamed.py"))
+        renamed = self.fingerprinter.fingerprint(self.dir)
+
+        self.assertEqual(len({before, added, renamed}), 3)
+
+    def test_must_change_fingerprint_if_permissions_change(self):
+        before = self.fingerprinter.fingerprint(self.dir)
+
+        os.chmod(os.path.join(self.dir, "python", "module.py"), 0o755)
+
+        self.assertNotEqual(self.fingerprinter.fingerprint(self.dir), before)
+
+    def test_must_not_read_unchanged_tree_again(self):
+        before = self.fingerprinter.fingerprint(self.dir)
+
+        with patch("samcli.lib.utils.fingerprint.open") as open_mock:
+            self.assertEqual(self.fingerprinter.fingerprint(self.dir), before)
+
+        open_mock.assert_not_called()
+
+    def test_must_read_only_changed_files(self):
+        self.fingerprinter.fingerprint(self.dir)
+
+        path = self.write("python/module.py", "changed")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+
+        with patch("samcli.lib.utils.fingerprint.open", wraps=open) as open_mock:
+            self.fingerprinter.fingerprint(self.dir)
+
+        open_mock.assert_called_once_with(path, "rb")
+
+    def test_must_keep_one_digest_per_file(self):
+        path = self.write("python/module.py", "content")
+
+        for index in range(3):
+            self.write("python/module.py", "content {}".format(index))
+            os.utime(path, (time.time() + index + 10, time.time() + index + 10))
+            self.fingerprinter.fingerprint(self.dir)
+
+        self.assertEqual(len(self.fingerprinter._files), 2)
+        self.assertEqual(self.fingerprinter._files[path][2], DirectoryFingerprinter()._file_digest(path, None, None))
+
+    def test_must_fingerprint_file(self):
+        path = self.write("layer.zip", "content")
+
+        self.assertEqual(self.fingerprinter.fingerprint(path), DirectoryFingerprinter().fingerprint(path))
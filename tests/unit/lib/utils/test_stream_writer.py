@@ -49,3 +49,20 @@ class TestStreamWriter(TestCase):
             writer.write(line)
             flush_mock.assert_called_once_with()
             flush_mock.reset_mock()
+
+    def test_must_write_response_to_stream_that_tells_responses_apart(self):
+        stream_mock = Mock()
+
+        writer = StreamWriter(stream_mock)
+        writer.write_response(b"response", is_error=True)
+
+        stream_mock.write_response.assert_called_once_with(b"response", is_error=True)
+        stream_mock.write.assert_not_called()
+
+    def test_must_write_response_as_output_to_other_streams(self):
+        stream_mock = Mock(spec=["write", "flush"])
+
+        writer = StreamWriter(stream_mock)
+        writer.write_response(b"response")
+
+        stream_mock.write.assert_called_once_with(b"response")
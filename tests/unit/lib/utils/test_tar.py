@@ -1,7 +1,12 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
 from unittest import TestCase
 from mock import Mock, patch, call
 
-from samcli.lib.utils.tar import create_tarball
+from samcli.lib.utils.tar import create_tarball, stream_tarball
 
 
 class TestTar(TestCase):
@@ -27,3 +32,62 @@ class TestTar(TestCase):
         temp_file_mock.seek.assert_called_once_with(0)
         temp_file_mock.close.assert_called_once()
         tarfile_open_patch.assert_called_once_with(fileobj=temp_file_mock, mode="w")
+
+
+class TestStreamTarball(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.dir, "layer", "python", "package"))
+        with open(os.path.join(self.dir, "layer", "python", "module.py"), "wb") as fp:
+            fp.write(b"x" * 1000)
+        with open(os.path.join(self.dir, "layer", "python", "package", "__init__.py"), "wb") as fp:
+            fp.write(b"")
+        os.symlink("module.py", os.path.join(self.dir, "layer", "python", "link.py"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def stream(self, chunk_size=64):
+        return b"".join(
+            stream_tarball(
+                {os.path.join(self.dir, "layer"): "/layer1"}, {"Dockerfile": b"FROM image\n"}, chunk_size=chunk_size
+            )
+        )
+
+    def test_must_stream_readable_tarball(self):
+        with tarfile.open(fileobj=io.BytesIO(self.stream()), mode="r") as archive:
+            members = {member.name: member for member in archive.getmembers()}
+
+            self.assertEqual(
+                sorted(members),
+                [
+                    "Dockerfile",
+                    "layer1",
+                    "layer1/python",
+                    "layer1/python/link.py",
+                    "layer1/python/module.py",
+                    "layer1/python/package",
+                    "layer1/python/package/__init__.py",
+                ],
+            )
+            self.assertEqual(archive.extractfile("Dockerfile").read(), b"FROM image\n")
+            self.assertEqual(archive.extractfile("layer1/python/module.py").read(), b"x" * 1000)
+            self.assertTrue(members["layer1/python"].isdir())
+            self.assertEqual(members["layer1/python/link.py"].linkname, "module.py")
+            self.assertEqual(members["layer1/python/module.py"].uid, 0)
+            self.assertEqual(members["layer1/python/module.py"].uname, "")
+
+    def test_must_be_deterministic(self):
+        self.assertEqual(self.stream(), self.stream(chunk_size=7))
+
+    def test_must_fail_if_file_shrinks(self):
+        stream = stream_tarball({os.path.join(self.dir, "layer"): "/layer1"})
+        # Read up to the header of the file, which has its size
+        while b"layer1/python/module.py" not in next(stream):
+            pass
+
+        with open(os.path.join(self.dir, "layer", "python", "module.py"), "wb") as fp:
+            fp.write(b"x")
+
+        with self.assertRaises(IOError):
+            list(stream)
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.lib.utils import timings
+from samcli.lib.utils.timings import Timings, TimingsFileWriter
+
+
+class TestTimings(TestCase):
+    @patch("samcli.lib.utils.timings._monotonic")
+    def test_must_add_up_repeated_phases(self, monotonic_mock):
+        monotonic_mock.side_effect = [10, 10.5]
+
+        record = Timings("name")
+        record.add("create", 0.25)
+        record.add("run", 0.1)
+        record.add("create", 0.05)
+        record.finish()
+
+        result = record.to_dict()
+
+        self.assertEqual(result["name"], "name")
+        self.assertEqual(result["total_ms"], 500)
+        self.assertEqual(list(result["phases_ms"].items()), [("create", 300), ("run", 100)])
+
+    def test_must_report_details(self):
+        record = Timings("name")
+        record.details["docker_api_calls"] = 3
+        record.finish()
+
+        self.assertEqual(json.loads(record.to_json())["docker_api_calls"], 3)
+
+
+class TestRecord(TestCase):
+    def test_must_time_phases(self):
+        with timings.record("name") as record:
+            with timings.phase("create"):
+                pass
+            with timings.phase("run"):
+                pass
+
+        self.assertEqual(list(record.phases), ["create", "run"])
+        self.assertIsNotNone(record.duration)
+
+    def test_must_ignore_phases_outside_of_record(self):
+        with timings.phase("create"):
+            pass
+
+        with timings.record("name") as record:
+            pass
+
+        self.assertEqual(record.phases, {})
+
+    def test_must_time_phase_that_raises(self):
+        with timings.record("name") as record:
+            with self.assertRaises(ValueError):
+                with timings.phase("run"):
+                    raise ValueError()
+
+        self.assertIn("run", record.phases)
+
+    def test_must_report_detail_of_current_record(self):
+        timings.detail("outside", True)
+
+        with timings.record("name") as record:
+            timings.detail("timed_out", True)
+
+        self.assertEqual(record.details, {"timed_out": True})
+
+    def test_must_not_record_phases_of_other_threads(self):
+        def run_phase():
+            with timings.phase("other"):
+                pass
+
+        with timings.record("name") as record:
+            thread = threading.Thread(target=run_phase)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(record.phases, {})
+
+    def test_must_restore_outer_record(self):
+        with timings.record("outer") as outer:
+            with timings.record("inner") as inner:
+                with timings.phase("inner_phase"):
+                    pass
+
+            with timings.phase("outer_phase"):
+                pass
+
+        self.assertEqual(list(inner.phases), ["inner_phase"])
+        self.assertEqual(list(outer.phases), ["outer_phase"])
+
+
+class TestCollect(TestCase):
+    def test_must_collect_finished_records(self):
+        with timings.collect() as collected:
+            with timings.record("first"):
+                pass
+            with timings.record("second"):
+                pass
+
+        with timings.record("after"):
+            pass
+
+        self.assertEqual([record.name for record in collected], ["first", "second"])
+
+
+class TestTimingsFileWriter(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "timings.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_must_append_json_lines(self):
+        with open(self.path, "w") as fp:
+            fp.write("existing\n")
+
+        writer = TimingsFileWriter(self.path)
+        for name in ["first", "second"]:
+            with timings.record(name) as record:
+                pass
+            writer.write(record)
+        writer.close()
+
+        with open(self.path) as fp:
+            lines = fp.read().splitlines()
+
+        self.assertEqual(lines[0], "existing")
+        self.assertEqual([json.loads(line)["name"] for line in lines[1:]], ["first", "second"])
+
+    def test_must_ignore_writes_after_close(self):
+        writer = TimingsFileWriter(self.path)
+        writer.close()
+
+        writer.write(Timings("name"))
+        writer.close()
+
+        with open(self.path) as fp:
+            self.assertEqual(fp.read(), "")
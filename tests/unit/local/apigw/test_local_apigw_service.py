@@ -9,6 +9,7 @@ from werkzeug.datastructures import Headers
 
 from samcli.commands.local.lib.provider import Api
 from samcli.commands.local.lib.provider import Cors
+from samcli.lib.utils import timings
 from samcli.local.apigw.local_apigw_service import LocalApigwService, Route
 from samcli.local.lambdafn.exceptions import FunctionNotFound
 
@@ -50,9 +51,36 @@ class TestApiGatewayService(TestCase):
         self.assertEquals(result, make_response_mock)
         self.lambda_runner.invoke.assert_called_with(ANY, ANY, stdout=ANY, stderr=self.stderr)
 
+    @parameterized.expand([(True,), (False,)])
     @patch.object(LocalApigwService, "get_request_methods_endpoints")
-    @patch("samcli.local.apigw.local_apigw_service.LambdaOutputParser")
-    def test_request_handler_returns_process_stdout_when_making_response(self, lambda_output_parser_mock, request_mock):
+    def test_request_must_return_timings_header_if_enabled(self, timings_header, request_mock):
+        self.service.timings_header = timings_header
+        self.service._get_current_route = MagicMock()
+        self.service._get_current_route.methods = []
+        self.service._construct_event = Mock()
+        self.service._parse_lambda_output = Mock(return_value=(200, Headers(), "body"))
+        self.service.service_response = Mock()
+        request_mock.return_value = ("test", "test")
+
+        def invoke(*args, **kwargs):
+            with timings.record("name"):
+                pass
+
+        self.lambda_runner.invoke.side_effect = invoke
+
+        self.service._request_handler()
+
+        headers = self.service.service_response.call_args[0][1]
+        if timings_header:
+            self.assertEqual(json.loads(headers[LocalApigwService.TIMINGS_HEADER])["name"], "name")
+        else:
+            self.assertNotIn(LocalApigwService.TIMINGS_HEADER, headers)
+
+    @patch.object(LocalApigwService, "get_request_methods_endpoints")
+    @patch("samcli.local.apigw.local_apigw_service.LambdaOutputSplitter")
+    def test_request_handler_returns_process_stdout_when_making_response(
+        self, lambda_output_splitter_mock, request_mock
+    ):
         make_response_mock = Mock()
         request_mock.return_value = ("test", "test")
         self.service.service_response = make_response_mock
@@ -65,10 +93,9 @@ class TestApiGatewayService(TestCase):
         parse_output_mock.return_value = ("status_code", Headers({"headers": "headers"}), "body")
         self.service._parse_lambda_output = parse_output_mock
 
-        lambda_logs = "logs"
         lambda_response = "response"
         is_customer_error = False
-        lambda_output_parser_mock.get_lambda_output.return_value = lambda_response, lambda_logs, is_customer_error
+        lambda_output_splitter_mock.return_value.get_lambda_output.return_value = lambda_response, is_customer_error
         service_response_mock = Mock()
         service_response_mock.return_value = make_response_mock
         self.service.service_response = service_response_mock
@@ -76,12 +103,12 @@ class TestApiGatewayService(TestCase):
         result = self.service._request_handler()
 
         self.assertEquals(result, make_response_mock)
-        lambda_output_parser_mock.get_lambda_output.assert_called_with(ANY)
+        lambda_output_splitter_mock.return_value.get_lambda_output.assert_called_with()
+        # Make sure the logs are written to stderr
+        lambda_output_splitter_mock.assert_called_with(log_stream=self.stderr)
 
         # Make sure the parse method is called only on the returned response and not on the raw data from stdout
         parse_output_mock.assert_called_with(lambda_response, ANY, ANY)
-        # Make sure the logs are written to stderr
-        self.stderr.write.assert_called_with(lambda_logs)
 
     @patch.object(LocalApigwService, "get_request_methods_endpoints")
     def test_request_handler_returns_make_response(self, request_mock):
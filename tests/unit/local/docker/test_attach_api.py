@@ -0,0 +1,187 @@
+"""
+Unit tests for the wrapper of the Docker Attach API
+"""
+
+import socket
+import struct
+import threading
+from socket import SHUT_WR
+from unittest import TestCase
+
+from mock import Mock
+from parameterized import parameterized
+
+from samcli.local.docker.attach_api import attach_stdin, write_stdin, _read_socket
+
+
+def make_frame(frame_type, data):
+    return struct.pack(">BxxxL", frame_type, len(data)) + data
+
+
+class FakeSocket(object):
+    """
+    Socket that returns the given blocks of data, one per read
+    """
+
+    def __init__(self, blocks):
+        self._blocks = list(blocks)
+
+    def recv_into(self, view):
+        if not self._blocks:
+            return 0
+
+        block = self._blocks.pop(0)
+        if block is None:
+            return None
+
+        size = min(len(block), len(view))
+        view[:size] = block[:size]
+        if size < len(block):
+            self._blocks.insert(0, block[size:])
+        return size
+
+
+class TestAttachStdin(TestCase):
+    def test_must_attach_to_stdin_only(self):
+        docker_client = Mock()
+        docker_client.api.base_url = "http+docker://localhost"
+        container = Mock()
+        container.id = "id"
+
+        result = attach_stdin(docker_client, container)
+
+        docker_client.api._post.assert_called_with(
+            "http+docker://localhost/containers/id/attach",
+            headers={"Connection": "Upgrade", "Upgrade": "tcp"},
+            params={"stdout": 0, "stderr": 0, "stdin": 1, "logs": 0, "stream": 1},
+            stream=True,
+        )
+        docker_client.api._get_raw_response_socket.assert_called_with(docker_client.api._post.return_value)
+        self.assertEqual(result, docker_client.api._get_raw_response_socket.return_value)
+
+
+class TestWriteStdin(TestCase):
+    def test_must_write_data_and_close_socket(self):
+        socket = Mock()
+
+        write_stdin(socket, b"data")
+
+        socket._sock.sendall.assert_called_with(b"data")
+        socket._sock.shutdown.assert_called_with(SHUT_WR)
+        socket.close.assert_called_with()
+
+    def test_must_write_to_plain_sockets(self):
+        socket = Mock(spec=["sendall", "shutdown", "close"])
+
+        write_stdin(socket, b"data")
+
+        socket.sendall.assert_called_with(b"data")
+        socket.close.assert_called_with()
+
+    def test_must_close_socket_if_write_fails(self):
+        socket = Mock()
+        socket._sock.sendall.side_effect = IOError("broken pipe")
+
+        with self.assertRaises(IOError):
+            write_stdin(socket, b"data")
+
+        socket.close.assert_called_with()
+
+
+class TestReadSocket(TestCase):
+    def test_must_demux_frames(self):
+        stream = make_frame(1, b"out1") + make_frame(2, b"err1") + make_frame(1, b"out2")
+
+        result = list(_read_socket(FakeSocket([stream])))
+
+        self.assertEqual(result, [(1, b"out1"), (2, b"err1"), (1, b"out2")])
+
+    def test_must_coalesce_consecutive_frames_of_same_type(self):
+        stream = make_frame(1, b"a") + make_frame(1, b"b") + make_frame(1, b"c") + make_frame(2, b"d")
+
+        result = list(_read_socket(FakeSocket([stream])))
+
+        self.assertEqual(result, [(1, b"abc"), (2, b"d")])
+
+    def test_must_yield_large_frames_as_they_arrive(self):
+        stream = make_frame(1, b"x" * 100)
+
+        result = list(_read_socket(FakeSocket([stream[:58], stream[58:]])))
+
+        self.assertEqual(result, [(1, b"x" * 50), (1, b"x" * 50)])
+
+    def test_must_handle_headers_split_across_reads(self):
+        stream = make_frame(1, b"first") + make_frame(2, b"second")
+        blocks = [stream[i : i + 3] for i in range(0, len(stream), 3)]
+
+        result = list(_read_socket(FakeSocket(blocks), buffer_size=8))
+
+        self.assertEqual(b"".join(data for frame_type, data in result if frame_type == 1), b"first")
+        self.assertEqual(b"".join(data for frame_type, data in result if frame_type == 2), b"second")
+
+    def test_must_skip_reads_without_data(self):
+        result = list(_read_socket(FakeSocket([None, make_frame(1, b"data")])))
+
+        self.assertEqual(result, [(1, b"data")])
+
+    def test_must_skip_socket_timeouts(self):
+        fake_socket = FakeSocket([make_frame(1, b"data")])
+        recv_into = fake_socket.recv_into
+        timeouts = [socket.timeout()]
+
+        def recv_into_after_timeout(view):
+            if timeouts:
+                raise timeouts.pop()
+            return recv_into(view)
+
+        fake_socket.recv_into = recv_into_after_timeout
+
+        result = list(_read_socket(fake_socket))
+
+        self.assertEqual(result, [(1, b"data")])
+
+    def test_must_stop_when_stream_ends_within_frame(self):
+        stream = make_frame(1, b"complete") + make_frame(2, b"incomplete")[:-2]
+
+        result = list(_read_socket(FakeSocket([stream])))
+
+        self.assertEqual(result, [(1, b"complete"), (2, b"incomple")])
+
+    def test_must_read_into_buffer_of_socket_file(self):
+        socket_file = Mock(spec=["readinto"])
+        socket_file.readinto.return_value = 0
+
+        self.assertEqual(list(_read_socket(socket_file)), [])
+        socket_file.readinto.assert_called_once()
+
+    @parameterized.expand(
+        [
+            ("socket", lambda sock: sock),
+            # The Docker SDK reads from a socket file on Python 3
+            ("socket_file", lambda sock: sock.makefile("rb", buffering=0)),
+        ]
+    )
+    def test_must_read_from_real_socket(self, name, wrap):
+        reader, writer = socket.socketpair()
+        stream = b"".join(make_frame(1 + i % 2, str(i).encode()) for i in range(1000))
+
+        def write():
+            writer.sendall(stream)
+            writer.close()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            result = list(_read_socket(wrap(reader), buffer_size=1024))
+        finally:
+            thread.join()
+            reader.close()
+
+        self.assertEqual(
+            b"".join(data for frame_type, data in result if frame_type == 1),
+            b"".join(str(i).encode() for i in range(0, 1000, 2)),
+        )
+        self.assertEqual(
+            b"".join(data for frame_type, data in result if frame_type == 2),
+            b"".join(str(i).encode() for i in range(1, 1000, 2)),
+        )
@@ -0,0 +1,81 @@
+"""
+Tests the process-wide Docker client
+"""
+
+import os
+import threading
+from unittest import TestCase
+
+from mock import Mock, patch
+from parameterized import parameterized
+
+from samcli.local.docker import client
+from samcli.local.docker.client import get_docker_client, count_api_calls
+
+
+class TestGetDockerClient(TestCase):
+    def setUp(self):
+        client._client = None
+
+    def tearDown(self):
+        client._client = None
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_create_client_once(self, docker_mock):
+        first = get_docker_client()
+        second = get_docker_client()
+
+        self.assertIs(first, docker_mock.from_env.return_value)
+        self.assertIs(first, second)
+        docker_mock.from_env.assert_called_once_with(max_pool_size=client.DEFAULT_MAX_POOL_SIZE)
+
+    @parameterized.expand(
+        [("5", 5), ("0", 1), ("many", client.DEFAULT_MAX_POOL_SIZE), ("", client.DEFAULT_MAX_POOL_SIZE)]
+    )
+    @patch("samcli.local.docker.client.docker")
+    def test_must_read_pool_size_from_environment(self, value, pool_size, docker_mock):
+        with patch.dict(os.environ, {"SAM_CLI_DOCKER_MAX_POOL_SIZE": value}):
+            get_docker_client()
+
+        docker_mock.from_env.assert_called_once_with(max_pool_size=pool_size)
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_fall_back_if_sdk_has_fixed_pool_size(self, docker_mock):
+        client_mock = Mock()
+        client_mock.api.hooks = {"response": []}
+        docker_mock.from_env.side_effect = [TypeError("unexpected keyword argument"), client_mock]
+
+        self.assertIs(get_docker_client(), client_mock)
+        docker_mock.from_env.assert_called_with()
+
+
+class TestCountApiCalls(TestCase):
+    def setUp(self):
+        client._client = None
+
+    def tearDown(self):
+        client._client = None
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_count_responses_of_the_shared_client(self, docker_mock):
+        docker_mock.from_env.return_value.api.hooks = {"response": []}
+        hook = get_docker_client().api.hooks["response"][0]
+
+        hook(Mock())
+        with count_api_calls() as outer:
+            hook(Mock())
+            with count_api_calls() as inner:
+                hook(Mock())
+                hook(Mock())
+            hook(Mock())
+
+        self.assertEqual(outer.count, 2)
+        self.assertEqual(inner.count, 2)
+
+    def test_must_not_count_calls_of_other_threads(self):
+        with count_api_calls() as counter:
+            thread = threading.Thread(target=client._count_api_call, args=(Mock(),))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(counter.count, 0)
@@ -1,6 +1,9 @@
 """
 Unit test for Container class
 """
+import shutil
+import tempfile
+
 from docker.errors import NotFound, APIError
 from unittest import TestCase
 from mock import Mock, call, patch
@@ -214,10 +217,6 @@ class TestContainer_create(TestCase):
         self.mock_docker_client.containers.create.return_value = Mock()
         self.mock_docker_client.containers.create.return_value.id = generated_id
 
-        network_mock = Mock()
-        self.mock_docker_client.networks.get.return_value = network_mock
-        network_mock.connect = Mock()
-
         container = Container(
             self.image, self.cmd, self.working_dir, self.host_dir, docker_client=self.mock_docker_client
         )
@@ -234,10 +233,11 @@ class TestContainer_create(TestCase):
             tty=False,
             use_config_proxy=True,
             volumes=expected_volumes,
+            network=network_id,
         )
 
-        self.mock_docker_client.networks.get.assert_called_with(network_id)
-        network_mock.connect.assert_called_with(container_id)
+        # Container is connected to the network as part of creating it
+        self.mock_docker_client.networks.get.assert_not_called()
 
     def test_must_connect_to_host_network_on_create(self):
         """
@@ -310,53 +310,42 @@ class TestContainer_delete(TestCase):
     def test_must_delete(self):
 
         self.container.is_created.return_value = True
-        real_container_mock = Mock()
-        self.mock_docker_client.containers.get.return_value = real_container_mock
-        real_container_mock.remove = Mock()
 
         self.container.delete()
 
-        self.mock_docker_client.containers.get.assert_called_with("someid")
-        real_container_mock.remove.assert_called_with(force=True)
+        self.mock_docker_client.api.remove_container.assert_called_with("someid", force=True)
+        self.mock_docker_client.containers.get.assert_not_called()
 
         # Must reset ID to None because container is now gone
         self.assertIsNone(self.container.id)
 
     def test_must_work_when_container_is_not_found(self):
         self.container.is_created.return_value = True
-        real_container_mock = Mock()
-        self.mock_docker_client.containers.get.side_effect = NotFound("msg")
-        real_container_mock.remove = Mock()
+        self.mock_docker_client.api.remove_container.side_effect = NotFound("msg")
 
         self.container.delete()
 
-        self.mock_docker_client.containers.get.assert_called_with("someid")
-        real_container_mock.remove.assert_not_called()
+        self.mock_docker_client.api.remove_container.assert_called_with("someid", force=True)
 
         # Must reset ID to None because container is now gone
         self.assertIsNone(self.container.id)
 
     def test_must_work_if_container_delete_is_in_progress(self):
         self.container.is_created.return_value = True
-        real_container_mock = Mock()
-        self.mock_docker_client.containers.get.return_value = real_container_mock
-        real_container_mock.remove = Mock()
-        real_container_mock.remove.side_effect = APIError("removal of container is already in progress")
+        self.mock_docker_client.api.remove_container.side_effect = APIError(
+            "removal of container is already in progress"
+        )
 
         self.container.delete()
 
-        self.mock_docker_client.containers.get.assert_called_with("someid")
-        real_container_mock.remove.assert_called_with(force=True)
+        self.mock_docker_client.api.remove_container.assert_called_with("someid", force=True)
 
         # Must reset ID to None because container is now gone
         self.assertIsNone(self.container.id)
 
     def test_must_raise_unknown_docker_api_errors(self):
         self.container.is_created.return_value = True
-        real_container_mock = Mock()
-        self.mock_docker_client.containers.get.return_value = real_container_mock
-        real_container_mock.remove = Mock()
-        real_container_mock.remove.side_effect = APIError("some error")
+        self.mock_docker_client.api.remove_container.side_effect = APIError("some error")
 
         with self.assertRaises(APIError):
             self.container.delete()
@@ -364,6 +353,16 @@ class TestContainer_delete(TestCase):
         # Must *NOT* reset ID because Docker API raised an exception
         self.assertIsNotNone(self.container.id)
 
+    def test_must_queue_removal_with_reaper(self):
+        reaper = Mock()
+        self.container.is_created.return_value = True
+
+        self.container.delete(reaper=reaper)
+
+        reaper.reap.assert_called_with(self.mock_docker_client, "someid")
+        self.mock_docker_client.containers.get.assert_not_called()
+        self.assertIsNone(self.container.id)
+
     def test_must_skip_if_container_is_not_created(self):
 
         self.container.is_created.return_value = False
@@ -371,6 +370,52 @@ class TestContainer_delete(TestCase):
         self.mock_docker_client.containers.get.assert_not_called()
 
 
+class TestContainer_is_mounted(TestCase):
+    def setUp(self):
+        self.host_dir = tempfile.mkdtemp()
+        self.layers_dir = tempfile.mkdtemp()
+        self.mock_docker_client = Mock()
+        self.container = Container(
+            "image",
+            "cmd",
+            "working_dir",
+            self.host_dir,
+            docker_client=self.mock_docker_client,
+            additional_volumes={self.layers_dir: {"bind": "/opt", "mode": "ro"}},
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.host_dir)
+        shutil.rmtree(self.layers_dir)
+
+    def test_must_count_mounts_from_create_until_delete(self):
+        self.assertFalse(Container.is_mounted(self.host_dir))
+
+        self.container.create()
+        clone = self.container.clone()
+        clone.create()
+
+        self.assertTrue(Container.is_mounted(self.host_dir))
+        self.assertTrue(Container.is_mounted(self.layers_dir))
+
+        self.container.delete()
+        self.assertTrue(Container.is_mounted(self.host_dir))
+
+        clone.delete()
+        self.assertFalse(Container.is_mounted(self.host_dir))
+        self.assertFalse(Container.is_mounted(self.layers_dir))
+
+    def test_must_not_count_container_that_was_not_created(self):
+        other = self.container.clone()
+        other.create()
+
+        self.container.id = "someid"
+        self.container.delete()
+
+        self.assertTrue(Container.is_mounted(self.host_dir))
+        other.delete()
+
+
 class TestContainer_start(TestCase):
     def setUp(self):
         self.image = "image"
@@ -409,12 +454,87 @@ class TestContainer_start(TestCase):
         with self.assertRaises(RuntimeError):
             self.container.start()
 
-    def test_must_not_support_input_data(self):
+    @patch("samcli.local.docker.container.write_stdin")
+    @patch("samcli.local.docker.container.attach_stdin")
+    def test_must_write_input_data_to_stdin(self, attach_stdin_mock, write_stdin_mock):
+
+        self.container.is_created.return_value = True
+
+        container_mock = Mock()
+        self.mock_docker_client.containers.get.return_value = container_mock
+        stdin_socket = Mock()
+        attach_stdin_mock.return_value = stdin_socket
+
+        call_order = Mock()
+        call_order.attach_mock(attach_stdin_mock, "attach_stdin")
+        call_order.attach_mock(container_mock.start, "start")
+        call_order.attach_mock(write_stdin_mock, "write_stdin")
+
+        self.container.start(input_data=u"some input data")
+
+        # Attach first, so the container finds its stdin connected. Write only after the container started.
+        self.assertEqual(
+            call_order.mock_calls,
+            [
+                call.attach_stdin(self.mock_docker_client, container=container_mock),
+                call.start(),
+                call.write_stdin(stdin_socket, b"some input data"),
+            ],
+        )
+
+    @patch("samcli.local.docker.container.write_stdin")
+    @patch("samcli.local.docker.container.attach_stdin")
+    def test_must_close_stdin_for_empty_input_data(self, attach_stdin_mock, write_stdin_mock):
+
+        self.container.is_created.return_value = True
+
+        self.container.start(input_data="")
+
+        write_stdin_mock.assert_called_with(attach_stdin_mock.return_value, b"")
+
+    @patch("samcli.local.docker.container.attach_stdin")
+    def test_must_not_attach_stdin_without_input_data(self, attach_stdin_mock):
 
         self.container.is_created.return_value = True
 
-        with self.assertRaises(ValueError):
-            self.container.start(input_data="some input data")
+        self.container.start()
+
+        attach_stdin_mock.assert_not_called()
+
+    @patch("samcli.local.docker.container.attach")
+    def test_must_attach_output_before_starting(self, attach_mock):
+
+        self.container.is_created.return_value = True
+
+        container_mock = Mock()
+        self.mock_docker_client.containers.get.return_value = container_mock
+
+        call_order = Mock()
+        call_order.attach_mock(attach_mock, "attach")
+        call_order.attach_mock(container_mock.start, "start")
+
+        self.container.start()
+
+        self.assertEqual(
+            call_order.mock_calls,
+            [
+                call.attach(self.mock_docker_client, container=container_mock, stdout=True, stderr=True, logs=False),
+                call.start(),
+            ],
+        )
+
+    @patch("samcli.local.docker.container.attach")
+    def test_must_reuse_container_object_from_create(self, attach_mock):
+        real_container_mock = Mock()
+        self.mock_docker_client.containers.create.return_value = real_container_mock
+        self.container.id = None
+        self.container.is_created.side_effect = [False, True]
+
+        self.container.create()
+        self.container.start()
+
+        self.mock_docker_client.containers.get.assert_not_called()
+        real_container_mock.start.assert_called_with()
 
 
 class TestContainer_wait_for_logs(TestCase):
@@ -457,11 +577,44 @@ class TestContainer_wait_for_logs(TestCase):
         )
         self.container._write_container_output.assert_called_with(output_itr, stdout=stdout_mock, stderr=stderr_mock)
 
+    @patch("samcli.local.docker.container.attach")
+    def test_must_read_output_attached_at_start(self, attach_mock):
+
+        self.container.is_created.return_value = True
+
+        output_itr = Mock()
+        attach_mock.return_value = output_itr
+        self.container._write_container_output = Mock()
+        stdout_mock = Mock()
+
+        self.container.start()
+        self.container.wait_for_logs(stdout=stdout_mock)
+
+        # Output was attached to once, without replaying logs
+        attach_mock.assert_called_once_with(
+            self.mock_docker_client,
+            container=self.mock_docker_client.containers.get.return_value,
+            stdout=True,
+            stderr=True,
+            logs=False,
+        )
+        self.container._write_container_output.assert_called_with(output_itr, stdout=stdout_mock, stderr=None)
+
     def test_must_skip_if_no_stdout_and_stderr(self):
 
         self.container.wait_for_logs()
         self.mock_docker_client.containers.get.assert_not_called()
 
+    @patch("samcli.local.docker.container.attach")
+    def test_must_close_output_attached_at_start_if_no_stdout_and_stderr(self, attach_mock):
+
+        self.container.is_created.return_value = True
+
+        self.container.start()
+        self.container.wait_for_logs()
+
+        attach_mock.return_value.close.assert_called_with()
+
     def test_must_raise_if_container_is_not_created(self):
 
         self.container.is_created.return_value = False
@@ -556,3 +709,15 @@ class TestContainer_copy(TestCase):
         # Make sure we open the tarfile right and extract to right location
         tarfile_mock.open.assert_called_with(fileobj=fp_mock, mode="r")
         tar_mock.extractall(path=dest)
+
+
+class TestContainer_clone(TestCase):
+    def test_must_copy_configuration_but_not_id(self):
+        container = Container("image", ["cmd"], "/var/task", "host dir", env_vars={"a": "b"}, docker_client=Mock())
+        container.id = "id"
+
+        clone = container.clone()
+
+        self.assertIsNone(clone.id)
+        self.assertEqual(container.id, "id")
+        self.assertEqual(clone.config_key, container.config_key)
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import Mock, patch, call
+from docker.errors import APIError, ImageNotFound
+
+from samcli.local.docker.image_cache import LambdaImageCache, IMAGE_LABEL, IMAGE_REPO_NAME
+
+MB = 1024 * 1024
+
+
+class TestLambdaImageCache(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.dir, "config", "lambda-images.json")
+        self.docker_client = Mock()
+        self.docker_client.images.get.return_value = Mock(attrs={"Size": 100 * MB})
+        self.images = []
+        self.docker_client.images.list.side_effect = lambda **kwargs: list(self.images)
+        self.image_cache = LambdaImageCache(
+            self.index_path, docker_client=self.docker_client, max_size=50 * MB, max_age=24 * 60 * 60
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def make_image(self, tag, size, created=None, parent_id="base"):
+        image = Mock(id="id-" + tag, tags=[tag])
+        image.attrs = {"Size": size, "Created": created or time.time(), "ParentId": parent_id}
+        self.images.append(image)
+        return image
+
+    def test_must_record_last_use_of_images(self):
+        self.image_cache.touch(["samcli/lambda:a", "samcli/lambda:b"])
+
+        with open(self.index_path) as fp:
+            index = json.load(fp)
+
+        self.assertEqual(sorted(index["Images"]), ["samcli/lambda:a", "samcli/lambda:b"])
+
+    def test_must_remove_least_recently_used_images_beyond_size(self):
+        self.make_image("samcli/lambda:oldest", 120 * MB)
+        self.make_image("samcli/lambda:old", 120 * MB)
+        self.make_image("samcli/lambda:new", 120 * MB)
+        self.image_cache.touch(["samcli/lambda:oldest"])
+        self.image_cache.touch(["samcli/lambda:old"])
+        time.sleep(0.01)
+        self.image_cache.touch(["samcli/lambda:new"])
+
+        removed = self.image_cache.collect(keep=["samcli/lambda:oldest"])
+
+        self.docker_client.images.list.assert_has_calls(
+            [call(filters={"label": IMAGE_LABEL}), call(filters={"reference": IMAGE_REPO_NAME})]
+        )
+        # Only what the images add to the base image counts
+        self.assertEqual(removed, ["samcli/lambda:old"])
+        self.docker_client.images.remove.assert_called_once_with("samcli/lambda:old")
+
+    def test_must_remove_images_built_without_label(self):
+        labeled = self.make_image("samcli/lambda:labeled", 120 * MB)
+        self.images.remove(labeled)
+        unlabeled = self.make_image("samcli/lambda:unlabeled", 120 * MB, created=time.time() - 2 * 24 * 60 * 60)
+        self.images.remove(unlabeled)
+        self.image_cache.touch(["samcli/lambda:labeled"])
+
+        def list_images(filters):
+            # Images that older versions of SAM CLI built are only found through their repository
+            return [labeled] if "label" in filters else [labeled, unlabeled]
+
+        self.docker_client.images.list.side_effect = list_images
+
+        removed = self.image_cache.collect()
+
+        self.assertEqual(removed, ["samcli/lambda:unlabeled"])
+        self.docker_client.images.remove.assert_called_once_with("samcli/lambda:unlabeled")
+
+    def test_must_remove_images_not_used_recently(self):
+        self.make_image("samcli/lambda:unused", 110 * MB, created=time.time() - 2 * 24 * 60 * 60)
+        self.make_image("samcli/lambda:used", 110 * MB, created=time.time() - 2 * 24 * 60 * 60)
+        self.image_cache.touch(["samcli/lambda:used"])
+
+        self.assertEqual(self.image_cache.collect(), ["samcli/lambda:unused"])
+
+    def test_must_remove_children_before_parent(self):
+        self.image_cache = LambdaImageCache(self.index_path, docker_client=self.docker_client, max_size=0)
+        now = time.time()
+        self.make_image("samcli/lambda:parent", 110 * MB, created=now - 10)
+        self.make_image("samcli/lambda:child", 120 * MB, created=now, parent_id="id-samcli/lambda:parent")
+        self.image_cache.touch(["samcli/lambda:parent", "samcli/lambda:child"])
+
+        self.assertEqual(self.image_cache.collect(), ["samcli/lambda:child", "samcli/lambda:parent"])
+
+    def test_must_skip_images_that_cannot_be_removed(self):
+        self.image_cache = LambdaImageCache(self.index_path, docker_client=self.docker_client, max_size=0)
+        self.make_image("samcli/lambda:in-use", 110 * MB)
+        self.make_image("samcli/lambda:gone", 110 * MB)
+        self.docker_client.images.remove.side_effect = lambda tag: self._remove(tag)
+
+        self.assertEqual(self.image_cache.collect(), ["samcli/lambda:gone"])
+
+    def test_must_only_list_images_in_dry_run(self):
+        self.image_cache = LambdaImageCache(self.index_path, docker_client=self.docker_client, max_size=0)
+        self.make_image("samcli/lambda:a", 110 * MB)
+
+        self.assertEqual(self.image_cache.collect(dry_run=True), ["samcli/lambda:a"])
+        self.docker_client.images.remove.assert_not_called()
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_must_forget_images_that_are_gone(self):
+        self.make_image("samcli/lambda:a", 110 * MB)
+        self.image_cache.touch(["samcli/lambda:a", "samcli/lambda:deleted"])
+
+        self.image_cache.collect()
+
+        with open(self.index_path) as fp:
+            self.assertEqual(list(json.load(fp)["Images"]), ["samcli/lambda:a"])
+
+    @patch("samcli.local.docker.image_cache.threading")
+    def test_must_collect_in_background_at_most_once_an_hour(self, threading_mock):
+        self.image_cache.collect_in_background(keep=["samcli/lambda:a"])
+        self.image_cache.collect_in_background(keep=["samcli/lambda:a"])
+
+        threading_mock.Thread.assert_called_once()
+        threading_mock.Thread.return_value.start.assert_called_once_with()
+
+    def test_must_ignore_corrupted_index(self):
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, "w") as fp:
+            fp.write('{"Images": ')
+
+        self.image_cache.touch(["samcli/lambda:a"])
+
+        with open(self.index_path) as fp:
+            self.assertEqual(list(json.load(fp)["Images"]), ["samcli/lambda:a"])
+
+    @staticmethod
+    def _remove(tag):
+        if tag == "samcli/lambda:in-use":
+            raise APIError("conflict: image is being used by a container")
+        raise ImageNotFound("image not found")
+
+
+class TestLambdaImageCache_limits(TestCase):
+    def test_must_read_limits_from_env(self):
+        env = {"SAM_CLI_IMAGE_CACHE_MAX_SIZE_MB": "10", "SAM_CLI_IMAGE_CACHE_MAX_AGE_DAYS": "2"}
+        with patch.dict(os.environ, env):
+            image_cache = LambdaImageCache("index.json", docker_client=Mock())
+
+        self.assertEqual(image_cache._max_size, 10 * 1024 * 1024)
+        self.assertEqual(image_cache._max_age, 2 * 24 * 60 * 60)
@@ -19,7 +19,7 @@ from samcli.local.docker.lambda_build_container import LambdaBuildContainer
 
 class TestLambdaBuildContainer_init(TestCase):
     @patch.object(LambdaBuildContainer, "_make_request")
-    @patch.object(LambdaBuildContainer, "_get_image")
+    @patch.object(LambdaBuildContainer, "get_image")
     @patch.object(LambdaBuildContainer, "_get_entrypoint")
     @patch.object(LambdaBuildContainer, "_get_container_dirs")
     def test_must_init_class(self, get_container_dirs_mock, get_entrypoint_mock, get_image_mock, make_request_mock):
@@ -165,7 +165,7 @@ class TestLambdaBuildContainer_get_image(TestCase):
         [("myruntime", "lambci/lambda:build-myruntime"), ("nodejs10.x", "amazon/lambda-build-node10.x")]
     )
     def test_must_get_image_name(self, runtime, expected_image_name):
-        self.assertEquals(expected_image_name, LambdaBuildContainer._get_image(runtime))
+        self.assertEquals(expected_image_name, LambdaBuildContainer.get_image(runtime))
 
 
 class TestLambdaBuildContainer_get_entrypoint(TestCase):
@@ -5,9 +5,10 @@ Unit test for Lambda container management
 from unittest import TestCase
 from mock import patch, Mock
 from parameterized import parameterized, param
+from requests.exceptions import RequestException
 
 from samcli.commands.local.lib.debug_context import DebugContext
-from samcli.local.docker.lambda_container import LambdaContainer, Runtime
+from samcli.local.docker.lambda_container import LambdaContainer, Runtime, ContainerNotReadyException
 from samcli.local.docker.lambda_debug_entrypoint import DebuggingNotSupported
 
 RUNTIMES_WITH_ENTRYPOINT = [
@@ -206,6 +207,29 @@ class TestLambdaContainer_get_additional_options(TestCase):
         self.assertEquals(result, expected)
 
 
+class TestLambdaContainer_get_layers_volume(TestCase):
+    def test_no_layers_volume_without_layers(self):
+        image_builder = Mock()
+
+        self.assertIsNone(LambdaContainer._get_layers_volume(image_builder, []))
+        image_builder.get_layers_dir.assert_not_called()
+
+    def test_no_layers_volume_when_layers_are_built_into_image(self):
+        image_builder = Mock()
+        image_builder.get_layers_dir.return_value = None
+
+        self.assertIsNone(LambdaContainer._get_layers_volume(image_builder, ["layer1"]))
+
+    def test_layers_volume_mounts_layers_dir_as_opt(self):
+        image_builder = Mock()
+        image_builder.get_layers_dir.return_value = "/cache/layer1"
+
+        result = LambdaContainer._get_layers_volume(image_builder, ["layer1"])
+
+        self.assertEquals(result, {"/cache/layer1": {"bind": "/opt", "mode": "ro,delegated"}})
+        image_builder.get_layers_dir.assert_called_once_with(["layer1"])
+
+
 class TestLambdaContainer_get_additional_volumes(TestCase):
     def test_no_additional_volumes_when_debug_options_is_none(self):
         debug_options = DebugContext(debug_port=None)
@@ -226,3 +250,269 @@ class TestLambdaContainer_get_additional_volumes(TestCase):
 
         result = LambdaContainer._get_additional_volumes(debug_options)
         self.assertEquals(result, expected)
+
+
+class TestLambdaContainer_stay_open(TestCase):
+    def setUp(self):
+        self.image_builder = Mock()
+        self.image_builder.build.return_value = "image"
+
+        with patch("samcli.local.docker.container.get_docker_client"):
+            self.container = LambdaContainer(
+                Runtime.python36.value,
+                "handler",
+                "codedir",
+                layers=[],
+                image_builder=self.image_builder,
+                env_vars={"var": "value"},
+                stay_open=True,
+            )
+
+        self.container.docker_client = Mock()
+        self.container.docker_client.api.base_url = "http+docker://localhost"
+        self.container.id = "container id"
+
+    def test_must_configure_stay_open_mode(self):
+        self.assertEqual(self.container._env_vars, {"var": "value", "DOCKER_LAMBDA_STAY_OPEN": "1"})
+        self.assertEqual(self.container._exposed_ports, {9001: None})
+
+    @patch("samcli.local.docker.lambda_container.time")
+    @patch("samcli.local.docker.lambda_container.requests")
+    def test_must_wait_for_invoke_api(self, requests_mock, time_mock):
+        requests_mock.exceptions.RequestException = RequestException
+        requests_mock.get.side_effect = [RequestException(), Mock()]
+        time_mock.time.return_value = 0
+        real_container = self.container.docker_client.containers.get.return_value
+        real_container.attrs = {"NetworkSettings": {"Ports": {"9001/tcp": [{"HostIp": "0.0.0.0", "HostPort": "1234"}]}}}
+
+        url = self.container._wait_for_invoke_api()
+
+        self.assertEqual(url, "http://127.0.0.1:1234/2015-03-31/functions/function/invocations")
+        self.assertEqual(requests_mock.get.call_count, 2)
+        time_mock.sleep.assert_called_once_with(0.1)
+
+    @patch("samcli.local.docker.lambda_container.time")
+    @patch("samcli.local.docker.lambda_container.requests")
+    def test_must_raise_if_invoke_api_does_not_come_up(self, requests_mock, time_mock):
+        requests_mock.exceptions.RequestException = RequestException
+        requests_mock.get.side_effect = RequestException()
+        time_mock.time.side_effect = [0, 31]
+        real_container = self.container.docker_client.containers.get.return_value
+        real_container.attrs = {"NetworkSettings": {"Ports": {"9001/tcp": [{"HostIp": "0.0.0.0", "HostPort": "1234"}]}}}
+
+        with self.assertRaises(ContainerNotReadyException):
+            self.container._wait_for_invoke_api()
+
+    def test_must_use_remote_docker_host(self):
+        self.container.docker_client.api.base_url = "https://10.0.0.1:2376"
+
+        self.assertEqual(self.container._get_docker_host(), "10.0.0.1")
+
+    @patch("samcli.local.docker.lambda_container.requests")
+    def test_must_invoke_and_write_response(self, requests_mock):
+        requests_mock.post.return_value.content = b"response"
+        self.container._invoke_url = "url"
+        stdout = Mock()
+        stderr = Mock()
+
+        result = self.container.invoke(u"event", stdout=stdout, stderr=stderr)
+
+        self.assertTrue(result)
+        requests_mock.post.assert_called_with("url", data=b"event")
+        stdout.write_response.assert_called_with(b"response")
+        self.assertEqual(self.container._invoke_log_writer.stream, stderr)
+
+    @patch("samcli.local.docker.lambda_container.requests")
+    def test_must_return_false_if_container_is_unreachable(self, requests_mock):
+        requests_mock.exceptions.RequestException = RequestException
+        requests_mock.post.side_effect = RequestException()
+        self.container._invoke_url = "url"
+        stdout = Mock()
+
+        self.assertFalse(self.container.invoke("event", stdout=stdout))
+        stdout.write_response.assert_not_called()
+
+    def test_must_not_invoke_if_not_started(self):
+        with self.assertRaises(RuntimeError):
+            self.container.invoke("event")
+
+
+class TestLambdaContainer_runtime_api(TestCase):
+    def setUp(self):
+        self.image_builder = Mock()
+        self.image_builder.build.return_value = "image"
+        self.docker_client = Mock()
+        self.docker_client.api.base_url = "http+docker://localhost"
+        self.docker_client.networks.get.return_value.attrs = {"IPAM": {"Config": [{"Gateway": "172.18.0.1"}]}}
+        LambdaContainer._network_gateways.clear()
+
+    def tearDown(self):
+        LambdaContainer._network_gateways.clear()
+
+    def make_container(self, runtime=Runtime.python37.value):
+        with patch("samcli.local.docker.lambda_container.LocalRuntimeApiService") as service_mock:
+            container = LambdaContainer(
+                runtime,
+                "handler",
+                "codedir",
+                layers=[],
+                image_builder=self.image_builder,
+                env_vars={"var": "value"},
+                stay_open=True,
+                docker_client=self.docker_client,
+            )
+
+        self.assertEqual(container._runtime_api, service_mock.return_value)
+        return container
+
+    @parameterized.expand([(Runtime.python37.value,), (Runtime.nodejs10x.value,)])
+    def test_must_run_bootstrap_of_runtime(self, runtime):
+        container = self.make_container(runtime)
+
+        self.assertEqual(container._entrypoint, ["/var/runtime/bootstrap"])
+        self.assertEqual(container._cmd, [])
+        self.assertEqual(
+            container._env_vars,
+            {
+                "var": "value",
+                "_HANDLER": "handler",
+                "AWS_LAMBDA_FUNCTION_NAME": "test",
+                "AWS_LAMBDA_FUNCTION_VERSION": "$LATEST",
+            },
+        )
+        self.assertIsNone(container._exposed_ports)
+
+    def test_must_look_up_bootstrap_of_custom_runtime(self):
+        container = self.make_container(Runtime.provided.value)
+
+        self.assertEqual(container._entrypoint[:2], ["/bin/sh", "-c"])
+        self.assertIn("/var/task/bootstrap", container._entrypoint[2])
+        self.assertIn("/opt/bootstrap", container._entrypoint[2])
+
+    @parameterized.expand(
+        [
+            (Runtime.python36.value, "http+docker://localhost"),
+            (Runtime.python37.value, "https://10.0.0.1:2376"),
+        ]
+    )
+    def test_must_fall_back_to_stay_open_mode(self, runtime, base_url):
+        self.docker_client.api.base_url = base_url
+
+        container = LambdaContainer(
+            runtime, "handler", "codedir", [], self.image_builder, stay_open=True, docker_client=self.docker_client
+        )
+
+        self.assertIsNone(container._runtime_api)
+        self.assertEqual(container._env_vars, {"DOCKER_LAMBDA_STAY_OPEN": "1"})
+
+    @patch("samcli.local.docker.lambda_container.sys")
+    def test_must_serve_api_on_bridge_gateway_on_linux(self, sys_mock):
+        sys_mock.platform = "linux"
+        container = self.make_container()
+        container._runtime_api.port = 1234
+        self.docker_client.containers.create.return_value.id = "id"
+
+        container.create()
+
+        self.assertEqual(container._runtime_api.host, "172.18.0.1")
+        container._runtime_api.start.assert_called_with()
+        self.docker_client.networks.get.assert_called_with("bridge")
+
+        environment = self.docker_client.containers.create.call_args[1]["environment"]
+        self.assertEqual(environment["AWS_LAMBDA_RUNTIME_API"], "172.18.0.1:1234")
+        # The address is not part of the configuration of the container
+        self.assertNotIn("AWS_LAMBDA_RUNTIME_API", container._env_vars)
+
+    @patch("samcli.local.docker.lambda_container.sys")
+    def test_must_serve_api_on_gateway_of_container_network(self, sys_mock):
+        sys_mock.platform = "linux"
+        container = self.make_container()
+        container.network_id = "mynetwork"
+
+        self.assertEqual(container._get_runtime_api_hosts(), ("172.18.0.1", "172.18.0.1"))
+        self.assertEqual(container._get_runtime_api_hosts(), ("172.18.0.1", "172.18.0.1"))
+
+        # Gateway is looked up once per network
+        self.docker_client.networks.get.assert_called_once_with("mynetwork")
+
+    @patch("samcli.local.docker.lambda_container.sys")
+    def test_must_serve_api_on_loopback_with_docker_desktop(self, sys_mock):
+        sys_mock.platform = "darwin"
+        container = self.make_container()
+
+        self.assertEqual(container._get_runtime_api_hosts(), ("127.0.0.1", "host.docker.internal"))
+
+    def test_must_stop_api_if_container_cannot_be_created(self):
+        container = self.make_container()
+        container._runtime_api.port = 1234
+        self.docker_client.containers.create.side_effect = ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            container.create()
+
+        container._runtime_api.stop.assert_called_with()
+
+    def test_must_stop_api_when_deleted(self):
+        container = self.make_container()
+
+        container.delete()
+
+        container._runtime_api.stop.assert_called_with()
+
+    def test_must_invoke_through_runtime_api(self):
+        container = self.make_container()
+        container.id = "id"
+        container._runtime_api.invoke.return_value.response = b"response"
+        container._runtime_api.invoke.return_value.is_error = False
+        stdout = Mock()
+        stderr = Mock()
+
+        result = container.invoke(u"event", stdout=stdout, stderr=stderr, timeout=3)
+
+        self.assertTrue(result)
+        container._runtime_api.invoke.assert_called_with(b"event", timeout=3)
+        stdout.write_response.assert_called_with(b"response", is_error=False)
+        self.assertEqual(container._invoke_log_writer.stream, stderr)
+
+    def test_must_return_false_if_container_stopped_during_invoke(self):
+        container = self.make_container()
+        container.id = "id"
+        container._runtime_api.invoke.return_value.response = None
+        stdout = Mock()
+
+        self.assertFalse(container.invoke("event", stdout=stdout))
+        stdout.write_response.assert_not_called()
+
+    def test_must_not_wait_for_invoke_api(self):
+        container = self.make_container()
+        container.id = "id"
+        container._follow_logs = Mock()
+        container._wait_for_invoke_api = Mock()
+
+        container.start()
+
+        container._follow_logs.assert_called_with()
+        container._wait_for_invoke_api.assert_not_called()
+
+    def test_must_not_share_runtime_api_with_clones(self):
+        container = self.make_container()
+
+        with patch("samcli.local.docker.lambda_container.LocalRuntimeApiService") as service_mock:
+            clone = container.clone()
+
+        self.assertEqual(clone._runtime_api, service_mock.return_value)
+        self.assertIsNot(clone._invoke_log_writer, container._invoke_log_writer)
+        self.assertEqual(clone.config_key, container.config_key)
+
+
+class TestLambdaContainer_stdin(TestCase):
+    @patch("samcli.local.docker.container.get_docker_client")
+    def test_must_read_event_from_stdin(self, docker_mock):
+        image_builder = Mock()
+
+        container = LambdaContainer(
+            Runtime.python37.value, "handler", "codedir", layers=[], image_builder=image_builder, env_vars={"a": "b"}
+        )
+
+        self.assertEqual(container._env_vars, {"a": "b", "DOCKER_LAMBDA_USE_STDIN": "1"})
+        self.assertEqual(container._container_opts, {"stdin_open": True, "stdin_once": True})
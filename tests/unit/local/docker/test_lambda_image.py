@@ -1,5 +1,7 @@
+import os
 from unittest import TestCase
-from mock import patch, Mock, mock_open
+from mock import patch, Mock, call
+from parameterized import parameterized
 
 from docker.errors import ImageNotFound, BuildError, APIError
 
@@ -16,10 +18,10 @@ class TestLambdaImage(TestCase):
         self.assertFalse(lambda_image.force_image_build)
         self.assertEquals(lambda_image.docker_client, "docker_client")
 
-    @patch("samcli.local.docker.lambda_image.docker")
-    def test_initialization_with_defaults(self, docker_patch):
+    @patch("samcli.local.docker.lambda_image.get_docker_client")
+    def test_initialization_with_defaults(self, get_docker_client_patch):
         docker_client_mock = Mock()
-        docker_patch.from_env.return_value = docker_client_mock
+        get_docker_client_patch.return_value = docker_client_mock
 
         lambda_image = LambdaImage("layer_downloader", False, False)
 
@@ -35,6 +37,51 @@ class TestLambdaImage(TestCase):
 
         self.assertEquals(lambda_image.build("python3.6", []), "lambci/lambda:python3.6")
 
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_building_image_with_mounted_layers(self, build_image_patch):
+        layer_downloader_mock = Mock()
+        docker_client_mock = Mock()
+
+        lambda_image = LambdaImage(
+            layer_downloader_mock, False, False, docker_client=docker_client_mock, mount_layers=True
+        )
+
+        self.assertEquals(lambda_image.build("python3.6", [Mock()]), "lambci/lambda:python3.6")
+
+        layer_downloader_mock.download_all.assert_not_called()
+        build_image_patch.assert_not_called()
+
+    def test_get_layers_dir_without_mounted_layers(self):
+        layer_downloader_mock = Mock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock())
+
+        self.assertIsNone(lambda_image.get_layers_dir([Mock()]))
+        layer_downloader_mock.download_all.assert_not_called()
+
+    def test_get_layers_dir_of_single_layer(self):
+        layer = Mock(codeuri="/cache/layer1")
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer]
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, True, docker_client=Mock(), mount_layers=True)
+
+        self.assertEquals(lambda_image.get_layers_dir([layer]), "/cache/layer1")
+        layer_downloader_mock.download_all.assert_called_once_with([layer], True)
+
+    @patch("samcli.local.docker.lambda_image.merge_layers")
+    def test_get_layers_dir_of_several_layers(self, merge_layers_patch):
+        layers = [Mock(is_defined_within_template=False), Mock(is_defined_within_template=False)]
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = layers
+        layer_downloader_mock.layer_cache = "/cache"
+        merge_layers_patch.return_value = "/cache/.merged/abc"
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock(), mount_layers=True)
+
+        self.assertEquals(lambda_image.get_layers_dir(layers), "/cache/.merged/abc")
+        merge_layers_patch.assert_called_once_with(layers, [None, None], os.path.join("/cache", ".merged"))
+
     @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
     def test_not_building_image_that_already_exists(self, generate_docker_image_version_patch, build_image_patch):
@@ -55,7 +102,7 @@ class TestLambdaImage(TestCase):
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
         layer_downloader_mock.download_all.assert_called_once_with([layer_mock], False)
-        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6")
+        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6", [None])
         docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
         build_image_patch.assert_not_called()
 
@@ -65,7 +112,9 @@ class TestLambdaImage(TestCase):
         self, generate_docker_image_version_patch, build_image_patch
     ):
         layer_downloader_mock = Mock()
-        layer_downloader_mock.download_all.return_value = ["layers1"]
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_downloader_mock.download_all.return_value = [layer_mock]
 
         generate_docker_image_version_patch.return_value = "image-version"
 
@@ -73,14 +122,16 @@ class TestLambdaImage(TestCase):
         docker_client_mock.images.get.side_effect = ImageNotFound("image not found")
 
         lambda_image = LambdaImage(layer_downloader_mock, False, True, docker_client=docker_client_mock)
-        actual_image_id = lambda_image.build("python3.6", ["layers1"])
+        actual_image_id = lambda_image.build("python3.6", [layer_mock])
 
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
-        layer_downloader_mock.download_all.assert_called_once_with(["layers1"], True)
-        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6")
-        docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
-        build_image_patch.assert_called_once_with("lambci/lambda:python3.6", "samcli/lambda:image-version", ["layers1"])
+        layer_downloader_mock.download_all.assert_called_once_with([layer_mock], True)
+        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6", [None])
+        docker_client_mock.images.get.assert_not_called()
+        build_image_patch.assert_called_once_with(
+            "lambci/lambda:python3.6", "samcli/lambda:image-version", [layer_mock], pull=True
+        )
 
     @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
@@ -88,7 +139,9 @@ class TestLambdaImage(TestCase):
         self, generate_docker_image_version_patch, build_image_patch
     ):
         layer_downloader_mock = Mock()
-        layer_downloader_mock.download_all.return_value = ["layers1"]
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_downloader_mock.download_all.return_value = [layer_mock]
 
         generate_docker_image_version_patch.return_value = "image-version"
 
@@ -96,14 +149,221 @@ class TestLambdaImage(TestCase):
         docker_client_mock.images.get.side_effect = ImageNotFound("image not found")
 
         lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
-        actual_image_id = lambda_image.build("python3.6", ["layers1"])
+        actual_image_id = lambda_image.build("python3.6", [layer_mock])
 
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
-        layer_downloader_mock.download_all.assert_called_once_with(["layers1"], False)
-        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6")
+        layer_downloader_mock.download_all.assert_called_once_with([layer_mock], False)
+        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6", [None])
         docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
-        build_image_patch.assert_called_once_with("lambci/lambda:python3.6", "samcli/lambda:image-version", ["layers1"])
+        build_image_patch.assert_called_once_with(
+            "lambci/lambda:python3.6", "samcli/lambda:image-version", [layer_mock], pull=True
+        )
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_building_image_of_unchanged_local_layer(self, build_image_patch):
+        layer_downloader_mock = Mock()
+        layer_mock = Mock()
+        layer_mock.name = "LocalLayer"
+        layer_mock.codeuri = "path/to/layer"
+        layer_mock.is_defined_within_template = True
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+
+        docker_client_mock = Mock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
+        lambda_image._fingerprinter = Mock()
+        # The remembered image is checked against the fingerprint before the changed layer is resolved again
+        lambda_image._fingerprinter.fingerprint.side_effect = ["content1", "content1", "content2", "content2"]
+
+        first_image = lambda_image.build("python3.6", [layer_mock])
+        second_image = lambda_image.build("python3.6", [layer_mock])
+        changed_image = lambda_image.build("python3.6", [layer_mock])
+
+        self.assertEquals(first_image, second_image)
+        self.assertNotEquals(first_image, changed_image)
+        lambda_image._fingerprinter.fingerprint.assert_called_with("path/to/layer")
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 2)
+        build_image_patch.assert_not_called()
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_building_image_of_local_layer_that_cannot_be_fingerprinted(self, build_image_patch):
+        layer_downloader_mock = Mock()
+        layer_mock = Mock()
+        layer_mock.name = "LocalLayer"
+        layer_mock.is_defined_within_template = True
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock())
+        lambda_image._fingerprinter = Mock()
+        lambda_image._fingerprinter.fingerprint.side_effect = OSError("permission denied")
+
+        lambda_image.build("python3.6", [layer_mock])
+
+        build_image_patch.assert_called_once()
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_reusing_image_of_same_layers(self, build_image_patch):
+        layer_mock = Mock(is_defined_within_template=False)
+        layer_mock.name = "layer1"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+        docker_client_mock = Mock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
+
+        first_image = lambda_image.build("python3.6", [layer_mock])
+        self.assertEquals(lambda_image.build("python3.6", [layer_mock]), first_image)
+        self.assertNotEquals(lambda_image.build("python3.7", [layer_mock]), first_image)
+
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 2)
+        self.assertEquals(docker_client_mock.images.get.call_count, 2)
+
+        # Forgetting another image keeps this one
+        lambda_image.invalidate("samcli/lambda:other")
+        lambda_image.build("python3.6", [layer_mock])
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 2)
+
+        lambda_image.invalidate(first_image)
+        self.assertEquals(lambda_image.build("python3.6", [layer_mock]), first_image)
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 3)
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_reusing_image_when_forcing_build(self, build_image_patch):
+        layer_mock = Mock(is_defined_within_template=False)
+        layer_mock.name = "layer1"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, True, docker_client=Mock())
+
+        lambda_image.build("python3.6", [layer_mock])
+        lambda_image.build("python3.6", [layer_mock])
+
+        self.assertEquals(build_image_patch.call_count, 2)
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_reusing_image_of_local_layer_that_cannot_be_fingerprinted(self, build_image_patch):
+        layer_mock = Mock(is_defined_within_template=True)
+        layer_mock.name = "LocalLayer"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock())
+        lambda_image._fingerprinter = Mock()
+        lambda_image._fingerprinter.fingerprint.return_value = None
+
+        lambda_image.build("python3.6", [layer_mock])
+        lambda_image.build("python3.6", [layer_mock])
+
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 2)
+
+    @patch("samcli.local.docker.lambda_image.os.path.isdir")
+    def test_reusing_layers_dir_while_it_exists(self, isdir_patch):
+        layer = Mock(codeuri="/cache/layer1", is_defined_within_template=False)
+        layer.name = "layer1"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer]
+        isdir_patch.return_value = True
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock(), mount_layers=True)
+
+        self.assertEquals(lambda_image.get_layers_dir([layer]), "/cache/layer1")
+        self.assertEquals(lambda_image.get_layers_dir([layer]), "/cache/layer1")
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 1)
+
+        # Deleted from the layer cache
+        isdir_patch.return_value = False
+        self.assertEquals(lambda_image.get_layers_dir([layer]), "/cache/layer1")
+        self.assertEquals(layer_downloader_mock.download_all.call_count, 2)
+
+    @parameterized.expand([(True,), (False,)])
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_recording_use_of_images(self, image_exists, build_image_patch):
+        layer_mock = Mock(is_defined_within_template=False)
+        layer_mock.name = "layer1"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+        docker_client_mock = Mock()
+        if not image_exists:
+            docker_client_mock.images.get.side_effect = ImageNotFound("image not found")
+        image_cache_mock = Mock()
+
+        lambda_image = LambdaImage(
+            layer_downloader_mock, False, False, docker_client=docker_client_mock, image_cache=image_cache_mock
+        )
+        image = lambda_image.build("python3.6", [layer_mock])
+
+        image_cache_mock.touch.assert_called_once_with([image])
+        if image_exists:
+            image_cache_mock.collect_in_background.assert_not_called()
+        else:
+            image_cache_mock.collect_in_background.assert_called_once_with(keep=[image])
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_failing_if_use_of_images_cannot_be_recorded(self, build_image_patch):
+        layer_mock = Mock(is_defined_within_template=False)
+        layer_mock.name = "layer1"
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+        image_cache_mock = Mock()
+        image_cache_mock.touch.side_effect = OSError("read-only file system")
+
+        lambda_image = LambdaImage(
+            layer_downloader_mock, False, False, docker_client=Mock(), image_cache=image_cache_mock
+        )
+
+        self.assertTrue(lambda_image.build("python3.6", [layer_mock]).startswith("samcli/lambda:"))
+
+    def test_generate_docker_image_version_with_fingerprints(self):
+        layer_mock = Mock()
+        layer_mock.name = "layer1"
+
+        without_fingerprint = LambdaImage._generate_docker_image_version([layer_mock], "runtime")
+        with_fingerprint = LambdaImage._generate_docker_image_version([layer_mock], "runtime", ["content"])
+
+        self.assertEquals(
+            without_fingerprint, LambdaImage._generate_docker_image_version([layer_mock], "runtime", [None])
+        )
+        self.assertNotEquals(without_fingerprint, with_fingerprint)
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_building_only_images_of_changed_layers(self, build_image_patch):
+        layers = []
+        for name in ["layer1", "layer2", "layer3"]:
+            layer = Mock()
+            layer.name = name
+            layer.is_defined_within_template = False
+            layers.append(layer)
+
+        layer_downloader_mock = Mock()
+        layer_downloader_mock.download_all.return_value = layers
+
+        # Only the image of the first layer exists
+        first_tag = "samcli/lambda:" + LambdaImage._generate_docker_image_version(layers[:1], "python3.6")
+        docker_client_mock = Mock()
+        docker_client_mock.images.get.side_effect = lambda tag: self._get_image(tag, [first_tag])
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
+        image_tag = lambda_image.build("python3.6", layers)
+
+        self.assertEquals(
+            image_tag, "samcli/lambda:" + LambdaImage._generate_docker_image_version(layers, "python3.6")
+        )
+        second_tag = "samcli/lambda:" + LambdaImage._generate_docker_image_version(layers[:2], "python3.6")
+        build_image_patch.assert_has_calls(
+            [
+                call(first_tag, second_tag, [layers[1]], pull=False),
+                call(second_tag, image_tag, [layers[2]], pull=False),
+            ]
+        )
+        self.assertEquals(build_image_patch.call_count, 2)
+
+    @staticmethod
+    def _get_image(tag, existing_tags):
+        if tag not in existing_tags:
+            raise ImageNotFound("image not found")
+        return Mock()
 
     @patch("samcli.local.docker.lambda_image.hashlib")
     def test_generate_docker_image_version(self, hashlib_patch):
@@ -132,125 +392,61 @@ class TestLambdaImage(TestCase):
 
         self.assertEquals(LambdaImage._generate_dockerfile("python", [layer_mock]), expected_docker_file)
 
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
+    @parameterized.expand([(True, False, True), (True, True, False), (False, False, False)])
+    @patch("samcli.local.docker.lambda_image.stream_tarball")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image(self, generate_dockerfile_patch, path_patch, uuid_patch, create_tarball_patch):
-        uuid_patch.uuid4.return_value = "uuid"
+    def test_build_image(
+        self, pull, skip_pull_image, expected_pull, generate_dockerfile_patch, stream_tarball_patch
+    ):
         generate_dockerfile_patch.return_value = "Dockerfile content"
 
-        docker_full_path_mock = Mock()
-        docker_full_path_mock.exists.return_value = True
-        path_patch.return_value = docker_full_path_mock
-
         docker_client_mock = Mock()
         layer_downloader_mock = Mock()
-        layer_downloader_mock.layer_cache = "cached layers"
 
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
+        tarball_stream = Mock()
+        stream_tarball_patch.return_value = tarball_stream
 
         layer_version1 = Mock()
         layer_version1.codeuri = "somevalue"
         layer_version1.name = "name"
 
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock)._build_image(
-                "base_image", "docker_tag", [layer_version1]
-            )
-
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
-        docker_client_mock.images.build.assert_called_once_with(
-            fileobj=tarball_fileobj, rm=True, tag="docker_tag", pull=False, custom_context=True
+        LambdaImage(layer_downloader_mock, skip_pull_image, False, docker_client=docker_client_mock)._build_image(
+            "base_image", "docker_tag", [layer_version1], pull=pull
         )
 
-        docker_full_path_mock.unlink.assert_called_once()
-
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
-    @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image_fails_with_BuildError(
-        self, generate_dockerfile_patch, path_patch, uuid_patch, create_tarball_patch
-    ):
-        uuid_patch.uuid4.return_value = "uuid"
-        generate_dockerfile_patch.return_value = "Dockerfile content"
-
-        docker_full_path_mock = Mock()
-        docker_full_path_mock.exists.return_value = False
-        path_patch.return_value = docker_full_path_mock
-
-        docker_client_mock = Mock()
-        docker_client_mock.images.build.side_effect = BuildError("buildError", "buildlog")
-        layer_downloader_mock = Mock()
-        layer_downloader_mock.layer_cache = "cached layers"
-
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
-
-        layer_version1 = Mock()
-        layer_version1.codeuri = "somevalue"
-        layer_version1.name = "name"
-
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            with self.assertRaises(ImageBuildException):
-                LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock)._build_image(
-                    "base_image", "docker_tag", [layer_version1]
-                )
-
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
+        stream_tarball_patch.assert_called_once_with({"somevalue": "/name"}, {"Dockerfile": b"Dockerfile content"})
         docker_client_mock.images.build.assert_called_once_with(
-            fileobj=tarball_fileobj, rm=True, tag="docker_tag", pull=False, custom_context=True
+            fileobj=tarball_stream,
+            rm=True,
+            tag="docker_tag",
+            pull=expected_pull,
+            custom_context=True,
+            labels={"com.amazonaws.sam-cli.image": "lambda"},
         )
 
-        docker_full_path_mock.unlink.assert_not_called()
-
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
+    @parameterized.expand([(BuildError("buildError", "buildlog"),), (APIError("apiError"),)])
+    @patch("samcli.local.docker.lambda_image.stream_tarball")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image_fails_with_ApiError(
-        self, generate_dockerfile_patch, path_patch, uuid_patch, create_tarball_patch
-    ):
-        uuid_patch.uuid4.return_value = "uuid"
+    def test_build_image_fails(self, error, generate_dockerfile_patch, stream_tarball_patch):
         generate_dockerfile_patch.return_value = "Dockerfile content"
 
-        docker_full_path_mock = Mock()
-        path_patch.return_value = docker_full_path_mock
-
         docker_client_mock = Mock()
-        docker_client_mock.images.build.side_effect = APIError("apiError")
-        layer_downloader_mock = Mock()
-        layer_downloader_mock.layer_cache = "cached layers"
-
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
+        docker_client_mock.images.build.side_effect = error
 
         layer_version1 = Mock()
         layer_version1.codeuri = "somevalue"
         layer_version1.name = "name"
 
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            with self.assertRaises(ImageBuildException):
-                LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock)._build_image(
-                    "base_image", "docker_tag", [layer_version1]
-                )
-
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
+        with self.assertRaises(ImageBuildException):
+            LambdaImage(Mock(), True, False, docker_client=docker_client_mock)._build_image(
+                "base_image", "docker_tag", [layer_version1]
+            )
+
         docker_client_mock.images.build.assert_called_once_with(
-            fileobj=tarball_fileobj, rm=True, tag="docker_tag", pull=False, custom_context=True
+            fileobj=stream_tarball_patch.return_value,
+            rm=True,
+            tag="docker_tag",
+            pull=False,
+            custom_context=True,
+            labels={"com.amazonaws.sam-cli.image": "lambda"},
         )
-        docker_full_path_mock.unlink.assert_called_once()
@@ -7,7 +7,7 @@ from unittest import TestCase
 
 import requests
 
-from mock import Mock
+from mock import Mock, patch
 from docker.errors import APIError, ImageNotFound
 from samcli.local.docker.manager import ContainerManager, DockerImagePullFailedException
 
@@ -31,10 +31,45 @@ class TestContainerManager_run(TestCase):
         self.container_mock.create = Mock()
         self.container_mock.is_created = Mock()
 
-    def test_must_error_with_warm(self):
+    def test_must_reuse_warm_container(self):
+        warm_container = Mock()
+        warm_container.config_key = "key"
+        self.container_mock.config_key = "key"
+        self.manager.has_image = Mock()
+
+        self.manager.release(warm_container)
+        result = self.manager.run(self.container_mock, warm=True)
+
+        self.assertEqual(result, warm_container)
+        self.manager.has_image.assert_not_called()
+        self.container_mock.create.assert_not_called()
+        self.container_mock.start.assert_not_called()
+
+    def test_must_run_given_container_if_no_warm_container_matches(self):
+        warm_container = Mock()
+        warm_container.config_key = "other key"
+        self.container_mock.config_key = "key"
+        self.manager.has_image = Mock()
+        self.manager.pull_image = Mock()
+
+        self.manager.release(warm_container)
+        result = self.manager.run(self.container_mock, warm=True)
+
+        self.assertEqual(result, self.container_mock)
+        self.container_mock.start.assert_called_with(input_data=None)
+
+    def test_must_not_reuse_warm_container_if_not_warm(self):
+        warm_container = Mock()
+        warm_container.config_key = "key"
+        self.container_mock.config_key = "key"
+        self.manager.has_image = Mock()
+        self.manager.pull_image = Mock()
+
+        self.manager.release(warm_container)
+        result = self.manager.run(self.container_mock)
 
-        with self.assertRaises(ValueError):
-            self.manager.run(self.container_mock, warm=True)
+        self.assertEqual(result, self.container_mock)
+        self.container_mock.start.assert_called_with(input_data=None)
 
     def test_must_pull_image_and_run_container(self):
         input_data = "input data"
@@ -48,7 +83,7 @@ class TestContainerManager_run(TestCase):
         self.manager.run(self.container_mock, input_data)
 
         self.manager.has_image.assert_called_with(self.image_name)
-        self.manager.pull_image.assert_called_with(self.image_name)
+        self.manager.pull_image.assert_called_with(self.image_name, stream=None)
         self.container_mock.start.assert_called_with(input_data=input_data)
 
     def test_must_pull_image_if_image_exist_and_no_skip(self):
@@ -65,7 +100,7 @@ class TestContainerManager_run(TestCase):
         self.manager.run(self.container_mock, input_data)
 
         self.manager.has_image.assert_called_with(self.image_name)
-        self.manager.pull_image.assert_called_with(self.image_name)
+        self.manager.pull_image.assert_called_with(self.image_name, stream=None)
         self.container_mock.start.assert_called_with(input_data=input_data)
 
     def test_must_not_pull_image_if_image_is_samcli_lambda_image(self):
@@ -120,7 +155,7 @@ class TestContainerManager_run(TestCase):
             self.manager.run(self.container_mock, input_data)
 
         self.manager.has_image.assert_called_with(self.image_name)
-        self.manager.pull_image.assert_called_with(self.image_name)
+        self.manager.pull_image.assert_called_with(self.image_name, stream=None)
         self.container_mock.start.assert_not_called()
 
     def test_must_run_if_image_pull_failed_and_image_does_exist(self):
@@ -137,7 +172,7 @@ class TestContainerManager_run(TestCase):
         self.manager.run(self.container_mock, input_data)
 
         self.manager.has_image.assert_called_with(self.image_name)
-        self.manager.pull_image.assert_called_with(self.image_name)
+        self.manager.pull_image.assert_called_with(self.image_name, stream=None)
         self.container_mock.start.assert_called_with(input_data=input_data)
 
     def test_must_create_container_if_not_exists(self):
@@ -167,6 +202,199 @@ class TestContainerManager_run(TestCase):
         self.container_mock.create.assert_not_called()
 
 
+class TestContainerManager_image_cache(TestCase):
+    def setUp(self):
+        self.manager = ContainerManager(docker_client=Mock())
+        self.manager.has_image = Mock(return_value=True)
+        self.manager.pull_image = Mock()
+
+        self.container_mock = Mock()
+        self.container_mock.image = "image name"
+        self.container_mock.is_created.return_value = False
+
+    def test_must_pull_image_once(self):
+        self.manager.run(self.container_mock)
+        self.manager.run(self.container_mock)
+
+        self.manager.has_image.assert_called_once_with("image name")
+        self.manager.pull_image.assert_called_once_with("image name", stream=None)
+        self.assertEqual(self.container_mock.start.call_count, 2)
+
+    def test_must_not_cache_image_that_failed_to_pull(self):
+        self.manager.has_image.return_value = False
+        self.manager.pull_image.side_effect = DockerImagePullFailedException("failed")
+
+        with self.assertRaises(DockerImagePullFailedException):
+            self.manager.run(self.container_mock)
+        with self.assertRaises(DockerImagePullFailedException):
+            self.manager.run(self.container_mock)
+
+        self.assertEqual(self.manager.pull_image.call_count, 2)
+
+    @patch("samcli.local.docker.manager.threading")
+    @patch("samcli.local.docker.manager.time")
+    def test_must_refresh_image_in_background_when_interval_passed(self, time_mock, threading_mock):
+        self.manager.image_refresh_interval = 60
+        time_mock.time.return_value = 100
+        self.manager.run(self.container_mock)
+
+        time_mock.time.return_value = 161
+        self.manager.run(self.container_mock)
+        # A refresh is already running
+        self.manager.run(self.container_mock)
+
+        self.manager.pull_image.assert_called_once_with("image name", stream=None)
+        threading_mock.Thread.assert_called_once()
+        threading_mock.Thread.return_value.start.assert_called_once_with()
+
+        # Run the refresh
+        threading_mock.Thread.call_args[1]["target"]()
+        self.assertEqual(self.manager.pull_image.call_count, 2)
+        self.assertEqual(self.manager._images["image name"].pulled_at, 161)
+        self.assertEqual(self.manager._refreshing, set())
+
+    @patch("samcli.local.docker.manager.threading")
+    @patch("samcli.local.docker.manager.time")
+    def test_must_not_refresh_if_asked_to_skip_pulling(self, time_mock, threading_mock):
+        self.manager.image_refresh_interval = 60
+        self.manager.skip_pull_image = True
+        time_mock.time.return_value = 100
+        self.manager.run(self.container_mock)
+
+        time_mock.time.return_value = 1000
+        self.manager.run(self.container_mock)
+
+        threading_mock.Thread.assert_not_called()
+
+    def test_must_look_up_image_again_if_it_was_removed(self):
+        self.manager.run(self.container_mock)
+        self.container_mock.create.side_effect = [ImageNotFound("gone"), None]
+
+        self.manager.run(self.container_mock)
+
+        self.assertEqual(self.manager.pull_image.call_count, 2)
+        self.assertEqual(self.container_mock.create.call_count, 3)
+
+
+class TestContainerManager_pull_images(TestCase):
+    def setUp(self):
+        self.manager = ContainerManager(docker_client=Mock())
+        self.manager.has_image = Mock(return_value=False)
+        self.manager.pull_image = Mock()
+
+    def test_must_pull_every_image_once(self):
+        self.manager.pull_images(["image1", "image2", "image1"])
+
+        self.assertEqual(sorted(c[0][0] for c in self.manager.pull_image.call_args_list), ["image1", "image2"])
+
+        # Containers of these images do not pull them again
+        container = Mock(image="image1")
+        container.is_created.return_value = False
+        self.manager.run(container)
+
+        self.assertEqual(self.manager.pull_image.call_count, 2)
+
+    def test_must_skip_images_that_failed_to_pull(self):
+        self.manager.pull_image.side_effect = lambda image_name, stream=None: self._fail_pull(image_name, "image1")
+
+        self.manager.pull_images(["image1", "image2"])
+
+        # The first container that uses the image pulls it again
+        container = Mock(image="image1")
+        container.is_created.return_value = False
+        with self.assertRaises(DockerImagePullFailedException):
+            self.manager.run(container)
+
+        self.assertEqual(self.manager.pull_image.call_count, 3)
+
+    def test_must_not_pull_without_images(self):
+        self.manager.pull_images([])
+
+        self.manager.pull_image.assert_not_called()
+
+    @staticmethod
+    def _fail_pull(image_name, failing_image_name):
+        if image_name == failing_image_name:
+            raise DockerImagePullFailedException("failed")
+
+
+class TestContainerManager_run_standby(TestCase):
+    def setUp(self):
+        self.manager = ContainerManager(docker_network_id="network", docker_client=Mock(), standby_pool_size=1)
+        self.manager._standby_pool = Mock()
+        self.manager.has_image = Mock()
+        self.manager.pull_image = Mock()
+
+        self.container_mock = Mock()
+        self.container_mock.image = "image name"
+        self.container_mock.config_key = "key"
+        self.container_mock.is_created.return_value = False
+
+    def test_must_start_standby_container(self):
+        standby_container = Mock()
+        self.manager._standby_pool.acquire.return_value = standby_container
+
+        result = self.manager.run(self.container_mock, input_data="input data")
+
+        self.assertEqual(result, standby_container)
+        self.manager._standby_pool.acquire.assert_called_with("key")
+        self.manager._standby_pool.replenish.assert_called_with(self.container_mock)
+        standby_container.start.assert_called_with(input_data="input data")
+        self.manager.has_image.assert_not_called()
+        self.container_mock.create.assert_not_called()
+
+    def test_must_run_given_container_if_standby_container_failed_to_start(self):
+        standby_container = Mock()
+        standby_container.start.side_effect = ValueError("failed")
+        self.manager._standby_pool.acquire.return_value = standby_container
+
+        result = self.manager.run(self.container_mock, input_data="input data")
+
+        self.assertEqual(result, self.container_mock)
+        standby_container.delete.assert_called_with(reaper=self.manager._reaper)
+        self.container_mock.create.assert_called_with()
+        self.container_mock.start.assert_called_with(input_data="input data")
+
+    def test_must_create_container_and_replenish_pool_if_no_standby_container(self):
+        self.manager._standby_pool.acquire.return_value = None
+
+        result = self.manager.run(self.container_mock, input_data="input data")
+
+        self.assertEqual(result, self.container_mock)
+        self.manager._standby_pool.replenish.assert_called_with(self.container_mock)
+        self.assertEqual(self.container_mock.network_id, "network")
+        self.container_mock.create.assert_called_with()
+        self.container_mock.start.assert_called_with(input_data="input data")
+
+    def test_must_replenish_empty_pool(self):
+        # An empty pool has a length of zero. It must still be used.
+        self.manager._standby_pool = Mock()
+        self.manager._standby_pool.__len__ = Mock(return_value=0)
+        self.manager._standby_pool.acquire.return_value = None
+
+        self.manager.run(self.container_mock)
+
+        self.manager._standby_pool.acquire.assert_called_with("key")
+        self.manager._standby_pool.replenish.assert_called_with(self.container_mock)
+
+    def test_must_not_use_standby_containers_for_warm_containers(self):
+        self.manager._warm_pool = Mock()
+        self.manager._warm_pool.acquire.return_value = None
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.manager._standby_pool.acquire.assert_not_called()
+        self.manager._standby_pool.replenish.assert_not_called()
+
+    def test_must_not_use_standby_containers_for_configuration_that_does_not_repeat(self):
+        result = self.manager.run(self.container_mock, input_data="input data", standby=False)
+
+        self.assertEqual(result, self.container_mock)
+        self.manager._standby_pool.acquire.assert_not_called()
+        self.manager._standby_pool.replenish.assert_not_called()
+        self.container_mock.start.assert_called_with(input_data="input data")
+
+
 class TestContainerManager_pull_image(TestCase):
     def setUp(self):
         self.image_name = "image name"
@@ -264,4 +492,34 @@ class TestContainerManager_stop(TestCase):
         container.delete = Mock()
 
         manager.stop(container)
-        container.delete.assert_called_with()
+        container.delete.assert_called_with(reaper=manager._reaper)
+
+
+class TestContainerManager_shutdown(TestCase):
+    def test_must_delete_warm_containers(self):
+
+        manager = ContainerManager(docker_client=Mock())
+        container = Mock()
+
+        manager.release(container)
+        manager.shutdown()
+
+        container.delete.assert_called_with(reaper=manager._reaper)
+
+    def test_must_delete_standby_containers(self):
+
+        manager = ContainerManager(docker_client=Mock(), standby_pool_size=1)
+        manager._standby_pool = Mock()
+
+        manager.shutdown()
+
+        manager._standby_pool.shutdown.assert_called_with()
+
+    def test_must_wait_for_removal_of_stopped_containers(self):
+
+        manager = ContainerManager(docker_client=Mock())
+        manager._reaper = Mock()
+
+        manager.shutdown()
+
+        manager._reaper.shutdown.assert_called_with()
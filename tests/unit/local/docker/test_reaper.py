@@ -0,0 +1,44 @@
+"""
+Tests the background removal of containers
+"""
+
+from unittest import TestCase
+
+from mock import Mock
+
+from samcli.local.docker.reaper import ContainerReaper
+
+
+class TestContainerReaper(TestCase):
+    def setUp(self):
+        self.remove = Mock()
+        self.docker_client = Mock()
+
+    def test_must_remove_queued_containers_before_shutdown_returns(self):
+        reaper = ContainerReaper(self.remove)
+
+        reaper.reap(self.docker_client, "id1")
+        reaper.reap(self.docker_client, "id2")
+        reaper.shutdown()
+
+        self.assertEqual(self.remove.call_count, 2)
+        self.remove.assert_any_call(self.docker_client, "id1")
+        self.remove.assert_any_call(self.docker_client, "id2")
+
+    def test_must_remove_right_away_after_shutdown(self):
+        reaper = ContainerReaper(self.remove)
+        reaper.shutdown()
+
+        reaper.reap(self.docker_client, "id")
+
+        self.remove.assert_called_once_with(self.docker_client, "id")
+
+    def test_must_keep_going_if_a_removal_fails(self):
+        self.remove.side_effect = [ValueError("failed"), None]
+        reaper = ContainerReaper(self.remove, max_workers=1)
+
+        reaper.reap(self.docker_client, "id1")
+        reaper.reap(self.docker_client, "id2")
+        reaper.shutdown()
+
+        self.assertEqual(self.remove.call_count, 2)
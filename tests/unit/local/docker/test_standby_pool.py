@@ -0,0 +1,133 @@
+"""
+Tests the pool of standby containers
+"""
+
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from samcli.local.docker.standby_pool import StandbyContainerPool
+
+
+def make_container(config_key="key"):
+    container = Mock()
+    container.config_key = config_key
+    container.clone.side_effect = lambda: make_clone(container)
+    return container
+
+
+def make_clone(container):
+    clone = Mock()
+    clone.config_key = container.config_key
+    return clone
+
+
+class TestStandbyContainerPool(TestCase):
+    def setUp(self):
+        self.create = Mock(side_effect=self.fake_create)
+        self.on_evict = Mock()
+        self.created_count = 0
+
+    def fake_create(self, container):
+        self.created_count += 1
+        container.id = "id{}".format(self.created_count)
+
+    def test_must_return_none_if_pool_is_empty(self):
+        pool = StandbyContainerPool(self.create, self.on_evict)
+
+        self.assertIsNone(pool.acquire("key"))
+
+    def test_must_create_standby_containers_in_background(self):
+        pool = StandbyContainerPool(self.create, self.on_evict, size=2)
+        container = make_container()
+
+        pool.replenish(container)
+        pool._executor.shutdown(wait=True)
+
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(self.create.call_count, 2)
+        # The given container is only used as a template
+        container.create.assert_not_called()
+
+        first = pool.acquire("key")
+        second = pool.acquire("key")
+        self.assertEqual([first.id, second.id], ["id1", "id2"])
+        self.assertIsNone(pool.acquire("key"))
+        self.assertIsNone(pool.acquire("other key"))
+
+    def test_must_only_create_missing_containers(self):
+        pool = StandbyContainerPool(self.create, self.on_evict, size=2)
+        container = make_container()
+
+        pool.replenish(container)
+        pool.replenish(container)
+        pool._executor.shutdown(wait=True)
+
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_must_skip_containers_that_fail_to_be_created(self):
+        self.create.side_effect = ValueError("failed")
+        pool = StandbyContainerPool(self.create, self.on_evict, size=1)
+
+        pool.replenish(make_container())
+        pool._executor.shutdown(wait=True)
+
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool._pending["key"], 0)
+
+    def test_must_evict_standby_containers_on_shutdown(self):
+        pool = StandbyContainerPool(self.create, self.on_evict, size=2)
+
+        pool.replenish(make_container())
+        pool.shutdown()
+
+        self.assertEqual(self.on_evict.call_count, 2)
+        self.assertEqual(len(pool), 0)
+
+    def test_must_not_replenish_after_shutdown(self):
+        pool = StandbyContainerPool(self.create, self.on_evict)
+
+        pool.shutdown()
+        pool.replenish(make_container())
+
+        self.create.assert_not_called()
+
+    def test_must_evict_least_recently_used_keys_beyond_max_keys(self):
+        pool = StandbyContainerPool(self.create, self.on_evict, size=1, max_keys=2)
+
+        for key in ["key1", "key2"]:
+            pool.replenish(make_container(key))
+        pool._executor.shutdown(wait=True)
+        pool._executor = None
+        pool.acquire("key1")
+
+        pool.replenish(make_container("key3"))
+        pool._executor.shutdown(wait=True)
+
+        # key1 was used after key2, so key2 was superseded. Its container is evicted.
+        self.assertEqual([c[0][0].config_key for c in self.on_evict.call_args_list], ["key2"])
+        self.assertIsNone(pool.acquire("key2"))
+        self.assertIsNotNone(pool.acquire("key3"))
+
+    @patch("samcli.local.docker.standby_pool.time")
+    def test_must_evict_keys_that_were_not_used(self, time_mock):
+        time_mock.time.return_value = 1000
+        pool = StandbyContainerPool(self.create, self.on_evict, size=1, idle_timeout=60)
+
+        pool.replenish(make_container("key1"))
+        pool._executor.shutdown(wait=True)
+
+        time_mock.time.return_value = 1100
+        self.assertIsNone(pool.acquire("key2"))
+
+        self.assertEqual(self.on_evict.call_count, 1)
+        self.assertEqual(len(pool), 0)
+
+    def test_must_evict_container_created_for_evicted_key(self):
+        pool = StandbyContainerPool(self.create, self.on_evict, size=1)
+        container = make_clone(make_container("key1"))
+
+        pool._create_standby("key1", container)
+
+        self.on_evict.assert_called_once_with(container)
+        self.assertEqual(len(pool), 0)
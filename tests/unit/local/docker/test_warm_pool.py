@@ -0,0 +1,120 @@
+"""
+Tests the pool of warm containers
+"""
+
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from samcli.local.docker.warm_pool import WarmContainerPool
+
+
+def make_container(container_id):
+    container = Mock()
+    container.id = container_id
+    return container
+
+
+class TestWarmContainerPool_acquire(TestCase):
+    def setUp(self):
+        self.on_evict = Mock()
+        self.pool = WarmContainerPool(self.on_evict)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_must_return_none_if_pool_is_empty(self):
+        self.assertIsNone(self.pool.acquire("key"))
+
+    def test_must_return_released_container_with_same_key(self):
+        container = make_container("id")
+
+        self.pool.release("key", container)
+
+        self.assertEqual(self.pool.acquire("key"), container)
+        # The container is leased now. It must not be handed out twice
+        self.assertIsNone(self.pool.acquire("key"))
+
+    def test_must_not_return_container_with_other_key(self):
+        self.pool.release("key", make_container("id"))
+
+        self.assertIsNone(self.pool.acquire("other key"))
+        self.assertEqual(len(self.pool), 1)
+
+    def test_must_return_most_recently_used_container(self):
+        older = make_container("older")
+        newer = make_container("newer")
+
+        self.pool.release("key", older)
+        self.pool.release("key", newer)
+
+        self.assertEqual(self.pool.acquire("key"), newer)
+        self.assertEqual(self.pool.acquire("key"), older)
+
+
+class TestWarmContainerPool_eviction(TestCase):
+    def setUp(self):
+        self.on_evict = Mock()
+
+    def test_must_evict_least_recently_used_container_when_full(self):
+        pool = WarmContainerPool(self.on_evict, max_size=2)
+        containers = [make_container(str(i)) for i in range(3)]
+
+        for container in containers:
+            pool.release("key", container)
+
+        self.on_evict.assert_called_once_with(containers[0])
+        self.assertEqual(len(pool), 2)
+        pool.shutdown()
+
+    @patch("samcli.local.docker.warm_pool.time")
+    def test_must_evict_idle_containers(self, time_mock):
+        pool = WarmContainerPool(self.on_evict, idle_timeout=10)
+        idle = make_container("idle")
+        fresh = make_container("fresh")
+
+        time_mock.time.return_value = 100
+        pool.release("key", idle)
+
+        time_mock.time.return_value = 111
+        pool.release("other key", fresh)
+
+        self.on_evict.assert_called_once_with(idle)
+        self.assertIsNone(pool.acquire("key"))
+        self.assertEqual(pool.acquire("other key"), fresh)
+        pool.shutdown()
+
+    def test_must_evict_remaining_containers_on_shutdown(self):
+        pool = WarmContainerPool(self.on_evict)
+        first = make_container("first")
+        second = make_container("second")
+
+        pool.release("key", first)
+        pool.release("other key", second)
+        pool.shutdown()
+
+        self.assertEqual(self.on_evict.call_count, 2)
+        self.on_evict.assert_any_call(first)
+        self.on_evict.assert_any_call(second)
+        self.assertEqual(len(pool), 0)
+
+    def test_must_evict_container_released_after_shutdown(self):
+        pool = WarmContainerPool(self.on_evict)
+        container = make_container("late")
+
+        pool.shutdown()
+        pool.release("key", container)
+
+        self.on_evict.assert_called_once_with(container)
+        self.assertEqual(len(pool), 0)
+        self.assertIsNone(pool.acquire("key"))
+
+    def test_must_evict_all_containers_even_if_one_fails(self):
+        pool = WarmContainerPool(self.on_evict)
+        self.on_evict.side_effect = [ValueError("failed"), None]
+
+        pool.release("key", make_container("first"))
+        pool.release("key", make_container("second"))
+        pool.shutdown()
+
+        self.assertEqual(self.on_evict.call_count, 2)
@@ -45,10 +45,10 @@ class TestLocalLambdaService(TestCase):
         )
 
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.LocalLambdaInvokeService.service_response")
-    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputParser")
+    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputSplitter")
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.request")
-    def test_invoke_request_handler(self, request_mock, lambda_output_parser_mock, service_response_mock):
-        lambda_output_parser_mock.get_lambda_output.return_value = "hello world", None, False
+    def test_invoke_request_handler(self, request_mock, lambda_output_splitter_mock, service_response_mock):
+        lambda_output_splitter_mock.return_value.get_lambda_output.return_value = "hello world", False
         service_response_mock.return_value = "request response"
         request_mock.get_data.return_value = b"{}"
 
@@ -82,17 +82,16 @@ class TestLocalLambdaService(TestCase):
         lambda_error_responses_mock.resource_not_found.assert_called_once_with("NotFound")
 
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.LocalLambdaInvokeService.service_response")
-    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputParser")
+    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputSplitter")
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.request")
     def test_request_handler_returns_process_stdout_when_making_response(
-        self, request_mock, lambda_output_parser_mock, service_response_mock
+        self, request_mock, lambda_output_splitter_mock, service_response_mock
     ):
         request_mock.get_data.return_value = b"{}"
 
-        lambda_logs = "logs"
         lambda_response = "response"
         is_customer_error = False
-        lambda_output_parser_mock.get_lambda_output.return_value = lambda_response, lambda_logs, is_customer_error
+        lambda_output_splitter_mock.return_value.get_lambda_output.return_value = lambda_response, is_customer_error
 
         service_response_mock.return_value = "request response"
 
@@ -105,10 +104,10 @@ class TestLocalLambdaService(TestCase):
         result = service._invoke_request_handler(function_name="HelloWorld")
 
         self.assertEquals(result, "request response")
-        lambda_output_parser_mock.get_lambda_output.assert_called_with(ANY)
+        lambda_output_splitter_mock.return_value.get_lambda_output.assert_called_with()
 
         # Make sure the logs are written to stderr
-        stderr_mock.write.assert_called_with(lambda_logs)
+        lambda_output_splitter_mock.assert_called_with(log_stream=stderr_mock)
 
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaErrorResponses")
     def test_construct_error_handling(self, lambda_error_response_mock):
@@ -127,12 +126,12 @@ class TestLocalLambdaService(TestCase):
         )
 
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.LocalLambdaInvokeService.service_response")
-    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputParser")
+    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputSplitter")
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.request")
     def test_invoke_request_handler_with_lambda_that_errors(
-        self, request_mock, lambda_output_parser_mock, service_response_mock
+        self, request_mock, lambda_output_splitter_mock, service_response_mock
     ):
-        lambda_output_parser_mock.get_lambda_output.return_value = "hello world", None, True
+        lambda_output_splitter_mock.return_value.get_lambda_output.return_value = "hello world", True
         service_response_mock.return_value = "request response"
         request_mock.get_data.return_value = b"{}"
 
@@ -149,10 +148,10 @@ class TestLocalLambdaService(TestCase):
         )
 
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.LocalLambdaInvokeService.service_response")
-    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputParser")
+    @patch("samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputSplitter")
     @patch("samcli.local.lambda_service.local_lambda_invoke_service.request")
-    def test_invoke_request_handler_with_no_data(self, request_mock, lambda_output_parser_mock, service_response_mock):
-        lambda_output_parser_mock.get_lambda_output.return_value = "hello world", None, False
+    def test_invoke_request_handler_with_no_data(self, request_mock, lambda_output_splitter_mock, service_response_mock):
+        lambda_output_splitter_mock.return_value.get_lambda_output.return_value = "hello world", False
         service_response_mock.return_value = "request response"
         request_mock.get_data.return_value = None
 
@@ -0,0 +1,114 @@
+"""
+Unit tests for the local Lambda Runtime API
+"""
+
+import json
+import threading
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.local.lambda_service.runtime_api_service import LocalRuntimeApiService
+
+NEXT_PATH = "/2018-06-01/runtime/invocation/next"
+
+
+class TestLocalRuntimeApiService(TestCase):
+    def setUp(self):
+        self.service = LocalRuntimeApiService(host="127.0.0.1", function_arn="arn")
+        self.service.create()
+        self.client = self.service._app.test_client()
+
+    def invoke_in_background(self, event, results):
+        thread = threading.Thread(target=lambda: results.append(self.service.invoke(event, timeout=3)))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def test_must_hand_event_to_runtime_and_return_response(self):
+        results = []
+        thread = self.invoke_in_background(b'{"key": "value"}', results)
+
+        next_response = self.client.get(NEXT_PATH)
+        request_id = next_response.headers["Lambda-Runtime-Aws-Request-Id"]
+
+        self.assertEqual(next_response.status_code, 200)
+        self.assertEqual(next_response.data, b'{"key": "value"}')
+        self.assertEqual(next_response.headers["Lambda-Runtime-Invoked-Function-Arn"], "arn")
+        self.assertIn("Lambda-Runtime-Deadline-Ms", next_response.headers)
+
+        result = self.client.post("/2018-06-01/runtime/invocation/{}/response".format(request_id), data=b"response")
+        thread.join(5)
+
+        self.assertEqual(result.status_code, 202)
+        self.assertEqual(results[0].response, b"response")
+        self.assertFalse(results[0].is_error)
+
+    def test_must_return_errors_of_function(self):
+        results = []
+        thread = self.invoke_in_background(b"{}", results)
+
+        request_id = self.client.get(NEXT_PATH).headers["Lambda-Runtime-Aws-Request-Id"]
+        self.client.post("/2018-06-01/runtime/invocation/{}/error".format(request_id), data=b"error")
+        thread.join(5)
+
+        self.assertEqual(results[0].response, b"error")
+        self.assertTrue(results[0].is_error)
+
+    def test_must_reject_response_to_unknown_invocation(self):
+        result = self.client.post("/2018-06-01/runtime/invocation/unknown/response", data=b"response")
+
+        self.assertEqual(result.status_code, 400)
+        self.assertEqual(json.loads(result.data.decode("utf-8"))["errorType"], "InvalidRequestID")
+
+    def test_must_fail_invokes_after_init_error(self):
+        results = []
+        thread = self.invoke_in_background(b"{}", results)
+
+        # Wait until the invocation is queued, then report the error
+        while self.service._queued.empty():
+            thread.join(0.01)
+        self.client.post("/2018-06-01/runtime/init/error", data=b"init error")
+        thread.join(5)
+
+        self.assertEqual(results[0].response, b"init error")
+        self.assertTrue(results[0].is_error)
+        # The runtime is gone. Later invokes must not wait for it
+        self.assertEqual(self.service.invoke(b"{}").response, b"init error")
+
+    def test_must_fail_pending_invokes_when_stopped(self):
+        results = []
+        thread = self.invoke_in_background(b"{}", results)
+
+        while self.service._queued.empty():
+            thread.join(0.01)
+        self.service.stop()
+        thread.join(5)
+
+        self.assertIsNone(results[0].response)
+
+    @patch.object(LocalRuntimeApiService, "_POLL_INTERVAL", 0.01)
+    def test_must_disconnect_waiting_runtime_when_stopped(self):
+        self.service.stop()
+
+        self.assertEqual(self.client.get(NEXT_PATH).status_code, 503)
+
+
+class TestLocalRuntimeApiService_start(TestCase):
+    def test_must_fail_if_not_created(self):
+        with self.assertRaises(RuntimeError):
+            LocalRuntimeApiService(host="127.0.0.1").start()
+
+    @patch("samcli.local.lambda_service.runtime_api_service.threading")
+    @patch("samcli.local.lambda_service.runtime_api_service.make_server")
+    def test_must_serve_on_ephemeral_port_in_background(self, make_server_mock, threading_mock):
+        make_server_mock.return_value.server_port = 1234
+        service = LocalRuntimeApiService(host="127.0.0.1")
+        service._app = app = object()
+
+        service.start()
+
+        make_server_mock.assert_called_with("127.0.0.1", 0, app, threaded=True)
+        self.assertEqual(service.port, 1234)
+        threading_mock.Thread.return_value.start.assert_called_with()
+        self.assertTrue(threading_mock.Thread.return_value.daemon)
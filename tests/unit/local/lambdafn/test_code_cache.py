@@ -0,0 +1,185 @@
+"""
+Tests the cache of decompressed code archives
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.local.lambdafn.code_cache import CodeArchiveCache
+from samcli.local.lambdafn.zip import unzip
+
+
+class TestCodeArchiveCache(TestCase):
+    def setUp(self):
+        self.dir = os.path.realpath(tempfile.mkdtemp())
+        self.cache_dir = os.path.join(self.dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def make_archive(self, name, content):
+        path = os.path.join(self.dir, name)
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("index.py", content)
+        return path
+
+    def cached_dirs(self):
+        return sorted(name for name in os.listdir(self.cache_dir) if not name.startswith("."))
+
+    def test_must_extract_archive_once(self):
+        archive = self.make_archive("code.zip", "handler")
+        cache = CodeArchiveCache(self.cache_dir)
+
+        with patch("samcli.local.lambdafn.code_cache.unzip", wraps=unzip) as unzip_mock:
+            with cache.extract(archive) as first_dir:
+                with open(os.path.join(first_dir, "index.py")) as fp:
+                    self.assertEqual(fp.read(), "handler")
+
+            with cache.extract(archive) as second_dir:
+                pass
+
+        self.assertEqual(first_dir, second_dir)
+        self.assertTrue(first_dir.startswith(self.cache_dir))
+        self.assertEqual(unzip_mock.call_count, 1)
+
+    def test_must_share_archives_with_same_content(self):
+        first_archive = self.make_archive("first.zip", "handler")
+        second_archive = self.make_archive("second.zip", "handler")
+        other_archive = self.make_archive("other.zip", "other")
+        cache = CodeArchiveCache(self.cache_dir)
+
+        with cache.extract(first_archive) as first_dir, cache.extract(second_archive) as second_dir:
+            self.assertEqual(first_dir, second_dir)
+
+        with cache.extract(other_archive) as other_dir:
+            self.assertNotEqual(first_dir, other_dir)
+
+    def test_must_reuse_archives_extracted_by_earlier_runs(self):
+        archive = self.make_archive("code.zip", "handler")
+
+        with CodeArchiveCache(self.cache_dir).extract(archive) as first_dir:
+            pass
+
+        with patch("samcli.local.lambdafn.code_cache.unzip") as unzip_mock:
+            with CodeArchiveCache(self.cache_dir).extract(archive) as second_dir:
+                pass
+
+        self.assertEqual(first_dir, second_dir)
+        unzip_mock.assert_not_called()
+
+    def test_must_evict_least_recently_used_archives(self):
+        archives = [self.make_archive("code%d.zip" % index, str(index) * 100) for index in range(3)]
+        # Fits two decompressed archives
+        cache = CodeArchiveCache(self.cache_dir, max_size=250)
+
+        dirs = []
+        for archive in archives[:2]:
+            with cache.extract(archive) as code_dir:
+                dirs.append(code_dir)
+
+        # Use the first archive again, which makes the second one the least recently used
+        with cache.extract(archives[0]):
+            pass
+
+        with cache.extract(archives[2]) as code_dir:
+            dirs.append(code_dir)
+
+        self.assertTrue(os.path.isdir(dirs[0]))
+        self.assertFalse(os.path.isdir(dirs[1]))
+        self.assertTrue(os.path.isdir(dirs[2]))
+        self.assertEqual(len(self.cached_dirs()), 2)
+
+    def test_must_not_evict_archives_in_use(self):
+        first_archive = self.make_archive("first.zip", "1" * 100)
+        second_archive = self.make_archive("second.zip", "2" * 100)
+        cache = CodeArchiveCache(self.cache_dir, max_size=0)
+
+        with cache.extract(first_archive) as first_dir:
+            with cache.extract(second_archive) as second_dir:
+                self.assertTrue(os.path.isdir(first_dir))
+                self.assertTrue(os.path.isdir(second_dir))
+
+            self.assertTrue(os.path.isdir(first_dir))
+            self.assertFalse(os.path.isdir(second_dir))
+
+        self.assertEqual(self.cached_dirs(), [])
+
+    @patch("samcli.local.lambdafn.code_cache.Container")
+    def test_must_not_evict_archives_mounted_by_containers(self, ContainerMock):
+        archive = self.make_archive("code.zip", "1" * 100)
+        cache = CodeArchiveCache(self.cache_dir, max_size=0)
+        ContainerMock.is_mounted.return_value = True
+
+        with cache.extract(archive) as code_dir:
+            pass
+
+        ContainerMock.is_mounted.assert_called_with(code_dir)
+        self.assertTrue(os.path.isdir(code_dir))
+
+    def test_must_extract_once_for_concurrent_invokes(self):
+        archive = self.make_archive("code.zip", "handler")
+        cache = CodeArchiveCache(self.cache_dir)
+        extracting = threading.Event()
+        resume = threading.Event()
+        results = []
+
+        def slow_unzip(*args):
+            extracting.set()
+            resume.wait(5)
+            unzip(*args)
+
+        def invoke():
+            with cache.extract(archive) as code_dir:
+                results.append(os.path.isfile(os.path.join(code_dir, "index.py")))
+
+        with patch("samcli.local.lambdafn.code_cache.unzip", side_effect=slow_unzip) as unzip_mock:
+            threads = [threading.Thread(target=invoke) for _ in range(3)]
+            threads[0].start()
+            self.assertTrue(extracting.wait(5))
+            for thread in threads[1:]:
+                thread.start()
+
+            resume.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(unzip_mock.call_count, 1)
+
+    def test_must_retry_failed_extraction(self):
+        archive = self.make_archive("code.zip", "handler")
+        cache = CodeArchiveCache(self.cache_dir)
+
+        with patch("samcli.local.lambdafn.code_cache.unzip", side_effect=IOError("disk full")):
+            with self.assertRaises(IOError):
+                with cache.extract(archive):
+                    pass
+
+        self.assertEqual(self.cached_dirs(), [])
+
+        with cache.extract(archive) as code_dir:
+            self.assertTrue(os.path.isfile(os.path.join(code_dir, "index.py")))
+
+    @patch("samcli.local.lambdafn.code_cache.hashlib")
+    def test_must_hash_unchanged_archive_once(self, hashlib_mock):
+        hashlib_mock.sha256.return_value.hexdigest.return_value = "digest"
+        archive = self.make_archive("code.zip", "handler")
+        cache = CodeArchiveCache(self.cache_dir)
+
+        for _ in range(2):
+            with cache.extract(archive):
+                pass
+
+        hashlib_mock.sha256.assert_called_once_with()
+
+
+class TestCodeArchiveCache_max_size(TestCase):
+    def test_must_read_max_size_from_env(self):
+        with patch.dict(os.environ, {"SAM_CLI_CODE_CACHE_MAX_SIZE_MB": "10"}):
+            self.assertEqual(CodeArchiveCache("cache_dir")._max_size, 10 * 1024 * 1024)
@@ -312,13 +312,3 @@ class TestEnvironmentVariables_stringify_value(TestCase):
     def test_must_stringify(self, input, expected):
         self.assertEquals(expected, self.environ._stringify_value(input))
 
-
-class TestEnvironmentVariables_add_lambda_event_body(TestCase):
-    def test_must_add_proper_variable(self):
-
-        value = "foobar"
-
-        environ = EnvironmentVariables()
-        environ.add_lambda_event_body(value)
-
-        self.assertEquals(environ.variables.get("AWS_LAMBDA_EVENT_BODY"), value)
@@ -6,6 +6,8 @@ from unittest import TestCase
 from mock import Mock, patch, MagicMock, ANY
 from parameterized import parameterized
 
+from docker.errors import ImageNotFound
+
 from samcli.local.lambdafn.runtime import LambdaRuntime, _unzip_file
 from samcli.local.lambdafn.config import FunctionConfig
 
@@ -18,6 +20,8 @@ class LambdaRuntime_invoke(TestCase):
     def setUp(self):
 
         self.manager_mock = Mock()
+        # The manager runs the given container, unless a test says otherwise
+        self.manager_mock.run.side_effect = lambda container, **kwargs: container
 
         self.name = "name"
         self.lang = "runtime"
@@ -56,8 +60,8 @@ class LambdaRuntime_invoke(TestCase):
 
         self.runtime.invoke(self.func_config, event, debug_context=debug_options, stdout=stdout, stderr=stderr)
 
-        # Verify if Lambda Event data is set
-        self.env_vars.add_lambda_event_body.assert_called_with(event)
+        # Event must not be part of the environment
+        self.env_vars.add_lambda_event_body.assert_not_called()
 
         # Make sure env-vars get resolved
         self.env_vars.resolve.assert_called_with()
@@ -78,7 +82,7 @@ class LambdaRuntime_invoke(TestCase):
         )
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=event, standby=True)
         self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, container, True)
         container.wait_for_logs.assert_called_with(stdout=stdout, stderr=stderr)
 
@@ -86,6 +90,35 @@ class LambdaRuntime_invoke(TestCase):
         timer.cancel.assert_called_with()
         self.manager_mock.stop.assert_called_with(container)
 
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_write_timings_of_invoke(self, LambdaContainerMock):
+        timings_writer = Mock()
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), timings_writer=timings_writer)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event", debug_context=Mock(), stdout="stdout", stderr="stderr")
+
+        timings_writer.write.assert_called_once()
+        record = timings_writer.write.call_args[0][0].to_dict()
+        self.assertEqual(record["name"], self.name)
+        self.assertEqual(list(record["phases_ms"]), ["run", "delete"])
+        self.assertIn("docker_api_calls", record)
+
+    @parameterized.expand([(True,), (False,)])
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_record_whether_invoke_timed_out(self, timed_out, LambdaContainerMock):
+        timings_writer = Mock()
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), timings_writer=timings_writer)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+        self.runtime._configure_interrupt.return_value.timed_out = timed_out
+
+        self.runtime.invoke(self.func_config, "event")
+
+        record = timings_writer.write.call_args[0][0].to_dict()
+        self.assertEqual(record["timed_out"], timed_out)
+
     @patch("samcli.local.lambdafn.runtime.LambdaContainer")
     def test_exception_from_run_must_trigger_cleanup(self, LambdaContainerMock):
         event = "event"
@@ -112,7 +145,7 @@ class LambdaRuntime_invoke(TestCase):
             self.runtime.invoke(self.func_config, event, debug_context=None, stdout=stdout, stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=event, standby=True)
 
         self.runtime._configure_interrupt.assert_not_called()
 
@@ -122,6 +155,25 @@ class LambdaRuntime_invoke(TestCase):
         # In any case, stop the container
         self.manager_mock.stop.assert_called_with(container)
 
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_build_deleted_image_again(self, LambdaContainerMock):
+        image_mock = Mock()
+        old_container = Mock(image="samcli/lambda:old")
+        new_container = Mock()
+        LambdaContainerMock.side_effect = [old_container, new_container]
+        self.manager_mock.run.side_effect = [ImageNotFound("image not found"), new_container]
+
+        self.runtime = LambdaRuntime(self.manager_mock, image_mock)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event")
+
+        image_mock.invalidate.assert_called_once_with("samcli/lambda:old")
+        self.manager_mock.run.assert_called_with(new_container, input_data="event", standby=True)
+        new_container.wait_for_logs.assert_called_once()
+        self.manager_mock.stop.assert_called_with(new_container)
+
     @patch("samcli.local.lambdafn.runtime.LambdaContainer")
     def test_exception_from_wait_for_logs_must_trigger_cleanup(self, LambdaContainerMock):
         event = "event"
@@ -149,7 +201,7 @@ class LambdaRuntime_invoke(TestCase):
             self.runtime.invoke(self.func_config, event, debug_context=debug_options, stdout=stdout, stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=event, standby=True)
 
         self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, container, True)
 
@@ -182,13 +234,204 @@ class LambdaRuntime_invoke(TestCase):
         self.runtime.invoke(self.func_config, event, stdout=stdout, stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=event, standby=True)
 
         self.runtime._configure_interrupt.assert_not_called()
 
         # Finally block must be called
         self.manager_mock.stop.assert_called_with(container)
 
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_wait_for_container_returned_by_manager(self, LambdaContainerMock):
+        self.runtime = LambdaRuntime(self.manager_mock, Mock())
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+        standby_container = Mock()
+        self.manager_mock.run.side_effect = None
+        self.manager_mock.run.return_value = standby_container
+
+        self.runtime.invoke(self.func_config, "event", stdout="stdout", stderr="stderr")
+
+        self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, standby_container, False)
+        standby_container.wait_for_logs.assert_called_with(stdout="stdout", stderr="stderr")
+        self.manager_mock.stop.assert_called_with(standby_container)
+
+
+class TestLambdaRuntime_invoke_warm(TestCase):
+
+    DEFAULT_MEMORY = 128
+    DEFAULT_TIMEOUT = 3
+
+    def setUp(self):
+        self.manager_mock = Mock()
+        self.image_mock = Mock()
+
+        self.name = "name"
+        self.lang = "runtime"
+        self.handler = "handler"
+        self.code_path = "code-path"
+        self.layers = []
+        self.func_config = FunctionConfig(self.name, self.lang, self.handler, self.code_path, self.layers)
+
+        self.env_vars = Mock()
+        self.func_config.env_vars = self.env_vars
+        self.env_var_value = {"a": "b"}
+        self.env_vars.resolve.return_value = self.env_var_value
+
+        self.runtime = LambdaRuntime(self.manager_mock, self.image_mock, warm_containers=True)
+        self.runtime._configure_interrupt = Mock()
+        self.timer = self.runtime._configure_interrupt.return_value
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_invoke_in_warm_container_and_release_it(self, LambdaContainerMock):
+        container = Mock()
+        warm_container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.run.return_value = warm_container
+        warm_container.invoke.return_value = True
+        warm_container.is_created.return_value = True
+
+        self.runtime.invoke(self.func_config, "event", stdout="stdout", stderr="stderr")
+
+        # Event must not be part of the container configuration
+        self.env_vars.add_lambda_event_body.assert_not_called()
+        LambdaContainerMock.assert_called_with(
+            self.lang,
+            self.handler,
+            self.code_path,
+            self.layers,
+            self.image_mock,
+            memory_mb=self.DEFAULT_MEMORY,
+            env_vars=self.env_var_value,
+            stay_open=True,
+        )
+
+        self.manager_mock.run.assert_called_with(container, warm=True)
+        self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, warm_container, False)
+        warm_container.invoke.assert_called_with(
+            "event", stdout="stdout", stderr="stderr", timeout=self.DEFAULT_TIMEOUT
+        )
+        self.timer.cancel.assert_called_with()
+        self.manager_mock.release.assert_called_with(warm_container)
+        self.manager_mock.stop.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stop_container_if_invoke_failed(self, LambdaContainerMock):
+        container = Mock()
+        self.manager_mock.run.return_value = container
+        container.invoke.return_value = False
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.release.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_release_container_that_timed_out(self, LambdaContainerMock):
+        container = Mock()
+        self.manager_mock.run.return_value = container
+        container.invoke.return_value = True
+        # Timer stopped the container while the function was running
+        container.is_created.return_value = False
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.release.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stop_container_if_run_fails(self, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.run.side_effect = ValueError("some exception")
+
+        with self.assertRaises(ValueError):
+            self.runtime.invoke(self.func_config, "event")
+
+        self.runtime._configure_interrupt.assert_not_called()
+        self.manager_mock.stop.assert_called_with(container)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_use_warm_container_when_debugging(self, LambdaContainerMock):
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._invoke_warm = Mock()
+
+        self.runtime.invoke(self.func_config, "event", debug_context=Mock())
+
+        self.runtime._invoke_warm.assert_not_called()
+        self.manager_mock.run.assert_called_with(LambdaContainerMock.return_value, input_data="event", standby=True)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_use_warm_container_for_archives_without_code_cache(self, LambdaContainerMock):
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._invoke_warm = Mock()
+        self.runtime._is_archive = Mock(return_value=True)
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.runtime._invoke_warm.assert_not_called()
+        # Every invoke decompresses the archive into a new directory. No other container has the same configuration.
+        self.manager_mock.run.assert_called_with(LambdaContainerMock.return_value, input_data="event", standby=False)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_use_warm_container_with_cached_code_for_archives(self, LambdaContainerMock):
+        code_cache = Mock()
+        code_cache.extract.return_value = MagicMock()
+        code_cache.extract.return_value.__enter__.return_value = "cached-dir"
+        self.runtime = LambdaRuntime(self.manager_mock, self.image_mock, warm_containers=True, code_cache=code_cache)
+        self.runtime._configure_interrupt = Mock()
+        self.runtime._is_archive = Mock(return_value=True)
+        container = LambdaContainerMock.return_value
+        self.manager_mock.run.return_value = container
+
+        self.runtime.invoke(self.func_config, "event")
+
+        code_cache.extract.assert_called_with(self.code_path)
+        self.assertEqual(LambdaContainerMock.call_args[0][2], "cached-dir")
+        self.assertTrue(LambdaContainerMock.call_args[1]["stay_open"])
+        self.manager_mock.run.assert_called_with(container, warm=True)
+        self.manager_mock.release.assert_called_with(container)
+
+class TestLambdaRuntime_prewarm(TestCase):
+    def setUp(self):
+        self.manager_mock = Mock()
+        self.func_config = FunctionConfig("name", "runtime", "handler", "code-path", [])
+        self.func_config.env_vars = Mock()
+        self.func_config.env_vars.resolve.return_value = {"a": "b"}
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_start_container_and_release_it(self, LambdaContainerMock):
+        container = LambdaContainerMock.return_value
+
+        self.runtime.prewarm(self.func_config)
+
+        self.assertTrue(LambdaContainerMock.call_args[1]["stay_open"])
+        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.release.assert_called_with(container)
+        self.manager_mock.stop.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stop_container_if_it_fails_to_start(self, LambdaContainerMock):
+        container = LambdaContainerMock.return_value
+        self.manager_mock.run.side_effect = ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            self.runtime.prewarm(self.func_config)
+
+        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.release.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_skip_functions_that_cannot_be_warm(self, LambdaContainerMock):
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=False)
+
+        self.runtime.prewarm(self.func_config)
+
+        LambdaContainerMock.assert_not_called()
+        self.manager_mock.run.assert_not_called()
+
 
 class TestLambdaRuntime_configure_interrupt(TestCase):
     def setUp(self):
@@ -198,27 +441,23 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
 
         self.manager_mock = Mock()
         self.layer_downloader = Mock()
-        self.runtime = LambdaRuntime(self.manager_mock, self.layer_downloader)
+        self.scheduler_mock = Mock()
+        self.runtime = LambdaRuntime(self.manager_mock, self.layer_downloader, timeout_scheduler=self.scheduler_mock)
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_must_setup_timer(self, SignalMock, ThreadingMock):
+    def test_must_setup_timer(self, SignalMock):
         is_debugging = False  # We are not debugging. So setup timer
-        timer_obj = Mock()
-        ThreadingMock.Timer.return_value = timer_obj
 
         result = self.runtime._configure_interrupt(self.name, self.timeout, self.container, is_debugging)
 
-        self.assertEquals(result, timer_obj)
+        self.assertEquals(result, self.scheduler_mock.schedule.return_value)
 
-        ThreadingMock.Timer.assert_called_with(self.timeout, ANY, ())
-        timer_obj.start.assert_called_with()
+        self.scheduler_mock.schedule.assert_called_with(self.timeout, ANY, name=self.name)
 
         SignalMock.signal.assert_not_called()  # must not setup signal handler
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_must_setup_signal_handler(self, SignalMock, ThreadingMock):
+    def test_must_setup_signal_handler(self, SignalMock):
         is_debugging = True  # We are debugging. So setup signal
         SignalMock.SIGTERM = sigterm = "sigterm"
 
@@ -227,11 +466,10 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
         self.assertIsNone(result, "There are no return values when setting up signal handler")
 
         SignalMock.signal.assert_called_with(sigterm, ANY)
-        ThreadingMock.Timer.signal.assert_not_called()  # must not setup timer
+        self.scheduler_mock.schedule.assert_not_called()  # must not setup timer
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_verify_signal_handler(self, SignalMock, ThreadingMock):
+    def test_verify_signal_handler(self, SignalMock):
         """
         Verify the internal implementation of the Signal Handler
         """
@@ -246,26 +484,31 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
         # This method should be called from within the Signal Handler
         self.manager_mock.stop.assert_called_with(self.container)
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_verify_timer_handler(self, SignalMock, ThreadingMock):
+    def test_verify_timer_handler(self, SignalMock):
         """
-        Verify the internal implementation of the Signal Handler
+        Verify the internal implementation of the Timer Handler
         """
         is_debugging = False
 
-        def fake_timer(timeout, handler, args):
+        def fake_schedule(timeout, handler, name):
             handler()
             return Mock()
 
         # Fake the real method with a Lambda. Also run the handler immediately.
-        ThreadingMock.Timer = fake_timer
+        self.scheduler_mock.schedule = fake_schedule
 
         self.runtime._configure_interrupt(self.name, self.timeout, self.container, is_debugging)
 
         # This method should be called from within the Timer Handler
         self.manager_mock.stop.assert_called_with(self.container)
 
+    @patch("samcli.local.lambdafn.runtime.get_timeout_scheduler")
+    def test_must_use_shared_scheduler_by_default(self, get_timeout_scheduler_mock):
+        runtime = LambdaRuntime(self.manager_mock, self.layer_downloader)
+
+        self.assertEqual(runtime._timeout_scheduler, get_timeout_scheduler_mock.return_value)
+
 
 class TestLambdaRuntime_get_code_dir(TestCase):
     def setUp(self):
@@ -293,6 +536,28 @@ class TestLambdaRuntime_get_code_dir(TestCase):
         # Finally block must call this after the context manager exists
         shutil_mock.rmtree.assert_called_with(decompressed_dir)
 
+    @patch("samcli.local.lambdafn.runtime.os")
+    @patch("samcli.local.lambdafn.runtime.shutil")
+    @patch("samcli.local.lambdafn.runtime._unzip_file")
+    def test_must_use_code_cache_for_archives(self, unzip_file_mock, shutil_mock, os_mock):
+        code_path = "foo.zip"
+        code_cache = Mock()
+        code_cache.extract.return_value = MagicMock()
+        code_cache.extract.return_value.__enter__.return_value = "cached-dir"
+        os_mock.path.isfile.return_value = True
+
+        self.runtime = LambdaRuntime(self.manager_mock, self.layer_downloader, code_cache=code_cache)
+
+        with self.runtime._get_code_dir(code_path) as result:
+            self.assertEquals(result, "cached-dir")
+            code_cache.extract.return_value.__exit__.assert_not_called()
+
+        code_cache.extract.assert_called_with(code_path)
+        code_cache.extract.return_value.__exit__.assert_called_once()
+        unzip_file_mock.assert_not_called()
+        # The cache decides when to delete the directory
+        shutil_mock.rmtree.assert_not_called()
+
     @patch("samcli.local.lambdafn.runtime.os")
     @patch("samcli.local.lambdafn.runtime.shutil")
     @patch("samcli.local.lambdafn.runtime._unzip_file")
@@ -0,0 +1,84 @@
+"""
+Tests the scheduler of function timeouts
+"""
+
+import threading
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from samcli.local.lambdafn import timeout_scheduler
+from samcli.local.lambdafn.timeout_scheduler import TimeoutScheduler, get_timeout_scheduler
+
+
+class TestTimeoutScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = TimeoutScheduler()
+
+    def test_must_run_callbacks_in_order_of_deadlines(self):
+        calls = []
+        done = threading.Event()
+
+        self.scheduler.schedule(0.2, lambda: (calls.append("late"), done.set()), name="late")
+        self.scheduler.schedule(0.05, lambda: calls.append("early"), name="early")
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, ["early", "late"])
+
+    def test_must_not_run_cancelled_callback(self):
+        callback = Mock()
+        done = threading.Event()
+
+        scheduled = self.scheduler.schedule(0.05, callback, name="cancelled")
+        scheduled.cancel()
+        self.scheduler.schedule(0.1, done.set, name="other")
+
+        self.assertTrue(done.wait(5))
+        callback.assert_not_called()
+        self.assertFalse(scheduled.timed_out)
+
+    def test_must_use_one_thread_for_all_timeouts(self):
+        with patch("samcli.local.lambdafn.timeout_scheduler.threading.Thread") as thread_mock:
+            self.scheduler.schedule(10, Mock())
+            self.scheduler.schedule(20, Mock())
+
+        thread_mock.assert_called_once()
+        self.assertEqual(len(self.scheduler), 2)
+
+    def test_must_keep_running_if_callback_fails(self):
+        done = threading.Event()
+
+        self.scheduler.schedule(0.01, Mock(side_effect=ValueError("failed")))
+        self.scheduler.schedule(0.05, done.set)
+
+        self.assertTrue(done.wait(5))
+
+
+class TestScheduledTimeout(TestCase):
+    def test_must_not_cancel_after_expiring(self):
+        scheduled = timeout_scheduler.ScheduledTimeout(Mock(), "name")
+
+        self.assertTrue(scheduled.expire())
+        scheduled.cancel()
+
+        self.assertTrue(scheduled.timed_out)
+        self.assertFalse(scheduled.is_cancelled)
+
+    def test_must_not_expire_after_cancelling(self):
+        scheduled = timeout_scheduler.ScheduledTimeout(Mock(), "name")
+
+        scheduled.cancel()
+
+        self.assertFalse(scheduled.expire())
+        self.assertFalse(scheduled.timed_out)
+
+
+class TestGetTimeoutScheduler(TestCase):
+    def setUp(self):
+        timeout_scheduler._scheduler = None
+
+    def tearDown(self):
+        timeout_scheduler._scheduler = None
+
+    def test_must_share_scheduler(self):
+        self.assertIs(get_timeout_scheduler(), get_timeout_scheduler())
@@ -1,3 +1,4 @@
+import io
 import os
 import platform
 import shutil
@@ -8,10 +9,18 @@ from tempfile import NamedTemporaryFile, mkdtemp
 from unittest import TestCase
 from unittest import skipIf
 
-from mock import Mock, patch
+from mock import Mock, call, patch
 from nose_parameterized import parameterized, param
 
-from samcli.local.lambdafn.zip import unzip, unzip_from_uri, _override_permissions
+from samcli.local.lambdafn.exceptions import ArchiveChecksumMismatch
+from samcli.local.lambdafn.zip import (
+    unzip,
+    unzip_from_uri,
+    _override_permissions,
+    _parse_content_range,
+    _TailFile,
+    _MissingBytes,
+)
 
 # On Windows, permissions do not match 1:1 with permissions on Unix systems.
 SKIP_UNZIP_PERMISSION_TESTS = platform.system() == "Windows"
@@ -48,6 +57,28 @@ class TestUnzipWithPermissions(TestCase):
                                 expected_permission, perm, "File {} has wrong permission {}".format(key, perm)
                             )
 
+    @parameterized.expand([param(1), param(4)])
+    @patch("samcli.local.lambdafn.zip.PARALLEL_UNZIP_MIN_FILES", 2)
+    def test_must_unzip_with_workers(self, workers):
+        files_with_permissions = {"folder{}/{}.txt".format(index % 3, index): 0o640 for index in range(20)}
+        # Directory that does not allow writing to it
+        files_with_permissions["folder0/"] = 0o555
+
+        with self._create_zip(files_with_permissions) as zip_file_name:
+            with self._temp_dir() as extract_dir:
+
+                unzip(zip_file_name, extract_dir, workers=workers)
+
+                for name, permission in files_with_permissions.items():
+                    path = os.path.join(extract_dir, name)
+                    self.assertEquals(oct(stat.S_IMODE(os.stat(path).st_mode)), oct(permission))
+                    if not name.endswith("/"):
+                        with open(path, "rb") as fp:
+                            self.assertEquals(fp.read(), b"hello world")
+
+                # Allow the directory to be deleted
+                os.chmod(os.path.join(extract_dir, "folder0"), 0o755)
+
     @contextmanager
     def _create_zip(self, files_with_permissions, add_permissions=True):
 
@@ -113,7 +144,9 @@ class TestUnzipFromUri(TestCase):
 
         unzip_from_uri("uri", "layer_zip_path", "output_zip_dir", "layer_arn")
 
-        requests_patch.get.assert_called_with("uri", stream=True, verify=True)
+        requests_patch.get.assert_called_with(
+            "uri", stream=True, verify=True, headers={"Range": "bytes=-65557"}
+        )
         get_request_mock.iter_content.assert_called_with(chunk_size=None)
         open_patch.assert_called_with("layer_zip_path", "wb")
         file_mock.write.assert_called_with(b"data1")
@@ -151,7 +184,9 @@ class TestUnzipFromUri(TestCase):
 
         unzip_from_uri("uri", "layer_zip_path", "output_zip_dir", "layer_arn")
 
-        requests_patch.get.assert_called_with("uri", stream=True, verify=True)
+        requests_patch.get.assert_called_with(
+            "uri", stream=True, verify=True, headers={"Range": "bytes=-65557"}
+        )
         get_request_mock.iter_content.assert_called_with(chunk_size=None)
         open_patch.assert_called_with("layer_zip_path", "wb")
         file_mock.write.assert_called_with(b"data1")
@@ -189,7 +224,9 @@ class TestUnzipFromUri(TestCase):
 
         unzip_from_uri("uri", "layer_zip_path", "output_zip_dir", "layer_arn")
 
-        requests_patch.get.assert_called_with("uri", stream=True, verify="/some/path/on/the/system")
+        requests_patch.get.assert_called_with(
+            "uri", stream=True, verify="/some/path/on/the/system", headers={"Range": "bytes=-65557"}
+        )
         get_request_mock.iter_content.assert_called_with(chunk_size=None)
         open_patch.assert_called_with("layer_zip_path", "wb")
         file_mock.write.assert_called_with(b"data1")
@@ -200,6 +237,97 @@ class TestUnzipFromUri(TestCase):
         os_patch.environ.get.assert_called_with("AWS_CA_BUNDLE", True)
 
 
+    @patch("samcli.local.lambdafn.zip.unzip")
+    @patch("samcli.local.lambdafn.zip.Path")
+    @patch("samcli.local.lambdafn.zip.progressbar")
+    @patch("samcli.local.lambdafn.zip.requests")
+    @patch("samcli.local.lambdafn.zip.open")
+    @patch("samcli.local.lambdafn.zip.os")
+    def test_unzip_from_uri_without_progressbar(
+        self, os_patch, open_patch, requests_patch, progressbar_patch, path_patch, unzip_patch
+    ):
+        get_request_mock = Mock()
+        get_request_mock.headers = {"Content-length": "200"}
+        get_request_mock.iter_content.return_value = [b"data1", b"data2"]
+        requests_patch.get.return_value = get_request_mock
+
+        file_mock = Mock()
+        open_patch.return_value.__enter__.return_value = file_mock
+
+        os_patch.environ.get.return_value = True
+
+        unzip_from_uri("uri", "layer_zip_path", "output_zip_dir", "layer_arn", show_progressbar=False)
+
+        progressbar_patch.assert_not_called()
+        file_mock.write.assert_has_calls([call(b"data1"), call(b"data2")])
+        unzip_patch.assert_called_with("layer_zip_path", "output_zip_dir", permission=0o700)
+
+    @patch("samcli.local.lambdafn.zip.unzip")
+    @patch("samcli.local.lambdafn.zip.Path")
+    @patch("samcli.local.lambdafn.zip.progressbar")
+    @patch("samcli.local.lambdafn.zip.requests")
+    @patch("samcli.local.lambdafn.zip.open")
+    @patch("samcli.local.lambdafn.zip.os")
+    def test_unzip_from_uri_verifies_sha256(
+        self, os_patch, open_patch, requests_patch, progressbar_patch, path_patch, unzip_patch
+    ):
+        get_request_mock = Mock()
+        get_request_mock.headers = {"Content-length": "200"}
+        get_request_mock.iter_content.return_value = [b"data1"]
+        requests_patch.get.return_value = get_request_mock
+
+        path_mock = Mock()
+        path_mock.exists.return_value = True
+        path_patch.return_value = path_mock
+
+        # Base64 encoded SHA256 of b"data1"
+        sha256 = "W0E2K8grfz1W7cWjBtsiEFcH0B/0gZ4m+u+XJKLUBsk="
+
+        unzip_from_uri("uri", "layer_zip_path", "output_zip_dir", "layer_arn", expected_sha256=sha256)
+        unzip_patch.assert_called_once()
+
+        unzip_patch.reset_mock()
+        with self.assertRaises(ArchiveChecksumMismatch):
+            unzip_from_uri("uri?signature", "layer_zip_path", "output_zip_dir", "layer_arn", expected_sha256="other")
+
+        unzip_patch.assert_not_called()
+        path_mock.unlink.assert_called()
+
+class TestParseContentRange(TestCase):
+    @parameterized.expand(
+        [
+            param({"Content-Range": "bytes 100-199/1000"}, (100, 1000)),
+            param({"Content-Range": "items 100-199/1000"}, None),
+            param({"Content-Range": "bytes */1000"}, None),
+            param({}, None),
+        ]
+    )
+    def test_parse_content_range(self, headers, expected):
+        response = Mock()
+        response.headers = headers
+
+        self.assertEqual(_parse_content_range(response), expected)
+
+
+class TestTailFile(TestCase):
+    def test_must_read_tail(self):
+        tail_file = _TailFile(10, b"6789")
+
+        tail_file.seek(-3, io.SEEK_END)
+        self.assertEqual(tail_file.read(2), b"78")
+        self.assertEqual(tail_file.tell(), 9)
+        self.assertEqual(tail_file.read(), b"9")
+        self.assertEqual(tail_file.read(), b"")
+
+    def test_must_raise_missing_bytes_before_tail(self):
+        tail_file = _TailFile(10, b"6789")
+
+        tail_file.seek(4)
+        with self.assertRaises(_MissingBytes) as ctx:
+            tail_file.read(4)
+
+        self.assertEqual(ctx.exception.position, 4)
+
 class TestOverridePermissions(TestCase):
     @patch("samcli.local.lambdafn.zip.os")
     def test_must_override_permissions(self, os_patch):
@@ -1,5 +1,10 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
 from unittest import TestCase
-from mock import patch, Mock, call
+from mock import patch, Mock, MagicMock, call
 
 from botocore.exceptions import NoCredentialsError, ClientError
 
@@ -9,8 +14,13 @@ except ImportError:
     from pathlib2 import Path
 
 
-from samcli.local.layers.layer_downloader import LayerDownloader
-from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound
+from samcli.local.layers.layer_downloader import LayerDownloader, _make_readable
+from samcli.local.lambdafn.exceptions import ArchiveChecksumMismatch
+from samcli.commands.local.cli_common.user_exceptions import (
+    CredentialsRequired,
+    ResourceNotFound,
+    CorruptedLayerDownload,
+)
 
 
 class TestDownloadLayers(TestCase):
@@ -23,29 +33,66 @@ class TestDownloadLayers(TestCase):
         self.assertEquals(download_layers.layer_cache, "/some/path")
         create_cache_patch.assert_called_with("/some/path")
 
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._clean_cache")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
-    def test_download_all_without_force(self, download_patch):
+    def test_download_all_without_force(self, download_patch, clean_cache_patch):
         download_patch.side_effect = ["/home/layer1", "/home/layer2"]
+        layers = [Mock(is_defined_within_template=True), Mock(is_defined_within_template=False)]
 
         download_layers = LayerDownloader("/home", ".")
 
-        acutal_results = download_layers.download_all(["layer1", "layer2"])
+        acutal_results = download_layers.download_all(layers)
 
         self.assertEquals(acutal_results, ["/home/layer1", "/home/layer2"])
 
-        download_patch.assert_has_calls([call("layer1", False), call("layer2", False)])
+        download_patch.assert_has_calls([call(layers[0], False), call(layers[1], False)])
+        clean_cache_patch.assert_called_once_with(keep=[layers[1].name])
 
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._clean_cache")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
-    def test_download_all_with_force(self, download_patch):
+    def test_download_all_with_force(self, download_patch, clean_cache_patch):
         download_patch.side_effect = ["/home/layer1", "/home/layer2"]
+        layers = [Mock(is_defined_within_template=True), Mock(is_defined_within_template=False)]
 
         download_layers = LayerDownloader("/home", ".")
 
-        acutal_results = download_layers.download_all(["layer1", "layer2"], force=True)
+        acutal_results = download_layers.download_all(layers, force=True)
 
         self.assertEquals(acutal_results, ["/home/layer1", "/home/layer2"])
 
-        download_patch.assert_has_calls([call("layer1", True), call("layer2", True)])
+        download_patch.assert_has_calls([call(layers[0], True), call(layers[1], True)])
+
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._clean_cache")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
+    def test_download_all_in_parallel(self, download_patch, clean_cache_patch):
+        layers = [Mock(is_defined_within_template=False) for _ in range(3)]
+        started = threading.Barrier(3) if hasattr(threading, "Barrier") else None
+
+        def download(layer, force, show_progressbar):
+            if started:
+                # Fails unless all layers are downloaded at the same time
+                started.wait(5)
+            return layer.name
+
+        download_patch.side_effect = download
+
+        download_layers = LayerDownloader("/home", ".")
+
+        acutal_results = download_layers.download_all(layers)
+
+        self.assertEquals(acutal_results, [layer.name for layer in layers])
+        download_patch.assert_has_calls([call(layer, False, False) for layer in layers], any_order=True)
+
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._clean_cache")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
+    def test_download_all_raises_failed_download(self, download_patch, clean_cache_patch):
+        layers = [Mock(is_defined_within_template=False) for _ in range(2)]
+        download_patch.side_effect = [layers[0], CredentialsRequired("no credentials")]
+
+        download_layers = LayerDownloader("/home", ".")
+
+        with self.assertRaises(CredentialsRequired):
+            download_layers.download_all(layers)
 
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._create_cache")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._is_layer_cached")
@@ -85,15 +132,23 @@ class TestDownloadLayers(TestCase):
         resolve_code_path_patch.assert_called_once_with(".", "/some/custom/path")
 
     @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
-    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_uri")
-    @patch("samcli.local.layers.layer_downloader.LayerDownloader._create_cache")
-    @patch("samcli.local.layers.layer_downloader.LayerDownloader._is_layer_cached")
-    def test_download_layer(
-        self, is_layer_cached_patch, create_cache_patch, fetch_layer_uri_patch, unzip_from_uri_patch
-    ):
-        is_layer_cached_patch.return_value = False
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    def test_download_layer(self, fetch_layer_content_patch, unzip_from_uri_patch):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        layer_path = str(Path(layer_cache).joinpath("layer1").resolve())
 
-        download_layers = LayerDownloader("/home", ".")
+        def unzip_from_uri(uri, layer_zip_path, unzip_output_dir, progressbar_label, show_progressbar, expected_sha256):
+            # The layer is unzipped next to the cached layers, and moved into place when it is complete
+            self.assertEquals(os.path.dirname(unzip_output_dir), os.path.dirname(layer_path))
+            self.assertFalse(os.path.exists(layer_path))
+            with open(os.path.join(unzip_output_dir, "layer.py"), "w") as fp:
+                fp.write("content")
+            os.chmod(os.path.join(unzip_output_dir, "layer.py"), 0o700)
+
+        unzip_from_uri_patch.side_effect = unzip_from_uri
+
+        download_layers = LayerDownloader(layer_cache, ".")
 
         layer_mock = Mock()
         layer_mock.is_defined_within_template = False
@@ -101,28 +156,141 @@ class TestDownloadLayers(TestCase):
         layer_mock.arn = "arn:layer:layer1:1"
         layer_mock.layer_arn = "arn:layer:layer1"
 
-        fetch_layer_uri_patch.return_value = "layer/uri"
+        fetch_layer_content_patch.return_value = {"Location": "layer/uri", "CodeSha256": "sha256"}
 
         actual = download_layers.download(layer_mock)
 
-        self.assertEquals(actual.codeuri, str(Path("/home/layer1").resolve()))
+        self.assertEquals(actual.codeuri, layer_path)
+        self.assertTrue(os.path.isfile(os.path.join(layer_path, "layer.py")))
+        # The function in a container that mounts the layer runs as another user
+        self.assertEquals(stat.S_IMODE(os.stat(os.path.join(layer_path, "layer.py")).st_mode), 0o755)
+        self.assertEquals(stat.S_IMODE(os.stat(layer_path).st_mode), 0o755)
+        self.assertEquals(
+            sorted(os.listdir(layer_cache)), [".index.json", ".index.json.lock", "layer1", "layer1.lock"]
+        )
+        self.assertEquals(download_layers._index.get("layer1"), {"CodeSha256": "sha256", "Size": 7})
 
-        create_cache_patch.assert_called_once_with("/home")
-        fetch_layer_uri_patch.assert_called_once_with(layer_mock)
+        fetch_layer_content_patch.assert_called_once_with(layer_mock)
         unzip_from_uri_patch.assert_called_once_with(
             "layer/uri",
-            str(Path("/home/layer1.zip").resolve()),
-            unzip_output_dir=str(Path("/home/layer1").resolve()),
+            layer_path + ".zip",
+            unzip_output_dir=unzip_from_uri_patch.call_args[1]["unzip_output_dir"],
             progressbar_label="Downloading arn:layer:layer1",
+            show_progressbar=True,
+            expected_sha256="sha256",
         )
 
+    @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    def test_download_layer_replaces_incomplete_layer(self, fetch_layer_content_patch, unzip_from_uri_patch):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        # Left behind by a download that was interrupted, before the cache was indexed
+        os.makedirs(os.path.join(layer_cache, "layer1", "partial"))
+        fetch_layer_content_patch.return_value = {"Location": "layer/uri", "CodeSha256": "sha256"}
+
+        download_layers = LayerDownloader(layer_cache, ".")
+
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_mock.name = "layer1"
+
+        download_layers.download(layer_mock)
+
+        unzip_from_uri_patch.assert_called_once()
+        self.assertEquals(os.listdir(os.path.join(layer_cache, "layer1")), [])
+        self.assertIsNotNone(download_layers._index.get("layer1"))
+
+    @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    def test_download_layer_with_checksum_mismatch(self, fetch_layer_content_patch, unzip_from_uri_patch):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        fetch_layer_content_patch.return_value = {"Location": "layer/uri", "CodeSha256": "sha256"}
+        unzip_from_uri_patch.side_effect = ArchiveChecksumMismatch("SHA256 of layer/uri is other")
+
+        download_layers = LayerDownloader(layer_cache, ".")
+
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_mock.name = "layer1"
+        layer_mock.arn = "arn:layer:layer1:1"
+
+        with self.assertRaises(CorruptedLayerDownload):
+            download_layers.download(layer_mock)
+
+        self.assertIsNone(download_layers._index.get("layer1"))
+        self.assertEquals(os.listdir(layer_cache), ["layer1.lock"])
+
+    @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    def test_download_layer_keeps_cache_clean_on_failure(self, fetch_layer_content_patch, unzip_from_uri_patch):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        unzip_from_uri_patch.side_effect = IOError("connection reset")
+
+        download_layers = LayerDownloader(layer_cache, ".")
+
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_mock.name = "layer1"
+
+        with self.assertRaises(IOError):
+            download_layers.download(layer_mock)
+
+        self.assertEquals(os.listdir(layer_cache), ["layer1.lock"])
+
+    @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    @patch("samcli.local.layers.layer_downloader.FileLock")
+    def test_download_layer_that_was_cached_while_waiting_for_lock(
+        self, file_lock_patch, fetch_layer_content_patch, unzip_from_uri_patch
+    ):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        layer_path = os.path.join(layer_cache, "layer1")
+
+        def lock(path):
+            # Another process downloads the layer, while this one waits for the lock
+            os.mkdir(layer_path)
+            download_layers._index.add("layer1", "sha256", 0)
+            return MagicMock()
+
+        file_lock_patch.side_effect = lock
+
+        download_layers = LayerDownloader(layer_cache, ".")
+
+        layer_mock = Mock()
+        layer_mock.is_defined_within_template = False
+        layer_mock.name = "layer1"
+
+        download_layers.download(layer_mock)
+
+        file_lock_patch.assert_called_once_with(str(Path(layer_path).resolve()) + ".lock")
+        fetch_layer_content_patch.assert_not_called()
+        unzip_from_uri_patch.assert_not_called()
+
     def test_layer_is_cached(self):
         download_layers = LayerDownloader("/", ".")
+        download_layers._index = Mock()
+        download_layers._index.get.return_value = {"CodeSha256": "sha256", "Size": 7}
 
         layer_path = Mock()
         layer_path.exists.return_value = True
+        layer_path.name = "layer1"
 
         self.assertTrue(download_layers._is_layer_cached(layer_path))
+        download_layers._index.get.assert_called_once_with("layer1")
+
+    def test_layer_is_not_cached_without_index_record(self):
+        download_layers = LayerDownloader("/", ".")
+        download_layers._index = Mock()
+        download_layers._index.get.return_value = None
+
+        layer_path = Mock()
+        layer_path.exists.return_value = True
+
+        self.assertFalse(download_layers._is_layer_cached(layer_path))
 
     def test_layer_is_not_cached(self):
         download_layers = LayerDownloader("/", ".")
@@ -132,6 +300,47 @@ class TestDownloadLayers(TestCase):
 
         self.assertFalse(download_layers._is_layer_cached(layer_path))
 
+    @patch("samcli.local.layers.layer_downloader.FileLock")
+    def test_clean_cache(self, file_lock_patch):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        for name in ["evicted", ".orphan-abc"]:
+            os.mkdir(os.path.join(layer_cache, name))
+        with open(os.path.join(layer_cache, "orphan.zip"), "w"):
+            pass
+
+        download_layers = LayerDownloader(layer_cache, ".")
+        download_layers._index = Mock()
+        download_layers._index.get_evictable.return_value = ["evicted"]
+        download_layers._index.get_orphans.return_value = [
+            os.path.join(layer_cache, ".orphan-abc"),
+            os.path.join(layer_cache, "orphan.zip"),
+        ]
+
+        download_layers._clean_cache(keep=["layer1"])
+
+        self.assertEquals(os.listdir(layer_cache), [])
+        download_layers._index.get_evictable.assert_called_once_with(["layer1"])
+        download_layers._index.remove.assert_called_once_with("evicted")
+        file_lock_patch.assert_called_once_with(os.path.join(layer_cache, "evicted.lock"))
+
+    @patch("samcli.local.layers.layer_downloader.Container")
+    def test_clean_cache_keeps_mounted_layers(self, ContainerMock):
+        layer_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_cache)
+        for name in ["mounted", "unused"]:
+            os.mkdir(os.path.join(layer_cache, name))
+        ContainerMock.is_mounted.side_effect = lambda path: path == os.path.join(layer_cache, "mounted")
+
+        download_layers = LayerDownloader(layer_cache, ".")
+        download_layers._index = Mock()
+        download_layers._index.get_evictable.return_value = []
+        download_layers._index.get_orphans.return_value = []
+
+        download_layers._clean_cache(keep=["layer1"])
+
+        download_layers._index.get_evictable.assert_called_once_with(["layer1", "mounted"])
+
     @patch("samcli.local.layers.layer_downloader.Path")
     def test_create_cache(self, path_patch):
         cache_path_mock = Mock()
@@ -143,20 +352,22 @@ class TestDownloadLayers(TestCase):
         cache_path_mock.mkdir.assert_called_once_with(parents=True, exist_ok=True, mode=0o700)
 
 
-class TestLayerDownloader_fetch_layer_uri(TestCase):
-    def test_fetch_layer_uri_is_successful(self):
+class TestLayerDownloader_fetch_layer_content(TestCase):
+    def test_fetch_layer_content_is_successful(self):
         lambda_client_mock = Mock()
-        lambda_client_mock.get_layer_version.return_value = {"Content": {"Location": "some/uri"}}
+        lambda_client_mock.get_layer_version.return_value = {
+            "Content": {"Location": "some/uri", "CodeSha256": "sha256"}
+        }
         download_layers = LayerDownloader("/", ".", lambda_client_mock)
 
         layer = Mock()
         layer.layer_arn = "arn"
         layer.version = 1
-        actual_uri = download_layers._fetch_layer_uri(layer=layer)
+        actual_content = download_layers._fetch_layer_content(layer=layer)
 
-        self.assertEquals(actual_uri, "some/uri")
+        self.assertEquals(actual_content, {"Location": "some/uri", "CodeSha256": "sha256"})
 
-    def test_fetch_layer_uri_fails_with_no_creds(self):
+    def test_fetch_layer_content_fails_with_no_creds(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = NoCredentialsError()
         download_layers = LayerDownloader("/", ".", lambda_client_mock)
@@ -166,9 +377,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(CredentialsRequired):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_fails_with_AccessDeniedException(self):
+    def test_fetch_layer_content_fails_with_AccessDeniedException(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={"Error": {"Code": "AccessDeniedException"}}, operation_name="lambda"
@@ -180,9 +391,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(CredentialsRequired):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_fails_with_ResourceNotFoundException(self):
+    def test_fetch_layer_content_fails_with_ResourceNotFoundException(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={"Error": {"Code": "ResourceNotFoundException"}}, operation_name="lambda"
@@ -194,9 +405,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(ResourceNotFound):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_re_raises_client_error(self):
+    def test_fetch_layer_content_re_raises_client_error(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={"Error": {"Code": "Unknown"}}, operation_name="lambda"
@@ -208,4 +419,25 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(ClientError):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
+
+
+class TestMakeReadable(TestCase):
+    def test_must_let_every_user_read_tree(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        os.mkdir(os.path.join(path, "bin"))
+        for name in ["data", os.path.join("bin", "tool")]:
+            with open(os.path.join(path, name), "w"):
+                pass
+        os.symlink("data", os.path.join(path, "link"))
+        modes = {".": 0o700, "bin": 0o700, "data": 0o600, os.path.join("bin", "tool"): 0o700}
+        for name, mode in modes.items():
+            os.chmod(os.path.join(path, name), mode)
+
+        _make_readable(path)
+
+        self.assertEquals(
+            {name: stat.S_IMODE(os.stat(os.path.join(path, name)).st_mode) for name in modes},
+            {".": 0o755, "bin": 0o755, "data": 0o644, os.path.join("bin", "tool"): 0o755},
+        )
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from samcli.local.layers.layer_cache_index import LayerCacheIndex
+
+
+class TestLayerCacheIndex(TestCase):
+    def setUp(self):
+        self.layer_cache = tempfile.mkdtemp()
+        self.index = LayerCacheIndex(self.layer_cache, max_size=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.layer_cache)
+
+    def make_layer(self, name, size, mtime=None):
+        os.mkdir(os.path.join(self.layer_cache, name))
+        open(os.path.join(self.layer_cache, name + ".lock"), "w").close()
+        self.index.add(name, "sha-" + name, size)
+        if mtime is not None:
+            os.utime(os.path.join(self.layer_cache, name), (mtime, mtime))
+
+    def test_must_record_installed_layers(self):
+        self.make_layer("layer1", 10)
+
+        self.assertEqual(self.index.get("layer1"), {"CodeSha256": "sha-layer1", "Size": 10})
+        self.assertEqual(LayerCacheIndex(self.layer_cache).get("layer1"), {"CodeSha256": "sha-layer1", "Size": 10})
+
+        self.index.remove("layer1")
+
+        self.assertIsNone(self.index.get("layer1"))
+
+    def test_must_not_return_layers_without_directory(self):
+        self.index.add("layer1", "sha", 10)
+
+        self.assertIsNone(self.index.get("layer1"))
+
+    def test_must_ignore_corrupted_index(self):
+        self.make_layer("layer1", 10)
+        with open(os.path.join(self.layer_cache, ".index.json"), "w") as fp:
+            fp.write('{"layer1": ')
+
+        self.assertIsNone(self.index.get("layer1"))
+
+        self.index.add("layer1", "sha", 10)
+
+        self.assertEqual(self.index.get("layer1"), {"CodeSha256": "sha", "Size": 10})
+
+    def test_must_evict_least_recently_used_layers(self):
+        now = time.time()
+        self.make_layer("oldest", 40, now - 30)
+        self.make_layer("old", 40, now - 20)
+        self.make_layer("new", 40, now - 10)
+
+        self.assertEqual(self.index.get_evictable(), ["oldest"])
+
+        self.index.touch("oldest")
+
+        self.assertEqual(self.index.get_evictable(), ["old"])
+        self.assertEqual(self.index.get_evictable(keep=["old"]), ["new"])
+
+    def test_must_not_evict_layers_within_size(self):
+        self.make_layer("layer1", 50)
+        self.make_layer("layer2", 50)
+
+        self.assertEqual(self.index.get_evictable(), [])
+
+    def test_must_list_orphans(self):
+        old = time.time() - 2 * 60 * 60
+        self.make_layer("installed", 10, old)
+        # Left behind by interrupted downloads of layer1
+        os.mkdir(os.path.join(self.layer_cache, "layer1"))
+        os.mkdir(os.path.join(self.layer_cache, ".layer1-abc_123"))
+        for name in ["layer1.zip", "layer1.lock"]:
+            open(os.path.join(self.layer_cache, name), "w").close()
+        # Not created by SAM CLI
+        os.mkdir(os.path.join(self.layer_cache, "unrelated"))
+        # Being downloaded
+        os.mkdir(os.path.join(self.layer_cache, ".installed-xyz"))
+
+        for name in os.listdir(self.layer_cache):
+            if name != ".installed-xyz":
+                os.utime(os.path.join(self.layer_cache, name), (old, old))
+
+        orphans = self.index.get_orphans()
+
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in orphans), [".layer1-abc_123", "layer1", "layer1.zip"]
+        )
+
+
+class TestLayerCacheIndex_max_size(TestCase):
+    def test_must_read_max_size_from_env(self):
+        with patch.dict(os.environ, {"SAM_CLI_LAYER_CACHE_MAX_SIZE_MB": "10"}):
+            self.assertEqual(LayerCacheIndex("layer_cache")._max_size, 10 * 1024 * 1024)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import stat
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from samcli.local.layers.merged_layers import merge_layers, MAX_MERGED_DIRS
+
+
+class TestMergeLayers(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.merged_layers_dir = os.path.join(self.dir, ".merged")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def make_layer(self, name, files, is_defined_within_template=False):
+        codeuri = os.path.join(self.dir, name)
+        for path, content in files.items():
+            path = os.path.join(codeuri, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as fp:
+                fp.write(content)
+
+        return Mock(codeuri=codeuri, is_defined_within_template=is_defined_within_template)
+
+    def read(self, path):
+        with open(path) as fp:
+            return fp.read()
+
+    def test_must_merge_layers_in_order(self):
+        first = self.make_layer("first", {"python/common.py": "first", "python/first.py": "first", "bin/tool": "tool"})
+        second = self.make_layer("second", {"python/common.py": "second", "python/second.py": "second"})
+        first.name = "first"
+        second.name = "second"
+
+        path = merge_layers([first, second], [None, None], self.merged_layers_dir)
+
+        self.assertEqual(os.path.dirname(path), self.merged_layers_dir)
+        # Mounted as /opt, which the function reads as another user
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o755)
+        self.assertEqual(self.read(os.path.join(path, "python", "common.py")), "second")
+        self.assertEqual(self.read(os.path.join(path, "python", "first.py")), "first")
+        self.assertEqual(self.read(os.path.join(path, "python", "second.py")), "second")
+        self.assertEqual(self.read(os.path.join(path, "bin", "tool")), "tool")
+        # Layers are left untouched
+        self.assertEqual(self.read(os.path.join(first.codeuri, "python", "common.py")), "first")
+        # Files are hard-linked instead of copied
+        merged_file = os.path.join(path, "python", "first.py")
+        self.assertTrue(os.path.samefile(merged_file, os.path.join(first.codeuri, "python", "first.py")))
+
+    def test_must_replace_file_with_directory_of_later_layer(self):
+        first = self.make_layer("first", {"lib": "file"})
+        second = self.make_layer("second", {"lib/module.py": "module"})
+        first.name = "first"
+        second.name = "second"
+
+        path = merge_layers([first, second], [None, None], self.merged_layers_dir)
+
+        self.assertEqual(self.read(os.path.join(path, "lib", "module.py")), "module")
+
+    def test_must_reuse_merged_layers_until_fingerprint_changes(self):
+        first = self.make_layer("first", {"first.py": "first"})
+        second = self.make_layer("second", {"second.py": "second"}, is_defined_within_template=True)
+        first.name = "first"
+        second.name = "second"
+
+        path = merge_layers([first, second], [None, "fp1"], self.merged_layers_dir)
+
+        with patch("samcli.local.layers.merged_layers._merge_tree") as merge_tree_patch:
+            self.assertEqual(merge_layers([first, second], [None, "fp1"], self.merged_layers_dir), path)
+            merge_tree_patch.assert_not_called()
+
+        self.assertNotEqual(merge_layers([first, second], [None, "fp2"], self.merged_layers_dir), path)
+
+    def test_must_merge_local_layers_without_fingerprint_every_time(self):
+        first = self.make_layer("first", {"first.py": "first"}, is_defined_within_template=True)
+        second = self.make_layer("second", {"second.py": "second"})
+        first.name = "first"
+        second.name = "second"
+
+        path = merge_layers([first, second], [None, None], self.merged_layers_dir)
+
+        self.assertNotEqual(merge_layers([first, second], [None, None], self.merged_layers_dir), path)
+
+    def test_must_delete_least_recently_used_merged_layers(self):
+        first = self.make_layer("first", {"first.py": "first"})
+        first.name = "first"
+
+        paths = []
+        for index in range(MAX_MERGED_DIRS + 2):
+            second = self.make_layer("second", {"second.py": "second"})
+            second.name = "second{}".format(index)
+            paths.append(merge_layers([first, second], [None, None], self.merged_layers_dir))
+            # Orders the merged directories, even on file systems with a coarse modification time
+            os.utime(paths[-1], (time.time() - 100 + index, time.time() - 100 + index))
+
+        self.assertEqual(sorted(os.listdir(self.merged_layers_dir)), sorted(os.path.basename(p) for p in paths[2:]))
+
+    @patch("samcli.local.layers.merged_layers.Container")
+    def test_must_keep_merged_layers_that_containers_mount(self, ContainerMock):
+        first = self.make_layer("first", {"first.py": "first"})
+        first.name = "first"
+
+        paths = []
+        for index in range(MAX_MERGED_DIRS + 2):
+            ContainerMock.is_mounted.side_effect = lambda path: paths and path == paths[0]
+            second = self.make_layer("second", {"second.py": "second"})
+            second.name = "second{}".format(index)
+            paths.append(merge_layers([first, second], [None, None], self.merged_layers_dir))
+            os.utime(paths[-1], (time.time() - 100 + index, time.time() - 100 + index))
+
+        # The least recently used merged layers are still mounted. They are kept, and only the others are deleted.
+        kept = [paths[0]] + paths[2:]
+        self.assertEqual(sorted(os.listdir(self.merged_layers_dir)), sorted(os.path.basename(p) for p in kept))
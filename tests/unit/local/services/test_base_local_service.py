@@ -3,7 +3,7 @@ from mock import Mock, patch
 
 from parameterized import parameterized, param
 
-from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
+from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser, LambdaOutputSplitter
 
 
 class TestLocalHostRunner(TestCase):
@@ -113,3 +113,97 @@ class TestLambdaOutputParser(TestCase):
     )
     def test_is_lambda_error_response(self, input, exected_result):
         self.assertEquals(LambdaOutputParser.is_lambda_error_response(input), exected_result)
+
+
+class TestLambdaOutputSplitter(TestCase):
+    @parameterized.expand(
+        [
+            param([b'{"a": "b"}'], b'{"a": "b"}', []),
+            param([b'{"a": "b"}\n\n'], b'{"a": "b"}', []),
+            param([b"log1\nlog2\n", b'{"a": "b"}\n'], b'{"a": "b"}', [b"log1\nlog2\n"]),
+            param([b"log", b"1\nresp", b"onse\n"], b"response", [b"log1\n"]),
+            param([b"log1\n", b"\n", b"response"], b"response", [b"log1\n\n"]),
+            param([b"log1\nresponse", b"\n", b"\n"], b"response", [b"log1\n"]),
+        ]
+    )
+    def test_must_split_response_from_logs(self, writes, response, logs):
+        log_stream = Mock()
+        splitter = LambdaOutputSplitter(log_stream=log_stream)
+
+        for data in writes:
+            splitter.write(data)
+
+        self.assertEqual(splitter.get_lambda_output(), (response.decode("utf-8"), False))
+        self.assertEqual(b"".join(call[0][0] for call in log_stream.write.call_args_list), b"".join(logs))
+
+    def test_must_forward_logs_as_they_arrive(self):
+        log_stream = Mock()
+        splitter = LambdaOutputSplitter(log_stream=log_stream)
+
+        splitter.write(b"log1\nlog2\n")
+        splitter.write(b"log3\n")
+
+        # The last line may be the response, until the next line arrives
+        self.assertEqual([call[0][0] for call in log_stream.write.call_args_list], [b"log1\n", b"log2\n"])
+
+    def test_must_drop_logs_without_log_stream(self):
+        splitter = LambdaOutputSplitter()
+
+        splitter.write(b"log1\nresponse")
+
+        self.assertEqual(splitter.get_lambda_output(), ("response", False))
+
+    def test_must_detect_error_response(self):
+        splitter = LambdaOutputSplitter()
+
+        splitter.write(b'{"errorMessage": "", "errorType": "", "stackTrace": []}')
+
+        self.assertEqual(splitter.get_lambda_output()[1], True)
+
+    def test_must_not_hold_lines_larger_than_limit(self):
+        log_stream = Mock()
+        splitter = LambdaOutputSplitter(log_stream=log_stream, max_response_size=5)
+
+        splitter.write(b"abc")
+        splitter.write(b"def")
+        splitter.write(b"ghi")
+
+        self.assertEqual(len(splitter._last_line), 0)
+        self.assertEqual(splitter.get_lambda_output(), ("", False))
+        self.assertEqual([call[0][0] for call in log_stream.write.call_args_list], [b"abcdef", b"ghi"])
+
+    def test_must_keep_response_after_large_log_line(self):
+        log_stream = Mock()
+        splitter = LambdaOutputSplitter(log_stream=log_stream, max_response_size=5)
+
+        splitter.write(b"very long log line\nok")
+
+        self.assertEqual(splitter.get_lambda_output(), ("ok", False))
+
+    def test_must_log_output_around_marked_response(self):
+        log_stream = Mock()
+        splitter = LambdaOutputSplitter(log_stream=log_stream)
+
+        splitter.write(b"log")
+        splitter.write_response(b"response")
+        splitter.write(b"more logs\n")
+
+        self.assertEqual([call[0][0] for call in log_stream.write.call_args_list], [b"log", b"more logs\n"])
+        self.assertEqual(splitter.get_lambda_output(), ("response", False))
+
+    @parameterized.expand([(True,), (None,)])
+    def test_must_detect_error_of_marked_response(self, is_error):
+        splitter = LambdaOutputSplitter()
+        error = b'{"errorMessage": "failed", "errorType": "", "stackTrace": []}'
+
+        splitter.write_response(error, is_error=is_error)
+
+        self.assertEqual(splitter.get_lambda_output(), (error.decode("utf-8"), True))
+
+    def test_must_report_error_of_marked_response(self):
+        splitter = LambdaOutputSplitter()
+
+        splitter.write_response(b"not json", is_error=True)
+
+        self.assertEqual(splitter.get_lambda_output(), ("not json", True))
+